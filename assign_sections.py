@@ -1,14 +1,31 @@
+import argparse
 import csv
 import config
+import instrumentation
+import solve_cache
+import solve_time_predictor
 from csv_input import readModNetIDToNameMapping, readSectionTimeInfo
 from assign_time_slots import assignModeratorsAndStudents
 from create_sections_from_time_slots import assignSectionsFromSectionTimes
+from incremental_assignment import assignModeratorsAndStudentsIncrementally, assignSectionsKeepingPrevious,\
+                                   getAssignmentChanges, readPreviousAssignment, writeAssignmentChangesToCsv
 
 def main():
+    if config.previous_assignment_csv_path is not None:
+        mainIncremental()
+        return
+
     # Assign moderators and students to their time slots
     csv_files = (config.mod_doodle_poll_csv_path, config.mod_max_sections_csv_path,
                  config.student_doodle_poll_csv_path, config.section_times_csv_path)
-    (mods_assigned_to_times, students_assigned_to_times) = assignModeratorsAndStudents(*csv_files)
+    if config.dry_run:
+        solve_time_predictor.dryRun(*csv_files)
+        return
+    if config.use_solve_cache:
+        (mods_assigned_to_times, students_assigned_to_times) = \
+            solve_cache.assignModeratorsAndStudentsWithCache(*csv_files)
+    else:
+        (mods_assigned_to_times, students_assigned_to_times) = assignModeratorsAndStudents(*csv_files)
 
     # Assign moderators and students to sections within their assigned time slots
     assert len(mods_assigned_to_times) == len(students_assigned_to_times)
@@ -18,6 +35,34 @@ def main():
     mod_net_id_to_name_dict = readModNetIDToNameMapping(config.mod_net_id_to_name_csv_path, config.mod_net_id_error_check)
     write_sections_to_csv(section_assignments, mod_net_id_to_name_dict)
 
+def mainIncremental():
+    """
+        Updates the section assignment at config.previous_assignment_csv_path for the current Doodle polls while
+         moving as few people as possible, see previous_assignment_csv_path in config.py
+    """
+    mod_net_id_to_name_dict = readModNetIDToNameMapping(config.mod_net_id_to_name_csv_path, config.mod_net_id_error_check)
+    (section_times, _) = readSectionTimeInfo(config.section_times_csv_path)
+    previous_assignment = readPreviousAssignment(config.previous_assignment_csv_path, section_times,
+                                                 mod_net_id_to_name_dict)
+
+    # Re-assign only the people and times affected by the changed Doodle polls
+    csv_files = (config.mod_doodle_poll_csv_path, config.mod_max_sections_csv_path,
+                 config.student_doodle_poll_csv_path, config.section_times_csv_path)
+    (mods_assigned_to_times, students_assigned_to_times) = \
+        assignModeratorsAndStudentsIncrementally(previous_assignment, *csv_files,
+                                                 config.previous_mod_doodle_poll_csv_path,
+                                                 config.previous_student_doodle_poll_csv_path,
+                                                 config.previous_mod_max_sections_csv_path)
+
+    # Keep everyone who did not move in the same section and room as before
+    assert len(mods_assigned_to_times) == len(students_assigned_to_times)
+    section_assignments = assignSectionsKeepingPrevious(mods_assigned_to_times, students_assigned_to_times,
+                                                        previous_assignment)
+
+    write_sections_to_csv(section_assignments, mod_net_id_to_name_dict)
+    changes = getAssignmentChanges(section_assignments, previous_assignment, section_times)
+    writeAssignmentChangesToCsv(changes, config.incremental_changes_csv_path)
+
 def write_sections_to_csv(section_assignments, mod_net_id_to_name_dict):
     """
         Writes the already assigned sections to a CSV for use in the email script
@@ -45,5 +90,107 @@ def write_sections_to_csv(section_assignments, mod_net_id_to_name_dict):
 
     print('Section assignment CSV written to:', config.output_csv_path)
 
+def parseCommandLineArguments(argv=None):
+    """
+        Args:
+            argv: List of String for the command line arguments, or None to use sys.argv
+
+        Returns:
+            argparse.Namespace where each attribute is a config option to override, or None if it was not given
+    """
+    parser = argparse.ArgumentParser(description='Assign moderators and students to sections. Every option '
+                                                 'overrides the config.py value of the same name for this run')
+    parser.add_argument('--num-search-workers', type=int, dest='num_search_workers',
+                        help='Number of parallel CP-SAT search workers, 0 uses every available core')
+    parser.add_argument('--max-time-in-seconds', type=float, dest='max_time_in_seconds',
+                        help='Wall time limit for the CP-SAT solver')
+    parser.add_argument('--relative-gap-limit', type=float, dest='relative_gap_limit',
+                        help='Stop once the relative optimality gap is below this value')
+    parser.add_argument('--absolute-gap-limit', type=float, dest='absolute_gap_limit',
+                        help='Stop once the absolute optimality gap is below this value')
+    parser.add_argument('--random-seed', type=int, dest='random_seed',
+                        help='Random seed for the CP-SAT search')
+    parser.add_argument('--deterministic-interleave-search', action='store_const', const=True,
+                        dest='deterministic_interleave_search',
+                        help='Interleave parallel search workers deterministically for reproducible runs')
+    parser.add_argument('--early-stop-no-improvement-seconds', type=float, dest='early_stop_no_improvement_seconds',
+                        help='Stop once no better solution has been found for this many seconds')
+    parser.add_argument('--early-stop-target-objective', type=float, dest='early_stop_target_objective',
+                        help='Stop once a solution with at most this objective value is found')
+    parser.add_argument('--solver-timeline-csv-path', dest='solver_timeline_csv_path',
+                        help='Write the time, objective, best bound and gap of every solution found to this CSV')
+    parser.add_argument('--checkpoint-incumbents', action='store_const', const=True, dest='checkpoint_incumbents',
+                        help='Write the best assignment found so far to a checkpoint file while solving')
+    parser.add_argument('--checkpoint-path', dest='checkpoint_path',
+                        help='Where to write the checkpoint, next to the output CSV by default')
+    parser.add_argument('--checkpoint-interval-seconds', type=float, dest='checkpoint_interval_seconds',
+                        help='Fewest seconds between two checkpoint writes')
+    parser.add_argument('--resume', action='store_const', const=True, dest='resume_from_checkpoint',
+                        help='Start from the assignment in the checkpoint of an earlier run and keep checkpointing')
+    parser.add_argument('--use-slack-relaxation', action='store_const', const=True, dest='use_slack_relaxation',
+                        help='Always find a partial assignment and list the people and times which needed relaxing')
+    parser.add_argument('--use-progressive-activation', action='store_const', const=True,
+                        dest='use_progressive_activation',
+                        help='Solve with preferred times first and add not preferred times only where needed')
+    parser.add_argument('--progressive-activation-prove-optimal', action='store_const', const=True,
+                        dest='progressive_activation_prove_optimal',
+                        help='Finish progressive activation with every not preferred time to prove optimality')
+    parser.add_argument('--predict-solve-time', action='store_const', const=True, dest='predict_solve_time',
+                        help='Predict the solve time from the benchmark history before solving')
+    parser.add_argument('--predicted-solve-seconds-limit', type=float, dest='predicted_solve_seconds_limit',
+                        help='Warn when the predicted solve time is over this many seconds')
+    parser.add_argument('--refuse-slow-predicted-solves', action='store_const', const=True,
+                        dest='refuse_slow_predicted_solves',
+                        help='Fail instead of solving when the predicted solve time is over the limit')
+    parser.add_argument('--dry-run', action='store_const', const=True, dest='dry_run',
+                        help='Only build the model and print its features and predicted solve time')
+    parser.add_argument('--allow-non-optimal', action='store_const', const=False,
+                        dest='only_allow_optimal_solutions',
+                        help='Accept the best solution found when the solver stops before proving optimality')
+    parser.add_argument('--previous-assignment-csv-path', dest='previous_assignment_csv_path',
+                        help='Update this previous section assignment CSV for the current Doodle polls, moving as '
+                             'few people as possible')
+    parser.add_argument('--previous-mod-doodle-poll-csv-path', dest='previous_mod_doodle_poll_csv_path',
+                        help='The moderator Doodle poll the previous assignment was made from')
+    parser.add_argument('--previous-student-doodle-poll-csv-path', dest='previous_student_doodle_poll_csv_path',
+                        help='The student Doodle poll the previous assignment was made from')
+    parser.add_argument('--previous-mod-max-sections-csv-path', dest='previous_mod_max_sections_csv_path',
+                        help='The moderator max sections CSV the previous assignment was made from')
+    parser.add_argument('--incremental-neighbourhood-radius', type=int, dest='incremental_neighbourhood_radius',
+                        help='Number of adjacent times around changed times that may also be re-assigned')
+    parser.add_argument('--incremental-changes-csv-path', dest='incremental_changes_csv_path',
+                        help='Where to write everyone whose assignment changed from the previous assignment')
+    parser.add_argument('--use-large-neighbourhood-search', action='store_const', const=True,
+                        dest='use_large_neighbourhood_search',
+                        help='Improve a first solution by re-solving small neighbourhoods until the time budget ends')
+    parser.add_argument('--lns-time-budget-seconds', type=float, dest='lns_time_budget_seconds',
+                        help='Wall time budget for large neighbourhood search')
+    parser.add_argument('--use-solve-cache', action='store_const', const=True, dest='use_solve_cache',
+                        help='Reuse the assignment or CP model of an earlier run with the same inputs, see '
+                             'solve_cache.py')
+    parser.add_argument('--enable-instrumentation', action='store_const', const=True, dest='enable_instrumentation',
+                        help='Time every phase, record counts and solver statistics, and print a summary at the end')
+    parser.add_argument('--instrumentation-output-path', dest='instrumentation_output_path',
+                        help='Write the recorded run to this .json file, or one event per line to this .jsonl file')
+    parser.add_argument('--instrumentation-trace-memory', action='store_const', const=True,
+                        dest='instrumentation_trace_memory', help='Also record the peak memory of every phase')
+    parser.add_argument('--quiet', action='store_const', const=True, dest='quiet_mode',
+                        help='Do not print every solution found or the counts printed while building the model')
+    return parser.parse_args(argv)
+
+def applyConfigOverrides(config_overrides):
+    """
+        Sets every config option that was given a value on the command line
+
+        Args:
+            config_overrides: argparse.Namespace from parseCommandLineArguments
+    """
+    for (option_name, value) in vars(config_overrides).items():
+        if value is not None:
+            setattr(config, option_name, value)
+
 if __name__ == '__main__':
+    applyConfigOverrides(parseCommandLineArguments())
+    instrumentation.startRun('assign_sections')
     main()
+    instrumentation.finishRun()
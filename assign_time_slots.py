@@ -1,12 +1,26 @@
+import component_decomposition
 import config
+import incumbent_checkpoint
+import instrumentation
+import large_neighbourhood_search
+import progressive_activation
 import random
+import slack_relaxation
+import solve_time_predictor
+import solver_progress
 import time
+import two_phase_engine
 from csv_input import readDoodlePreferences, readModMaxSectionPreferences, readSectionTimeInfo
+from feasibility_precheck import runFeasibilityPrecheck, verifyNoFeasibilityProblems
 from constraints import addMaxSectionsPerModConstraint, addMaxSectionsPerSectionTimeConstraint,\
-                        addSectionsPerStudentConstraint, addStudentsPerSectionTimeConstraint
+                        addSectionsPerStudentConstraint, addStudentsPerSectionTimeConstraint, numPeopleInRow
 from greedy_preselect import greedyPreselectSections
-from objective_functions import addFunctionToMinimize
+from objective_functions import addFunctionToMinimize, getObjectiveStages
 from ortools.sat.python import cp_model
+from person_time_index import PersonTimeVariables, getPersonTimeIndex
+from person_types import getModAndStudentTypes
+from presolve import applyPresolveToVariables, presolveInputData
+from solution_extraction import extractSolution, getSolutionValues
 
 DOODLE_PREFERRED_TIME = 'OK'
 DOODLE_NOT_PREFERRED_TIME = '(OK)'
@@ -14,9 +28,11 @@ DOODLE_IMPOSSIBLE_TIME = ''
 
 class PersonTimeVariableWrapper:
     """ Wrapper class around a CP variable that represents an assignment of a mod/student to a time """
+    __slots__ = ('net_id', 'time_index', 'is_preferred_time', 'is_impossible_time', 'day_of_week', 'variable',
+                 'person_index', 'type_net_ids', 'allows_contiguous_sections')
 
     def __init__(self, net_id, time_index, is_preferred_time, is_impossible_time, day_of_week,
-                 constraint_programming_var):
+                 constraint_programming_var, person_index=0, type_net_ids=None):
         """
             Args:
                 net_id: String for the netID of the student or moderator this CP variable represents
@@ -25,6 +41,10 @@ class PersonTimeVariableWrapper:
                 is_impossible_time: True if this person marked this time as impossible
                 day_of_week: String for the weekday associated with this variable's time or None
                 constraint_programming_var: The OR-Tools IntVar object being wrapped with extra data
+                person_index: Integer for the index of this person in their Doodle poll
+                type_net_ids: List of String for the netIDs of every interchangeable person this CP variable
+                               represents when config.aggregate_identical_people is enabled, in which case the
+                               CP variable counts how many of them are assigned to the time. None for one person
         """
         self.net_id = net_id
         self.time_index = time_index
@@ -32,6 +52,10 @@ class PersonTimeVariableWrapper:
         self.is_impossible_time = is_impossible_time
         self.day_of_week = day_of_week
         self.variable = constraint_programming_var
+        self.person_index = person_index
+        self.type_net_ids = [net_id] if type_net_ids is None else type_net_ids
+        # False when presolve finds the moderator teaches one section or the time can never have a section
+        self.allows_contiguous_sections = True
 
     def isTimeAssignedToPerson(self, solver):
         """
@@ -43,8 +67,45 @@ class PersonTimeVariableWrapper:
         """
         return (solver.Value(self.variable) != 0)
 
+    def numPeopleAssignedToTime(self, solver):
+        """
+            The output of this function should only be used after the constraint programming solver
+                has been run
+
+            Returns:
+                Integer for how many of the people in type_net_ids were assigned this time by the CP solver
+        """
+        return solver.Value(self.variable)
+
+class SolveOutcome:
+    """ What solving the input files gave with the way of solving chosen in config, see solveInputFiles """
+
+    def __init__(self, status, objective=None, extracted_solution=None, solve_results=None, precheck_problems=(),
+                 assignments=None):
+        """
+            Args:
+                status: The CP solver status, INFEASIBLE when the feasibility precheck found a problem
+                objective: Float for the objective value of the solution, or None if it is not known
+                extracted_solution: solution_extraction.ExtractedSolution of the solution, or None if there is no
+                                     solution or it was reported while solving
+                solve_results: List of (status, stop reason) of every solve still to be checked with
+                                verifyEverySolve, [(status, None)] if None
+                precheck_problems: List of String for every problem found by the feasibility precheck
+                assignments: Tuple of (mods_assigned_to_times, students_assigned_to_times) when there is a solution
+                              but no extracted_solution, otherwise None
+        """
+        self.status = status
+        self.objective = objective
+        self.extracted_solution = extracted_solution
+        self.solve_results = [(status, None)] if solve_results is None else solve_results
+        self.precheck_problems = precheck_problems
+        if (assignments is None) and (extracted_solution is not None):
+            assignments = (extracted_solution.mods_assigned_to_times, extracted_solution.students_assigned_to_times)
+        (self.mods_assigned_to_times, self.students_assigned_to_times) = \
+            (None, None) if assignments is None else assignments
+
 def assignModeratorsAndStudents(mod_doodle_poll_csv_path, mod_max_section_csv_path, student_doodle_poll_csv_path,
-                                section_times_csv_path=None):
+                                section_times_csv_path=None, model_cache=None):
     """
         Args:
             mod_doodle_poll_csv_path: The file path to the Doodle poll for the moderators in .csv format
@@ -52,6 +113,7 @@ def assignModeratorsAndStudents(mod_doodle_poll_csv_path, mod_max_section_csv_pa
             student_doodle_poll_csv_path: The file path to the Doodle poll for the students in .csv format
             section_times_csv_path: The file path to the .csv file containing info on section times and rooms
                                     available for each time. If None, 3 rooms per time is assumed
+            model_cache: solve_cache.CachedModel to read the CP model from or save it to, or None to always build it
 
         Returns:
             mods_assigned_to_times: List of List of Strings, each entry is all net IDs of the moderators assigned
@@ -59,32 +121,146 @@ def assignModeratorsAndStudents(mod_doodle_poll_csv_path, mod_max_section_csv_pa
             students_assigned_to_times: List of List of Strings, each entry is all net IDs of the moderators assigned
                                         to that time index
     """
-    # Read in all of the input files and get the constraint programming model
-    (model, mod_time_variables, student_time_variables,
-     max_sections_per_mod, max_sections_per_time) = getModelFromInputFiles(**locals())
+    solve_outcome = solveInputFiles((mod_doodle_poll_csv_path, mod_max_section_csv_path, student_doodle_poll_csv_path,
+                                     section_times_csv_path), model_cache)
+    verifySolveOutcome(solve_outcome)
+    return solve_outcome.mods_assigned_to_times, solve_outcome.students_assigned_to_times
+
+def verifySolveOutcome(solve_outcome):
+    """ Fails if the solve should not be accepted, see verifyEverySolve, otherwise prints the solution's report """
+    verifyNoFeasibilityProblems(solve_outcome.precheck_problems)
+    verifyEverySolve(solve_outcome.solve_results)
+    if solve_outcome.extracted_solution is not None:
+        solve_outcome.extracted_solution.printReport()
+
+def solveInputFiles(csv_paths, model_cache=None):
+    """
+        Builds and solves the model for the input files with the way of solving chosen in config, without verifying
+         the solution, so that every caller solves the same way and decides for itself what to accept
 
-    # Attempt to greedy preselect some sections if specified in config and then add CP constraints
-    num_greedy_sections = greedyPreselectSections(model, mod_time_variables, student_time_variables,
-                                                  max_sections_per_time, max_sections_per_mod)
-    print(f"Greedy selected {num_greedy_sections} sections")
-    addMaxSectionsPerModConstraint(model, mod_time_variables, max_sections_per_mod)
-    addMaxSectionsPerSectionTimeConstraint(model, mod_time_variables, max_sections_per_time)
-    addSectionsPerStudentConstraint(model, student_time_variables)
-    addStudentsPerSectionTimeConstraint(model, mod_time_variables, student_time_variables, max_sections_per_time)
-    addFunctionToMinimize(model, mod_time_variables, student_time_variables, sum(max_sections_per_mod))
+        Args:
+            csv_paths: Tuple of the input file paths, see assignModeratorsAndStudents
+            model_cache: See assignModeratorsAndStudents
 
-    # Kick off the solver, and verify an optimal solution exists
-    solver = cp_model.CpSolver()
-    solution_counter = SolutionCounter()
-    status = solver.SolveWithSolutionCallback(model, solution_counter)
+        Returns:
+            SolveOutcome of the solve
+    """
+    # Relax every constraint with penalized slack and allow impossible times only for people who are stuck
+    if config.use_slack_relaxation:
+        if config.use_progressive_activation:
+            print('WARNING: config.use_progressive_activation is ignored with config.use_slack_relaxation')
+        return slack_relaxation.solveInputFilesWithSlack(*csv_paths)
+
+    # Solve on preferred times first and add not preferred times only where they are needed if specified in config
+    if config.use_progressive_activation:
+        return progressive_activation.solveInputFilesProgressively(*csv_paths)
+
+    # Read in all of the input files and get the constraint programming model, unless it is already cached
+    cached_model = None if model_cache is None else model_cache.load()
+    if cached_model is not None:
+        (model, mod_time_variables, student_time_variables, max_sections_per_mod, max_sections_per_time) = cached_model
+    else:
+        (model, mod_time_variables, student_time_variables,
+         max_sections_per_mod, max_sections_per_time) = getModelFromInputFiles(*csv_paths)
+
+    # Explain obviously infeasible inputs right away instead of waiting for the solver to prove it
+    if config.check_feasibility_before_solving:
+        precheck_problems = runFeasibilityPrecheck(mod_time_variables, student_time_variables, max_sections_per_mod,
+                                                   max_sections_per_time)
+        if len(precheck_problems) > 0:
+            return SolveOutcome(cp_model.INFEASIBLE, precheck_problems=precheck_problems)
+
+    if cached_model is None:
+        # Place students with a minimum cost flow after choosing moderator times if specified in config
+        if config.use_two_phase_engine:
+            (status, objective, assignment_values, _) = two_phase_engine.solveTwoPhase(
+                model, mod_time_variables, student_time_variables, max_sections_per_mod, max_sections_per_time)
+            return getSolveOutcome(status, objective, assignment_values, mod_time_variables, student_time_variables)
+
+        # Solve groups of people who share no section times separately if specified in config
+        if config.decompose_into_components:
+            components = component_decomposition.findConnectedComponents(mod_time_variables, student_time_variables)
+            print('Num connected components:', len(components))
+            if len(components) > 1 and config.num_sections_to_greedy_preselect > 0:
+                print('WARNING: config.decompose_into_components is ignored when greedy preselecting sections')
+            elif len(components) > 1:
+                results = component_decomposition.solveComponents(components, mod_time_variables,
+                                                                  student_time_variables, max_sections_per_mod,
+                                                                  max_sections_per_time)
+                (status, objective, mods_assigned_to_times, students_assigned_to_times) = \
+                    component_decomposition.mergeComponentResults(results, len(max_sections_per_time))
+                print(cp_model.CpSolver().StatusName(status))
+                if objective is not None:
+                    print("Objective value:", round(objective, 3))
+                return SolveOutcome(status, objective, assignments=(None if mods_assigned_to_times is None else
+                                                                    (mods_assigned_to_times,
+                                                                     students_assigned_to_times)))
+
+        # Attempt to greedy preselect some sections if specified in config and then add CP constraints
+        num_greedy_sections = greedyPreselectSections(model, mod_time_variables, student_time_variables,
+                                                      max_sections_per_time, max_sections_per_mod)
+        instrumentation.setCounter('greedy sections', num_greedy_sections, 'Greedy selected sections:')
+        addAllConstraints(model, mod_time_variables, student_time_variables, max_sections_per_mod,
+                          max_sections_per_time)
+        if model_cache is not None:
+            model_cache.save(model, mod_time_variables, student_time_variables, max_sections_per_mod,
+                             max_sections_per_time)
+
+    # Warn about or refuse a solve which is predicted to take too long if specified in config
+    if config.predict_solve_time:
+        solve_time_predictor.checkPredictedSolveTime(mod_time_variables, student_time_variables, max_sections_per_mod,
+                                                     max_sections_per_time)
+
+    # Improve a first solution one neighbourhood at a time under a time budget if specified in config
+    if config.use_large_neighbourhood_search:
+        (status, objective, _, assignment_values, _) = large_neighbourhood_search.solveWithLargeNeighbourhoodSearch(
+            model, mod_time_variables, student_time_variables, max_sections_per_mod)
+        return getSolveOutcome(status, objective, assignment_values, mod_time_variables, student_time_variables)
+
+    # Kick off the solver
+    checkpointer = incumbent_checkpoint.getCheckpointer(csv_paths, mod_time_variables, student_time_variables)
+    (status, solver, solution_counter, _) = solveModel(model, mod_time_variables, student_time_variables,
+                                                       max_sections_per_mod, checkpointer=checkpointer)
 
-    # Print and verify properties of the found solution
     print(solver.StatusName(status))
-    print("Num solutions considered:", solution_counter.solution_count)
+    solver_progress.printProgressSummary(solution_counter, solver)
+    instrumentation.setCounter('solutions found', solution_counter.solution_count, 'Num solutions considered:')
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return SolveOutcome(status, solve_results=solution_counter.solve_results)
     print("Objective value:", round(solver.ObjectiveValue(), 3))
+    return SolveOutcome(status, solver.ObjectiveValue(),
+                        extractSolution(solver, mod_time_variables, student_time_variables),
+                        solution_counter.solve_results)
+
+def getSolveOutcome(status, objective, assignment_values, mod_time_variables, student_time_variables):
+    """
+        Prints the status and objective value of a solve which gives its solution as SolutionValues
+
+        Returns:
+            SolveOutcome of the solve, with the solution extracted from assignment_values when there is one
+    """
+    print(cp_model.CpSolver().StatusName(status))
+    if objective is not None:
+        print("Objective value:", round(objective, 3))
+    if assignment_values is None:
+        return SolveOutcome(status, objective)
+    return SolveOutcome(status, objective, extractSolution(assignment_values, mod_time_variables,
+                                                           student_time_variables))
+
+def verifySolutionStatus(status, stop_reason=None):
+    """
+        Fails if the solver did not find a solution, or did not prove the solution optimal when
+         config.only_allow_optimal_solutions is enabled. A solution from a solve stopped by one of the early stopping
+         rules in config is accepted, since those rules are the way to ask for a solution which is not optimal
 
+        Args:
+            status: The CP solver status
+            stop_reason: String for why the solve stopped, see solver_progress.getStopReason, or None if not known
+    """
     assert (status != cp_model.INFEASIBLE)
-    if config.only_allow_optimal_solutions:
+    if (status == cp_model.FEASIBLE) and (stop_reason in solver_progress.EARLY_STOP_REASONS):
+        print(f'Solution is not proven optimal, the solver was stopped early: {stop_reason}')
+    elif config.only_allow_optimal_solutions:
         if (status != cp_model.OPTIMAL):
             print("Run with config.only_allow_optimal_solutions=False to allow terminating early")
             assert (status == cp_model.OPTIMAL)
@@ -92,7 +268,16 @@ def assignModeratorsAndStudents(mod_doodle_poll_csv_path, mod_max_section_csv_pa
         for _ in range(10):
             print("WARNING: CPSolver terminated early, solution is not optimal")
 
-    return extractModAndStudentAssignments(solver, mod_time_variables, student_time_variables)
+def verifyEverySolve(solve_results):
+    """
+        verifySolutionStatus for every solve, so that a stage of config.use_lexicographic_objective which stopped
+         early is not accepted because the last stage was optimal
+
+        Args:
+            solve_results: List of (status, stop reason) of every solve, like SolutionCounter.solve_results
+    """
+    for (solve_status, stop_reason) in solve_results:
+        verifySolutionStatus(solve_status, stop_reason)
 
 def getModelFromInputFiles(mod_doodle_poll_csv_path, mod_max_section_csv_path, student_doodle_poll_csv_path,
                            section_times_csv_path):
@@ -116,6 +301,28 @@ def getModelFromInputFiles(mod_doodle_poll_csv_path, mod_max_section_csv_path, s
             max_sections_per_time: List of Integer where each index represents the number of rooms
                                     available at that time index
             max_sections_per_mod: List of Integer, each entry is the max sections for that mod_index
+
+        When config.aggregate_identical_people is enabled, each mod_index/student_index is instead the index of
+         a type of interchangeable people, see person_types.py
+    """
+    return getModelFromInputData(*readInputFiles(mod_doodle_poll_csv_path, mod_max_section_csv_path,
+                                                 student_doodle_poll_csv_path, section_times_csv_path))
+
+@instrumentation.timed('read input files')
+def readInputFiles(mod_doodle_poll_csv_path, mod_max_section_csv_path, student_doodle_poll_csv_path,
+                   section_times_csv_path):
+    """
+        Reads in the .csv files, see getModelFromInputFiles for the arguments
+
+        Returns:
+            mod_net_ids: List of Strings for each moderator's net ID
+            mod_time_preferences: List where each entry is all the time preferences for one moderator
+            max_sections_per_mod: List of Integer, each entry is the max sections for that mod_index
+            student_net_ids: List of Strings for each student's net ID
+            student_time_preferences: List where each entry is all the time preferences for one student
+            section_times: List of String for the name of each section time, or None without a section times file
+            max_sections_per_time: List of Integer where each index represents the number of rooms
+                                    available at that time index
     """
     # Read in all the student and mod time preferences from doodle poll info
     (mod_net_ids, mod_time_preferences) = readDoodlePreferences(mod_doodle_poll_csv_path)
@@ -123,6 +330,12 @@ def getModelFromInputFiles(mod_doodle_poll_csv_path, mod_max_section_csv_path, s
     (student_net_ids, student_time_preferences) = readDoodlePreferences(student_doodle_poll_csv_path)
     assert len(mod_time_preferences[0]) == len(student_time_preferences[0])
 
+    # Doctor the data by making the not preferred times of the students who answered first impossible
+    for time_preferences in student_time_preferences[:config.num_students_without_not_preferred_times]:
+        for (time_index, preference_for_time) in enumerate(time_preferences):
+            if preference_for_time == DOODLE_NOT_PREFERRED_TIME:
+                time_preferences[time_index] = DOODLE_IMPOSSIBLE_TIME
+
     # Read in the section times to know what rooms can be used when
     num_section_times = len(mod_time_preferences[0])
     section_times = None
@@ -132,39 +345,298 @@ def getModelFromInputFiles(mod_doodle_poll_csv_path, mod_max_section_csv_path, s
         max_sections_per_time = [sum(room_at_time.max_sections for room_at_time in rooms_in_each_time[time_index])
                                  for time_index in range(num_section_times)]
 
+    return (mod_net_ids, mod_time_preferences, max_sections_per_mod, student_net_ids, student_time_preferences,
+            section_times, max_sections_per_time)
+
+def getModelFromInputData(mod_net_ids, mod_time_preferences, max_sections_per_mod, student_net_ids,
+                          student_time_preferences, section_times, max_sections_per_time,
+                          allowed_impossible_net_ids=None, not_preferred_activation=None):
+    """
+        Creates all PersonTimeVariable objects needed in the CP solver from the data of readInputFiles
+
+        Args:
+            The return values of readInputFiles, followed by
+            allowed_impossible_net_ids: See setupConstraintProgrammingVariables
+            not_preferred_activation: See setupConstraintProgrammingVariables
+
+        Returns:
+            See getModelFromInputFiles
+    """
+    # Fix variables and tighten bounds that are obvious from the input if specified in config. This is skipped for
+    #  the relaxed models, where a student with one possible time may still be left without a section
+    presolved_input = None
+    is_relaxed_model = (allowed_impossible_net_ids is not None) or (not_preferred_activation is not None)
+    if config.presolve_input_data and not (config.allow_impossible_times or is_relaxed_model):
+        presolved_input = presolveInputData(mod_time_preferences, max_sections_per_mod, student_time_preferences,
+                                            max_sections_per_time)
+        max_sections_per_time = presolved_input.max_sections_per_time
+
     # Set up the constraint programming model for each student/moderator at the times that work for them
+    mod_types = None
+    student_types = None
+    if config.aggregate_identical_people:
+        (mod_types, student_types) = getModAndStudentTypes(mod_time_preferences, max_sections_per_mod,
+                                                           student_time_preferences)
+        max_sections_per_mod = [max_sections_per_mod[mod_type[0]] for mod_type in mod_types]
+        instrumentation.setCounter('mod types', len(mod_types), 'Num mod types:')
+        instrumentation.setCounter('student types', len(student_types), 'Num student types:')
+
     model = cp_model.CpModel()
     mod_time_variables = setupConstraintProgrammingVariables(model, mod_net_ids, mod_time_preferences,
-                                                             section_times, is_mod_data=True)
+                                                             section_times, is_mod_data=True, person_types=mod_types,
+                                                             allowed_impossible_net_ids=allowed_impossible_net_ids,
+                                                             not_preferred_activation=not_preferred_activation)
     student_time_variables = setupConstraintProgrammingVariables(model, student_net_ids, student_time_preferences,
-                                                                 section_times, is_mod_data=False)
+                                                                 section_times, is_mod_data=False,
+                                                                 person_types=student_types,
+                                                                 allowed_impossible_net_ids=allowed_impossible_net_ids,
+                                                                 not_preferred_activation=not_preferred_activation)
+    if presolved_input is not None:
+        applyPresolveToVariables(model, presolved_input, mod_time_variables, student_time_variables)
 
     printProblemInfo(mod_net_ids, student_net_ids, mod_time_preferences, student_time_variables, mod_time_variables)
     return (model, mod_time_variables, student_time_variables, max_sections_per_mod, max_sections_per_time)
 
+def createSolver():
+    """
+        Returns:
+            A cp_model.CpSolver object with its parameters set from the solver options in the config file
+    """
+    solver = cp_model.CpSolver()
+    solver.parameters.num_search_workers = config.num_search_workers
+    solver.parameters.random_seed = config.random_seed
+    solver.parameters.relative_gap_limit = config.relative_gap_limit
+    solver.parameters.absolute_gap_limit = config.absolute_gap_limit
+    if config.max_time_in_seconds is not None:
+        solver.parameters.max_time_in_seconds = config.max_time_in_seconds
+    if config.deterministic_interleave_search:
+        solver.parameters.interleave_search = True
+    return solver
+
+def solveModel(model, mod_time_variables, student_time_variables, max_sections_per_mod, moved_person_expressions=(),
+               num_people=None, checkpointer=None):
+    """
+        Adds the objective function to a model which already has all constraints and solves it, either with the
+         single weighted objective function or one part of the objective at a time if
+         config.use_lexicographic_objective is enabled
+
+        Args:
+            model: The CpModel object that represents the constraints of the problem
+            mod_time_variables: 2D List of PersonTimeVariableWrapper, if [mod_index][time_index]
+                                    is None then that time is impossible for that mod
+            student_time_variables: 2D List of PersonTimeVariableWrapper,
+                                        if [student_index][time_index] is None then
+                                        that time is impossible for that student
+            max_sections_per_mod: List of Integer, each entry is the max sections for that mod_index
+            moved_person_expressions: List of CP linear expressions which are each 1 when a person is moved away
+                                       from a previously assigned time, see addFunctionToMinimize
+            num_people: Tuple of (number of moderators, number of students) in the whole problem, or None if the
+                         variables are the whole problem, see getObjectiveTerms
+            checkpointer: incumbent_checkpoint.IncumbentCheckpointer to write every improving solution of the
+                           weighted objective function to, resuming from its checkpoint first if
+                           config.resume_from_checkpoint is enabled, or None
+
+        Returns:
+            status: The CP solver status, only OPTIMAL for the lexicographic objective if every stage was optimal
+            solver: The cp_model.CpSolver object holding the final solution
+            solution_counter: The SolutionCounter used for every solve
+            objective_stages: List of ObjectiveStage for each part of the objective function, with the value
+                               reached for each part filled in when a solution was found
+    """
+    if config.use_lexicographic_objective:
+        if checkpointer is not None:
+            print('WARNING: checkpoints are not written or resumed from with config.use_lexicographic_objective')
+        solution_counter = SolutionCounter()
+        objective_stages = getObjectiveStages(model, mod_time_variables, student_time_variables,
+                                              moved_person_expressions, num_people)
+        (status, solver) = solveLexicographically(model, objective_stages, solution_counter)
+    else:
+        objective_stages = addFunctionToMinimize(model, mod_time_variables, student_time_variables,
+                                                 getMaxTotalSections(mod_time_variables, max_sections_per_mod),
+                                                 moved_person_expressions, num_people)
+        if (checkpointer is not None) and config.resume_from_checkpoint:
+            incumbent_checkpoint.resumeFromCheckpoint(model, checkpointer, mod_time_variables, student_time_variables)
+        solution_counter = SolutionCounter(checkpointer=checkpointer)
+        solver = createSolver()
+        try:
+            status = solveWithProgress(solver, model, solution_counter,
+                                       target_objective=config.early_stop_target_objective)
+        finally:
+            if checkpointer is not None:
+                checkpointer.close()
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            for objective_stage in objective_stages:
+                objective_stage.value = solver.Value(objective_stage.expression)
+
+    return status, solver, solution_counter, objective_stages
+
+def solveWithProgress(solver, model, solution_counter, name='solve', target_objective=None,
+                      no_improvement_seconds=None):
+    """
+        Solves the model with the early stopping rules in config, recording every solution found in the timeline of
+         the solution counter and writing it to config.solver_timeline_csv_path
+
+        Args:
+            solver: cp_model.CpSolver with its parameters already set
+            model: The CpModel to solve
+            solution_counter: SolutionCounter to record the solve with, it may be used for several solves
+            name: String naming the solve in the timeline
+            target_objective: Number to stop at once the minimized objective is at most this value, or None. This is
+                               only for the weighted objective function, not the stages of the lexicographic one
+            no_improvement_seconds: Number of seconds without a better solution to stop after, or None to use
+                                     config.early_stop_no_improvement_seconds
+
+        Returns:
+            The CP solver status, the reason the solve stopped is left in solution_counter.stop_reason
+    """
+    solution_counter.startSolve(name, target_objective)
+    with solver_progress.watchForNoImprovement(solver, solution_counter, no_improvement_seconds):
+        status = instrumentation.solve(solver, model, solution_counter, name)
+    solution_counter.stop_reason = solver_progress.getStopReason(status, solver, solution_counter.early_stop_reason)
+    solution_counter.solve_results.append((status, solution_counter.stop_reason))
+    instrumentation.setCounter('stop reason', solution_counter.stop_reason)
+    if config.solver_timeline_csv_path is not None:
+        solver_progress.writeTimelineCsv(solution_counter.timeline, config.solver_timeline_csv_path)
+    return status
+
+def solveLexicographically(model, objective_stages, solution_callback):
+    """
+        Optimizes each part of the objective function one at a time in priority order. After each stage is solved,
+         its value is fixed with a constraint so that later stages can not make it worse, and the stage's solution
+         is given to the solver as a hint for the next stage
+
+        The solve time and value of each stage is stored in the ObjectiveStage objects and printed
+
+        Args:
+            model: The CpModel object that represents the constraints of the problem
+            objective_stages: List of ObjectiveStage in priority order
+            solution_callback: CpSolverSolutionCallback used for every stage
+
+        Returns:
+            status: OPTIMAL if every stage was solved optimally, FEASIBLE if any stage stopped early with a solution,
+                     otherwise the status of the stage without any solution
+            solver: The cp_model.CpSolver object holding the solution to the last stage
+    """
+    if len(objective_stages) == 0:
+        # Every assignment is equally good, so just find one
+        solver = createSolver()
+        return solveWithProgress(solver, model, solution_callback), solver
+
+    overall_status = cp_model.OPTIMAL
+    for (stage_number, objective_stage) in enumerate(objective_stages, 1):
+        if objective_stage.is_minimization:
+            model.Minimize(objective_stage.expression)
+        else:
+            model.Maximize(objective_stage.expression)
+
+        solver = createSolver()
+        millis_at_stage_start = currentMillis()
+        status = solveWithProgress(solver, model, solution_callback, f'solve stage {stage_number}')
+        objective_stage.solve_seconds = (currentMillis() - millis_at_stage_start) / 1000.0
+
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            print(f'Stage {stage_number} ({objective_stage.name}): {solver.StatusName(status)} '
+                  f'after {objective_stage.solve_seconds} seconds')
+            return status, solver
+        elif status == cp_model.FEASIBLE:
+            overall_status = cp_model.FEASIBLE
+
+        objective_stage.value = solver.Value(objective_stage.expression)
+        print(f'Stage {stage_number} ({objective_stage.name}): {solver.StatusName(status)} with value '
+              f'{objective_stage.value} in {objective_stage.solve_seconds} seconds')
+
+        # Later stages may only choose between solutions which are at least as good for this stage
+        if objective_stage.is_minimization:
+            model.Add(objective_stage.expression <= objective_stage.value)
+        else:
+            model.Add(objective_stage.expression >= objective_stage.value)
+        hintSolverSolution(model, solver)
+
+    return overall_status, solver
+
+def hintSolverSolution(model, solver):
+    """
+        Replaces any solution hint in the model with the full solution last found by the solver, this solution
+         must still be feasible for the model
+
+        Args:
+            model: The CpModel object that was solved by the solver
+            solver: The cp_model.CpSolver object holding a solution to the model
+    """
+    model_proto = model.Proto()
+    model_proto.ClearField('solution_hint')
+    model_proto.solution_hint.vars.extend(range(len(model_proto.variables)))
+    model_proto.solution_hint.values.extend(solver.ResponseProto().solution)
+
+def getMaxTotalSections(mod_time_variables, max_sections_per_mod):
+    """
+        Returns:
+            Integer for the maximum number of sections possible if every moderator is assigned to their
+             maximum number of sections
+    """
+    return sum(max_sections_per_mod[mod_index] * numPeopleInRow(mod_time_variables[mod_index])
+               for mod_index in range(len(mod_time_variables)))
+
+def addConstraintsAndObjective(model, mod_time_variables, student_time_variables, max_sections_per_mod,
+                               max_sections_per_time):
+    """
+        Adds every constraint of the section assignment problem and the weighted objective function to the model
+
+        Args:
+            model: The CpModel object that represents the constraints of the problem
+            mod_time_variables: 2D List of PersonTimeVariableWrapper, if [mod_index][time_index]
+                                    is None then that time is impossible for that mod
+            student_time_variables: 2D List of PersonTimeVariableWrapper,
+                                        if [student_index][time_index] is None then
+                                        that time is impossible for that student
+            max_sections_per_mod: List of Integer, each entry is the max sections for that mod_index
+            max_sections_per_time: List of Integer where each index represents the number of rooms
+                                    available at that time index
+
+        Returns:
+            List of ObjectiveStage for each part of the objective function, see addFunctionToMinimize
+    """
+    addAllConstraints(model, mod_time_variables, student_time_variables, max_sections_per_mod, max_sections_per_time)
+    return addFunctionToMinimize(model, mod_time_variables, student_time_variables,
+                                 getMaxTotalSections(mod_time_variables, max_sections_per_mod))
+
+def addAllConstraints(model, mod_time_variables, student_time_variables, max_sections_per_mod, max_sections_per_time):
+    """
+        Adds every constraint of the section assignment problem to the model
+
+        Args:
+            model: The CpModel object that represents the constraints of the problem
+            mod_time_variables: 2D List of PersonTimeVariableWrapper, if [mod_index][time_index]
+                                    is None then that time is impossible for that mod
+            student_time_variables: 2D List of PersonTimeVariableWrapper,
+                                        if [student_index][time_index] is None then
+                                        that time is impossible for that student
+            max_sections_per_mod: List of Integer, each entry is the max sections for that mod_index
+            max_sections_per_time: List of Integer where each index represents the number of rooms
+                                    available at that time index
+    """
+    addMaxSectionsPerModConstraint(model, mod_time_variables, max_sections_per_mod)
+    addMaxSectionsPerSectionTimeConstraint(model, mod_time_variables, max_sections_per_time)
+    addSectionsPerStudentConstraint(model, student_time_variables)
+    addStudentsPerSectionTimeConstraint(model, mod_time_variables, student_time_variables, max_sections_per_time)
+
 def printProblemInfo(mod_net_ids, student_net_ids, mod_time_preferences,
                      student_time_variables, mod_time_variables):
-    var_count = 0
     num_mods = len(mod_net_ids)
     num_students = len(student_net_ids)
     num_section_times = len(mod_time_preferences[0])
-
-    for mod_index in range(num_mods):
-        for time_index in range(num_section_times):
-            if mod_time_variables[mod_index][time_index] is not None:
-                var_count += 1
-
-    for student_index in range(num_students):
-        for time_index in range(num_section_times):
-            if student_time_variables[student_index][time_index] is not None:
-                var_count += 1
-
-    print('Num mods:', num_mods)
-    print('Num students:', num_students)
-    print('Num section times:', num_section_times)
-    print('Num person/time variables:', var_count)
-
-def setupConstraintProgrammingVariables(model, net_ids, time_preferences, section_times, is_mod_data=True):
+    var_count = (getPersonTimeIndex(mod_time_variables).numVariables() +
+                 getPersonTimeIndex(student_time_variables).numVariables())
+
+    instrumentation.setCounter('mods', num_mods, 'Num mods:')
+    instrumentation.setCounter('students', num_students, 'Num students:')
+    instrumentation.setCounter('section times', num_section_times, 'Num section times:')
+    instrumentation.setCounter('person/time variables', var_count, 'Num person/time variables:')
+
+@instrumentation.timed('create variables')
+def setupConstraintProgrammingVariables(model, net_ids, time_preferences, section_times, is_mod_data=True,
+                                        person_types=None, allowed_impossible_net_ids=None,
+                                        not_preferred_activation=None):
     """
         Creates the constraint programming variables for the model of the moderator/student assignment problem
 
@@ -175,12 +647,23 @@ def setupConstraintProgrammingVariables(model, net_ids, time_preferences, sectio
             section_times: List like ['Wednesday 10 AM - 12 PM', 'Thursday 2 PM - 4 PM', ...] or None if no section
                             time data was provided
             is_mod_data: True if we are setting up constraint variables for the moderators, False if students
+            person_types: List of List of Integer where each entry is the indices of interchangeable people who
+                           should share one integer variable per time counting how many of them are assigned to
+                           that time, or None to create one 0/1 variable per person per time
+            allowed_impossible_net_ids: Set of String for the net IDs of the people who get a variable for every
+                                         time they marked impossible, replacing the random selection of
+                                         config.allow_impossible_times, or None to use that random selection
+            not_preferred_activation: progressive_activation.Activation deciding which times that are possible but
+                                       not preferred get a variable, or None to give every one a variable
 
         Returns:
-            2D List of PersonTimeVariableWrapper
+            PersonTimeVariables holding a 2D List of PersonTimeVariableWrapper, with one row per person or one row per
+             type if person_types is given
     """
     random.seed('Creatively Titled Impossible Time Selection Seed') # Ensure deterministic behavior
-    num_people = len(net_ids)
+    if person_types is None:
+        person_types = [[person_index] for person_index in range(len(net_ids))]
+    num_people = len(person_types)
     num_section_times = len(time_preferences[0])
     person_time_variables = []
 
@@ -194,32 +677,47 @@ def setupConstraintProgrammingVariables(model, net_ids, time_preferences, sectio
     for person_index in range(num_people):
         person_time_variables.append([])
 
+        first_index_in_type = person_types[person_index][0]
+        type_net_ids = [net_ids[index_in_type] for index_in_type in person_types[person_index]]
+        is_allowed_impossible = (allowed_impossible_net_ids is not None and
+                                 any(net_id in allowed_impossible_net_ids for net_id in type_net_ids))
+
         for time_index in range(num_section_times):
-            preference_for_time = time_preferences[person_index][time_index]
+            preference_for_time = time_preferences[first_index_in_type][time_index]
             is_impossible_time = (preference_for_time == DOODLE_IMPOSSIBLE_TIME)
             is_randomly_selected = (random.random() < config.impossible_time_percentage)
-            is_impossible_but_selected = (is_impossible_time and config.allow_impossible_times and is_randomly_selected)
+            if allowed_impossible_net_ids is None:
+                is_impossible_but_selected = (is_impossible_time and config.allow_impossible_times and
+                                              is_randomly_selected)
+            else:
+                is_impossible_but_selected = (is_impossible_time and is_allowed_impossible)
+
+            is_preferred_time = (preference_for_time == DOODLE_PREFERRED_TIME)
+            is_inactive_not_preferred = ((not_preferred_activation is not None) and (not is_preferred_time) and
+                                         (not is_impossible_time) and
+                                         (not not_preferred_activation.isActive(type_net_ids, time_index)))
 
-            if not is_impossible_time or is_impossible_but_selected:
+            if (not is_impossible_time or is_impossible_but_selected) and not is_inactive_not_preferred:
                 # The time is either not impossible, or impossible times are allowed and it was randomly selected
-                is_preferred_time = (preference_for_time == DOODLE_PREFERRED_TIME)
                 cp_var_prefix = 'mod' if is_mod_data else 'student'
                 cp_var_name = (cp_var_prefix + str(person_index) + ':time_' + str(time_index))
                 day_of_week = section_time_weekdays[time_index]
 
-                constraint_programming_var = model.NewIntVar(0, 1, cp_var_name)
-                variable_wrapper = PersonTimeVariableWrapper(net_ids[person_index], time_index, is_preferred_time,
-                                                             is_impossible_time, day_of_week, constraint_programming_var)
+                constraint_programming_var = model.NewIntVar(0, len(type_net_ids), cp_var_name)
+                variable_wrapper = PersonTimeVariableWrapper(net_ids[first_index_in_type], time_index,
+                                                             is_preferred_time, is_impossible_time, day_of_week,
+                                                             constraint_programming_var, first_index_in_type,
+                                                             type_net_ids)
                 person_time_variables[person_index].append(variable_wrapper)
             else:
                 person_time_variables[person_index].append(None)
 
-    return person_time_variables
+    return PersonTimeVariables(person_time_variables, num_section_times)
 
 def extractModAndStudentAssignments(solver, mod_time_variables, student_time_variables):
     """
         Args:
-            solver: The cp_model.CpSolver object which previously solved the constraint problem
+            solver: The cp_model.CpSolver object which previously solved the constraint problem, or SolutionValues
             mod_time_variables: 2D List of PersonTimeVariableWrapper, if [mod_index][time_index]
                                     is None then that time is impossible for that mod
             student_time_variables: 2D List of PersonTimeVariableWrapper,
@@ -232,76 +730,83 @@ def extractModAndStudentAssignments(solver, mod_time_variables, student_time_var
             students_assigned_to_times: List of List of Strings, each entry is all net IDs of the moderators assigned
                                         to that time index
     """
-    num_mods = len(mod_time_variables)
-    num_students = len(student_time_variables)
-    num_section_times = len(mod_time_variables[0])
-    mods_assigned_to_times = []
-    students_assigned_to_times = []
-    not_preferred_mod_net_ids = []
-    impossible_mod_net_ids = []
-    not_preferred_student_net_ids = []
-    impossible_student_net_ids = []
-
-    for time_index in range(num_section_times):
-        mods_assigned_to_times.append([])
-        for mod_index in range(num_mods):
-            mod_time_var_wrapper = mod_time_variables[mod_index][time_index]
-            if mod_time_var_wrapper is not None and mod_time_var_wrapper.isTimeAssignedToPerson(solver):
-                mod_net_id = mod_time_var_wrapper.net_id
-                mods_assigned_to_times[time_index].append(mod_net_id)
-
-                # Record if this moderator did not receive a preferred time
-                if mod_time_var_wrapper.is_impossible_time:
-                    impossible_mod_net_ids.append(mod_net_id)
-                elif not mod_time_var_wrapper.is_preferred_time:
-                    not_preferred_mod_net_ids.append(mod_net_id)
-
-        students_assigned_to_times.append([])
-        for student_index in range(num_students):
-            student_time_var_wrapper = student_time_variables[student_index][time_index]
-            if student_time_var_wrapper is not None and student_time_var_wrapper.isTimeAssignedToPerson(solver):
-                student_net_id = student_time_var_wrapper.net_id
-                students_assigned_to_times[time_index].append(student_net_id)
-
-                # Record if this student did not receive a preferred time
-                if student_time_var_wrapper.is_impossible_time:
-                    impossible_student_net_ids.append(student_net_id)
-                elif not student_time_var_wrapper.is_preferred_time:
-                    not_preferred_student_net_ids.append(student_net_id)
-
-    if len(impossible_mod_net_ids) > 0 or len(impossible_student_net_ids) > 0:
-        print('Mods assigned to impossible times:', len(impossible_mod_net_ids),
-              '(' + str(impossible_mod_net_ids) + ')')
-        print('Students assigned to impossible times:', len(impossible_student_net_ids),
-              '(' + str(impossible_student_net_ids) + ')')
-
-    # If there aren't too many to report, print out the students who received not preferred times
-    mod_message = 'Mods assigned to not preferred time: ' + str(len(not_preferred_mod_net_ids)) + ' '
-    student_message = 'Students assigned to not preferred time: ' + str(len(not_preferred_student_net_ids)) + ' '
-    if len(not_preferred_mod_net_ids) <= 10:
-        mod_message += str(not_preferred_mod_net_ids)
-    if len(not_preferred_student_net_ids) <= 10:
-        student_message += str(not_preferred_student_net_ids)
-
-    print(mod_message)
-    print(student_message)
-    return mods_assigned_to_times, students_assigned_to_times
+    extracted_solution = extractSolution(solver, mod_time_variables, student_time_variables)
+    extracted_solution.printReport()
+    return extracted_solution.mods_assigned_to_times, extracted_solution.students_assigned_to_times
 
 def currentMillis():
     return int(round(time.time() * 1000))
 
 class SolutionCounter(cp_model.CpSolverSolutionCallback):
-    """ Simple callback class to count the number of solutions considered and report progress """
+    """
+        Callback class to count the number of solutions considered, report progress, record a timeline of every
+         solution, and stop the search once a solution is good enough, see solver_progress.getEarlyStopReason
+    """
 
-    def __init__(self):
+    def __init__(self, should_snapshot_incumbents=False, checkpointer=None):
+        """
+            Args:
+                should_snapshot_incumbents: True to keep the SolutionValues of the latest solution found, so the
+                                             best solution so far is available even if the solve is stopped
+                checkpointer: incumbent_checkpoint.IncumbentCheckpointer to hand every solution found to, or None
+        """
         cp_model.CpSolverSolutionCallback.__init__(self)
         self.solution_count = 0
-        self.millis_at_last_solution = currentMillis()
+        self.millis_at_start = currentMillis()
+        self.millis_at_last_solution = self.millis_at_start
+        self.seconds_to_first_solution = None
+        self.should_snapshot_incumbents = should_snapshot_incumbents
+        self.checkpointer = checkpointer
+        self.incumbent = None # SolutionValues of the latest solution when should_snapshot_incumbents is enabled
+        self.timeline = [] # solver_progress.ProgressPoint for every solution of every solve
+        self.solve_name = None
+        self.target_objective = None
+        self.solve_start_time = time.perf_counter()
+        self.last_solution_time = None
+        self.early_stop_reason = None # Set when an early stopping rule stopped the current solve
+        self.stop_reason = None # Why the last solve stopped, set by solveWithProgress
+        self.solve_results = [] # (status, stop reason) of every solve, see verifyEverySolve
+
+    def startSolve(self, solve_name, target_objective=None):
+        """ Resets what is tracked per solve before the next solve which reports to this counter """
+        self.solve_name = solve_name
+        self.target_objective = target_objective
+        self.solve_start_time = time.perf_counter()
+        self.last_solution_time = None
+        self.early_stop_reason = None
+        self.stop_reason = None
+
+    def secondsSinceLastSolution(self):
+        """
+            Returns:
+                Float for the seconds since the last solution of the current solve, or None before the first one
+        """
+        last_solution_time = self.last_solution_time
+        return None if last_solution_time is None else time.perf_counter() - last_solution_time
 
     def on_solution_callback(self):
         self.solution_count += 1
+        self.last_solution_time = time.perf_counter()
+        objective = self.ObjectiveValue()
+        best_bound = self.BestObjectiveBound()
+        self.timeline.append(solver_progress.ProgressPoint(self.solve_name, self.last_solution_time -
+                                                           self.solve_start_time, objective, best_bound))
+        early_stop_reason = solver_progress.getEarlyStopReason(objective, best_bound, self.target_objective)
+        if early_stop_reason is not None:
+            self.early_stop_reason = early_stop_reason
+            self.StopSearch()
+        if self.seconds_to_first_solution is None:
+            self.seconds_to_first_solution = (currentMillis() - self.millis_at_start) / 1000.0
+        if self.should_snapshot_incumbents or (self.checkpointer is not None):
+            incumbent = getSolutionValues(self)
+            if self.should_snapshot_incumbents:
+                self.incumbent = incumbent
+            if self.checkpointer is not None:
+                self.checkpointer.offer(incumbent)
         millis_since_last_solution = (currentMillis() - self.millis_at_last_solution)
         seconds_since_last_solution = (millis_since_last_solution / 1000.0)
         obj_value = str(self.ObjectiveValue())
-        print(f'Viable assignment found (objective={obj_value}), time since last: {str(seconds_since_last_solution)} seconds')
+        if not config.quiet_mode:
+            print(f'Viable assignment found (objective={obj_value}), time since last: '
+                  f'{str(seconds_since_last_solution)} seconds')
         self.millis_at_last_solution = currentMillis()
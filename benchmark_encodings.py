@@ -0,0 +1,70 @@
+import os
+import time
+import config
+from assign_time_slots import addConstraintsAndObjective, getModelFromInputFiles
+from ortools.sat.python import cp_model
+
+REAL_DATA_DIRECTORIES = ['test_data/real_data/fa18_data/', 'test_data/real_data/fa19_data/',
+                         'test_data/real_data/sp19_data/', 'test_data/real_data/sp20_data/']
+
+def main():
+    """
+        Compares the solve time of the compact and decision variable versions of the students per section time
+         constraint on every real semester of data, printing a table of the results
+    """
+    results = []
+    for semester_data_dir in REAL_DATA_DIRECTORIES:
+        for use_compact_encoding in (False, True):
+            config.use_compact_students_per_section_time_encoding = use_compact_encoding
+            (status_name, objective, num_variables, num_constraints, seconds) = timeSemesterSolve(semester_data_dir)
+            encoding_name = 'compact' if use_compact_encoding else 'decision_variables'
+            results.append((semester_data_dir, encoding_name, status_name, objective,
+                            num_variables, num_constraints, seconds))
+
+    print()
+    print('{:<35} {:<20} {:<12} {:>10} {:>10} {:>12} {:>10}'.format('Data', 'Encoding', 'Status', 'Objective',
+                                                                    'Variables', 'Constraints', 'Seconds'))
+    for (semester_data_dir, encoding_name, status_name, objective, num_variables, num_constraints, seconds) in results:
+        print('{:<35} {:<20} {:<12} {:>10} {:>10} {:>12} {:>10.3f}'.format(semester_data_dir, encoding_name,
+                                                                          status_name, str(objective), num_variables,
+                                                                          num_constraints, seconds))
+
+def timeSemesterSolve(semester_data_dir):
+    """
+        Builds and solves the full model for one semester of data with the current config
+
+        Returns:
+            (status name, objective value or None, number of model variables, number of model constraints,
+             seconds taken to build and solve the model)
+    """
+    start_time = time.time()
+    (model, mod_time_variables, student_time_variables,
+     max_sections_per_mod, max_sections_per_time) = getModelFromInputFiles(*getSemesterCsvFiles(semester_data_dir))
+    addConstraintsAndObjective(model, mod_time_variables, student_time_variables,
+                               max_sections_per_mod, max_sections_per_time)
+
+    solver = cp_model.CpSolver()
+    status = solver.Solve(model)
+    seconds = time.time() - start_time
+
+    objective = None
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        objective = round(solver.ObjectiveValue(), 3)
+    model_proto = model.Proto()
+    return (solver.StatusName(status), objective, len(model_proto.variables), len(model_proto.constraints), seconds)
+
+def getSemesterCsvFiles(semester_data_dir):
+    """
+        Returns:
+            Tuple of the mod preferences, mod max sections, student preferences, and section times CSV paths in
+             semester_data_dir, where the section times path is None if the semester has no section times CSV
+    """
+    section_times_csv_path = semester_data_dir + 'section_times.csv'
+    if not os.path.exists(section_times_csv_path):
+        section_times_csv_path = None
+
+    return (semester_data_dir + 'mod_preferences.csv', semester_data_dir + 'mod_max_sections.csv',
+            semester_data_dir + 'student_preferences.csv', section_times_csv_path)
+
+if __name__ == '__main__':
+    main()
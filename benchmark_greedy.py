@@ -0,0 +1,70 @@
+import time
+import config
+from assign_time_slots import SolutionCounter, addAllConstraints, createSolver, getMaxTotalSections,\
+                              getModelFromInputFiles
+from benchmark_encodings import REAL_DATA_DIRECTORIES, getSemesterCsvFiles
+from greedy_preselect import GREEDY_MODE_BOTH, GREEDY_MODE_CONSTRAINTS, GREEDY_MODE_HINT, greedyPreselectSections
+from objective_functions import addFunctionToMinimize
+
+NUM_SECTIONS_TO_GREEDY_PRESELECT = 10
+
+def main():
+    """
+        Compares the time to the first solution and to the optimal solution for each way of using greedy
+         preselection on every real semester of data, printing a table of the results
+    """
+    config.only_allow_optimal_solutions = False
+    config.aggregate_identical_people = False
+
+    results = []
+    for semester_data_dir in REAL_DATA_DIRECTORIES:
+        for (greedy_preselect_mode, num_sections) in (('none', 0),
+                                                      (GREEDY_MODE_CONSTRAINTS, NUM_SECTIONS_TO_GREEDY_PRESELECT),
+                                                      (GREEDY_MODE_HINT, 0),
+                                                      (GREEDY_MODE_BOTH, NUM_SECTIONS_TO_GREEDY_PRESELECT)):
+            config.greedy_preselect_mode = GREEDY_MODE_CONSTRAINTS if greedy_preselect_mode == 'none' \
+                                           else greedy_preselect_mode
+            config.num_sections_to_greedy_preselect = num_sections
+            results.append((semester_data_dir, greedy_preselect_mode) + timeGreedySolve(semester_data_dir))
+
+    print()
+    print('{:<35} {:<12} {:<12} {:>10} {:>16} {:>16}'.format('Data', 'Greedy mode', 'Status', 'Objective',
+                                                             'First solution', 'Optimal'))
+    for (semester_data_dir, greedy_preselect_mode, status_name, objective, first_seconds, total_seconds) in results:
+        print('{:<35} {:<12} {:<12} {:>10} {:>16} {:>16.3f}'.format(semester_data_dir, greedy_preselect_mode,
+                                                                    status_name, str(objective), str(first_seconds),
+                                                                    total_seconds))
+
+def timeGreedySolve(semester_data_dir):
+    """
+        Builds and solves the model for one semester of data with the current config
+
+        Returns:
+            (status name, objective value or None, seconds to the first solution or None,
+             seconds for the whole solve including the greedy algorithm)
+    """
+    (model, mod_time_variables, student_time_variables,
+     max_sections_per_mod, max_sections_per_time) = getModelFromInputFiles(*getSemesterCsvFiles(semester_data_dir))
+
+    start_time = time.time()
+    greedyPreselectSections(model, mod_time_variables, student_time_variables,
+                            max_sections_per_time, max_sections_per_mod)
+    addAllConstraints(model, mod_time_variables, student_time_variables, max_sections_per_mod, max_sections_per_time)
+    addFunctionToMinimize(model, mod_time_variables, student_time_variables,
+                          getMaxTotalSections(mod_time_variables, max_sections_per_mod))
+    greedy_seconds = time.time() - start_time
+
+    solver = createSolver()
+    solution_counter = SolutionCounter()
+    status = solver.SolveWithSolutionCallback(model, solution_counter)
+    total_seconds = time.time() - start_time
+
+    objective = None
+    first_solution_seconds = None
+    if solution_counter.seconds_to_first_solution is not None:
+        objective = round(solver.ObjectiveValue(), 3)
+        first_solution_seconds = round(greedy_seconds + solution_counter.seconds_to_first_solution, 3)
+    return (solver.StatusName(status), objective, first_solution_seconds, total_seconds)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import time
+import config
+from assign_time_slots import addAllConstraints, getModelFromInputFiles, solveModel
+from benchmark_encodings import getSemesterCsvFiles
+
+BENCHMARK_DIRECTORIES = ['test_data/real_data/sp19_data/', 'test_data/real_data/sp20_data/']
+
+def main():
+    """
+        Compares solving the single weighted objective function against solving it lexicographically one stage at a
+         time on the spring semesters, printing the total solve time and the value reached for each stage
+        Maximizing the number of sections is enabled so that there is more than one stage to solve
+    """
+    config.maximize_number_of_sections = True
+    config.assign_exact_max_sections = False
+    config.only_allow_optimal_solutions = False
+
+    results = []
+    for semester_data_dir in BENCHMARK_DIRECTORIES:
+        for use_lexicographic_objective in (False, True):
+            config.use_lexicographic_objective = use_lexicographic_objective
+            objective_name = 'lexicographic' if use_lexicographic_objective else 'weighted'
+            results.append((semester_data_dir, objective_name) + timeObjectiveSolve(semester_data_dir))
+
+    print()
+    print('{:<35} {:<15} {:<12} {:>10}  {}'.format('Data', 'Objective', 'Status', 'Seconds',
+                                                   'Stage values (seconds per stage)'))
+    for (semester_data_dir, objective_name, status_name, seconds, stage_descriptions) in results:
+        print('{:<35} {:<15} {:<12} {:>10.3f}  {}'.format(semester_data_dir, objective_name, status_name, seconds,
+                                                          ', '.join(stage_descriptions)))
+
+def timeObjectiveSolve(semester_data_dir):
+    """
+        Builds and solves the model for one semester of data with the current config
+
+        Returns:
+            (status name, seconds taken to solve, List of String describing the value reached for each stage)
+    """
+    (model, mod_time_variables, student_time_variables,
+     max_sections_per_mod, max_sections_per_time) = getModelFromInputFiles(*getSemesterCsvFiles(semester_data_dir))
+    addAllConstraints(model, mod_time_variables, student_time_variables, max_sections_per_mod, max_sections_per_time)
+
+    start_time = time.time()
+    (status, solver, _, objective_stages) = solveModel(model, mod_time_variables, student_time_variables,
+                                                       max_sections_per_mod)
+    seconds = time.time() - start_time
+
+    # The weighted objective solves every stage at once, so it has no per stage solve times
+    stage_descriptions = [f'{objective_stage.name}={objective_stage.value} ({objective_stage.solve_seconds})'
+                          for objective_stage in objective_stages]
+
+    return (solver.StatusName(status), seconds, stage_descriptions)
+
+if __name__ == '__main__':
+    main()
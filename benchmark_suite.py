@@ -0,0 +1,416 @@
+import argparse
+import config
+import contextlib
+import io
+import json
+import objective_functions
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from assign_time_slots import SolutionCounter, createSolver, getMaxTotalSections, getModelFromInputData,\
+                              readInputFiles
+from benchmark_encodings import getSemesterCsvFiles
+from component_decomposition import getConfigValues
+from constraints import addMaxSectionsPerModConstraint, addMaxSectionsPerSectionTimeConstraint,\
+                        addSectionsPerStudentConstraint, addStudentsPerSectionTimeConstraint
+from create_sections_from_time_slots import assignSectionsFromSectionTimes
+from feasibility_precheck import findFeasibilityProblems
+from greedy_preselect import greedyPreselectSections
+from objective_functions import addFunctionToMinimize
+from ortools import __version__ as ortools_version
+from ortools.sat.python import cp_model
+from person_time_index import getPersonTimeIndex
+from solution_extraction import extractSolution
+from solve_time_predictor import getModelFeatures
+from synthetic_instance_generator import SyntheticInstanceParameters, generateSyntheticInstance, writeSyntheticInstance
+
+DEFAULT_HISTORY_PATH = 'benchmark_history.json'
+PREPROCESS_SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts',
+                                      'preprocess_doodle_poll.py')
+
+# Config options every profile starts from, so that a benchmark run does not depend on the values in config.py
+BASE_PROFILE_CONFIG = {'objective_function': objective_functions.everyone_equal_weight,
+                       'min_students_per_section': 5, 'max_students_per_section': 6,
+                       'assign_exact_max_sections': False, 'maximize_number_of_sections': False,
+                       'prefer_contiguous_sections_preferred_times_only': False,
+                       'prefer_contiguous_sections_all_possible': False, 'contiguous_sections_percentage': 1.0,
+                       'num_sections_to_greedy_preselect': 0, 'allow_impossible_times': False,
+                       'aggregate_identical_people': False, 'use_lexicographic_objective': False,
+                       'only_allow_optimal_solutions': False, 'check_feasibility_before_solving': True,
+                       'presolve_input_data': True}
+
+# Profile name -> config options changed from BASE_PROFILE_CONFIG
+BENCHMARK_PROFILES = {
+    'default': {},
+    'first_come_first_serve': {'objective_function': objective_functions.first_come_first_serve},
+    'maximize_sections': {'maximize_number_of_sections': True},
+    'contiguous_preferred': {'prefer_contiguous_sections_preferred_times_only': True},
+    'aggregate_people': {'aggregate_identical_people': True},
+}
+
+# Phase timings which are compared between runs, in pipeline order
+PHASES = ['parse', 'variables', 'precheck', 'greedy', 'constraints: max sections per mod',
+          'constraints: max sections per time', 'constraints: sections per student',
+          'constraints: students per section time', 'objective', 'solve', 'extraction', 'section creation']
+
+class BenchmarkInstance:
+    """ One set of input files to benchmark """
+
+    def __init__(self, name, csv_files=None, doodle_exports=None, synthetic_parameters=None, run_by_default=True):
+        """
+            Args:
+                name: String naming the instance in the history file
+                csv_files: Tuple of the input CSV paths in getModelFromInputFiles order, for input files which are
+                            ready to be read
+                doodle_exports: Tuple in the same order where the mod and student entries are instead
+                                 (raw Doodle export CSV path, "can't read" name to net ID CSV path or None), for
+                                 input files which must first go through scripts/preprocess_doodle_poll.py
+                synthetic_parameters: SyntheticInstanceParameters, for input files which are generated
+                run_by_default: When False, the instance is only run when it is named with --instances
+        """
+        self.name = name
+        self.csv_files = csv_files
+        self.doodle_exports = doodle_exports
+        self.synthetic_parameters = synthetic_parameters
+        self.run_by_default = run_by_default
+
+    def prepareCsvFiles(self, working_directory):
+        """
+            Returns:
+                Tuple of the input CSV paths in getModelFromInputFiles order, preprocessing any raw Doodle exports
+                 into working_directory
+        """
+        if self.synthetic_parameters is not None:
+            return writeSyntheticInstance(generateSyntheticInstance(self.synthetic_parameters),
+                                          os.path.join(working_directory, self.name))
+        if self.doodle_exports is None:
+            return self.csv_files
+
+        (mod_export, mod_max_sections_csv_path, student_export, section_times_csv_path) = self.doodle_exports
+        return (preprocessDoodleExport(mod_export, working_directory, 'mods'), mod_max_sections_csv_path,
+                preprocessDoodleExport(student_export, working_directory, 'students'), section_times_csv_path)
+
+def preprocessDoodleExport(doodle_export, working_directory, file_name):
+    """
+        Args:
+            doodle_export: Either a path to a CSV which is ready to be read, or (raw Doodle export CSV path,
+                            "can't read" mapping CSV path or None) which is run through scripts/preprocess_doodle_poll.py
+            working_directory: Directory to write the preprocessed CSV into
+            file_name: String for the name of the preprocessed CSV without an extension
+
+        Returns:
+            Path to a CSV which is ready to be read
+    """
+    if isinstance(doodle_export, str):
+        return doodle_export
+
+    (export_csv_path, cant_read_csv_path) = doodle_export
+    copied_csv_path = os.path.join(working_directory, file_name + '.csv')
+    shutil.copyfile(export_csv_path, copied_csv_path)
+    subprocess.run([sys.executable, PREPROCESS_SCRIPT_PATH, copied_csv_path] +
+                   ([] if cant_read_csv_path is None else [cant_read_csv_path]),
+                   check=True, stdout=subprocess.DEVNULL)
+    return os.path.join(working_directory, file_name + '_no_duplicates.csv')
+
+BENCHMARK_INSTANCES = [
+    BenchmarkInstance('fa18', getSemesterCsvFiles('test_data/real_data/fa18_data/')),
+    BenchmarkInstance('fa19', getSemesterCsvFiles('test_data/real_data/fa19_data/')),
+    BenchmarkInstance('sp19', getSemesterCsvFiles('test_data/real_data/sp19_data/')),
+    BenchmarkInstance('sp20', getSemesterCsvFiles('test_data/real_data/sp20_data/')),
+    # The full data sets keep the Doodle exports, sp19 has no max sections file of its own
+    BenchmarkInstance('sp19_full', doodle_exports=(
+        ('sp19_full_data/sp19_mods.csv', 'sp19_full_data/mods_who_cant_read_sp19.csv'),
+        'test_data/real_data/sp19_data/mod_max_sections.csv',
+        'sp19_full_data/sp19_students_most_recent_no_duplicates.csv',
+        'sp19_full_data/sp19_section_times.csv')),
+    BenchmarkInstance('sp20_full', doodle_exports=(
+        ('sp20_full_data/mod_preferences_original_sp20.csv', 'sp20_full_data/mods_who_cant_read_sp20.csv'),
+        'sp20_full_data/mod_max_sections_sp20.csv',
+        ('sp20_full_data/sp20_student_preferences_original.csv', 'sp20_full_data/students_who_cant_read_sp20.csv'),
+        'sp20_full_data/sp20_section_times.csv')),
+    # Planted, always feasible instances at the size of a spring semester and at the sizes of combined courses
+    BenchmarkInstance('synthetic_1x', synthetic_parameters=SyntheticInstanceParameters(num_students=330)),
+    BenchmarkInstance('synthetic_5x', synthetic_parameters=SyntheticInstanceParameters(num_students=1650),
+                      run_by_default=False),
+    BenchmarkInstance('synthetic_20x', synthetic_parameters=SyntheticInstanceParameters(num_students=6600),
+                      run_by_default=False),
+]
+
+class PhaseTimer:
+    """ Adds up the seconds spent in each phase of the pipeline """
+
+    def __init__(self):
+        self.phase_seconds = {}
+
+    @contextlib.contextmanager
+    def phase(self, phase_name):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_seconds[phase_name] = (self.phase_seconds.get(phase_name, 0.0) +
+                                              time.perf_counter() - start_time)
+
+def runPipeline(csv_files):
+    """
+        Runs every step of assignModeratorsAndStudents and assignSectionsFromSectionTimes for the single weighted
+         CP model with the current config, timing each phase. The model is solved even when the feasibility
+         precheck fails, so that proving infeasibility is also timed
+
+        Args:
+            csv_files: Tuple of the input CSV paths in getModelFromInputFiles order
+
+        Returns:
+            Dictionary with the status, objective, model size and seconds of each phase, see PHASES
+    """
+    phase_timer = PhaseTimer()
+    with phase_timer.phase('parse'):
+        input_data = readInputFiles(*csv_files)
+    with phase_timer.phase('variables'):
+        (model, mod_time_variables, student_time_variables,
+         max_sections_per_mod, max_sections_per_time) = getModelFromInputData(*input_data)
+    # Recorded so that solve_time_predictor.py can be fitted on the solve times of the history file
+    features = getModelFeatures(mod_time_variables, student_time_variables, max_sections_per_mod,
+                                max_sections_per_time)
+
+    num_precheck_problems = None
+    if config.check_feasibility_before_solving:
+        with phase_timer.phase('precheck'):
+            num_precheck_problems = len(findFeasibilityProblems(mod_time_variables, student_time_variables,
+                                                                max_sections_per_mod, max_sections_per_time))
+    with phase_timer.phase('greedy'):
+        greedyPreselectSections(model, mod_time_variables, student_time_variables, max_sections_per_time,
+                                max_sections_per_mod)
+
+    # The same constraints as addAllConstraints, one family at a time
+    with phase_timer.phase('constraints: max sections per mod'):
+        addMaxSectionsPerModConstraint(model, mod_time_variables, max_sections_per_mod)
+    with phase_timer.phase('constraints: max sections per time'):
+        addMaxSectionsPerSectionTimeConstraint(model, mod_time_variables, max_sections_per_time)
+    with phase_timer.phase('constraints: sections per student'):
+        addSectionsPerStudentConstraint(model, student_time_variables)
+    with phase_timer.phase('constraints: students per section time'):
+        addStudentsPerSectionTimeConstraint(model, mod_time_variables, student_time_variables, max_sections_per_time)
+    num_constraints = len(model.Proto().constraints)
+
+    with phase_timer.phase('objective'):
+        addFunctionToMinimize(model, mod_time_variables, student_time_variables,
+                              getMaxTotalSections(mod_time_variables, max_sections_per_mod))
+
+    with phase_timer.phase('solve'):
+        solver = createSolver()
+        solution_counter = SolutionCounter()
+        status = solver.SolveWithSolutionCallback(model, solution_counter)
+
+    result = {'status': solver.StatusName(status), 'objective': None, 'best_bound': None,
+              'num_solutions': solution_counter.solution_count, 'num_precheck_problems': num_precheck_problems,
+              'num_variables': len(model.Proto().variables), 'num_constraints': num_constraints,
+              'num_person_time_variables': (getPersonTimeIndex(mod_time_variables).numVariables() +
+                                            getPersonTimeIndex(student_time_variables).numVariables()),
+              'features': features}
+    if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        result['objective'] = solver.ObjectiveValue()
+        result['best_bound'] = solver.BestObjectiveBound()
+        with phase_timer.phase('extraction'):
+            extracted_solution = extractSolution(solver, mod_time_variables, student_time_variables)
+        if config.section_times_csv_path is not None:
+            with phase_timer.phase('section creation'):
+                assignSectionsFromSectionTimes(extracted_solution.mods_assigned_to_times,
+                                               extracted_solution.students_assigned_to_times)
+
+    result['phase_seconds'] = phase_timer.phase_seconds
+    result['total_seconds'] = sum(phase_timer.phase_seconds.values())
+    return result
+
+def runBenchmark(instances, profile_names, time_limit_seconds, num_repeats=1):
+    """
+        Runs the pipeline for every instance under every profile, keeping the fastest of num_repeats runs
+
+        Args:
+            instances: List of BenchmarkInstance
+            profile_names: List of String keys of BENCHMARK_PROFILES
+            time_limit_seconds: Number for the solver time limit of each run, or None for no limit
+            num_repeats: Integer for the number of times each run is repeated
+
+        Returns:
+            Dictionary for one run in the history file
+    """
+    original_config_values = getConfigValues()
+    results = []
+    working_directory = tempfile.mkdtemp()
+    try:
+        for instance in instances:
+            csv_files = instance.prepareCsvFiles(working_directory)
+            for profile_name in profile_names:
+                for (option_name, value) in original_config_values.items():
+                    setattr(config, option_name, value)
+                for profile_config in (BASE_PROFILE_CONFIG, BENCHMARK_PROFILES[profile_name]):
+                    for (option_name, value) in profile_config.items():
+                        setattr(config, option_name, value)
+                config.max_time_in_seconds = time_limit_seconds
+                config.section_times_csv_path = csv_files[3]
+
+                repeat_results = []
+                for _ in range(num_repeats):
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        repeat_results.append(runPipeline(csv_files))
+                result = min(repeat_results, key=lambda repeat_result: repeat_result['total_seconds'])
+                result.update({'instance': instance.name, 'profile': profile_name})
+                results.append(result)
+                print(f'{instance.name:<14} {profile_name:<24} {result["status"]:<10} '
+                      f'objective={result["objective"]} seconds={round(result["total_seconds"], 3)}')
+    finally:
+        shutil.rmtree(working_directory)
+        for (option_name, value) in original_config_values.items():
+            setattr(config, option_name, value)
+
+    return {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'git_commit': getGitCommit(),
+            'python_version': platform.python_version(), 'ortools_version': ortools_version,
+            'cpu_count': os.cpu_count(), 'time_limit_seconds': time_limit_seconds, 'num_repeats': num_repeats,
+            'results': results}
+
+def getGitCommit():
+    """
+        Returns:
+            String for the commit the code was run at, or None if it is not known
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def readHistory(history_path):
+    """
+        Returns:
+            List of the runs in the history file, oldest first, empty if the file does not exist
+    """
+    if not os.path.exists(history_path):
+        return []
+    with open(history_path, 'r', encoding='utf-8') as history_file:
+        return json.load(history_file)
+
+def appendToHistory(history_path, run):
+    history = readHistory(history_path)
+    history.append(run)
+    temporary_path = history_path + '.tmp'
+    with open(temporary_path, 'w', encoding='utf-8') as history_file:
+        json.dump(history, history_file, indent=1)
+    os.replace(temporary_path, history_path)
+
+def findRegressions(baseline_run, new_run, max_slowdown, min_seconds):
+    """
+        Compares every instance and profile that is in both runs
+
+        Args:
+            baseline_run: Dictionary for a run in the history file to compare against
+            new_run: Dictionary for a later run in the history file
+            max_slowdown: Float for the fraction a phase may get slower by before it is a regression
+            min_seconds: Float for the number of seconds a phase must get slower by before it is a regression,
+                          so that phases which take almost no time do not flag noise
+
+        Returns:
+            List of String describing each regression, the status becoming worse, the objective becoming worse,
+             or a phase or the total time getting slower
+    """
+    status_rank = {'OPTIMAL': 0, 'INFEASIBLE': 0, 'FEASIBLE': 1, 'UNKNOWN': 2, 'MODEL_INVALID': 3}
+    baseline_results = {(result['instance'], result['profile']): result for result in baseline_run['results']}
+    regressions = []
+    for new_result in new_run['results']:
+        run_name = f'{new_result["instance"]}/{new_result["profile"]}'
+        baseline_result = baseline_results.get((new_result['instance'], new_result['profile']))
+        if baseline_result is None:
+            continue
+
+        if status_rank.get(new_result['status'], 3) > status_rank.get(baseline_result['status'], 3):
+            regressions.append(f'{run_name}: status {baseline_result["status"]} -> {new_result["status"]}')
+        if (baseline_result['objective'] is not None) and \
+           ((new_result['objective'] is None) or (new_result['objective'] > baseline_result['objective'] + 1e-6)):
+            regressions.append(f'{run_name}: objective {baseline_result["objective"]} -> {new_result["objective"]}')
+
+        timings = [(phase_name, baseline_result['phase_seconds'].get(phase_name),
+                    new_result['phase_seconds'].get(phase_name)) for phase_name in PHASES]
+        timings.append(('total', baseline_result['total_seconds'], new_result['total_seconds']))
+        for (phase_name, baseline_seconds, new_seconds) in timings:
+            if (baseline_seconds is None) or (new_seconds is None):
+                continue
+            if (new_seconds > baseline_seconds * (1 + max_slowdown)) and (new_seconds - baseline_seconds > min_seconds):
+                regressions.append(f'{run_name}: {phase_name} {round(baseline_seconds, 3)}s -> '
+                                   f'{round(new_seconds, 3)}s')
+    return regressions
+
+def printComparison(baseline_run, new_run):
+    """ Prints the total seconds and objective of both runs side by side """
+    baseline_results = {(result['instance'], result['profile']): result for result in baseline_run['results']}
+    print('{:<14} {:<24} {:>12} {:>12} {:>8} {:>12} {:>12}'.format('Instance', 'Profile', 'Old seconds',
+                                                                    'New seconds', 'Change', 'Old objective',
+                                                                    'New objective'))
+    for new_result in new_run['results']:
+        baseline_result = baseline_results.get((new_result['instance'], new_result['profile']))
+        if baseline_result is None:
+            continue
+        change = new_result['total_seconds'] / max(baseline_result['total_seconds'], 1e-9) - 1
+        print('{:<14} {:<24} {:>12.3f} {:>12.3f} {:>7.1f}% {:>12} {:>12}'.format(
+            new_result['instance'], new_result['profile'], baseline_result['total_seconds'],
+            new_result['total_seconds'], 100 * change, str(baseline_result['objective']),
+            str(new_result['objective'])))
+
+def main(argv=None):
+    """
+        Returns:
+            Integer exit code, 1 if compare found a regression
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the section assignment pipeline on the historical '
+                                                 'semesters and compare runs')
+    parser.add_argument('--history-path', default=DEFAULT_HISTORY_PATH, help='JSON file holding every run')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Benchmark and add the results to the history file')
+    run_parser.add_argument('--instances', nargs='+', choices=[instance.name for instance in BENCHMARK_INSTANCES],
+                            help='Instances to run, all but the large synthetic ones if not given')
+    run_parser.add_argument('--profiles', nargs='+', choices=list(BENCHMARK_PROFILES),
+                            help='Config profiles to run, all of them if not given')
+    run_parser.add_argument('--time-limit-seconds', type=float, default=60, help='Solver time limit of each run')
+    run_parser.add_argument('--repeat', type=int, default=1, dest='num_repeats',
+                            help='Run each instance this many times and keep the fastest')
+
+    compare_parser = subparsers.add_parser('compare', help='Flag regressions between two runs in the history file')
+    compare_parser.add_argument('runs', nargs='*', type=int,
+                                help='Indices of the baseline and new run in the history file, negative indices '
+                                     'count from the end. The last two runs if not given')
+    compare_parser.add_argument('--max-slowdown', type=float, default=0.2,
+                                help='Fraction a phase may get slower by before it is a regression')
+    compare_parser.add_argument('--min-seconds', type=float, default=0.05,
+                                help='Seconds a phase must get slower by before it is a regression')
+    arguments = parser.parse_args(argv)
+
+    if arguments.command == 'run':
+        instances = [instance for instance in BENCHMARK_INSTANCES
+                     if instance.name in arguments.instances] if arguments.instances is not None \
+                    else [instance for instance in BENCHMARK_INSTANCES if instance.run_by_default]
+        profile_names = arguments.profiles if arguments.profiles is not None else list(BENCHMARK_PROFILES)
+        run = runBenchmark(instances, profile_names, arguments.time_limit_seconds, arguments.num_repeats)
+        appendToHistory(arguments.history_path, run)
+        print('Benchmark run added to', arguments.history_path)
+        return 0
+
+    history = readHistory(arguments.history_path)
+    (baseline_index, new_index) = arguments.runs if len(arguments.runs) == 2 else (-2, -1)
+    assert len(history) >= 2, 'compare needs at least two runs in the history file'
+    (baseline_run, new_run) = (history[baseline_index], history[new_index])
+    print(f'Comparing {baseline_run["timestamp"]} ({baseline_run["git_commit"]}) with '
+          f'{new_run["timestamp"]} ({new_run["git_commit"]})')
+    printComparison(baseline_run, new_run)
+    regressions = findRegressions(baseline_run, new_run, arguments.max_slowdown, arguments.min_seconds)
+    for regression in regressions:
+        print('REGRESSION:', regression)
+    if len(regressions) == 0:
+        print('No regressions')
+    return 1 if len(regressions) > 0 else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+import time
+import config
+from assign_time_slots import addAllConstraints, getModelFromInputFiles, solveModel
+from benchmark_encodings import REAL_DATA_DIRECTORIES, getSemesterCsvFiles
+from ortools.sat.python import cp_model
+from two_phase_engine import solveTwoPhase
+
+def main():
+    """
+        Compares solving the monolithic model against the two phase engine on every semester of real data,
+         printing the status, objective, and seconds taken by each
+    """
+    config.num_sections_to_greedy_preselect = 0
+    config.only_allow_optimal_solutions = False
+
+    results = []
+    for semester_data_dir in REAL_DATA_DIRECTORIES:
+        results.append((semester_data_dir, 'monolithic') + timeMonolithicSolve(semester_data_dir))
+        results.append((semester_data_dir, 'two phase') + timeTwoPhaseSolve(semester_data_dir))
+
+    print()
+    print('{:<35} {:<12} {:<12} {:>10} {:>10} {:>11}'.format('Data', 'Engine', 'Status', 'Objective', 'Seconds',
+                                                             'Iterations'))
+    for (semester_data_dir, engine_name, status_name, objective, seconds, num_iterations) in results:
+        print('{:<35} {:<12} {:<12} {:>10} {:>10.3f} {:>11}'.format(semester_data_dir, engine_name, status_name,
+                                                                    objective, seconds, num_iterations))
+
+def timeMonolithicSolve(semester_data_dir):
+    """
+        Returns:
+            (status name, objective value, seconds taken to solve, 1) for the monolithic model of one semester
+    """
+    (model, mod_time_variables, student_time_variables,
+     max_sections_per_mod, max_sections_per_time) = getModelFromInputFiles(*getSemesterCsvFiles(semester_data_dir))
+
+    start_time = time.time()
+    addAllConstraints(model, mod_time_variables, student_time_variables, max_sections_per_mod, max_sections_per_time)
+    (status, solver, _, _) = solveModel(model, mod_time_variables, student_time_variables, max_sections_per_mod)
+    seconds = time.time() - start_time
+
+    return (solver.StatusName(status), getObjectiveDescription(status, solver.ObjectiveValue()), seconds, 1)
+
+def timeTwoPhaseSolve(semester_data_dir):
+    """
+        Returns:
+            (status name, objective value, seconds taken to solve, number of CP solves) for the two phase engine on
+             one semester
+    """
+    (model, mod_time_variables, student_time_variables,
+     max_sections_per_mod, max_sections_per_time) = getModelFromInputFiles(*getSemesterCsvFiles(semester_data_dir))
+
+    start_time = time.time()
+    (status, objective, _, num_iterations) = solveTwoPhase(model, mod_time_variables, student_time_variables,
+                                                           max_sections_per_mod, max_sections_per_time)
+    seconds = time.time() - start_time
+
+    return (cp_model.CpSolver().StatusName(status), getObjectiveDescription(status, objective), seconds,
+            num_iterations)
+
+def getObjectiveDescription(status, objective):
+    """
+        Returns:
+            The objective value rounded for printing, or '-' if no solution was found
+    """
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return '-'
+    return round(objective, 3)
+
+if __name__ == '__main__':
+    main()
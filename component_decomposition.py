@@ -0,0 +1,325 @@
+import assign_time_slots
+import config
+import os
+import types
+from concurrent.futures import ProcessPoolExecutor
+from constraints import numPeopleInRow
+from ortools.sat.python import cp_model
+
+class ConnectedComponent:
+    """ A group of moderators, students, and section times which shares no section time with anyone else """
+
+    def __init__(self, mod_indices, student_indices, time_indices):
+        """
+            Args:
+                mod_indices: List of Integer for the rows of mod_time_variables in the component
+                student_indices: List of Integer for the rows of student_time_variables in the component
+                time_indices: List of Integer for the section times possible for anyone in the component
+        """
+        self.mod_indices = mod_indices
+        self.student_indices = student_indices
+        self.time_indices = time_indices
+
+class ComponentProblem:
+    """
+        Everything needed to rebuild the model for one ConnectedComponent in another process, since CP variables
+         can not be sent between processes
+    """
+
+    def __init__(self, component, mod_time_variables, student_time_variables, max_sections_per_mod,
+                 max_sections_per_time, num_people):
+        """
+            Args:
+                component: ConnectedComponent to rebuild the model for
+                mod_time_variables: 2D List of PersonTimeVariableWrapper for the whole problem
+                student_time_variables: 2D List of PersonTimeVariableWrapper for the whole problem
+                max_sections_per_mod: List of Integer, each entry is the max sections for that mod_index
+                max_sections_per_time: List of Integer where each index represents the number of rooms
+                                        available at that time index
+                num_people: Tuple of (number of moderators, number of students) in the whole problem
+        """
+        self.mod_rows = [getVariableInfoForRow(mod_time_variables[mod_index]) for mod_index in component.mod_indices]
+        self.student_rows = [getVariableInfoForRow(student_time_variables[student_index])
+                             for student_index in component.student_indices]
+        self.max_sections_per_mod = [max_sections_per_mod[mod_index] for mod_index in component.mod_indices]
+        self.max_sections_per_time = max_sections_per_time
+        self.num_people = num_people
+
+    def numVariables(self):
+        return sum(sum(1 for variable_info in row if variable_info is not None)
+                   for row in (self.mod_rows + self.student_rows))
+
+    def createModel(self):
+        """
+            Returns:
+                (model, mod_time_variables, student_time_variables) like getModelFromInputFiles, but only with the
+                 people of the component
+        """
+        model = cp_model.CpModel()
+        mod_time_variables = [createVariablesForRow(model, row, 'mod') for row in self.mod_rows]
+        student_time_variables = [createVariablesForRow(model, row, 'student') for row in self.student_rows]
+        return model, mod_time_variables, student_time_variables
+
+def getVariableInfoForRow(time_variables_for_person):
+    """
+        Returns:
+            List with None for each impossible time and otherwise a tuple of the PersonTimeVariableWrapper
+             arguments other than the CP variable itself
+    """
+    return [None if person_time_var_wrapper is None else
+            (person_time_var_wrapper.net_id, person_time_var_wrapper.time_index,
+             person_time_var_wrapper.is_preferred_time, person_time_var_wrapper.is_impossible_time,
+             person_time_var_wrapper.day_of_week, person_time_var_wrapper.person_index,
+             person_time_var_wrapper.type_net_ids, person_time_var_wrapper.allows_contiguous_sections)
+            for person_time_var_wrapper in time_variables_for_person]
+
+def createVariablesForRow(model, row, cp_var_prefix):
+    """
+        Returns:
+            List of PersonTimeVariableWrapper with a new CP variable for every entry of a row from
+             getVariableInfoForRow, named like setupConstraintProgrammingVariables names them
+    """
+    time_variables_for_person = []
+    for variable_info in row:
+        if variable_info is None:
+            time_variables_for_person.append(None)
+            continue
+
+        (net_id, time_index, is_preferred_time, is_impossible_time, day_of_week, person_index, type_net_ids,
+         allows_contiguous_sections) = variable_info
+        cp_var_name = (cp_var_prefix + str(person_index) + ':time_' + str(time_index))
+        constraint_programming_var = model.NewIntVar(0, len(type_net_ids), cp_var_name)
+        person_time_var_wrapper = assign_time_slots.PersonTimeVariableWrapper(net_id, time_index, is_preferred_time,
+                                                                              is_impossible_time, day_of_week,
+                                                                              constraint_programming_var,
+                                                                              person_index, type_net_ids)
+        person_time_var_wrapper.allows_contiguous_sections = allows_contiguous_sections
+        time_variables_for_person.append(person_time_var_wrapper)
+    return time_variables_for_person
+
+def findConnectedComponents(mod_time_variables, student_time_variables):
+    """
+        Finds the connected components of the graph where every moderator and student is connected to each section
+         time that is possible for them. Components share no section time, so each can be solved by itself
+
+        Args:
+            mod_time_variables: 2D List of PersonTimeVariableWrapper, if [mod_index][time_index]
+                                    is None then that time is impossible for that mod
+            student_time_variables: 2D List of PersonTimeVariableWrapper,
+                                        if [student_index][time_index] is None then
+                                        that time is impossible for that student
+
+        Returns:
+            List of ConnectedComponent ordered by their first section time, each with people in their original
+             order. A person with no possible section times is a component by themself with no times, these come
+             last. Times nobody can be assigned to are in no component
+    """
+    num_section_times = len(mod_time_variables[0])
+    parent_time = list(range(num_section_times))
+
+    def findRootTime(time_index):
+        while parent_time[time_index] != time_index:
+            parent_time[time_index] = parent_time[parent_time[time_index]]
+            time_index = parent_time[time_index]
+        return time_index
+
+    def getPossibleTimes(time_variables_for_person):
+        return [time_index for time_index in range(num_section_times)
+                if time_variables_for_person[time_index] is not None]
+
+    # Join every section time that the same person could be assigned to
+    for time_variables_for_person in (mod_time_variables + student_time_variables):
+        possible_times = getPossibleTimes(time_variables_for_person)
+        for time_index in possible_times[1:]:
+            parent_time[findRootTime(time_index)] = findRootTime(possible_times[0])
+
+    component_for_root_time = {}
+    components_without_times = []
+    for (person_time_variables, is_mod_data) in ((mod_time_variables, True), (student_time_variables, False)):
+        for person_index in range(len(person_time_variables)):
+            possible_times = getPossibleTimes(person_time_variables[person_index])
+            if len(possible_times) == 0:
+                component = ConnectedComponent([], [], [])
+                components_without_times.append(component)
+            else:
+                root_time = findRootTime(possible_times[0])
+                if root_time not in component_for_root_time:
+                    component_for_root_time[root_time] = ConnectedComponent([], [], [])
+                component = component_for_root_time[root_time]
+
+            if is_mod_data:
+                component.mod_indices.append(person_index)
+            else:
+                component.student_indices.append(person_index)
+
+    for time_index in range(num_section_times):
+        root_time = findRootTime(time_index)
+        if root_time in component_for_root_time:
+            component_for_root_time[root_time].time_indices.append(time_index)
+
+    components = sorted(component_for_root_time.values(), key=lambda component: component.time_indices[0])
+    return components + components_without_times
+
+def batchComponentProblems(component_problems):
+    """
+        Groups component problems so that no group is smaller than config.min_component_batch_variables
+         person/time variables unless there is nothing left to add to it, so that process start up and
+         communication does not dominate the solve time of small components
+
+        Args:
+            component_problems: List of ComponentProblem
+
+        Returns:
+            List of List of Integer where each entry is the indices into component_problems of one batch, largest
+             batches first
+    """
+    batches = []
+    current_batch = []
+    current_batch_variables = 0
+    # Smallest components are batched first so the largest components get their own process
+    for problem_index in sorted(range(len(component_problems)),
+                                key=lambda problem_index: component_problems[problem_index].numVariables()):
+        current_batch.append(problem_index)
+        current_batch_variables += component_problems[problem_index].numVariables()
+        if current_batch_variables >= config.min_component_batch_variables:
+            batches.append(current_batch)
+            current_batch = []
+            current_batch_variables = 0
+    if len(current_batch) > 0:
+        batches.append(current_batch)
+
+    batches.reverse()
+    return batches
+
+def getConfigValues():
+    """
+        Returns:
+            Dictionary of every config option name to its current value, so that a worker process uses the same
+             config even when it does not share memory with this process
+    """
+    return {option_name : value for (option_name, value) in vars(config).items()
+            if not option_name.startswith('_') and not isinstance(value, types.ModuleType)}
+
+def solveComponentBatch(component_problems, config_values):
+    """
+        Solves each component problem of a batch one after another, this is run in a worker process
+
+        Args:
+            component_problems: List of ComponentProblem
+            config_values: Dictionary from getConfigValues in the process which created the problems
+
+        Returns:
+            List of (status, objective value or None, mods_assigned_to_times, students_assigned_to_times) for each
+             component problem, the assignments are None unless a solution was found
+    """
+    for (option_name, value) in config_values.items():
+        setattr(config, option_name, value)
+
+    results = []
+    for component_problem in component_problems:
+        if len(component_problem.mod_rows) == 0 or len(component_problem.student_rows) == 0:
+            # Students with no moderator at any of their times, or moderators with no students for any section
+            results.append((cp_model.INFEASIBLE, None, None, None))
+            continue
+
+        (model, mod_time_variables, student_time_variables) = component_problem.createModel()
+        assign_time_slots.addAllConstraints(model, mod_time_variables, student_time_variables,
+                                            component_problem.max_sections_per_mod,
+                                            component_problem.max_sections_per_time)
+        (status, solver, _, _) = assign_time_slots.solveModel(model, mod_time_variables, student_time_variables,
+                                                              component_problem.max_sections_per_mod,
+                                                              num_people=component_problem.num_people)
+
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            (mods_assigned_to_times, students_assigned_to_times) = \
+                assign_time_slots.extractModAndStudentAssignments(solver, mod_time_variables,
+                                                                  student_time_variables)
+            results.append((status, solver.ObjectiveValue(), mods_assigned_to_times, students_assigned_to_times))
+        else:
+            results.append((status, None, None, None))
+    return results
+
+def solveComponents(components, mod_time_variables, student_time_variables, max_sections_per_mod,
+                    max_sections_per_time):
+    """
+        Solves every connected component separately, in parallel in a process pool with
+         config.num_component_processes processes when there is more than one batch of components
+
+        Args:
+            components: List of ConnectedComponent from findConnectedComponents
+            mod_time_variables: 2D List of PersonTimeVariableWrapper, if [mod_index][time_index]
+                                    is None then that time is impossible for that mod
+            student_time_variables: 2D List of PersonTimeVariableWrapper,
+                                        if [student_index][time_index] is None then
+                                        that time is impossible for that student
+            max_sections_per_mod: List of Integer, each entry is the max sections for that mod_index
+            max_sections_per_time: List of Integer where each index represents the number of rooms
+                                    available at that time index
+
+        Returns:
+            List of the solveComponentBatch result for each component, in the same order as components
+    """
+    num_people = (sum(numPeopleInRow(row) for row in mod_time_variables),
+                  sum(numPeopleInRow(row) for row in student_time_variables))
+    component_problems = [ComponentProblem(component, mod_time_variables, student_time_variables,
+                                           max_sections_per_mod, max_sections_per_time, num_people)
+                          for component in components]
+    batches = batchComponentProblems(component_problems)
+    print('Num component batches:', len(batches))
+
+    config_values = getConfigValues()
+    batch_problems = [[component_problems[problem_index] for problem_index in batch] for batch in batches]
+    if len(batches) == 1:
+        batch_results = [solveComponentBatch(batch_problems[0], config_values)]
+    else:
+        num_processes = config.num_component_processes
+        if num_processes is None:
+            num_processes = os.cpu_count()
+        with ProcessPoolExecutor(max_workers=min(num_processes, len(batches))) as executor:
+            batch_results = list(executor.map(solveComponentBatch, batch_problems,
+                                              [config_values] * len(batches)))
+
+    results = [None] * len(components)
+    for (batch, results_for_batch) in zip(batches, batch_results):
+        for (problem_index, result) in zip(batch, results_for_batch):
+            results[problem_index] = result
+    return results
+
+def mergeComponentResults(results, num_section_times):
+    """
+        Args:
+            results: List of the solveComponentBatch result for each component
+            num_section_times: Integer for the number of section times in the whole problem
+
+        Returns:
+            status: INFEASIBLE if any component is infeasible, otherwise the least certain status of any component
+            objective: Float for the sum of the objective values of every component, or None if any component has
+                        no solution
+            mods_assigned_to_times: List of List of Strings, each entry is all net IDs of the moderators assigned
+                                        to that time index across every component
+            students_assigned_to_times: List of List of Strings, each entry is all net IDs of the students assigned
+                                        to that time index across every component
+    """
+    statuses = [result[0] for result in results]
+    if cp_model.INFEASIBLE in statuses:
+        status = cp_model.INFEASIBLE
+    elif any(status not in (cp_model.OPTIMAL, cp_model.FEASIBLE) for status in statuses):
+        status = next(status for status in statuses if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE))
+    elif cp_model.FEASIBLE in statuses:
+        status = cp_model.FEASIBLE
+    else:
+        status = cp_model.OPTIMAL
+
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return status, None, None, None
+
+    # Every section time belongs to at most one component, so the assignments never overlap
+    mods_assigned_to_times = [[] for _ in range(num_section_times)]
+    students_assigned_to_times = [[] for _ in range(num_section_times)]
+    for (_, _, component_mods_assigned_to_times, component_students_assigned_to_times) in results:
+        for time_index in range(num_section_times):
+            mods_assigned_to_times[time_index] += component_mods_assigned_to_times[time_index]
+            students_assigned_to_times[time_index] += component_students_assigned_to_times[time_index]
+
+    objective = sum(result[1] for result in results)
+    return status, objective, mods_assigned_to_times, students_assigned_to_times
@@ -77,6 +77,22 @@ contiguous_sections_percentage = 1.0
 # Greedy sections will never be assigned using yellow times, and students may still be added to greedy sections by
 #  a later step of the constraint programming optimizer.
 num_sections_to_greedy_preselect = 0
+# Pinning greedy sections with constraints can make the final assignment worse, or even make the problem infeasible.
+#  greedy_preselect_mode controls how greedy sections are used:
+#  'constraints' adds the num_sections_to_greedy_preselect greedy sections to the model as constraints
+#  'hint' extends the greedy sections into an assignment of as many students and moderators as possible, and gives it
+#   to the solver as a starting point (hint). This never changes the optimal solution, only how fast it is found
+#  'both' adds the greedy sections as constraints and also hints the rest of the greedy assignment
+greedy_preselect_mode = 'constraints'
+
+# Doctoring the data, see usage_instructions.txt, removes the not preferred "(OK)" times of the students who answered
+#  the Doodle poll first, which removes the variables for those times while keeping first come first serve.
+#  Setting num_students_without_not_preferred_times to N does this for the first N students of the student Doodle poll
+#  when it is read, the same as running scripts/remove_yellow_times.py with N but without editing the CSV.
+# python3 data_doctoring.py searches for the smallest N, along with the contiguous_sections_percentage,
+#  num_sections_to_greedy_preselect and impossible_time_percentage degrading the assignment the least, which solves
+#  within a time budget
+num_students_without_not_preferred_times = 0
 
 # When True, allows a partial assignment to be generated by considering times marked as impossible
 # Impossible times will only be selected when a full assignment is impossible without them
@@ -86,6 +102,50 @@ num_sections_to_greedy_preselect = 0
 allow_impossible_times = False
 impossible_time_percentage = 0.05
 
+# When True, instead of failing on an infeasible input, every constraint gets a heavily penalized slack variable so
+#  that a partial assignment is always found quickly: each student may be left without a section, each moderator may
+#  be over their max sections or under their min sections, and each time may have too few or too many students for
+#  its moderators. The rooms available at each time are never exceeded. Exactly which people and times needed
+#  relaxing is printed. While anything needs relaxing, the impossible times of the people the solution shows to be
+#  stuck (students without a section, moderators over or under their sections, and everyone in a time with too few
+#  or too many students) are added and the model is solved again from the previous solution
+# This replaces the random selection of allow_impossible_times, impossible times are only added where they may help.
+#  Students a time can not hold are left out of the returned assignment. The weighted objective function is always
+#  used, and greedy preselection, decomposition, the two phase engine and large neighbourhood search are skipped
+use_slack_relaxation = False
+
+# When True, the model is first solved with only the preferred ('OK') times of everyone, with the slack variables of
+#  use_slack_relaxation above, which is much smaller and faster to solve. This does the "data doctoring" described in
+#  usage_instructions.txt automatically. While the solution still needs slack, the not preferred ('(OK)') times of
+#  everyone the solution shows to be stuck, and every not preferred time at times with too few or too many students,
+#  are added and the model is solved again starting from the previous solution. If that adds nothing new, every not
+#  preferred time is added. Impossible times are never added
+# The result is only optimal when progressive_activation_prove_optimal is True, then a final solve adds every
+#  remaining not preferred time and proves the assignment is optimal for the whole model. Otherwise a not preferred
+#  time that was never added may still give a better assignment, for example more contiguous sections, and each
+#  solve may also have stopped early as described below
+# use_slack_relaxation takes precedence, so this is ignored with a warning when both are True
+# Proving that the fewest slack was used is slow when it can not be 0, so every solve except the final proof stops
+#  once no better solution was found for progressive_activation_no_improvement_seconds, or None to solve each one
+#  until config.early_stop_no_improvement_seconds or optimality
+use_progressive_activation = False
+progressive_activation_prove_optimal = False
+progressive_activation_no_improvement_seconds = 1
+
+# When True, how long the CP solver will take to solve the single weighted CP model is predicted right after the model
+#  is built, so that a config which takes exponential time is found before waiting on it. The prediction comes from
+#  features of the model (the number of person/time variables, decision variables and contiguous section variables,
+#  the fraction of preferred and not preferred times, the rooms per time, and how many more student seats there are
+#  than students), fitted on every run in benchmark_history_path made by python3 benchmark_suite.py run
+# A warning is printed when the prediction is over predicted_solve_seconds_limit, and when refuse_slow_predicted_solves
+#  is True the run fails instead of solving. The prediction is only as good as the benchmark history it is fitted on
+# When dry_run is True, assign_sections.py only builds the model and prints its features and predicted solve time
+predict_solve_time = False
+predicted_solve_seconds_limit = 60
+refuse_slow_predicted_solves = False
+benchmark_history_path = 'benchmark_history.json'
+dry_run = False
+
 
 # When False, allows the constraint programming solver to be terminated early by sending SIGINT
 # Terminating the solver early will cause the rest of the program to use the most optimal assignment that
@@ -95,3 +155,188 @@ impossible_time_percentage = 0.05
 # Be very careful about using this with allow_impossible_times set to True as early section assignments
 #  will very likely contain times that are impossible for students or moderators
 only_allow_optimal_solutions=True
+
+# Parameters handed to the CP-SAT solver, each of these may also be overridden from the command line, see
+#  python3 assign_sections.py --help
+# num_search_workers is the number of parallel search threads to use, 0 lets the solver use every available core
+# max_time_in_seconds stops the solver after this much wall time, None for no limit. A solve stopped by this limit
+#  is usually not optimal, so only_allow_optimal_solutions must be False to use the solution it found
+# relative_gap_limit and absolute_gap_limit stop the solver once the gap between the best solution found and the
+#  best possible objective is below the limit. CP-SAT does not always stop as soon as the gap is below the limit, so
+#  they are also checked at every solution found, see solver_progress.getEarlyStopReason. A solution they stop at
+#  is accepted even with only_allow_optimal_solutions=True, see the early stopping rules below
+# random_seed makes the solver's search deterministic for a fixed input and number of search workers
+# When deterministic_interleave_search is True, multiple search workers are interleaved in a deterministic
+#  order, so runs with the same random_seed give the same assignment on any machine at some cost of speed
+num_search_workers = 0
+max_time_in_seconds = None
+relative_gap_limit = 0.0
+absolute_gap_limit = 0.0
+random_seed = 1
+deterministic_interleave_search = False
+
+# Rules for stopping the CP-SAT search early with the best solution found so far, a controlled replacement for
+#  sending SIGINT. A solve stopped by one of these rules is accepted even with only_allow_optimal_solutions=True
+# early_stop_no_improvement_seconds stops once no better solution has been found for this many seconds after the
+#  first solution, None to never stop for this
+# early_stop_target_objective stops once a solution with at most this objective value is found, None to never stop
+#  for this. It is ignored by the stages of use_lexicographic_objective
+# To stop once the gap to the best possible objective is small enough, use relative_gap_limit or absolute_gap_limit
+#  above, which are checked at every solution found and are accepted the same way
+# Why the solver stopped, when it last improved and the gap left are printed after solving. When
+#  solver_timeline_csv_path is not None, the time, objective, best bound and gap of every solution found is written
+#  to that CSV, which shows whether waiting longer would likely have helped
+early_stop_no_improvement_seconds = None
+early_stop_target_objective = None
+solver_timeline_csv_path = None
+
+# When True, the best assignment found so far by the weighted objective function is written to checkpoint_path while
+#  solving, so a long solve which is stopped or crashes does not lose its progress. The solution callback only copies
+#  the solution out of the solver, the file is written by a background thread at most once every
+#  checkpoint_interval_seconds, always with the newest solution, and once more when the solve ends. Every write
+#  replaces the file atomically. When checkpoint_path is None, it is output_csv_path ending in .checkpoint.json
+# When resume_from_checkpoint is True (--resume), the assignment in checkpoint_path is given to the solver as a hint
+#  and its objective value becomes an upper bound on the objective, so a restarted run begins where the previous one
+#  stopped. The bound is only added if the checkpoint was made for the same input files and model config options
+#  (see MODEL_CONFIG_OPTIONS in solve_cache.py), otherwise the assignment is only a hint. Resuming also keeps writing
+#  checkpoints. Neither is done with use_lexicographic_objective, large neighbourhood search, the two phase engine,
+#  or when decomposing into components
+checkpoint_incumbents = False
+checkpoint_path = None
+checkpoint_interval_seconds = 10
+resume_from_checkpoint = False
+
+# When True, the constraint that every section time has an appropriate number of students for its number of
+#  moderators is stated directly as min * (mods in time) <= (students in time) <= max * (mods in time)
+# When False, the original formulation is used which creates a decision variable for every possible number of
+#  moderators and students in each section time. Both give identical optimal solutions, but the compact version
+#  adds no variables to the system and is considerably faster to solve on spring semester sized data
+use_compact_students_per_section_time_encoding = True
+
+# When True, students who gave identical Doodle poll responses are grouped into a single type of student, and
+#  moderators with identical responses and max sections are grouped into a single type of moderator. Each type gets
+#  one variable per time counting how many of its people are assigned there instead of one variable per person,
+#  which removes the symmetry between interchangeable people that the solver would otherwise have to explore
+# People are only grouped when they also have the same objective function coefficient, so the optimal objective is
+#  unchanged for every objective function. Moderators are not grouped when contiguous sections are preferred
+# The individual assignment is filled back in from the type counts after solving
+# num_sections_to_greedy_preselect is ignored when this is True, and impossible times allowed by
+#  allow_impossible_times are randomly selected per type rather than per person
+aggregate_identical_people = False
+
+# When True, instead of combining every part of the objective function into one weighted sum with large
+#  multipliers, each part is optimized by itself in priority order:
+#  1. Minimize the number of impossible times used (only with allow_impossible_times)
+#     Then minimize the number of people moved from their previous assignment (only with previous_assignment_csv_path)
+#  2. Maximize the number of sections created (only with maximize_number_of_sections)
+#  3. Minimize the cost of not preferred times, weighted by objective_function
+#  4. Maximize the number of contiguous sections (only with the prefer_contiguous_sections options)
+# Each stage fixes the value found by the previous stages and starts from the previous stage's solution.
+# The solver options above, including max_time_in_seconds, apply to every stage separately
+use_lexicographic_objective = False
+
+# Mid-semester adds and drops: set previous_assignment_csv_path to a section assignment CSV previously written to
+#  output_csv_path, and point the Doodle poll paths above at the updated polls. Instead of assigning everyone from
+#  scratch, only people who were added, dropped, or whose availability changed are re-solved, along with whoever
+#  shares a time with them, and moving anyone away from their previous time is heavily penalized
+# A person's availability is considered changed when their row differs from the previous Doodle polls if these are
+#  given, otherwise only when a time they were previously assigned is no longer possible for them. A moderator is
+#  also changed when their row differs from previous_mod_max_sections_csv_path if it is given, or when they were
+#  previously assigned more sections than mod_max_sections_csv_path now allows
+# The times allowed to change are those previously assigned to a changed or dropped person, and the times a changed
+#  person is likely to move to: the times whose preference changed, or their preferred times without previous polls
+# incremental_neighbourhood_radius widens the times allowed to change by this many adjacent time indices. It is
+#  widened automatically by one at a time if no assignment exists, and to every time if nothing is known to have
+#  changed, failing with INFEASIBLE if even that has no assignment
+# Everyone whose assignment changed is written to incremental_changes_csv_path as
+#  [net ID],[student or mod],[previous assignment],[new assignment]
+previous_assignment_csv_path = None
+previous_mod_doodle_poll_csv_path = None
+previous_student_doodle_poll_csv_path = None
+previous_mod_max_sections_csv_path = None
+incremental_neighbourhood_radius = 0
+incremental_changes_csv_path = 'assignment_changes.csv'
+
+# When True, the moderators, students, and section times are split into groups which share no section time with
+#  each other, such as a weekday that only some people can make. Each group is solved by itself in a pool of
+#  num_component_processes processes (None for one per CPU) and the results are combined into one assignment
+# Groups with fewer than min_component_batch_variables person/time variables are solved together in one process
+#  so that starting processes does not take longer than solving them
+# The optimal objective is unchanged, but different optimal assignments may be picked. This is ignored when
+#  greedy preselecting sections, and contiguous_sections_percentage below 1.0 samples differently per group
+decompose_into_components = False
+num_component_processes = None
+min_component_batch_variables = 2000
+
+# When True, a few conditions every assignment must satisfy are checked before running the solver, such as every
+#  student fitting into the rooms and moderators available at their times. If one fails, the times, moderators, or
+#  students causing it are printed and the program stops immediately instead of waiting for the solver to prove that
+#  no assignment exists, which can take minutes on spring semester sized data
+check_feasibility_before_solving = True
+
+# When True, reductions which are obvious from the Doodle polls are applied before the model is built. Times where
+#  no section can ever happen, because too few moderators, students, or rooms are available, have every variable
+#  fixed to 0, the max sections at each time is lowered to what the available people can fill, students with
+#  only one possible time are fixed to it, and moderators with max sections 1 get no contiguous section variables
+# The optimal objective is unchanged and the number of variables fixed and bounds tightened is printed.
+#  This is skipped when allow_impossible_times is True, as impossible times may then still be assigned
+presolve_input_data = True
+
+# When True, the moderator times are chosen by a smaller CP model which only knows how many students can make each
+#  time, and then the students are placed into those sections with a minimum cost flow, which finds the best
+#  placement of students for the chosen moderator times very quickly. If the students do not fit into the chosen
+#  sections, a constraint ruling them out is added and the moderator times are chosen again
+# The moderator times are chosen with an estimate of the least the students at each time can cost. Whenever the
+#  students cost more than estimated, those sections are ruled out and the moderator times are chosen again, keeping
+#  the best assignment found, until the estimate shows nothing better is possible and the assignment is optimal
+# two_phase_max_iterations limits how many times the moderator times are chosen. If it runs out first, the best
+#  assignment found is not proven optimal, so only_allow_optimal_solutions must be False to use it
+# Greedy preselection, decompose_into_components, and use_lexicographic_objective are ignored when this is True
+use_two_phase_engine = False
+two_phase_max_iterations = 10
+
+# When True, a first solution is found quickly and then improved by large neighbourhood search: a small part of the
+#  assignment is freed and re-solved with everything else fixed, over and over, until lns_time_budget_seconds of wall
+#  time have passed. This gives a good assignment in minutes on spring semester sized data where proving the optimal
+#  assignment may take days. The remaining gap to the best proven bound is printed at the end
+# Each neighbourhood is one weekday (only with a section times file), lns_neighbourhood_num_times random times, or
+#  the times taught by lns_neighbourhood_num_mods random moderators, and is solved for at most
+#  lns_neighbourhood_seconds. The first solution may take up to lns_initial_solution_seconds
+# The result is usually not proven optimal, so only_allow_optimal_solutions must be False to use it.
+#  use_lexicographic_objective is ignored when this is True, and it is not used for problems which
+#  decompose_into_components splits into more than one group
+use_large_neighbourhood_search = False
+lns_time_budget_seconds = 300
+lns_initial_solution_seconds = 60
+lns_neighbourhood_seconds = 5
+lns_neighbourhood_num_times = 3
+lns_neighbourhood_num_mods = 3
+
+# When True, assign_sections.py keeps a cache in solve_cache_directory so that rerunning it does not redo work:
+#  - With the same input CSV files and config options, the assignment of the earlier run is reused without solving
+#  - When only the solver options changed (num_search_workers, max_time_in_seconds, etc.), the CP model is read from
+#    the cache instead of being built again and then solved the same way as without the cache. This is not done with
+#    use_two_phase_engine, decompose_into_components, use_slack_relaxation or use_progressive_activation, which build
+#    their own models
+#  - Options which only change the output, like output_csv_path and mod_net_id_to_name_csv_path, never cause a solve
+# Entries are named by a hash of the input file contents and the config options, so editing an input file simply
+#  makes a new entry. The least recently used entries are removed once the cache is over solve_cache_max_megabytes
+# The cache can be listed and pruned with python3 solve_cache.py inspect / prune / clear
+use_solve_cache = False
+solve_cache_directory = '.solve_cache'
+solve_cache_max_megabytes = 512
+
+# When True, every phase of a run (reading the CSV files, creating variables, each constraint family, the objective,
+#  greedy preselection, solving, extraction and section creation) is timed, counts like the number of variables are
+#  recorded, and the CP-SAT statistics of every solve (presolve time, conflicts, branches, bound) are kept. A summary
+#  table is printed when assign_sections.py finishes
+# instrumentation_output_path is where the recorded run is written: a path ending in .jsonl gets one JSON line per
+#  event as it happens, which also survives a run that is killed, and any other path gets one JSON document at the end
+# instrumentation_trace_memory records the peak memory of every phase with tracemalloc, which makes Python code
+#  noticeably slower, so only use it when looking for memory problems
+enable_instrumentation = False
+instrumentation_output_path = None
+instrumentation_trace_memory = False
+
+# When True, the line printed for every solution found and the counts printed while building the model are left out
+quiet_mode = False
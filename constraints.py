@@ -1,5 +1,23 @@
 import config
+import instrumentation
+from person_time_index import getPersonTimeIndex
 
+def numPeopleInRow(time_variables_for_person):
+    """
+        Args:
+            time_variables_for_person: List of PersonTimeVariableWrapper for one row of a 2D List of
+                                        PersonTimeVariableWrapper, entries are None for impossible times
+
+        Returns:
+            Integer for the number of interchangeable people the row represents, which is always 1 unless
+             config.aggregate_identical_people is enabled
+    """
+    for person_time_var_wrapper in time_variables_for_person:
+        if person_time_var_wrapper is not None:
+            return len(person_time_var_wrapper.type_net_ids)
+    return 1
+
+@instrumentation.timed('constraints: max sections per mod')
 def addMaxSectionsPerModConstraint(model, mod_time_variables, max_sections_per_mod):
     """
         Adds the constraint that the total number of section times a mod is assigned must be
@@ -10,21 +28,22 @@ def addMaxSectionsPerModConstraint(model, mod_time_variables, max_sections_per_m
             mod_time_variables: 2D List of PersonTimeVariableWrapper, if [mod_index][time_index]
                                     is None then that time is impossible for that mod
             max_sections_per_mod: List of Integer, each entry is the max sections for that mod_index
+
+        When a mod_index represents a type of N interchangeable moderators, the bounds are multiplied by N
     """
-    num_mods = len(mod_time_variables)
-    num_section_times = len(mod_time_variables[0])
+    mod_time_index = getPersonTimeIndex(mod_time_variables)
 
-    for mod_index in range(num_mods):
-        all_time_vars_for_mod = sum([mod_time_variables[mod_index][time_index].variable
-                                     for time_index in range(num_section_times)
-                                     if mod_time_variables[mod_index][time_index] is not None])
+    for mod_index in range(len(mod_time_variables)):
+        all_time_vars_for_mod = sum(mod_time_index.variablesForPerson(mod_index))
+        num_mods_in_row = numPeopleInRow(mod_time_variables[mod_index])
 
         if config.assign_exact_max_sections:
-            model.Add(all_time_vars_for_mod == max_sections_per_mod[mod_index])
+            model.Add(all_time_vars_for_mod == max_sections_per_mod[mod_index] * num_mods_in_row)
         else:
-            model.Add(1 <= all_time_vars_for_mod)
-            model.Add(all_time_vars_for_mod <= max_sections_per_mod[mod_index])
+            model.Add(num_mods_in_row <= all_time_vars_for_mod)
+            model.Add(all_time_vars_for_mod <= max_sections_per_mod[mod_index] * num_mods_in_row)
 
+@instrumentation.timed('constraints: max sections per time')
 def addMaxSectionsPerSectionTimeConstraint(model, mod_time_variables, max_sections_per_time):
     """
         Adds the constraint that the number of moderators assigned to a section time must be
@@ -38,15 +57,13 @@ def addMaxSectionsPerSectionTimeConstraint(model, mod_time_variables, max_sectio
             max_sections_per_time: List of Integer where each index represents the number of rooms
                                     available at that time index
     """
-    num_mods = len(mod_time_variables)
-    num_section_times = len(mod_time_variables[0])
+    mod_time_index = getPersonTimeIndex(mod_time_variables)
 
-    for time_index in range(num_section_times):
-        all_mod_vars_for_time = sum([mod_time_variables[mod_index][time_index].variable
-                                     for mod_index in range(num_mods)
-                                     if mod_time_variables[mod_index][time_index] is not None])
+    for time_index in range(mod_time_index.num_section_times):
+        all_mod_vars_for_time = sum(mod_time_index.variablesAtTime(time_index))
         model.Add(all_mod_vars_for_time <= max_sections_per_time[time_index])
 
+@instrumentation.timed('constraints: sections per student')
 def addSectionsPerStudentConstraint(model, student_time_variables):
     """
         Adds the constraint that the number of sections assigned to a student must be exactly 1
@@ -56,17 +73,81 @@ def addSectionsPerStudentConstraint(model, student_time_variables):
             student_time_variables: 2D List of PersonTimeVariableWrapper,
                                         if [student_index][time_index] is None then
                                         that time is impossible for that student
+
+        When a student_index represents a type of N interchangeable students, the sum must instead be exactly N
     """
-    num_students = len(student_time_variables)
-    num_section_times = len(student_time_variables[0])
+    student_time_index = getPersonTimeIndex(student_time_variables)
 
-    for student_index in range(num_students):
-        all_student_vars_for_time = sum([student_time_variables[student_index][time_index].variable
-                                         for time_index in range(num_section_times)
-                                         if student_time_variables[student_index][time_index] is not None])
-        model.Add(all_student_vars_for_time == 1)
+    for student_index in range(len(student_time_variables)):
+        all_student_vars_for_time = sum(student_time_index.variablesForPerson(student_index))
+        model.Add(all_student_vars_for_time == numPeopleInRow(student_time_variables[student_index]))
 
+@instrumentation.timed('constraints: students per section time')
 def addStudentsPerSectionTimeConstraint(model, mod_time_variables, student_time_variables, max_sections_for_times):
+    """
+        Adds the constraint that the number of students in a section time must be an appropriate count for the
+            number of moderators assigned to that time, using the encoding specified in the config file
+
+        Args:
+            model: The CpModel object that represents the constraints of the problem
+            mod_time_variables: 2D List of PersonTimeVariableWrapper, if [mod_index][time_index]
+                                    is None then that time is impossible for that mod
+            student_time_variables: 2D List of PersonTimeVariableWrapper,
+                                        if [student_index][time_index] is None then
+                                        that time is impossible for that student
+            max_sections_for_times: List of Integer where each index represents the number of rooms
+                                    available at that time index
+    """
+    if config.use_compact_students_per_section_time_encoding:
+        addCompactStudentsPerSectionTimeConstraint(model, mod_time_variables, student_time_variables,
+                                                   max_sections_for_times)
+    else:
+        addDecisionVariableStudentsPerSectionTimeConstraint(model, mod_time_variables, student_time_variables,
+                                                            max_sections_for_times)
+
+def addCompactStudentsPerSectionTimeConstraint(model, mod_time_variables, student_time_variables,
+                                               max_sections_for_times):
+    """
+        Compact version of addDecisionVariableStudentsPerSectionTimeConstraint which adds no new variables
+
+        For X mods in a section time the number of students must be in [min * X, max * X], and the union of
+            these ranges over every possible X is exactly the set of (mods, students) pairs satisfying
+            min * sum(mod_vars) <= sum(student_vars) <= max * sum(mod_vars)
+        Stating this directly as two linear constraints per section time gives the solver the same feasible
+            set without any decision variables or OnlyEnforceIf chains to presolve and branch on
+
+        Args:
+            model: The CpModel object that represents the constraints of the problem
+            mod_time_variables: 2D List of PersonTimeVariableWrapper, if [mod_index][time_index]
+                                    is None then that time is impossible for that mod
+            student_time_variables: 2D List of PersonTimeVariableWrapper,
+                                        if [student_index][time_index] is None then
+                                        that time is impossible for that student
+            max_sections_for_times: List of Integer where each index represents the number of rooms
+                                    available at that time index
+    """
+    mod_time_index = getPersonTimeIndex(mod_time_variables)
+    student_time_index = getPersonTimeIndex(student_time_variables, mod_time_index.num_section_times)
+
+    for time_index in range(mod_time_index.num_section_times):
+        mods_in_time = mod_time_index.variablesAtTime(time_index)
+        students_in_time = student_time_index.variablesAtTime(time_index)
+
+        if (len(mods_in_time) == 0) and (len(students_in_time) == 0):
+            # Nobody can make this time, so there is nothing to constrain
+            continue
+        elif (len(mods_in_time) == 0) or (len(students_in_time) == 0):
+            # This time index should never allow a section
+            model.Add(sum(mods_in_time) == 0)
+            model.Add(sum(students_in_time) == 0)
+            continue
+
+        model.Add(sum(mods_in_time) <= max_sections_for_times[time_index])
+        model.Add(config.min_students_per_section * sum(mods_in_time) <= sum(students_in_time))
+        model.Add(sum(students_in_time) <= config.max_students_per_section * sum(mods_in_time))
+
+def addDecisionVariableStudentsPerSectionTimeConstraint(model, mod_time_variables, student_time_variables,
+                                                        max_sections_for_times):
     """
         This is where things get complicated and why linear programming cannot solve the system as a whole
         A little about constraint programming: It's an NP hard problem, so on some level it is just trying
@@ -96,22 +177,20 @@ def addStudentsPerSectionTimeConstraint(model, mod_time_variables, student_time_
             max_sections_for_times: List of Integer where each index represents the number of rooms
                                     available at that time index
     """
-    num_mods = len(mod_time_variables)
-    num_students = len(student_time_variables)
-    num_section_times = len(mod_time_variables[0])
+    mod_time_index = getPersonTimeIndex(mod_time_variables)
+    student_time_index = getPersonTimeIndex(student_time_variables, mod_time_index.num_section_times)
     num_decision_vars = 0
 
-    for time_index in range(num_section_times):
+    for time_index in range(mod_time_index.num_section_times):
         max_sections_for_time = max_sections_for_times[time_index]
 
-        mods_in_time = [mod_time_variables[mod_index][time_index].variable
-                            for mod_index in range(num_mods)
-                            if mod_time_variables[mod_index][time_index] is not None]
-        students_in_time = [student_time_variables[student_index][time_index].variable
-                            for student_index in range(num_students)
-                            if student_time_variables[student_index][time_index] is not None]
+        mods_in_time = mod_time_index.variablesAtTime(time_index)
+        students_in_time = student_time_index.variablesAtTime(time_index)
 
-        if (len(mods_in_time) == 0) or (len(students_in_time) == 0):
+        if (len(mods_in_time) == 0) and (len(students_in_time) == 0):
+            # Nobody can make this time, so there is nothing to constrain
+            continue
+        elif (len(mods_in_time) == 0) or (len(students_in_time) == 0):
             # This time index should never allow a section
             model.Add(sum(mods_in_time) == 0)
             model.Add(sum(students_in_time) == 0)
@@ -155,4 +234,4 @@ def addStudentsPerSectionTimeConstraint(model, mod_time_variables, student_time_
         # Ensure that exactly one of the sum(mods_in_time) decision vars is active
         model.Add(sum(num_sections_decision_vars) == 1)
 
-    print('Num decision variables: ' + str(num_decision_vars))
+    instrumentation.setCounter('decision variables', num_decision_vars, 'Num decision variables:')
@@ -1,4 +1,5 @@
 import config
+import instrumentation
 import random
 from csv_input import readSectionTimeInfo
 
@@ -15,6 +16,30 @@ def popRandomElement(list_to_pop):
     random_index = random.randint(0, (len(list_to_pop) - 1))
     return list_to_pop.pop(random_index)
 
+def getRoomOrder(rooms_in_time):
+    """
+        Args:
+            rooms_in_time: List of RoomAtTime for the rooms available at one time, this list is consumed
+
+        Returns:
+            List of String for the order rooms should be handed out in, with a room repeated once for each
+             section it can hold
+    """
+    # Need to turn [('Siebel 1112', 2), ('Siebel 1314', 1), ('Siebel 4102', 1)]
+    # into an ordering with repeats: ['Siebel 1112', 'Siebel 1314', 'Siebel 4102', 'Siebel 1112']
+    i = 0
+    room_order = []
+    while len(rooms_in_time) > 0:
+        i = i % len(rooms_in_time)
+        room_order.append(rooms_in_time[i].name)
+        rooms_in_time[i].max_sections -= 1
+        if rooms_in_time[i].max_sections <= 0:
+            del rooms_in_time[i]
+            i -= 1
+        i += 1
+    return room_order
+
+@instrumentation.timed('section creation')
 def assignSectionsFromSectionTimes(mods_assigned_to_times, students_assigned_to_times):
     """
         Args:
@@ -36,18 +61,7 @@ def assignSectionsFromSectionTimes(mods_assigned_to_times, students_assigned_to_
         students_in_time = students_assigned_to_times[time_index]
         rooms_in_time = rooms_in_each_time[time_index]
 
-        # Need to turn [('Siebel 1112', 2), ('Siebel 1314', 1), ('Siebel 4102', 1)]
-        # into an ordering with repeats: ['Siebel 1112', 'Siebel 1314', 'Siebel 4102', 'Siebel 1112']
-        i = 0
-        room_order = []
-        while len(rooms_in_time) > 0:
-            i = i % len(rooms_in_time)
-            room_order.append(rooms_in_time[i].name)
-            rooms_in_time[i].max_sections -= 1
-            if rooms_in_time[i].max_sections <= 0:
-                del rooms_in_time[i]
-                i -= 1
-            i += 1
+        room_order = getRoomOrder(rooms_in_time)
 
         # Randomly assign moderators for the section time to a room
         num_sections_in_time = len(mods_in_time)
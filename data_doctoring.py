@@ -0,0 +1,271 @@
+import argparse
+import config
+import json
+import time
+from component_decomposition import getConfigValues
+from csv_input import readDoodlePreferences
+from scenario_sweep import Scenario, getScenarioName, solveScenario
+
+TRIAL_COLUMNS = ['Trial', 'Settings', 'Status', 'Objective', 'Time limit', 'Seconds']
+# Statuses where degrading the input further can never give a solution, since it only removes possible assignments
+INFEASIBLE_STATUS_NAMES = ('INFEASIBLE', 'PRECHECK_INFEASIBLE', 'MODEL_INVALID')
+# A trial shorter than this could not tell a slow setting from a fast one, so the search stops instead
+MIN_TRIAL_SECONDS = 1
+FIRST_NUM_STUDENTS_DOCTORED = 25
+GREEDY_PRESELECT_LADDER = [5, 10, 20, 40]
+CONTIGUOUS_SECTIONS_PERCENTAGE_LADDER = [0.75, 0.5, 0.25, 0.0]
+
+class Trial:
+    """ One short solve of the data doctoring search, with the settings it tried and what solving gave """
+
+    def __init__(self, trial_number, config_overrides, time_limit_seconds, scenario_result):
+        """
+            Args:
+                trial_number: Integer for the order of the trial in the search, starting at 1
+                config_overrides: Dictionary of config option name to the value it had in this trial
+                time_limit_seconds: Number for the solver time limit of this trial
+                scenario_result: scenario_sweep.ScenarioResult of solving with the settings
+        """
+        self.trial_number = trial_number
+        self.config_overrides = config_overrides
+        self.time_limit_seconds = time_limit_seconds
+        self.status_name = scenario_result.status_name
+        self.objective = scenario_result.objective
+        self.seconds = scenario_result.seconds
+
+    def isSuccess(self):
+        """
+            Returns:
+                True if the solve was optimal, or within the acceptable gap which CP-SAT also reports as optimal
+        """
+        return self.status_name == 'OPTIMAL'
+
+    def isInfeasible(self):
+        return self.status_name in INFEASIBLE_STATUS_NAMES
+
+    def isError(self):
+        return self.status_name.startswith('ERROR')
+
+    def getRow(self):
+        """
+            Returns:
+                List of the values of TRIAL_COLUMNS for this trial
+        """
+        objective = '-' if self.objective is None else round(self.objective, 3)
+        return [self.trial_number, getScenarioName(self.config_overrides), self.status_name, objective,
+                round(self.time_limit_seconds, 3), round(self.seconds, 3)]
+
+    def toJson(self):
+        return {'trial': self.trial_number, 'config_overrides': self.config_overrides, 'status': self.status_name,
+                'objective': self.objective, 'time_limit_seconds': self.time_limit_seconds, 'seconds': self.seconds}
+
+class DataDoctoringSearch:
+    """
+        Searches for the least degraded settings of the speed/quality config options which solve the input files in
+         config within a wall clock budget, by solving with short trials. See search for the strategy
+    """
+
+    def __init__(self, budget_seconds, trial_seconds, acceptable_relative_gap=0.0, resolution=5):
+        """
+            Args:
+                budget_seconds: Number for the wall clock seconds the whole search may take
+                trial_seconds: Number for the solver time limit of each trial, a setting is only fast enough if its
+                                solve finishes within this
+                acceptable_relative_gap: Float for the relative gap to the best possible objective at which a trial
+                                          counts as solved, 0 to only accept optimal solutions
+                resolution: Integer for how close the bisection of an integer option gets to the smallest value which
+                             solves in time
+        """
+        self.budget_seconds = budget_seconds
+        self.trial_seconds = trial_seconds
+        self.resolution = max(1, resolution)
+        self.base_config_values = getConfigValues()
+        self.solver_overrides = {}
+        if acceptable_relative_gap > 0:
+            self.solver_overrides['relative_gap_limit'] = acceptable_relative_gap
+        self.trials = []
+        self.start_time = None
+
+    def getRemainingSeconds(self):
+        return self.budget_seconds - (time.time() - self.start_time)
+
+    def getOptionLadders(self):
+        """
+            Returns:
+                List of (String for a config option name, List of its values from least to most degraded), in the
+                 order the options are degraded. Options which do nothing with the rest of config are left out
+        """
+        option_ladders = []
+        if config.allow_impossible_times and config.impossible_time_percentage > 0:
+            impossible_time_percentage = config.impossible_time_percentage
+            option_ladders.append(('impossible_time_percentage',
+                                   [impossible_time_percentage / 2, impossible_time_percentage / 4, 0.0]))
+        if config.prefer_contiguous_sections_preferred_times_only or config.prefer_contiguous_sections_all_possible:
+            option_ladders.append(('contiguous_sections_percentage',
+                                   [percentage for percentage in CONTIGUOUS_SECTIONS_PERCENTAGE_LADDER
+                                    if percentage < config.contiguous_sections_percentage]))
+
+        (student_net_ids, _) = readDoodlePreferences(config.student_doodle_poll_csv_path)
+        num_students_doctored = []
+        num_students = FIRST_NUM_STUDENTS_DOCTORED
+        while num_students < len(student_net_ids):
+            num_students_doctored.append(num_students)
+            num_students *= 2
+        num_students_doctored.append(len(student_net_ids))
+        option_ladders.append(('num_students_without_not_preferred_times',
+                               [num_students for num_students in num_students_doctored
+                                if num_students > config.num_students_without_not_preferred_times]))
+        option_ladders.append(('num_sections_to_greedy_preselect',
+                               [num_sections for num_sections in GREEDY_PRESELECT_LADDER
+                                if num_sections > config.num_sections_to_greedy_preselect]))
+        return [(option_name, values) for (option_name, values) in option_ladders if len(values) > 0]
+
+    def runTrial(self, config_overrides):
+        """
+            Solves the input files with the config overrides, under the trial time limit or whatever is left of the
+             budget if that is less
+
+            Returns:
+                Trial for the solve, or None if the budget has run out
+        """
+        time_limit_seconds = min(self.trial_seconds, self.getRemainingSeconds())
+        if time_limit_seconds < MIN_TRIAL_SECONDS:
+            return None
+        scenario_overrides = dict(config_overrides, **self.solver_overrides)
+        scenario_result = solveScenario(Scenario(getScenarioName(scenario_overrides), scenario_overrides),
+                                        self.base_config_values, time_limit_seconds)
+        trial = Trial(len(self.trials) + 1, dict(config_overrides), time_limit_seconds, scenario_result)
+        self.trials.append(trial)
+        print('Trial ' + '  '.join(str(value) for value in trial.getRow()))
+        return trial
+
+    def search(self):
+        """
+            Solves with config.py first, then degrades one option at a time in the order of getOptionLadders,
+             escalating through the values of its ladder until a trial solves in time. Once an integer option solves,
+             the value between the last one too slow and the one which solved is bisected down to the resolution, so
+             the fewest students or greedy sections needed are used. When every value of an option is too slow, its
+             most degraded value which did not make the input infeasible is kept while degrading the next option
+
+            Returns:
+                Dictionary of config option name to the value it needs to solve in time, or None if no setting solved
+                 within the budget or the input is infeasible. config is left as it was before the search
+        """
+        self.start_time = time.time()
+        try:
+            return self.searchOptionLadders()
+        finally:
+            for (option_name, value) in self.base_config_values.items():
+                setattr(config, option_name, value)
+
+    def searchOptionLadders(self):
+        settings = {}
+        trial = self.runTrial(settings)
+        if (trial is None) or trial.isInfeasible() or trial.isError():
+            # No option can fix an input which cannot be solved at all or fails to be read
+            return None
+        if trial.isSuccess():
+            return settings
+
+        for (option_name, values) in self.getOptionLadders():
+            last_too_slow_value = getattr(config, option_name)
+            for value in values:
+                trial = self.runTrial(dict(settings, **{option_name: value}))
+                if trial is None:
+                    return None
+                if trial.isSuccess():
+                    return self.bisectOption(settings, option_name, last_too_slow_value, value)
+                if trial.isInfeasible():
+                    break
+                last_too_slow_value = value
+            if last_too_slow_value != getattr(config, option_name):
+                settings[option_name] = last_too_slow_value
+        return None
+
+    def bisectOption(self, settings, option_name, too_slow_value, solved_value):
+        """
+            Returns:
+                The settings with the smallest value of the integer option found to solve in time, which is
+                 solved_value for options that are not integers
+        """
+        if not isinstance(solved_value, int):
+            return dict(settings, **{option_name: solved_value})
+        while solved_value - too_slow_value > self.resolution:
+            middle_value = (too_slow_value + solved_value) // 2
+            trial = self.runTrial(dict(settings, **{option_name: middle_value}))
+            if trial is None:
+                break
+            if trial.isSuccess():
+                solved_value = middle_value
+            else:
+                too_slow_value = middle_value
+        return dict(settings, **{option_name: solved_value})
+
+    def getChosenTrial(self, settings):
+        """
+            Returns:
+                The last Trial which solved with exactly the settings
+        """
+        return [trial for trial in self.trials if trial.isSuccess() and trial.config_overrides == settings][-1]
+
+    def printReport(self, settings):
+        """ Prints every trial, then the chosen settings and how to solve with them again """
+        rows = [[str(value) for value in trial.getRow()] for trial in self.trials]
+        column_widths = [max([len(column)] + [len(row[column_index]) for row in rows])
+                         for (column_index, column) in enumerate(TRIAL_COLUMNS)]
+        print('  '.join(column.ljust(width) for (column, width) in zip(TRIAL_COLUMNS, column_widths)))
+        for row in rows:
+            print('  '.join(value.ljust(width) for (value, width) in zip(row, column_widths)))
+        print(f'{len(self.trials)} trials took {round(time.time() - self.start_time, 3)} of '
+              f'{self.budget_seconds} seconds')
+
+        if settings is None:
+            print('No setting solved within the budget, try a larger budget or longer trials')
+            return
+        chosen_trial = self.getChosenTrial(settings)
+        print(f'Chosen settings solved in {round(chosen_trial.seconds, 3)} seconds with objective '
+              f'{chosen_trial.objective}: {getScenarioName(settings)}')
+        config_overrides = dict(settings, **self.solver_overrides)
+        if len(config_overrides) == 0:
+            print('config.py already solves within the trial time limit, no data doctoring is needed')
+            return
+        print('To reproduce, set these in config.py:')
+        for (option_name, value) in config_overrides.items():
+            print(f'    {option_name} = {value!r}')
+        print('or run:')
+        print('    python3 scenario_sweep.py ' +
+              ' '.join(f'--set {option_name}={value}' for (option_name, value) in config_overrides.items()) +
+              f' --time-limit-seconds {self.trial_seconds}')
+
+    def writeReportJson(self, settings, output_json_path):
+        report = {'budget_seconds': self.budget_seconds, 'trial_seconds': self.trial_seconds,
+                  'solver_overrides': self.solver_overrides, 'chosen_settings': settings,
+                  'trials': [trial.toJson() for trial in self.trials]}
+        with open(output_json_path, 'w', encoding='utf-8') as output_file:
+            json.dump(report, output_file, indent=2)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Search for the least degraded data doctoring settings which solve '
+                                                 'the input files in config.py within a time budget')
+    parser.add_argument('--budget-seconds', type=float, default=600,
+                        help='Wall clock seconds the whole search may take')
+    parser.add_argument('--trial-seconds', type=float, default=60,
+                        help='Solver time limit of each trial, a setting solving within this is fast enough')
+    parser.add_argument('--acceptable-relative-gap', type=float, default=0.0,
+                        help='Relative gap to the best possible objective at which a trial counts as solved, '
+                             '0 to only accept optimal solutions')
+    parser.add_argument('--resolution', type=int, default=5,
+                        help='How close the bisection of the number of students doctored gets to the smallest number')
+    parser.add_argument('--output-json', dest='output_json_path',
+                        help='Also write the chosen settings and every trial to this JSON file')
+    arguments = parser.parse_args(argv)
+
+    data_doctoring_search = DataDoctoringSearch(arguments.budget_seconds, arguments.trial_seconds,
+                                                arguments.acceptable_relative_gap, arguments.resolution)
+    settings = data_doctoring_search.search()
+    data_doctoring_search.printReport(settings)
+    if arguments.output_json_path is not None:
+        data_doctoring_search.writeReportJson(settings, arguments.output_json_path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,389 @@
+import config
+import instrumentation
+import time
+from collections import defaultdict, deque
+from constraints import numPeopleInRow
+from math import inf
+MAX_NAMES_TO_LIST = 10
+
+class FlowNetwork:
+    """ Directed graph with edge capacities for finding a maximum flow, nodes may be any hashable value """
+
+    def __init__(self):
+        self.edges_from_node = defaultdict(list) # Node -> List of edge indices
+        self.edge_to_node = []
+        self.edge_capacity = []
+
+    def addEdge(self, from_node, to_node, capacity):
+        # Each edge is stored next to its reverse edge, so edge_index ^ 1 is always the reverse of edge_index
+        self.edges_from_node[from_node].append(len(self.edge_to_node))
+        self.edge_to_node.append(to_node)
+        self.edge_capacity.append(capacity)
+        self.edges_from_node[to_node].append(len(self.edge_to_node))
+        self.edge_to_node.append(from_node)
+        self.edge_capacity.append(0)
+
+    def maxFlow(self, source, sink):
+        """
+            Finds a maximum flow from source to sink with Dinic's algorithm, afterwards edge_capacity holds the
+             remaining capacity of every edge
+
+            Returns:
+                The total amount of flow from source to sink
+        """
+        total_flow = 0
+        while True:
+            node_level = self.getNodeLevels(source)
+            if sink not in node_level:
+                return total_flow
+
+            next_edge_position = defaultdict(int)
+            while True:
+                flow = self.pushFlow(source, sink, inf, node_level, next_edge_position)
+                if flow == 0:
+                    break
+                total_flow += flow
+
+    def getNodeLevels(self, source):
+        """
+            Returns:
+                Dictionary of every node reachable from source through edges with remaining capacity to the
+                 number of edges on the shortest such path
+        """
+        node_level = {source : 0}
+        nodes_to_visit = deque([source])
+        while len(nodes_to_visit) > 0:
+            node = nodes_to_visit.popleft()
+            for edge_index in self.edges_from_node[node]:
+                to_node = self.edge_to_node[edge_index]
+                if self.edge_capacity[edge_index] > 0 and to_node not in node_level:
+                    node_level[to_node] = node_level[node] + 1
+                    nodes_to_visit.append(to_node)
+        return node_level
+
+    def pushFlow(self, node, sink, max_flow, node_level, next_edge_position):
+        if node == sink:
+            return max_flow
+
+        edges_from_node = self.edges_from_node[node]
+        while next_edge_position[node] < len(edges_from_node):
+            edge_index = edges_from_node[next_edge_position[node]]
+            to_node = self.edge_to_node[edge_index]
+            if self.edge_capacity[edge_index] > 0 and node_level.get(to_node) == node_level[node] + 1:
+                flow = self.pushFlow(to_node, sink, min(max_flow, self.edge_capacity[edge_index]),
+                                     node_level, next_edge_position)
+                if flow > 0:
+                    self.edge_capacity[edge_index] -= flow
+                    self.edge_capacity[edge_index ^ 1] += flow
+                    return flow
+            next_edge_position[node] += 1
+        return 0
+
+    def getSourceSide(self, source):
+        """
+            Should be called after maxFlow, at which point the returned nodes are the source side of a minimum cut
+
+            Returns:
+                Set of every node still reachable from source through edges with remaining capacity
+        """
+        return set(self.getNodeLevels(source))
+
+def verifyFeasibilityPrecheck(mod_time_variables, student_time_variables, max_sections_per_mod,
+                              max_sections_per_time):
+    """
+        Fails with a description of every problem found by findFeasibilityProblems, see findFeasibilityProblems
+    """
+    verifyNoFeasibilityProblems(runFeasibilityPrecheck(mod_time_variables, student_time_variables,
+                                                       max_sections_per_mod, max_sections_per_time))
+
+def runFeasibilityPrecheck(mod_time_variables, student_time_variables, max_sections_per_mod, max_sections_per_time):
+    """
+        findFeasibilityProblems, printing how long the checks took
+
+        Returns:
+            List of String describing each problem found, see findFeasibilityProblems
+    """
+    start_time = time.time()
+    problems = findFeasibilityProblems(mod_time_variables, student_time_variables, max_sections_per_mod,
+                                       max_sections_per_time)
+    print(f'Feasibility precheck took {round((time.time() - start_time) * 1000, 1)} ms')
+    return problems
+
+def verifyNoFeasibilityProblems(problems):
+    """ Fails with a description of every problem, see findFeasibilityProblems """
+    for problem in problems:
+        print('INFEASIBLE:', problem)
+    assert len(problems) == 0
+
+@instrumentation.timed('feasibility precheck')
+def findFeasibilityProblems(mod_time_variables, student_time_variables, max_sections_per_mod, max_sections_per_time):
+    """
+        Checks conditions that every section assignment must satisfy, so that obviously infeasible inputs can be
+         explained in milliseconds instead of waiting for the CP solver to prove them infeasible. Passing every check
+         does not guarantee a solution exists
+
+        Args:
+            mod_time_variables: 2D List of PersonTimeVariableWrapper, if [mod_index][time_index]
+                                    is None then that time is impossible for that mod
+            student_time_variables: 2D List of PersonTimeVariableWrapper,
+                                        if [student_index][time_index] is None then
+                                        that time is impossible for that student
+            max_sections_per_mod: List of Integer, each entry is the max sections for that mod_index
+            max_sections_per_time: List of Integer where each index represents the number of rooms
+                                    available at that time index
+
+        Returns:
+            List of String describing each problem found and the times, moderators, or students causing it,
+             empty if no problem was found
+    """
+    problems = findPeopleWithoutSections(mod_time_variables, student_time_variables, max_sections_per_mod)
+    if len(problems) > 0:
+        # The flow checks below would only repeat these problems less clearly
+        return problems
+
+    problems += findForcedTimesWithoutSections(mod_time_variables, student_time_variables)
+    problems += findRoomShortage(mod_time_variables, max_sections_per_mod, max_sections_per_time)
+    problems += findStudentCapacityShortage(mod_time_variables, student_time_variables, max_sections_per_mod,
+                                            max_sections_per_time)
+    problems += findMinStudentShortage(mod_time_variables, student_time_variables, max_sections_per_mod)
+    return problems
+
+def getNetIDs(person_time_variables, person_indices):
+    """
+        Returns:
+            String listing the net IDs of every person in the given rows, shortened if there are many of them
+    """
+    net_ids = []
+    for person_index in sorted(person_indices):
+        for person_time_var_wrapper in person_time_variables[person_index]:
+            if person_time_var_wrapper is not None:
+                net_ids += person_time_var_wrapper.type_net_ids
+                break
+
+    if len(net_ids) > MAX_NAMES_TO_LIST:
+        return ', '.join(net_ids[:MAX_NAMES_TO_LIST]) + f' and {len(net_ids) - MAX_NAMES_TO_LIST} more'
+    return ', '.join(net_ids)
+
+def getPossibleTimes(time_variables_for_person):
+    return [person_time_var_wrapper.time_index for person_time_var_wrapper in time_variables_for_person
+            if person_time_var_wrapper is not None]
+
+def getMinSectionsForMod(mod_index, mod_time_variables, max_sections_per_mod):
+    """
+        Returns:
+            Integer for the fewest sections the moderators of the row can be assigned, see
+             addMaxSectionsPerModConstraint
+    """
+    num_mods_in_row = numPeopleInRow(mod_time_variables[mod_index])
+    if config.assign_exact_max_sections:
+        return max_sections_per_mod[mod_index] * num_mods_in_row
+    return num_mods_in_row
+
+def findPeopleWithoutSections(mod_time_variables, student_time_variables, max_sections_per_mod):
+    """
+        Returns:
+            List of String for every student with no possible time, and every moderator who must be assigned a
+             section but has no possible time or too low a max sections
+    """
+    problems = []
+    for student_index in range(len(student_time_variables)):
+        if len(getPossibleTimes(student_time_variables[student_index])) == 0:
+            # Rows without possible times have no PersonTimeVariableWrapper to take a net ID from
+            problems.append(f'Student in row {student_index} of the student Doodle poll can not make any '
+                            'section time')
+
+    for mod_index in range(len(mod_time_variables)):
+        min_sections = getMinSectionsForMod(mod_index, mod_time_variables, max_sections_per_mod)
+        possible_times = getPossibleTimes(mod_time_variables[mod_index])
+        if min_sections == 0:
+            continue
+        elif max_sections_per_mod[mod_index] < 1:
+            problems.append(f'Moderator with max sections {max_sections_per_mod[mod_index]} must still be '
+                            f'assigned at least one section: {getNetIDs(mod_time_variables, [mod_index])}')
+        elif len(possible_times) == 0:
+            problems.append(f'Moderator in row {mod_index} of the moderator Doodle poll can not make any '
+                            'section time')
+        elif len(possible_times) * numPeopleInRow(mod_time_variables[mod_index]) < min_sections:
+            problems.append(f'Moderator {getNetIDs(mod_time_variables, [mod_index])} must be assigned '
+                            f'{min_sections} sections but can only make {len(possible_times)} section times')
+    return problems
+
+def findForcedTimesWithoutSections(mod_time_variables, student_time_variables):
+    """
+        A student or moderator who can only make one time forces a section to exist at that time, which needs both
+         a moderator and at least config.min_students_per_section students who can make that time
+
+        Returns:
+            List of String for every time that must have a section but can not have one
+    """
+    num_section_times = len(mod_time_variables[0])
+    mods_at_time = [0] * num_section_times
+    students_at_time = [0] * num_section_times
+    forced_mod_indices = defaultdict(list)
+    forced_student_indices = defaultdict(list)
+
+    for (person_time_variables, people_at_time, forced_indices) in \
+            ((mod_time_variables, mods_at_time, forced_mod_indices),
+             (student_time_variables, students_at_time, forced_student_indices)):
+        for person_index in range(len(person_time_variables)):
+            possible_times = getPossibleTimes(person_time_variables[person_index])
+            for time_index in possible_times:
+                people_at_time[time_index] += numPeopleInRow(person_time_variables[person_index])
+            if len(possible_times) == 1:
+                forced_indices[possible_times[0]].append(person_index)
+
+    problems = []
+    for time_index in range(num_section_times):
+        forced_people = []
+        if len(forced_mod_indices[time_index]) > 0:
+            forced_people.append('moderators ' + getNetIDs(mod_time_variables, forced_mod_indices[time_index]))
+        if len(forced_student_indices[time_index]) > 0:
+            forced_people.append('students ' + getNetIDs(student_time_variables,
+                                                         forced_student_indices[time_index]))
+        if len(forced_people) == 0:
+            continue
+
+        forced_people_message = f'Time {time_index} must have a section since {" and ".join(forced_people)} ' \
+                                'can make no other time, but '
+        if mods_at_time[time_index] == 0:
+            problems.append(forced_people_message + 'no moderator can make it')
+        elif students_at_time[time_index] < config.min_students_per_section:
+            problems.append(forced_people_message + f'only {students_at_time[time_index]} students can make it '
+                            f'which is fewer than the minimum of {config.min_students_per_section} per section')
+    return problems
+
+def findRoomShortage(mod_time_variables, max_sections_per_mod, max_sections_per_time):
+    """
+        Every moderator must be assigned their minimum number of sections at different times, and no time can have
+         more sections than it has rooms
+
+        Returns:
+            List with a String describing the bottleneck if the moderators' sections do not fit into the rooms
+    """
+    network = FlowNetwork()
+    num_sections_needed = 0
+    for mod_index in range(len(mod_time_variables)):
+        min_sections = getMinSectionsForMod(mod_index, mod_time_variables, max_sections_per_mod)
+        num_sections_needed += min_sections
+        network.addEdge('source', ('mod', mod_index), min_sections)
+        for time_index in getPossibleTimes(mod_time_variables[mod_index]):
+            network.addEdge(('mod', mod_index), ('time', time_index), numPeopleInRow(mod_time_variables[mod_index]))
+    for time_index in range(len(max_sections_per_time)):
+        network.addEdge(('time', time_index), 'sink', max_sections_per_time[time_index])
+
+    num_sections_placed = network.maxFlow('source', 'sink')
+    if num_sections_placed == num_sections_needed:
+        return []
+
+    source_side = network.getSourceSide('source')
+    bottleneck_mod_indices = [node[1] for node in source_side if node[0] == 'mod']
+    bottleneck_times = sorted(node[1] for node in source_side if node[0] == 'time')
+    num_rooms = sum(max_sections_per_time[time_index] for time_index in bottleneck_times)
+    return [f'Only {num_sections_placed} of the {num_sections_needed} sections moderators must teach fit into '
+            f'rooms. Moderators {getNetIDs(mod_time_variables, bottleneck_mod_indices)} can only make times '
+            f'{bottleneck_times}, which have {num_rooms} rooms in total']
+
+def findStudentCapacityShortage(mod_time_variables, student_time_variables, max_sections_per_mod,
+                                max_sections_per_time):
+    """
+        Every student must fit into a section, where each section holds at most config.max_students_per_section,
+         each time holds at most as many sections as it has rooms, and each moderator teaches at most one section
+         per time and at most their max sections in total
+
+        Returns:
+            List with a String describing the bottleneck if not every student fits into a section
+    """
+    max_students = config.max_students_per_section
+    network = FlowNetwork()
+    num_students = 0
+    for student_index in range(len(student_time_variables)):
+        num_students_in_row = numPeopleInRow(student_time_variables[student_index])
+        num_students += num_students_in_row
+        network.addEdge('source', ('student', student_index), num_students_in_row)
+        for time_index in getPossibleTimes(student_time_variables[student_index]):
+            network.addEdge(('student', student_index), ('time', time_index), inf)
+    for time_index in range(len(max_sections_per_time)):
+        network.addEdge(('time', time_index), ('rooms', time_index), max_sections_per_time[time_index] * max_students)
+    for mod_index in range(len(mod_time_variables)):
+        num_mods_in_row = numPeopleInRow(mod_time_variables[mod_index])
+        for time_index in getPossibleTimes(mod_time_variables[mod_index]):
+            network.addEdge(('rooms', time_index), ('mod', mod_index), num_mods_in_row * max_students)
+        network.addEdge(('mod', mod_index), 'sink', max_sections_per_mod[mod_index] * num_mods_in_row * max_students)
+
+    num_students_placed = network.maxFlow('source', 'sink')
+    if num_students_placed == num_students:
+        return []
+
+    source_side = network.getSourceSide('source')
+    bottleneck_student_indices = [node[1] for node in source_side if node[0] == 'student']
+    bottleneck_times = sorted(node[1] for node in source_side if node[0] == 'time')
+    full_times = [time_index for time_index in bottleneck_times if ('rooms', time_index) not in source_side]
+    full_mod_indices = [node[1] for node in source_side if node[0] == 'mod']
+    available_mod_indices = set(mod_index for mod_index in range(len(mod_time_variables))
+                                if any(time_index in bottleneck_times
+                                       for time_index in getPossibleTimes(mod_time_variables[mod_index])))
+
+    message = f'Only {num_students_placed} of {num_students} students fit into sections of at most ' \
+              f'{max_students}. Students {getNetIDs(student_time_variables, bottleneck_student_indices)} ' \
+              f'can only make times {bottleneck_times}'
+    if len(available_mod_indices) == 0:
+        message += ', which no moderator can make'
+    else:
+        limits = []
+        if len(full_times) > 0:
+            limits.append(f'rooms at times {full_times}')
+        if len(full_mod_indices) > 0:
+            limits.append(f'max sections of moderators {getNetIDs(mod_time_variables, full_mod_indices)}')
+        if len(available_mod_indices - set(full_mod_indices)) > 0:
+            limits.append('moderators only teaching one section at a time')
+        message += f', which are limited by the {" and the ".join(limits)}'
+    return [message]
+
+def findMinStudentShortage(mod_time_variables, student_time_variables, max_sections_per_mod):
+    """
+        Every moderator must be assigned their minimum number of sections, each with at least
+         config.min_students_per_section students who can make one of the moderator's times, and no student can be
+         in two sections
+
+        Returns:
+            List with a String describing the bottleneck if there are not enough students to fill every section
+             that must exist
+    """
+    min_students = config.min_students_per_section
+    max_students = config.max_students_per_section
+    network = FlowNetwork()
+    for student_index in range(len(student_time_variables)):
+        network.addEdge('source', ('student', student_index), numPeopleInRow(student_time_variables[student_index]))
+        for time_index in getPossibleTimes(student_time_variables[student_index]):
+            network.addEdge(('student', student_index), ('time', time_index), inf)
+
+    num_students_needed = 0
+    for mod_index in range(len(mod_time_variables)):
+        num_mods_in_row = numPeopleInRow(mod_time_variables[mod_index])
+        min_sections = getMinSectionsForMod(mod_index, mod_time_variables, max_sections_per_mod)
+        num_students_needed += min_sections * min_students
+        for time_index in getPossibleTimes(mod_time_variables[mod_index]):
+            network.addEdge(('time', time_index), ('mod', mod_index), num_mods_in_row * max_students)
+        network.addEdge(('mod', mod_index), 'sink', min_sections * min_students)
+
+    num_students_placed = network.maxFlow('source', 'sink')
+    if num_students_placed == num_students_needed:
+        return []
+
+    # Moderators on the sink side of the minimum cut who can only make sink side times can only get students
+    #  from the sink side, of which there are fewer than they need
+    source_side = network.getSourceSide('source')
+    bottleneck_mod_indices = [mod_index for mod_index in range(len(mod_time_variables))
+                              if ('mod', mod_index) not in source_side and
+                              not any(('time', time_index) in source_side
+                                      for time_index in getPossibleTimes(mod_time_variables[mod_index]))]
+    bottleneck_times = sorted(set(time_index for mod_index in bottleneck_mod_indices
+                                  for time_index in getPossibleTimes(mod_time_variables[mod_index])))
+    num_students_at_times = sum(numPeopleInRow(student_time_variables[student_index])
+                                for student_index in range(len(student_time_variables))
+                                if any(time_index in bottleneck_times
+                                       for time_index in getPossibleTimes(student_time_variables[student_index])))
+    return [f'Only {num_students_placed} of the {num_students_needed} students needed to give every moderator '
+            f'sections of at least {min_students} can be placed. Moderators '
+            f'{getNetIDs(mod_time_variables, bottleneck_mod_indices)} can only make times {bottleneck_times}, '
+            f'which {num_students_at_times} students can make']
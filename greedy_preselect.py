@@ -1,13 +1,22 @@
 from collections import defaultdict
 import config
+import instrumentation
 from math import inf
+from person_time_index import PREFERRED_TIME, getPersonTimeIndex
 UNUSABLE_VALUE = inf
 
+GREEDY_MODE_CONSTRAINTS = 'constraints'
+GREEDY_MODE_HINT = 'hint'
+GREEDY_MODE_BOTH = 'both'
+
+@instrumentation.timed('greedy preselect')
 def greedyPreselectSections(model, mod_time_variables, student_time_variables, max_sections_per_time, max_sections_per_mod):
     """
-        Attempts to greedily select ahead of time a number of sections. Sections are created ahead of time in the constraint
-         programming model by adding constraints which say that all students and moderators in greedy sections must be
-         assigned to those same time slots by the constraint programming problem solver.
+        Attempts to greedily select ahead of time a number of sections. Depending on config.greedy_preselect_mode,
+         sections are either created ahead of time in the constraint programming model by adding constraints which
+         say that all students and moderators in greedy sections must be assigned to those same time slots by the
+         constraint programming problem solver, or a complete greedy assignment is given to the solver as a hint
+         to start searching from, or both.
 
         Args:
             model: The CpModel object that represents the constraints of the problem
@@ -21,11 +30,22 @@ def greedyPreselectSections(model, mod_time_variables, student_time_variables, m
             max_sections_per_mod: List of Integer, each entry is the max sections for that mod_index
 
          Returns:
-            Integer representing the number of greedy sections successfully created/added to the model
+            Integer representing the number of greedy sections successfully created/added to the model as constraints
 
     """
-    greedy_assignment = getGreedyAssignment(mod_time_variables, student_time_variables,
-                                            max_sections_per_time, max_sections_per_mod)
+    assert config.greedy_preselect_mode in (GREEDY_MODE_CONSTRAINTS, GREEDY_MODE_HINT, GREEDY_MODE_BOTH)
+    should_add_constraints = config.greedy_preselect_mode in (GREEDY_MODE_CONSTRAINTS, GREEDY_MODE_BOTH)
+    should_add_hint = config.greedy_preselect_mode in (GREEDY_MODE_HINT, GREEDY_MODE_BOTH)
+
+    if config.aggregate_identical_people:
+        if (should_add_constraints and config.num_sections_to_greedy_preselect > 0) or should_add_hint:
+            print('WARNING: Greedy preselection is ignored with config.aggregate_identical_people')
+        return 0
+
+    greedy_assignment = []
+    if should_add_constraints:
+        greedy_assignment = getGreedyAssignment(mod_time_variables, student_time_variables,
+                                                max_sections_per_time, max_sections_per_mod)
 
     # Actually apply the greedy assignment to the constraint programming model
     for (most_constraining_time_index, greedy_mod_index, greedy_student_indices) in greedy_assignment:
@@ -33,9 +53,18 @@ def greedyPreselectSections(model, mod_time_variables, student_time_variables, m
         for greedy_student_index in greedy_student_indices:
             model.Add(student_time_variables[greedy_student_index][most_constraining_time_index].variable == 1)
 
+    if should_add_hint:
+        (mod_assigned_times, student_assigned_times) = getGreedyCompleteAssignment(mod_time_variables,
+                                                                                   student_time_variables,
+                                                                                   max_sections_per_time,
+                                                                                   max_sections_per_mod)
+        addGreedySolutionHint(model, mod_time_variables, student_time_variables,
+                              mod_assigned_times, student_assigned_times)
+
     return len(greedy_assignment)
 
-def getGreedyAssignment(mod_time_variables, student_time_variables, max_sections_per_time, max_sections_per_mod):
+def getGreedyAssignment(mod_time_variables, student_time_variables, max_sections_per_time, max_sections_per_mod,
+                        num_sections_to_select=None):
     """
         Generates a greedy assignment through repeating a 3 step process:
             1. Find the time with the least number of students having selected it as a green time
@@ -43,6 +72,7 @@ def getGreedyAssignment(mod_time_variables, student_time_variables, max_sections
             3. Of the students and mods with the time marked as green, select the students and mod who gave the
                 fewest total green/yellow times to work with.
         The maximum number of greedy sections to create is specified by config.num_sections_to_greedy_preselect
+         unless num_sections_to_select is given
 
         Args:
             mod_time_variables: 2D List of PersonTimeVariableWrapper, if [mod_index][time_index]
@@ -53,14 +83,19 @@ def getGreedyAssignment(mod_time_variables, student_time_variables, max_sections
             max_sections_per_time: List of Integer where each index represents the number of rooms
                                     available at that time index
             max_sections_per_mod: List of Integer, each entry is the max sections for that mod_index
+            num_sections_to_select: Integer for the maximum number of greedy sections to create, or None to use
+                                     config.num_sections_to_greedy_preselect
 
         Returns:
             List of (time_index, mod_index, List of student_index) where each entry represents a single greedy
              section created with the time, moderator, and students specified by the indices
     """
+    if num_sections_to_select is None:
+        num_sections_to_select = config.num_sections_to_greedy_preselect
     greedy_assignment = []
 
-    num_mods = len(mod_time_variables)    
+    mod_time_index = getPersonTimeIndex(mod_time_variables)
+    student_time_index = getPersonTimeIndex(student_time_variables, mod_time_index.num_section_times)
     num_students = len(student_time_variables)
     num_section_times = len(max_sections_per_time)
     max_sections_per_student = [1] * num_students
@@ -68,15 +103,11 @@ def getGreedyAssignment(mod_time_variables, student_time_variables, max_sections
     max_sections_per_time = max_sections_per_time.copy() # Can't modify outside this function
     mod_assigned_times = defaultdict(set)
     # Keep track of how many students put green for each time slot and decrement as we greedy assign them
-    num_students_with_each_time = [sum(1
-                                       if (student_time_variables[i][j] is not None) and
-                                          (student_time_variables[i][j].is_preferred_time)
-                                       else 0
-                                       for i in range(num_students))
-                                   for j in range(num_section_times)]
+    num_students_with_each_time = [student_time_index.countAtTime(time_index, PREFERRED_TIME)
+                                   for time_index in range(num_section_times)]
 
     # Loop until we can't assign any more greedy sections
-    while len(greedy_assignment) < config.num_sections_to_greedy_preselect:
+    while len(greedy_assignment) < num_sections_to_select:
         valid_greedy_section_time_found = False
         while not valid_greedy_section_time_found:
             # Find the time with the least students still >= config.min
@@ -98,9 +129,9 @@ def getGreedyAssignment(mod_time_variables, student_time_variables, max_sections
                 continue
 
             # Time has enough students, but still need to see if a mod can be assigned
-            for mod_index in range(num_mods):
-                mod_var_for_time = mod_time_variables[mod_index][most_constraining_time_index]
-                mod_has_time_green = (mod_var_for_time is not None) and (mod_var_for_time.is_preferred_time)
+            for (mod_index, mod_var_for_time) in zip(mod_time_index.personIndicesAtTime(most_constraining_time_index),
+                                                     mod_time_index.wrappersAtTime(most_constraining_time_index)):
+                mod_has_time_green = mod_var_for_time.is_preferred_time
                 mod_has_been_fully_assigned = (max_sections_per_mod[mod_index] <= 0)
                 mod_previously_assigned_to_time = (most_constraining_time_index in mod_assigned_times[mod_index])
 
@@ -132,10 +163,9 @@ def getGreedyAssignment(mod_time_variables, student_time_variables, max_sections
         for greedy_student_index in greedy_student_indices:
             max_sections_per_student[greedy_student_index] -= 1
             # Need to subtract this student from the other green times they have too
-            for time_index in range(num_section_times):
-                student_time_var = student_time_variables[greedy_student_index][time_index]
-                if (student_time_var is not None) and (student_time_var.is_preferred_time):
-                    num_students_with_each_time[time_index] -= 1
+            for student_time_var in student_time_index.wrappersForPerson(greedy_student_index):
+                if student_time_var.is_preferred_time:
+                    num_students_with_each_time[student_time_var.time_index] -= 1
 
     return greedy_assignment
 
@@ -158,14 +188,10 @@ def getMostConstrainingIndices(most_constraining_time_index, person_time_variabl
              have a green time in the most_constraining_time_index
     """
     num_people = len(person_time_variables)
-    num_section_times = len(person_time_variables[0])
+    person_time_index = getPersonTimeIndex(person_time_variables)
 
     # Get the number of valid times for each unassigned person and return the most constraining people
-    num_times_per_person = [sum(1
-                                if (person_time_variables[i][j] is not None)
-                                else 0
-                                for j in range(num_section_times)
-                               )
+    num_times_per_person = [person_time_index.numTimesForPerson(i)
                             if (person_time_variables[i][most_constraining_time_index] is not None) and
                                (max_sections_per_person[i] > 0) and
                                (most_constraining_time_index not in assigned_times[i])
@@ -183,3 +209,173 @@ def getMostConstrainingIndices(most_constraining_time_index, person_time_variabl
             most_constraining_green_indices.append(current_person_index)
         i += 1
     return most_constraining_green_indices
+
+def getGreedyCompleteAssignment(mod_time_variables, student_time_variables, max_sections_per_time,
+                                max_sections_per_mod):
+    """
+        Extends the greedy assignment into an assignment of every student and moderator where possible:
+            1. Create as many greedy sections as possible with getGreedyAssignment
+            2. Place each remaining student, most constrained first, into a time with an open section and room
+                for them, preferring their green times and then the time with the most open spots
+            3. While students remain unplaced, open a new section at the time the most unplaced students can attend
+                with any moderator who can still take a section there, and repeat step 2
+        The result is only used as a hint for the constraint programming solver, so it is fine for it to be partial
+
+        Args:
+            mod_time_variables: 2D List of PersonTimeVariableWrapper, if [mod_index][time_index]
+                                    is None then that time is impossible for that mod
+            student_time_variables: 2D List of PersonTimeVariableWrapper,
+                                        if [student_index][time_index] is None then
+                                        that time is impossible for that student
+            max_sections_per_time: List of Integer where each index represents the number of rooms
+                                    available at that time index
+            max_sections_per_mod: List of Integer, each entry is the max sections for that mod_index
+
+        Returns:
+            mod_assigned_times: defaultdict(set) where mod_assigned_times[i] is the set of time indices assigned to mod i
+            student_assigned_times: List where each entry is the time index assigned to that student or None
+    """
+    num_students = len(student_time_variables)
+    num_section_times = len(max_sections_per_time)
+    student_time_index = getPersonTimeIndex(student_time_variables)
+    mod_assigned_times = defaultdict(set)
+    student_assigned_times = [None] * num_students
+    num_sections_in_time = [0] * num_section_times
+    num_students_in_time = [0] * num_section_times
+
+    # Step 1: as many green sections as the greedy algorithm can find
+    greedy_assignment = getGreedyAssignment(mod_time_variables, student_time_variables, max_sections_per_time,
+                                            max_sections_per_mod, num_sections_to_select=sum(max_sections_per_mod))
+    for (time_index, greedy_mod_index, greedy_student_indices) in greedy_assignment:
+        mod_assigned_times[greedy_mod_index].add(time_index)
+        num_sections_in_time[time_index] += 1
+        for greedy_student_index in greedy_student_indices:
+            student_assigned_times[greedy_student_index] = time_index
+            num_students_in_time[time_index] += 1
+
+    def possibleTimes(student_index):
+        return [student_time_var_wrapper.time_index
+                for student_time_var_wrapper in student_time_index.wrappersForPerson(student_index)
+                if not student_time_var_wrapper.is_impossible_time]
+
+    # Most constrained students are placed first
+    students_by_num_times = sorted(range(num_students), key=lambda i: len(possibleTimes(i)))
+
+    while True:
+        # Step 2: place remaining students into sections which are already open
+        for student_index in students_by_num_times:
+            if student_assigned_times[student_index] is not None:
+                continue
+
+            open_times = [time_index for time_index in possibleTimes(student_index)
+                          if num_students_in_time[time_index] <
+                             (num_sections_in_time[time_index] * config.max_students_per_section)]
+            if len(open_times) == 0:
+                continue
+
+            def timePriority(time_index):
+                is_preferred_time = student_time_variables[student_index][time_index].is_preferred_time
+                open_spots = ((num_sections_in_time[time_index] * config.max_students_per_section) -
+                              num_students_in_time[time_index])
+                return (is_preferred_time, open_spots)
+
+            chosen_time_index = max(open_times, key=timePriority)
+            student_assigned_times[student_index] = chosen_time_index
+            num_students_in_time[chosen_time_index] += 1
+
+        # Step 3: open a new section for the students who could not be placed
+        unplaced_students = [student_index for student_index in range(num_students)
+                             if student_assigned_times[student_index] is None]
+        if len(unplaced_students) == 0:
+            break
+
+        new_section = findNewGreedySection(unplaced_students, mod_time_variables, student_time_index,
+                                           max_sections_per_time, max_sections_per_mod, mod_assigned_times,
+                                           num_sections_in_time)
+        if new_section is None:
+            break
+
+        (time_index, mod_index, student_indices) = new_section
+        mod_assigned_times[mod_index].add(time_index)
+        num_sections_in_time[time_index] += 1
+        for student_index in student_indices:
+            student_assigned_times[student_index] = time_index
+            num_students_in_time[time_index] += 1
+
+    num_unplaced_students = sum(1 for assigned_time in student_assigned_times if assigned_time is None)
+    num_unassigned_mods = sum(1 for mod_index in range(len(mod_time_variables))
+                              if len(mod_assigned_times[mod_index]) == 0)
+    print(f'Greedy hint: {sum(num_sections_in_time)} sections, {num_unplaced_students} students unplaced, '
+          f'{num_unassigned_mods} mods without a section')
+    return mod_assigned_times, student_assigned_times
+
+def findNewGreedySection(unplaced_students, mod_time_variables, student_time_index, max_sections_per_time,
+                         max_sections_per_mod, mod_assigned_times, num_sections_in_time):
+    """
+        Finds a new section for the time which the most unplaced students can attend and which still has a room
+         and a moderator available, preferring moderators with the time as green and the fewest assigned sections
+         The students' variables are looked up through their PersonTimeIndex, student_time_index
+
+        Returns:
+            (time_index, mod_index, List of student_index) for the new section, or None if no section can be created
+    """
+    num_section_times = len(max_sections_per_time)
+    mod_time_index = getPersonTimeIndex(mod_time_variables)
+    unplaced_students_for_time = [[] for _ in range(num_section_times)]
+    for student_index in unplaced_students:
+        for student_time_var_wrapper in student_time_index.wrappersForPerson(student_index):
+            if not student_time_var_wrapper.is_impossible_time:
+                unplaced_students_for_time[student_time_var_wrapper.time_index].append(student_index)
+
+    for time_index in sorted(range(num_section_times), key=lambda t: len(unplaced_students_for_time[t]),
+                             reverse=True):
+        students_for_time = unplaced_students_for_time[time_index]
+        if len(students_for_time) < config.min_students_per_section:
+            break
+        if num_sections_in_time[time_index] >= max_sections_per_time[time_index]:
+            continue
+
+        available_mods = [mod_index for (mod_index, mod_time_var_wrapper)
+                          in zip(mod_time_index.personIndicesAtTime(time_index),
+                                 mod_time_index.wrappersAtTime(time_index))
+                          if (not mod_time_var_wrapper.is_impossible_time) and
+                             (time_index not in mod_assigned_times[mod_index]) and
+                             (len(mod_assigned_times[mod_index]) < max_sections_per_mod[mod_index])]
+        if len(available_mods) == 0:
+            continue
+
+        mod_index = min(available_mods, key=lambda i: (not mod_time_variables[i][time_index].is_preferred_time,
+                                                        len(mod_assigned_times[i])))
+        return (time_index, mod_index, students_for_time[:config.max_students_per_section])
+
+    return None
+
+def addGreedySolutionHint(model, mod_time_variables, student_time_variables, mod_assigned_times,
+                          student_assigned_times):
+    """
+        Hints every variable of each moderator and each placed student from a greedy assignment to the model,
+         students who could not be placed are left for the solver to decide
+
+        Args:
+            model: The CpModel object that represents the constraints of the problem
+            mod_time_variables: 2D List of PersonTimeVariableWrapper, if [mod_index][time_index]
+                                    is None then that time is impossible for that mod
+            student_time_variables: 2D List of PersonTimeVariableWrapper,
+                                        if [student_index][time_index] is None then
+                                        that time is impossible for that student
+            mod_assigned_times: defaultdict(set) from getGreedyCompleteAssignment
+            student_assigned_times: List of time index or None from getGreedyCompleteAssignment
+    """
+    for (mod_index, time_variables_for_mod) in enumerate(mod_time_variables):
+        for (time_index, mod_time_var_wrapper) in enumerate(time_variables_for_mod):
+            if mod_time_var_wrapper is not None:
+                is_assigned = (time_index in mod_assigned_times[mod_index])
+                model.AddHint(mod_time_var_wrapper.variable, 1 if is_assigned else 0)
+
+    for (student_index, time_variables_for_student) in enumerate(student_time_variables):
+        if student_assigned_times[student_index] is None:
+            continue
+        for (time_index, student_time_var_wrapper) in enumerate(time_variables_for_student):
+            if student_time_var_wrapper is not None:
+                is_assigned = (time_index == student_assigned_times[student_index])
+                model.AddHint(student_time_var_wrapper.variable, 1 if is_assigned else 0)
@@ -0,0 +1,451 @@
+import csv
+import config
+import random
+from assign_time_slots import DOODLE_IMPOSSIBLE_TIME, DOODLE_PREFERRED_TIME, addAllConstraints,\
+                              extractModAndStudentAssignments, getModelFromInputFiles, solveModel
+from collections import defaultdict
+from create_sections_from_time_slots import Section, getRoomOrder
+from csv_input import readDoodlePreferences, readModMaxSectionPreferences, readSectionTimeInfo
+from ortools.sat.python import cp_model
+
+class PreviousAssignment:
+    """ A section assignment previously written by assign_sections.py, which students have already been sent """
+
+    def __init__(self):
+        self.student_time = {} # Student net ID -> time index
+        self.student_mod = {} # Student net ID -> net ID of the moderator of their section
+        self.mod_times = defaultdict(set) # Mod net ID -> set of time indices
+        self.mod_room = {} # (mod net ID, time index) -> room name
+
+    def timesForPerson(self, net_id, is_mod):
+        """
+            Returns:
+                Set of Integer for the time indices previously assigned to the person, empty if they are new
+        """
+        if is_mod:
+            return self.mod_times.get(net_id, set())
+        if net_id in self.student_time:
+            return {self.student_time[net_id]}
+        return set()
+
+def readPreviousAssignment(previous_assignment_csv_path, section_times, mod_net_id_to_name_dict):
+    """
+        Args:
+            previous_assignment_csv_path: The file path to a section assignment CSV written by assign_sections.py,
+                                           where each line is [student net ID],[section time],[mod name],[room]
+            section_times: List of String for the section times in the same order as the Doodle polls
+            mod_net_id_to_name_dict: A dictionary mapping from moderator NetID to moderator name
+
+        Returns:
+            PreviousAssignment holding every student and moderator assignment in the CSV
+    """
+    time_index_for_section_time = {section_time : time_index for (time_index, section_time) in enumerate(section_times)}
+    mod_net_id_for_name = {name : net_id for (net_id, name) in mod_net_id_to_name_dict.items()}
+    previous_assignment = PreviousAssignment()
+
+    with open(previous_assignment_csv_path, 'r', encoding='utf-8-sig') as previous_assignment_file:
+        for entry in csv.reader(previous_assignment_file):
+            assert (len(entry) == 4)
+            (student_net_id, section_time, mod_name, room) = entry
+            assert section_time in time_index_for_section_time
+            assert mod_name in mod_net_id_for_name
+            time_index = time_index_for_section_time[section_time]
+            mod_net_id = mod_net_id_for_name[mod_name]
+
+            previous_assignment.student_time[student_net_id] = time_index
+            previous_assignment.student_mod[student_net_id] = mod_net_id
+            previous_assignment.mod_times[mod_net_id].add(time_index)
+            previous_assignment.mod_room[(mod_net_id, time_index)] = room
+
+    return previous_assignment
+
+def assignModeratorsAndStudentsIncrementally(previous_assignment, mod_doodle_poll_csv_path, mod_max_section_csv_path,
+                                             student_doodle_poll_csv_path, section_times_csv_path,
+                                             previous_mod_doodle_poll_csv_path=None,
+                                             previous_student_doodle_poll_csv_path=None,
+                                             previous_mod_max_section_csv_path=None):
+    """
+        Re-solves only the part of the assignment affected by changes to the Doodle polls since the previous
+         assignment, keeping everyone else exactly where they were
+
+        A person is changed when they are new, when their Doodle poll row differs from the previous poll, or, if the
+         previous polls are not given, when a time they were previously assigned is no longer possible for them.
+         A moderator is also changed when their max sections row differs from the previous max sections file, or
+         when they were previously assigned more sections than their max sections now allow.
+         The affected times are every time previously assigned to a changed or dropped person plus the new times of
+         each changed person (see getNewTimes), widened by config.incremental_neighbourhood_radius time indices.
+         Changed people and people previously assigned to an affected time may move between affected times, every
+         other variable is fixed to its previous value. Moving a person is penalized in the objective function.
+         If this residual problem is infeasible, the neighbourhood is widened by one time index and solved again,
+         or to every time when nothing is known to have changed, until no assignment exists even for every time
+
+        Args:
+            previous_assignment: PreviousAssignment from readPreviousAssignment
+            mod_doodle_poll_csv_path: The file path to the updated Doodle poll for the moderators in .csv format
+            mod_max_section_csv_path: The file path to the max sections .csv file
+            student_doodle_poll_csv_path: The file path to the updated Doodle poll for the students in .csv format
+            section_times_csv_path: The file path to the .csv file containing info on section times and rooms
+            previous_mod_doodle_poll_csv_path: The file path to the moderator Doodle poll the previous assignment
+                                                was made from, or None
+            previous_student_doodle_poll_csv_path: The file path to the student Doodle poll the previous assignment
+                                                    was made from, or None
+            previous_mod_max_section_csv_path: The file path to the max sections .csv file the previous assignment was
+                                                made from, or None
+
+        Returns:
+            mods_assigned_to_times: List of List of Strings, each entry is all net IDs of the moderators assigned
+                                        to that time index
+            students_assigned_to_times: List of List of Strings, each entry is all net IDs of the students assigned
+                                        to that time index
+    """
+    # Aggregated people have no single net ID to keep in place, so aggregation is turned off only for this solve
+    aggregate_identical_people = config.aggregate_identical_people
+    if aggregate_identical_people:
+        print('WARNING: config.aggregate_identical_people is ignored for incremental assignment')
+        config.aggregate_identical_people = False
+    try:
+        return solveAffectedNeighbourhood(previous_assignment,
+                                          (mod_doodle_poll_csv_path, mod_max_section_csv_path,
+                                           student_doodle_poll_csv_path, section_times_csv_path),
+                                          previous_mod_doodle_poll_csv_path, previous_student_doodle_poll_csv_path,
+                                          previous_mod_max_section_csv_path)
+    finally:
+        config.aggregate_identical_people = aggregate_identical_people
+
+def solveAffectedNeighbourhood(previous_assignment, csv_files, previous_mod_doodle_poll_csv_path,
+                               previous_student_doodle_poll_csv_path, previous_mod_max_section_csv_path):
+    """
+        Args:
+            See assignModeratorsAndStudentsIncrementally, csv_files is the Tuple of its four updated input files
+
+        Returns:
+            See assignModeratorsAndStudentsIncrementally
+    """
+    (mod_doodle_poll_csv_path, mod_max_section_csv_path, student_doodle_poll_csv_path, _) = csv_files
+    (mod_net_ids, mod_time_preferences) = readDoodlePreferences(mod_doodle_poll_csv_path)
+    (student_net_ids, student_time_preferences) = readDoodlePreferences(student_doodle_poll_csv_path)
+    previous_mod_time_preferences = readPreviousTimePreferences(previous_mod_doodle_poll_csv_path)
+    previous_student_time_preferences = readPreviousTimePreferences(previous_student_doodle_poll_csv_path)
+    changed_mod_net_ids = getChangedNetIDs(mod_net_ids, mod_time_preferences, previous_mod_time_preferences,
+                                           previous_assignment, is_mod=True)
+    changed_mod_net_ids |= getChangedMaxSectionsNetIDs(
+        mod_net_ids, readModMaxSectionPreferences(mod_max_section_csv_path, mod_net_ids),
+        readPreviousMaxSections(previous_mod_max_section_csv_path), previous_assignment)
+    changed_student_net_ids = getChangedNetIDs(student_net_ids, student_time_preferences,
+                                               previous_student_time_preferences, previous_assignment, is_mod=False)
+    print('Changed mods:', len(changed_mod_net_ids), sorted(changed_mod_net_ids))
+    print('Changed students:', len(changed_student_net_ids), sorted(changed_student_net_ids))
+
+    # Every time a dropped person was assigned is affected, as is every previous and new time of a changed person
+    affected_times = set()
+    for dropped_mod_net_id in set(previous_assignment.mod_times) - set(mod_net_ids):
+        affected_times |= previous_assignment.mod_times[dropped_mod_net_id]
+    for dropped_student_net_id in set(previous_assignment.student_time) - set(student_net_ids):
+        affected_times.add(previous_assignment.student_time[dropped_student_net_id])
+    for (net_ids, time_preferences, previous_time_preferences, changed_net_ids, is_mod) in \
+            ((mod_net_ids, mod_time_preferences, previous_mod_time_preferences, changed_mod_net_ids, True),
+             (student_net_ids, student_time_preferences, previous_student_time_preferences, changed_student_net_ids,
+              False)):
+        for (person_index, net_id) in enumerate(net_ids):
+            if net_id in changed_net_ids:
+                affected_times |= previous_assignment.timesForPerson(net_id, is_mod)
+                affected_times |= getNewTimes(time_preferences[person_index],
+                                              None if previous_time_preferences is None
+                                              else previous_time_preferences.get(net_id))
+
+    num_section_times = len(mod_time_preferences[0])
+    neighbourhood_radius = config.incremental_neighbourhood_radius
+    while True:
+        neighbourhood_times = {time_index for time_index in range(num_section_times)
+                               if any(abs(time_index - affected_time) <= neighbourhood_radius
+                                      for affected_time in affected_times)}
+        print(f'Re-solving {len(neighbourhood_times)} of {num_section_times} times: {sorted(neighbourhood_times)}')
+
+        (model, mod_time_variables, student_time_variables,
+         max_sections_per_mod, max_sections_per_time) = getModelFromInputFiles(*csv_files)
+        moved_person_expressions = []
+        moved_person_expressions += restrictToNeighbourhood(model, mod_time_variables, previous_assignment,
+                                                            changed_mod_net_ids, neighbourhood_times, is_mod=True)
+        moved_person_expressions += restrictToNeighbourhood(model, student_time_variables, previous_assignment,
+                                                            changed_student_net_ids, neighbourhood_times,
+                                                            is_mod=False)
+        addAllConstraints(model, mod_time_variables, student_time_variables, max_sections_per_mod,
+                          max_sections_per_time)
+        (status, solver, _, _) = solveModel(model, mod_time_variables, student_time_variables, max_sections_per_mod,
+                                            moved_person_expressions)
+        print(solver.StatusName(status))
+
+        if (status == cp_model.INFEASIBLE) and (len(neighbourhood_times) < num_section_times):
+            if len(affected_times) == 0:
+                # Nothing is known to have changed, so no radius would add a time to the neighbourhood
+                affected_times = set(range(num_section_times))
+                print('No assignment exists keeping everyone in place, re-solving every time')
+            else:
+                neighbourhood_radius += 1
+                print('No assignment exists within the neighbourhood, widening it to radius', neighbourhood_radius)
+            continue
+        break
+
+    if status == cp_model.INFEASIBLE:
+        print('INFEASIBLE: No assignment exists for the updated input files, even re-solving every time')
+    assert (status != cp_model.INFEASIBLE)
+    if config.only_allow_optimal_solutions:
+        assert (status == cp_model.OPTIMAL)
+
+    return extractModAndStudentAssignments(solver, mod_time_variables, student_time_variables)
+
+def readPreviousTimePreferences(previous_doodle_poll_csv_path):
+    """
+        Returns:
+            Dictionary of net ID to List of String for their time preferences in the previous Doodle poll, or None if
+             the previous Doodle poll is not given
+    """
+    if previous_doodle_poll_csv_path is None:
+        return None
+    return dict(zip(*readDoodlePreferences(previous_doodle_poll_csv_path)))
+
+def readPreviousMaxSections(previous_max_section_csv_path):
+    """
+        Returns:
+            Dictionary of moderator net ID to Integer for their max sections in the previous max sections file, or
+             None if it is not given. Unlike readModMaxSectionPreferences, moderators may be missing from it
+    """
+    if previous_max_section_csv_path is None:
+        return None
+    with open(previous_max_section_csv_path, 'r', encoding='utf-8-sig') as max_sections_csv:
+        return {entry[0]: int(entry[1]) for entry in csv.reader(max_sections_csv)}
+
+def getChangedMaxSectionsNetIDs(mod_net_ids, max_sections_per_mod, previous_max_sections, previous_assignment):
+    """
+        Args:
+            max_sections_per_mod: List of Integer for the max sections of each moderator in mod_net_ids
+            previous_max_sections: The result of readPreviousMaxSections for the previous max sections file
+
+        Returns:
+            Set of String for the net IDs of every previously assigned moderator whose max sections changed, or who
+             was assigned more sections than their max sections now allow
+    """
+    changed_net_ids = set()
+    for (mod_net_id, max_sections) in zip(mod_net_ids, max_sections_per_mod):
+        num_previous_sections = len(previous_assignment.timesForPerson(mod_net_id, is_mod=True))
+        if num_previous_sections == 0:
+            # New moderators are already changed, see getChangedNetIDs
+            continue
+        if num_previous_sections > max_sections:
+            changed_net_ids.add(mod_net_id)
+        elif (previous_max_sections is not None) and (previous_max_sections.get(mod_net_id) != max_sections):
+            changed_net_ids.add(mod_net_id)
+    return changed_net_ids
+
+def getNewTimes(time_preferences, previous_time_preferences):
+    """
+        Args:
+            time_preferences: List of String for a changed person's time preferences in the updated Doodle poll
+            previous_time_preferences: List of String for their time preferences in the previous Doodle poll, or None
+                                        if they were not in it or it is not given
+
+        Returns:
+            Set of Integer for the time indices the changed person is likely to move to: the possible times whose
+             preference changed since the previous poll, or their preferred times if it is not known what changed.
+             If that is no time at all, every time possible for them
+    """
+    possible_times = {time_index for (time_index, preference) in enumerate(time_preferences)
+                      if preference != DOODLE_IMPOSSIBLE_TIME}
+    if previous_time_preferences is not None:
+        new_times = {time_index for time_index in possible_times
+                     if time_preferences[time_index] != previous_time_preferences[time_index]}
+    else:
+        new_times = {time_index for time_index in possible_times
+                     if time_preferences[time_index] == DOODLE_PREFERRED_TIME}
+    return new_times if len(new_times) > 0 else possible_times
+
+def getChangedNetIDs(net_ids, time_preferences, previous_time_preferences, previous_assignment, is_mod):
+    """
+        Args:
+            previous_time_preferences: The result of readPreviousTimePreferences for the previous Doodle poll
+
+        Returns:
+            Set of String for the net IDs of every person who is new or whose preferences changed since the
+             previous assignment, see assignModeratorsAndStudentsIncrementally
+    """
+    changed_net_ids = set()
+    for (person_index, net_id) in enumerate(net_ids):
+        previous_times = previous_assignment.timesForPerson(net_id, is_mod)
+        if len(previous_times) == 0:
+            # New person who has never been assigned
+            changed_net_ids.add(net_id)
+        elif any(time_preferences[person_index][time_index] == '' for time_index in previous_times):
+            # A previously assigned time no longer works for them, so they must move no matter what
+            changed_net_ids.add(net_id)
+        elif (previous_time_preferences is not None) and \
+             (previous_time_preferences.get(net_id) != time_preferences[person_index]):
+            changed_net_ids.add(net_id)
+
+    return changed_net_ids
+
+def restrictToNeighbourhood(model, person_time_variables, previous_assignment, changed_net_ids,
+                            neighbourhood_times, is_mod):
+    """
+        Fixes every variable outside of the neighbourhood to its previous value, hints every variable inside of it
+         with its previous value, and fixes people who are neither changed nor assigned inside the neighbourhood
+
+        Args:
+            model: The CpModel object that represents the constraints of the problem
+            person_time_variables: 2D List of PersonTimeVariableWrapper for either moderators or students
+            previous_assignment: PreviousAssignment from readPreviousAssignment
+            changed_net_ids: Set of String for the net IDs of people who are new or changed
+            neighbourhood_times: Set of Integer for the time indices people are allowed to move between
+            is_mod: True if person_time_variables is for moderators, False if for students
+
+        Returns:
+            List of CP linear expressions which are each 1 when a person is moved away from a time they were
+             previously assigned
+    """
+    moved_person_expressions = []
+    for time_variables_for_person in person_time_variables:
+        person_time_var_wrappers = [wrapper for wrapper in time_variables_for_person if wrapper is not None]
+        if len(person_time_var_wrappers) == 0:
+            continue
+
+        net_id = person_time_var_wrappers[0].net_id
+        previous_times = previous_assignment.timesForPerson(net_id, is_mod)
+        is_free = (net_id in changed_net_ids) or (len(previous_times & neighbourhood_times) > 0)
+
+        for person_time_var_wrapper in person_time_var_wrappers:
+            time_index = person_time_var_wrapper.time_index
+            previous_value = 1 if time_index in previous_times else 0
+            if is_free and (time_index in neighbourhood_times):
+                model.AddHint(person_time_var_wrapper.variable, previous_value)
+                if previous_value == 1:
+                    moved_person_expressions.append(1 - person_time_var_wrapper.variable)
+            else:
+                model.Add(person_time_var_wrapper.variable == previous_value)
+
+    return moved_person_expressions
+
+def assignSectionsKeepingPrevious(mods_assigned_to_times, students_assigned_to_times, previous_assignment):
+    """
+        Assigns moderators and students to sections within their time slots like assignSectionsFromSectionTimes,
+         except that moderators keep their previous room and students keep their previous section whenever they are
+         still assigned to the same time, so unchanged people are not shuffled between sections
+
+        Args:
+            mods_assigned_to_times: List of List of Strings where the entry at each index is all net IDs of the
+                                       moderators assigned to that time index
+            students_assigned_to_times: List of List of Strings where the entry at each index is all net IDs of the
+                                            students assigned to that time index
+            previous_assignment: PreviousAssignment from readPreviousAssignment
+
+        Returns: List of List of Section where the entry at each index is all Sections complete with moderator,
+                    room, and students that have been assigned to that time index
+    """
+    random.seed("Creatively Titled Section Assignment Seed") # Ensure deterministic behavior
+    (_, rooms_in_each_time) = readSectionTimeInfo(config.section_times_csv_path)
+
+    sections_in_each_time = []
+    for time_index in range(len(mods_assigned_to_times)):
+        room_order = getRoomOrder(rooms_in_each_time[time_index])
+        mods_in_time = mods_assigned_to_times[time_index]
+
+        # Moderators who taught at this time before keep their room, everyone else takes the next free room
+        section_for_mod = {}
+        for mod_net_id in mods_in_time:
+            previous_room = previous_assignment.mod_room.get((mod_net_id, time_index))
+            if previous_room in room_order:
+                room_order.remove(previous_room)
+                section_for_mod[mod_net_id] = Section(mod_net_id, previous_room)
+        for mod_net_id in mods_in_time:
+            if mod_net_id not in section_for_mod:
+                section_for_mod[mod_net_id] = Section(mod_net_id, room_order.pop(0))
+        sections_in_time = [section_for_mod[mod_net_id] for mod_net_id in mods_in_time]
+
+        # Students who were in the section of one of these moderators at this time stay in it
+        remaining_students = []
+        for student_net_id in students_assigned_to_times[time_index]:
+            previous_mod_net_id = previous_assignment.student_mod.get(student_net_id)
+            previous_section = section_for_mod.get(previous_mod_net_id)
+            if (previous_assignment.student_time.get(student_net_id) == time_index) and \
+               (previous_section is not None) and \
+               (len(previous_section.student_net_ids) < config.max_students_per_section):
+                previous_section.addStudent(student_net_id)
+            else:
+                remaining_students.append(student_net_id)
+
+        # Everyone else goes to the smallest section, in random order like assignSectionsFromSectionTimes
+        random.shuffle(remaining_students)
+        for student_net_id in remaining_students:
+            min(sections_in_time, key=lambda section: len(section.student_net_ids)).addStudent(student_net_id)
+
+        # Move students out of the largest sections until every section has the minimum number of students
+        while len(sections_in_time) > 0 and \
+              min(len(section.student_net_ids) for section in sections_in_time) < config.min_students_per_section:
+            smallest_section = min(sections_in_time, key=lambda section: len(section.student_net_ids))
+            largest_section = max(sections_in_time, key=lambda section: len(section.student_net_ids))
+            smallest_section.addStudent(largest_section.student_net_ids.pop())
+
+        sections_in_each_time.append(sections_in_time)
+
+    return sections_in_each_time
+
+def getAssignmentChanges(section_assignments, previous_assignment, section_times):
+    """
+        Args:
+            section_assignments: List of List of Section representing all Sections created at each time index
+            previous_assignment: PreviousAssignment from readPreviousAssignment
+            section_times: List of String for the section times in the same order as the Doodle polls
+
+        Returns:
+            List of (net ID, 'student' or 'mod', previous assignment, new assignment) for everyone whose section
+             changed, where an assignment is described like 'Wednesday 10 AM - 12 PM (amackow2)' for a student or
+             the section times joined with ' | ' for a moderator, and is '' for an added or dropped person
+    """
+    new_student_sections = {}
+    new_mod_times = defaultdict(set)
+    for (time_index, sections_in_time) in enumerate(section_assignments):
+        for section in sections_in_time:
+            new_mod_times[section.mod_net_id].add(time_index)
+            for student_net_id in section.student_net_ids:
+                new_student_sections[student_net_id] = (time_index, section.mod_net_id)
+
+    def describeStudentSection(student_section):
+        if student_section is None:
+            return ''
+        (time_index, mod_net_id) = student_section
+        return f'{section_times[time_index]} ({mod_net_id})'
+
+    def describeModTimes(mod_times):
+        return ' | '.join(section_times[time_index] for time_index in sorted(mod_times))
+
+    changes = []
+    for student_net_id in sorted(set(previous_assignment.student_time) | set(new_student_sections)):
+        previous_section = None
+        if student_net_id in previous_assignment.student_time:
+            previous_section = (previous_assignment.student_time[student_net_id],
+                                previous_assignment.student_mod[student_net_id])
+        new_section = new_student_sections.get(student_net_id)
+        if previous_section != new_section:
+            changes.append((student_net_id, 'student', describeStudentSection(previous_section),
+                            describeStudentSection(new_section)))
+
+    for mod_net_id in sorted(set(previous_assignment.mod_times) | set(new_mod_times)):
+        previous_times = previous_assignment.mod_times.get(mod_net_id, set())
+        new_times = new_mod_times.get(mod_net_id, set())
+        if previous_times != new_times:
+            changes.append((mod_net_id, 'mod', describeModTimes(previous_times), describeModTimes(new_times)))
+
+    return changes
+
+def writeAssignmentChangesToCsv(changes, output_csv_path):
+    """
+        Writes the result of getAssignmentChanges to a CSV with format
+         [net ID],[student or mod],[previous assignment],[new assignment]
+    """
+    with open(output_csv_path, 'w+', encoding='utf-8-sig') as output_file:
+        output_writer = csv.writer(output_file)
+        for change in changes:
+            output_writer.writerow(change)
+
+    print('Assignment changes:', len(changes))
+    for (net_id, role, previous_description, new_description) in changes:
+        print(f'{role} {net_id}: "{previous_description}" -> "{new_description}"')
+    print('Assignment changes CSV written to:', output_csv_path)
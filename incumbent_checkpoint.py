@@ -0,0 +1,252 @@
+import config
+import json
+import math
+import os
+import solve_cache
+import threading
+import time
+from person_time_index import getPersonTimeIndex
+from solution_extraction import popPeopleFromType
+
+# Increase this whenever the contents of a checkpoint change, so that checkpoints made by older code are never used
+CHECKPOINT_FORMAT_VERSION = 1
+
+class Checkpoint:
+    """ The best assignment found by an earlier solve, as read by readCheckpoint """
+    __slots__ = ('model_key', 'objective_value', 'mod_times', 'student_times')
+
+    def __init__(self, model_key, objective_value, mod_times, student_times):
+        """
+            Args:
+                model_key: String naming the input files and model config options the assignment was found for
+                objective_value: Float for the objective value of the assignment
+                mod_times: Dictionary of moderator net ID to List of Integer for the time indices they are assigned
+                student_times: Dictionary of student net ID to List of Integer for the time indices they are assigned
+        """
+        self.model_key = model_key
+        self.objective_value = objective_value
+        self.mod_times = mod_times
+        self.student_times = student_times
+
+class IncumbentCheckpointer:
+    """
+        Writes the newest solution of a solve to a checkpoint file from a background thread, so that the solution
+         callback only has to copy the solution out of the solver. Writes are at most once every interval, and
+         solutions found in between are only kept until the next write, which always has the newest one
+    """
+
+    def __init__(self, checkpoint_path, model_key, mod_time_variables, student_time_variables, interval_seconds):
+        """
+            Args:
+                checkpoint_path: Path to write the checkpoint to
+                model_key: String naming the input files and model config options, see getModelKey
+                mod_time_variables: 2D List of PersonTimeVariableWrapper, if [mod_index][time_index]
+                                        is None then that time is impossible for that mod
+                student_time_variables: 2D List of PersonTimeVariableWrapper,
+                                            if [student_index][time_index] is None then
+                                            that time is impossible for that student
+                interval_seconds: Number for the fewest seconds between two writes
+        """
+        self.checkpoint_path = checkpoint_path
+        self.model_key = model_key
+        self.mod_time_index = getPersonTimeIndex(mod_time_variables)
+        self.student_time_index = getPersonTimeIndex(student_time_variables, self.mod_time_index.num_section_times)
+        self.interval_seconds = interval_seconds
+        self.condition = threading.Condition()
+        self.pending_solution = None # SolutionValues waiting to be written
+        self.last_write_time = None
+        self.num_writes = 0
+        self.is_closed = False
+        self.writer_thread = None
+
+    def offer(self, solution_values):
+        """
+            Hands a new solution to the writer thread, called from the solution callback
+
+            Args:
+                solution_values: SolutionValues of the newest solution, see solution_extraction.getSolutionValues
+        """
+        with self.condition:
+            assert not self.is_closed
+            self.pending_solution = solution_values
+            if self.writer_thread is None:
+                self.writer_thread = threading.Thread(target=self.writeLoop, daemon=True)
+                self.writer_thread.start()
+            self.condition.notify()
+
+    def close(self):
+        """ Writes the newest solution right away if it has not been written yet, and stops the writer thread """
+        with self.condition:
+            self.is_closed = True
+            self.condition.notify()
+        if self.writer_thread is not None:
+            self.writer_thread.join()
+
+    def writeLoop(self):
+        while True:
+            with self.condition:
+                while self.pending_solution is None and not self.is_closed:
+                    self.condition.wait()
+                if self.pending_solution is None:
+                    return
+                if (not self.is_closed) and (self.last_write_time is not None):
+                    seconds_until_write = self.last_write_time + self.interval_seconds - time.perf_counter()
+                    if seconds_until_write > 0:
+                        # Wait for the interval to pass, a newer solution may replace the pending one meanwhile
+                        self.condition.wait(seconds_until_write)
+                        continue
+                solution_values = self.pending_solution
+                self.pending_solution = None
+
+            writeCheckpoint(self.checkpoint_path, self.model_key, solution_values, self.mod_time_index,
+                            self.student_time_index)
+            self.last_write_time = time.perf_counter()
+            self.num_writes += 1
+
+def getCheckpointPath():
+    """
+        Returns:
+            config.checkpoint_path, or the output CSV path with its extension replaced by .checkpoint.json if None
+    """
+    if config.checkpoint_path is not None:
+        return config.checkpoint_path
+    return os.path.splitext(config.output_csv_path)[0] + '.checkpoint.json'
+
+def getModelKey(csv_paths):
+    """
+        Returns:
+            String naming the contents of the input files and the config options which change the CP model, so a
+             checkpoint is only trusted by a model it was made for
+    """
+    return solve_cache.getCacheKey(solve_cache.hashInputFiles(csv_paths), solve_cache.MODEL_CONFIG_OPTIONS)
+
+def getCheckpointer(csv_paths, mod_time_variables, student_time_variables):
+    """
+        Returns:
+            IncumbentCheckpointer writing to getCheckpointPath() if config.checkpoint_incumbents or
+             config.resume_from_checkpoint is enabled, otherwise None
+    """
+    if not (config.checkpoint_incumbents or config.resume_from_checkpoint):
+        return None
+    return IncumbentCheckpointer(getCheckpointPath(), getModelKey(csv_paths), mod_time_variables,
+                                 student_time_variables, config.checkpoint_interval_seconds)
+
+def getAssignedTimes(values, person_time_index):
+    """
+        Args:
+            values: Sequence of Integer where each entry is the value of the CP variable with that index
+            person_time_index: PersonTimeIndex of the moderators or students
+
+        Returns:
+            Dictionary of net ID to List of Integer for the time indices assigned to that person, in the same way
+             solution_extraction.extractSolution hands out the people of a type
+    """
+    assigned_times = {}
+    next_person_in_type = [0] * person_time_index.num_people
+    for time_index in range(person_time_index.num_section_times):
+        for (person_index, person_time_var_wrapper) in zip(person_time_index.personIndicesAtTime(time_index),
+                                                           person_time_index.wrappersAtTime(time_index)):
+            num_assigned = values[person_time_var_wrapper.variable.Index()]
+            if num_assigned == 0:
+                continue
+            for net_id in popPeopleFromType(person_time_var_wrapper.type_net_ids, next_person_in_type, person_index,
+                                            num_assigned):
+                assigned_times.setdefault(net_id, []).append(time_index)
+    return assigned_times
+
+def writeCheckpoint(checkpoint_path, model_key, solution_values, mod_time_index, student_time_index):
+    """
+        Writes the times assigned to every person in a solution, replacing the checkpoint file atomically so that a
+         run stopped midway always leaves the previous checkpoint or the new one
+    """
+    contents = {'version': CHECKPOINT_FORMAT_VERSION, 'model_key': model_key,
+                'objective_value': solution_values.objective_value, 'saved_at': time.time(),
+                'mods': getAssignedTimes(solution_values.values, mod_time_index),
+                'students': getAssignedTimes(solution_values.values, student_time_index)}
+    solve_cache.writeFileAtomically(checkpoint_path, json.dumps(contents, separators=(',', ':')).encode('utf-8'))
+
+def readCheckpoint(checkpoint_path):
+    """
+        Returns:
+            Checkpoint in the file, or None if there is no checkpoint made by this version of the code
+    """
+    if not os.path.exists(checkpoint_path):
+        return None
+    with open(checkpoint_path, 'r', encoding='utf-8') as checkpoint_file:
+        contents = json.load(checkpoint_file)
+    if contents.get('version') != CHECKPOINT_FORMAT_VERSION:
+        return None
+    return Checkpoint(contents['model_key'], contents['objective_value'], contents['mods'], contents['students'])
+
+def hintCheckpoint(model, checkpoint, mod_time_variables, student_time_variables):
+    """
+        Replaces any solution hint in the model with the assignment of the checkpoint. Only the person/time
+         variables are hinted, the solver completes the rest of the hint from them
+
+        Returns:
+            Integer for the number of people in the checkpoint who were not found in the model
+    """
+    model_proto = model.Proto()
+    model_proto.ClearField('solution_hint')
+    num_people_not_found = 0
+    for (person_time_variables, assigned_times) in ((mod_time_variables, checkpoint.mod_times),
+                                                    (student_time_variables, checkpoint.student_times)):
+        people_found = set()
+        for person_time_var_wrappers in person_time_variables:
+            for person_time_var_wrapper in person_time_var_wrappers:
+                if person_time_var_wrapper is None:
+                    continue
+                num_assigned = 0
+                for net_id in person_time_var_wrapper.type_net_ids:
+                    if net_id in assigned_times:
+                        people_found.add(net_id)
+                        num_assigned += (person_time_var_wrapper.time_index in assigned_times[net_id])
+                model_proto.solution_hint.vars.append(person_time_var_wrapper.variable.Index())
+                model_proto.solution_hint.values.append(num_assigned)
+        num_people_not_found += len(assigned_times.keys() - people_found)
+    return num_people_not_found
+
+def addObjectiveUpperBound(model, objective_value):
+    """
+        Adds the constraint that the minimized objective is at most objective_value, so the solver never spends
+         time on solutions worse than one which is already known
+    """
+    model_proto = model.Proto()
+    objective = model_proto.objective
+    scaling_factor = objective.scaling_factor if objective.scaling_factor != 0 else 1.0
+    assert scaling_factor > 0, 'only a minimized objective can be bounded'
+    unscaled_bound = math.floor(objective_value / scaling_factor - objective.offset + 1e-6)
+    bound_constraint = model_proto.constraints.add().linear
+    bound_constraint.vars.extend(objective.vars)
+    bound_constraint.coeffs.extend(objective.coeffs)
+    bound_constraint.domain.extend([-2**63 + 1, unscaled_bound])
+
+def resumeFromCheckpoint(model, checkpointer, mod_time_variables, student_time_variables):
+    """
+        Starts the solve from the assignment in the checkpoint file if there is one, with its objective value as an
+         upper bound when the checkpoint was made for the same input files and model config options
+
+        Args:
+            model: The CpModel object with every constraint and the weighted objective function
+            checkpointer: IncumbentCheckpointer of the solve, which names the checkpoint file and the model
+            mod_time_variables: 2D List of PersonTimeVariableWrapper for the moderators
+            student_time_variables: 2D List of PersonTimeVariableWrapper for the students
+
+        Returns:
+            The Checkpoint resumed from, or None if there was none
+    """
+    checkpoint = readCheckpoint(checkpointer.checkpoint_path)
+    if checkpoint is None:
+        print(f'No checkpoint to resume from at {checkpointer.checkpoint_path}, solving from the start')
+        return None
+
+    num_people_not_found = hintCheckpoint(model, checkpoint, mod_time_variables, student_time_variables)
+    if checkpoint.model_key == checkpointer.model_key:
+        addObjectiveUpperBound(model, checkpoint.objective_value)
+        print(f'Resuming from checkpoint with objective value {checkpoint.objective_value}')
+    else:
+        # The objective value may mean something else for different inputs or config, so it is only a hint
+        print('WARNING: the checkpoint was made for different input files or config, it is only used as a hint')
+    if num_people_not_found > 0:
+        print(f'WARNING: {num_people_not_found} people in the checkpoint are not in the input files')
+    return checkpoint
@@ -0,0 +1,264 @@
+import config
+import contextlib
+import functools
+import json
+import re
+import time
+import tracemalloc
+
+# How long CP-SAT presolve took is only in the solve log, as the time the search started
+SEARCH_START_PATTERN = re.compile(r'^Starting search at ([0-9.eE+-]+)s', re.MULTILINE)
+
+class Span:
+    """ One timed phase of the pipeline """
+    __slots__ = ('name', 'parent_name', 'start_seconds', 'seconds', 'start_memory_bytes', 'peak_memory_bytes')
+
+    def __init__(self, name, parent_name, start_seconds, start_memory_bytes=None):
+        """
+            Args:
+                name: String naming the phase
+                parent_name: String for the name of the span this one is inside of, or None
+                start_seconds: Float for the seconds since the start of the run when the span started
+                start_memory_bytes: Integer for the memory traced by tracemalloc when the span started, or None
+                                     when memory is not traced
+        """
+        self.name = name
+        self.parent_name = parent_name
+        self.start_seconds = start_seconds
+        self.seconds = None
+        self.start_memory_bytes = start_memory_bytes
+        self.peak_memory_bytes = start_memory_bytes
+
+    def getEvent(self):
+        event = {'type': 'span', 'name': self.name, 'parent': self.parent_name,
+                 'start_seconds': round(self.start_seconds, 6), 'seconds': round(self.seconds, 6)}
+        if self.start_memory_bytes is not None:
+            # Peak memory above what was already allocated when the span started
+            event['peak_memory_bytes'] = self.peak_memory_bytes - self.start_memory_bytes
+        return event
+
+class Recorder:
+    """ Collects the spans, counters and CP-SAT statistics of one run and writes them to the output sink """
+
+    def __init__(self, run_name=None, output_path=None, should_trace_memory=False):
+        """
+            Args:
+                run_name: String naming the run in the output, or None
+                output_path: Path ending in .jsonl to append every event to as it happens, a path ending in .json to
+                              write one document when the run finishes, or None for no output file
+                should_trace_memory: True to record the peak memory of every span with tracemalloc
+        """
+        self.run_name = run_name
+        self.output_path = output_path
+        self.should_trace_memory = should_trace_memory
+        self.start_time = time.perf_counter()
+        self.open_spans = []
+        self.spans = []
+        self.counters = {}
+        self.solver_statistics = []
+        if should_trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def startSpan(self, name):
+        parent_name = self.open_spans[-1].name if len(self.open_spans) > 0 else None
+        start_memory_bytes = None
+        if self.should_trace_memory:
+            # Keep the peak of the enclosing span before the peak is reset for this one
+            (start_memory_bytes, peak_memory_bytes) = tracemalloc.get_traced_memory()
+            if len(self.open_spans) > 0:
+                self.open_spans[-1].peak_memory_bytes = max(self.open_spans[-1].peak_memory_bytes, peak_memory_bytes)
+            tracemalloc.reset_peak()
+        span = Span(name, parent_name, time.perf_counter() - self.start_time, start_memory_bytes)
+        self.open_spans.append(span)
+        return span
+
+    def finishSpan(self, span):
+        span.seconds = time.perf_counter() - self.start_time - span.start_seconds
+        assert self.open_spans[-1] is span, 'spans must finish in the reverse order they started'
+        self.open_spans.pop()
+        if self.should_trace_memory:
+            peak_memory_bytes = tracemalloc.get_traced_memory()[1]
+            span.peak_memory_bytes = max(span.peak_memory_bytes, peak_memory_bytes)
+            if len(self.open_spans) > 0:
+                self.open_spans[-1].peak_memory_bytes = max(self.open_spans[-1].peak_memory_bytes, peak_memory_bytes)
+            tracemalloc.reset_peak()
+        self.spans.append(span)
+        self.writeEvent(span.getEvent())
+
+    def setCounter(self, name, value):
+        self.counters[name] = value
+        self.writeEvent({'type': 'counter', 'name': name, 'value': value})
+
+    def addSolverStatistics(self, solver_statistics):
+        self.solver_statistics.append(solver_statistics)
+        self.writeEvent(dict(solver_statistics, type='solver'))
+
+    def writeEvent(self, event):
+        if self.output_path is not None and self.output_path.endswith('.jsonl'):
+            with open(self.output_path, 'a', encoding='utf-8') as output_file:
+                output_file.write(json.dumps(dict(event, run=self.run_name)) + '\n')
+
+    def getPhaseTotals(self):
+        """
+            Returns:
+                List of (span name, number of spans, total seconds, largest peak memory bytes or None) in the order
+                 each name first finished
+        """
+        phase_totals = {}
+        for span in self.spans:
+            event = span.getEvent()
+            (num_spans, seconds, peak_memory_bytes) = phase_totals.get(span.name, (0, 0.0, None))
+            if 'peak_memory_bytes' in event:
+                peak_memory_bytes = max(peak_memory_bytes or 0, event['peak_memory_bytes'])
+            phase_totals[span.name] = (num_spans + 1, seconds + span.seconds, peak_memory_bytes)
+        return [(name,) + totals for (name, totals) in phase_totals.items()]
+
+    def finish(self):
+        """ Writes the whole run to a .json output path, a .jsonl output path already has every event """
+        if self.output_path is not None and not self.output_path.endswith('.jsonl'):
+            with open(self.output_path, 'w', encoding='utf-8') as output_file:
+                json.dump({'run': self.run_name, 'total_seconds': time.perf_counter() - self.start_time,
+                           'spans': [span.getEvent() for span in self.spans], 'counters': self.counters,
+                           'solver_statistics': self.solver_statistics}, output_file, indent=1)
+        if self.should_trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def printSummary(self):
+        print()
+        print('{:<44} {:>6} {:>12} {:>14}'.format('Phase', 'Count', 'Seconds', 'Peak memory MB'))
+        for (name, num_spans, seconds, peak_memory_bytes) in self.getPhaseTotals():
+            peak_memory = '-' if peak_memory_bytes is None else f'{peak_memory_bytes / (1024 * 1024):.2f}'
+            print('{:<44} {:>6} {:>12.3f} {:>14}'.format(name, num_spans, seconds, peak_memory))
+        for (name, value) in self.counters.items():
+            print(f'{name}: {value}')
+        for solver_statistics in self.solver_statistics:
+            print(f'{solver_statistics["name"]}: {solver_statistics["status"]}, objective '
+                  f'{solver_statistics["objective"]}, bound {solver_statistics["best_bound"]}, '
+                  f'{solver_statistics["wall_seconds"]:.3f}s wall, {solver_statistics["presolve_seconds"]}s presolve, '
+                  f'{solver_statistics["num_conflicts"]} conflicts, {solver_statistics["num_branches"]} branches')
+
+# The recorder of the current run, None when config.enable_instrumentation is off and no run was started
+recorder = None
+
+def getRecorder():
+    """
+        Returns:
+            The Recorder of the current run, starting one if config.enable_instrumentation is on and none was
+             started, otherwise None
+    """
+    global recorder
+    if recorder is None and config.enable_instrumentation:
+        recorder = Recorder(output_path=config.instrumentation_output_path,
+                            should_trace_memory=config.instrumentation_trace_memory)
+    return recorder
+
+def startRun(run_name=None):
+    """
+        Starts recording a new run if config.enable_instrumentation is on, discarding anything recorded before
+
+        Args:
+            run_name: String naming the run in the output, or None
+    """
+    global recorder
+    recorder = None
+    if config.enable_instrumentation:
+        recorder = Recorder(run_name, config.instrumentation_output_path, config.instrumentation_trace_memory)
+
+def finishRun():
+    """ Writes the output sink and prints the summary of the current run, if one is being recorded """
+    global recorder
+    if recorder is None:
+        return
+    recorder.finish()
+    recorder.printSummary()
+    recorder = None
+
+@contextlib.contextmanager
+def span(name):
+    """
+        Times the code inside a with block as one phase of the pipeline, does nothing without a run being recorded
+
+        Args:
+            name: String naming the phase
+    """
+    current_recorder = getRecorder()
+    if current_recorder is None:
+        yield
+        return
+    started_span = current_recorder.startSpan(name)
+    try:
+        yield
+    finally:
+        current_recorder.finishSpan(started_span)
+
+def timed(name):
+    """
+        Returns:
+            Decorator which runs the whole function inside span(name)
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def timedFunction(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return timedFunction
+    return decorator
+
+def setCounter(name, value, message=None):
+    """
+        Records a count like the number of variables created, replacing the print each count used to have
+
+        Args:
+            name: String naming the counter in the output
+            value: Number for the counter
+            message: String printed before the value unless config.quiet_mode is on, or None to not print
+    """
+    if message is not None and not config.quiet_mode:
+        print(message, value)
+    current_recorder = getRecorder()
+    if current_recorder is not None:
+        current_recorder.setCounter(name, value)
+
+def solve(solver, model, solution_callback=None, name='solve'):
+    """
+        Solves the model inside a span and records the CP-SAT statistics of the response
+
+        Args:
+            solver: cp_model.CpSolver with its parameters already set
+            model: The CpModel to solve
+            solution_callback: CpSolverSolutionCallback called for every solution, or None
+            name: String naming the solve in the output
+
+        Returns:
+            The CP solver status
+    """
+    current_recorder = getRecorder()
+    if current_recorder is not None:
+        # Presolve time is only reported in the search log
+        solver.parameters.log_search_progress = True
+        solver.parameters.log_to_stdout = False
+        solver.parameters.log_to_response = True
+    with span(name):
+        if solution_callback is None:
+            status = solver.Solve(model)
+        else:
+            status = solver.SolveWithSolutionCallback(model, solution_callback)
+    if current_recorder is not None:
+        current_recorder.addSolverStatistics(getSolverStatistics(solver, name))
+    return status
+
+def getSolverStatistics(solver, name):
+    """
+        Returns:
+            Dictionary of the statistics in the response of a solver which has finished solving
+    """
+    response = solver.ResponseProto()
+    has_solution = len(response.solution) > 0
+    search_start_match = SEARCH_START_PATTERN.search(response.solve_log)
+    return {'name': name, 'status': solver.StatusName(), 'objective': response.objective_value if has_solution
+            else None, 'best_bound': response.best_objective_bound, 'wall_seconds': response.wall_time,
+            'user_seconds': response.user_time, 'deterministic_time': response.deterministic_time,
+            'presolve_seconds': float(search_start_match.group(1)) if search_start_match is not None else None,
+            'num_conflicts': response.num_conflicts, 'num_branches': response.num_branches,
+            'num_booleans': response.num_booleans, 'num_restarts': response.num_restarts,
+            'gap_integral': response.gap_integral}
@@ -0,0 +1,205 @@
+import assign_time_slots
+import config
+import instrumentation
+import random
+import time
+from objective_functions import addFunctionToMinimize
+from ortools.sat.python import cp_model
+from solution_extraction import SolutionValues, getSolutionValues
+from solver_progress import getRelativeGap
+
+NEIGHBOURHOOD_KINDS = ['weekday', 'times', 'mods']
+
+def solveWithLargeNeighbourhoodSearch(model, mod_time_variables, student_time_variables, max_sections_per_mod):
+    """
+        Finds a first solution to the full model, then repeatedly frees a small neighbourhood of the assignment,
+         fixes every other person/time variable to its value in the best solution so far, and re-solves only the
+         neighbourhood under a short time limit, until config.lns_time_budget_seconds have passed
+
+        Neighbourhoods take turns between every time on one weekday, a random set of times, and the times taught by
+         a few random moderators. Everyone assigned to a freed time may move anywhere, everyone else may only move
+         into the freed times
+
+        Args:
+            model: The CpModel object that represents the constraints of the problem, without an objective
+            mod_time_variables: 2D List of PersonTimeVariableWrapper, if [mod_index][time_index]
+                                    is None then that time is impossible for that mod
+            student_time_variables: 2D List of PersonTimeVariableWrapper,
+                                        if [student_index][time_index] is None then
+                                        that time is impossible for that student
+            max_sections_per_mod: List of Integer, each entry is the max sections for that mod_index
+
+        Returns:
+            status: OPTIMAL if the best solution was proven optimal, FEASIBLE if a solution was found without proof,
+                     otherwise the status of the first solve
+            objective: Float for the objective value of the best solution, or None if no solution was found
+            best_bound: Float for the best lower bound on the objective value that was proven
+            assignment_values: SolutionValues holding the best solution, or None if no solution was found
+            num_improvements: Integer for the number of neighbourhoods which improved the objective value
+    """
+    start_time = time.time()
+    addFunctionToMinimize(model, mod_time_variables, student_time_variables,
+                          assign_time_slots.getMaxTotalSections(mod_time_variables, max_sections_per_mod))
+
+    # The first solution found is the incumbent every neighbourhood starts from
+    solver = assign_time_slots.createSolver()
+    solver.parameters.max_time_in_seconds = min(config.lns_initial_solution_seconds, config.lns_time_budget_seconds)
+    solver.parameters.stop_after_first_solution = True
+    status = instrumentation.solve(solver, model, name='solve first solution')
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return (status, None, solver.BestObjectiveBound(), None, 0)
+
+    values = getSolutionValues(solver).values
+    objective = solver.ObjectiveValue()
+    best_bound = solver.BestObjectiveBound()
+    print(f'LNS first solution: objective {round(objective, 3)}, bound {round(best_bound, 3)}')
+
+    random_generator = random.Random(config.random_seed)
+    neighbourhood_kinds = [kind for kind in NEIGHBOURHOOD_KINDS
+                           if (kind != 'weekday') or (len(getWeekdayTimes(mod_time_variables)) > 1)]
+    num_person_variables = len(getPersonVariableIndices(mod_time_variables + student_time_variables))
+    iteration = 0
+    num_improvements = 0
+    while (status != cp_model.OPTIMAL) and (time.time() - start_time < config.lns_time_budget_seconds):
+        neighbourhood_kind = neighbourhood_kinds[iteration % len(neighbourhood_kinds)]
+        iteration += 1
+        free_variable_indices = getNeighbourhoodVariableIndices(neighbourhood_kind, mod_time_variables,
+                                                                student_time_variables, values, random_generator)
+
+        remaining_seconds = config.lns_time_budget_seconds - (time.time() - start_time)
+        (neighbourhood_status, neighbourhood_solver) = solveNeighbourhood(
+            model, mod_time_variables + student_time_variables, values, free_variable_indices,
+            min(config.lns_neighbourhood_seconds, remaining_seconds))
+        if neighbourhood_status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            continue
+
+        # Equally good solutions are also accepted so that the search keeps moving
+        if neighbourhood_solver.ObjectiveValue() <= objective:
+            if neighbourhood_solver.ObjectiveValue() < objective:
+                num_improvements += 1
+                if not config.quiet_mode:
+                    print(f'LNS iteration {iteration} ({neighbourhood_kind}, {len(free_variable_indices)} free '
+                          f'variables): objective {round(objective, 3)} -> '
+                          f'{round(neighbourhood_solver.ObjectiveValue(), 3)}')
+            values = getSolutionValues(neighbourhood_solver).values
+            objective = neighbourhood_solver.ObjectiveValue()
+
+        # Solving a neighbourhood which frees every variable to optimality proves the whole problem optimal
+        if (neighbourhood_status == cp_model.OPTIMAL) and (len(free_variable_indices) == num_person_variables):
+            best_bound = objective
+        if objective <= best_bound:
+            status = cp_model.OPTIMAL
+        else:
+            status = cp_model.FEASIBLE
+
+    print(f'LNS finished after {iteration} neighbourhoods and {round(time.time() - start_time, 3)} seconds')
+    print('Best objective value:', round(objective, 3))
+    print('Best objective bound:', round(best_bound, 3))
+    print('Remaining optimality gap:', f'{round(100 * getRelativeGap(objective, best_bound), 2)}%')
+
+    return (status, objective, best_bound, SolutionValues(values, objective), num_improvements)
+
+def solveNeighbourhood(model, person_time_variables, values, free_variable_indices, max_time_in_seconds):
+    """
+        Solves a copy of the model where every person/time variable outside of the neighbourhood is fixed to its
+         current value, starting from the current solution
+
+        Args:
+            model: The CpModel object with every constraint and the objective function
+            person_time_variables: 2D List of PersonTimeVariableWrapper for every moderator and then every student
+            values: List of Integer for the value of every variable in the model in the current solution
+            free_variable_indices: Set of Integer for the indices of the person/time variables that may change
+            max_time_in_seconds: The time limit for solving the neighbourhood
+
+        Returns:
+            (CP solver status, the cp_model.CpSolver object holding the neighbourhood's solution)
+    """
+    neighbourhood_model = model.Clone()
+    model_proto = neighbourhood_model.Proto()
+    for variable_index in getPersonVariableIndices(person_time_variables) - free_variable_indices:
+        model_proto.variables[variable_index].domain[:] = [values[variable_index], values[variable_index]]
+    model_proto.ClearField('solution_hint')
+    model_proto.solution_hint.vars.extend(range(len(values)))
+    model_proto.solution_hint.values.extend(values)
+
+    solver = assign_time_slots.createSolver()
+    solver.parameters.max_time_in_seconds = max_time_in_seconds
+    return (instrumentation.solve(solver, neighbourhood_model, name='solve neighbourhood'), solver)
+
+def getNeighbourhoodVariableIndices(neighbourhood_kind, mod_time_variables, student_time_variables, values,
+                                    random_generator):
+    """
+        Args:
+            neighbourhood_kind: One of NEIGHBOURHOOD_KINDS
+            mod_time_variables: 2D List of PersonTimeVariableWrapper for the moderators
+            student_time_variables: 2D List of PersonTimeVariableWrapper for the students
+            values: List of Integer for the value of every variable in the model in the current solution
+            random_generator: random.Random used to pick the neighbourhood
+
+        Returns:
+            Set of Integer for the indices of the person/time variables which are free in a random neighbourhood
+             of the given kind
+    """
+    num_section_times = len(mod_time_variables[0])
+    if neighbourhood_kind == 'weekday':
+        weekday_times = getWeekdayTimes(mod_time_variables)
+        neighbourhood_times = weekday_times[random_generator.choice(sorted(weekday_times))]
+        return (getVariablesOfPeopleAtTimes(mod_time_variables, values, neighbourhood_times) |
+                getVariablesOfPeopleAtTimes(student_time_variables, values, neighbourhood_times))
+    elif neighbourhood_kind == 'times':
+        neighbourhood_times = set(random_generator.sample(range(num_section_times),
+                                                          min(config.lns_neighbourhood_num_times, num_section_times)))
+        return (getVariablesOfPeopleAtTimes(mod_time_variables, values, neighbourhood_times) |
+                getVariablesOfPeopleAtTimes(student_time_variables, values, neighbourhood_times))
+
+    # Free the chosen moderators entirely along with the students at every time they teach
+    assigned_mod_indices = [mod_index for (mod_index, time_variables_for_mod) in enumerate(mod_time_variables)
+                            if any(values[wrapper.variable.Index()] > 0
+                                   for wrapper in time_variables_for_mod if wrapper is not None)]
+    chosen_mod_indices = random_generator.sample(assigned_mod_indices,
+                                                 min(config.lns_neighbourhood_num_mods, len(assigned_mod_indices)))
+    free_variable_indices = getPersonVariableIndices([mod_time_variables[mod_index]
+                                                      for mod_index in chosen_mod_indices])
+    neighbourhood_times = {wrapper.time_index for mod_index in chosen_mod_indices
+                           for wrapper in mod_time_variables[mod_index]
+                           if (wrapper is not None) and (values[wrapper.variable.Index()] > 0)}
+    return free_variable_indices | getVariablesOfPeopleAtTimes(student_time_variables, values, neighbourhood_times)
+
+def getVariablesOfPeopleAtTimes(person_time_variables, values, neighbourhood_times):
+    """
+        Returns:
+            Set of Integer for the indices of every variable of a person assigned to one of the neighbourhood_times
+             in the current solution, along with every other person's variables at the neighbourhood_times
+    """
+    free_variable_indices = set()
+    for time_variables_for_person in person_time_variables:
+        times_for_person = {time_index for time_index in neighbourhood_times
+                            if time_variables_for_person[time_index] is not None}
+        if any(values[time_variables_for_person[time_index].variable.Index()] > 0 for time_index in times_for_person):
+            free_variable_indices |= getPersonVariableIndices([time_variables_for_person])
+        else:
+            free_variable_indices |= getPersonVariableIndices([time_variables_for_person], times_for_person)
+    return free_variable_indices
+
+def getPersonVariableIndices(person_time_variables, time_indices=None):
+    """
+        Returns:
+            Set of Integer for the indices of the CP variables of every person/time variable, only at the given
+             time_indices if they are not None
+    """
+    return {wrapper.variable.Index() for time_variables_for_person in person_time_variables
+            for wrapper in time_variables_for_person
+            if (wrapper is not None) and ((time_indices is None) or (wrapper.time_index in time_indices))}
+
+def getWeekdayTimes(mod_time_variables):
+    """
+        Returns:
+            Dictionary of String weekday to Set of Integer for the time indices on that weekday, empty if the
+             section times file was not given
+    """
+    weekday_times = {}
+    for time_variables_for_mod in mod_time_variables:
+        for wrapper in time_variables_for_mod:
+            if (wrapper is not None) and (wrapper.day_of_week is not None):
+                weekday_times.setdefault(wrapper.day_of_week, set()).add(wrapper.time_index)
+    return weekday_times
@@ -1,5 +1,11 @@
 import config
+import instrumentation
 import random
+from constraints import numPeopleInRow
+from fractions import Fraction
+from math import floor, gcd
+from ortools.sat.python import cp_model
+from person_time_index import getPersonTimeIndex
 # You really should use a first come first serve objective function (try not to lie to students)
 
 # Simplest function for calculation speed, inadvisable to use this however from a moderator perspective
@@ -24,8 +30,79 @@ def first_come_first_serve_mods_high_priority(num_mods, num_students, index, is_
         return ((num_students * num_students) / 2) + (num_mods - index)
     return num_students - index
 
+def getAffineCoefficientGenerator(objective_function):
+    """
+        Args:
+            objective_function: One of the functions above whose coefficient changes by the same amount from each
+                                 index to the next, for a fixed num_mods, num_students and is_mod_coefficient
+
+        Returns:
+            Function computing the objective function's coefficients for a whole sequence of indices from only two
+             calls to it, with the same arguments as objective_function except for a sequence of indices
+    """
+    def getCoefficients(num_mods, num_students, indices, is_mod_coefficient):
+        first_coefficient = objective_function(num_mods, num_students, 0, is_mod_coefficient)
+        step = objective_function(num_mods, num_students, 1, is_mod_coefficient) - first_coefficient
+        return [first_coefficient + (step * index) for index in indices]
+    return getCoefficients
+
+# Objective function -> function computing its coefficients for a whole sequence of indices, only for the objective
+#  functions whose coefficients change by the same amount from each index to the next
+COEFFICIENT_GENERATORS = {objective_function: getAffineCoefficientGenerator(objective_function)
+                          for objective_function in (everyone_equal_weight, moderators_equal_but_higher_priority,
+                                                     first_come_first_serve,
+                                                     first_come_first_serve_mods_high_priority)}
+
+def getObjectiveCoefficients(num_mods, num_students, indices, is_mod_coefficient):
+    """
+        Args:
+            num_mods: Integer for the number of moderators in the whole problem
+            num_students: Integer for the number of students in the whole problem
+            indices: Sequence of Integer for the person indices to compute coefficients for
+            is_mod_coefficient: True if the indices are moderator indices, False if they are student indices
+
+        Returns:
+            List of the config.objective_function coefficient for each index, computed all at once when the
+             function has an entry in COEFFICIENT_GENERATORS, otherwise by calling it for each index
+    """
+    coefficient_generator = COEFFICIENT_GENERATORS.get(config.objective_function)
+    if coefficient_generator is not None:
+        return coefficient_generator(num_mods, num_students, indices, is_mod_coefficient)
+    return [config.objective_function(num_mods, num_students, index, is_mod_coefficient) for index in indices]
+
+class ObjectiveStage:
+    """ One part of the objective function, the parts are solved one at a time in the lexicographic objective """
+
+    def __init__(self, name, expression, is_minimization):
+        """
+            Args:
+                name: String describing what this part of the objective function measures
+                expression: The CP linear expression for this part of the objective function
+                is_minimization: True if this part should be minimized, False if it should be maximized
+        """
+        self.name = name
+        self.expression = expression
+        self.is_minimization = is_minimization
+
+        # Filled in when the stage is solved by itself in the lexicographic objective
+        self.value = None
+        self.solve_seconds = None
+
 # Below is the code that actually makes use of the objective functions defined above
-def addFunctionToMinimize(model, mod_time_variables, student_time_variables, max_total_sections):
+
+# Give impossible times an extremely high cost to discourage the use of these times
+IMPOSSIBLE_VARIABLE_PENALTY = 10000
+
+# Leaving a constraint unsatisfied in the slack relaxation costs more than anything else, including an impossible
+#  time, see slack_relaxation.py
+SLACK_VARIABLE_PENALTY = 100000
+
+# Give not preferred times a multiplier to make them have a higher priority than contiguous sections
+NOT_PREFERRED_PRIORITY_MULTIPLIER = 10
+
+@instrumentation.timed('objective')
+def addFunctionToMinimize(model, mod_time_variables, student_time_variables, max_total_sections,
+                          moved_person_expressions=(), num_people=None, slack_variables=(), extra_terms=()):
     """
         Adds the objective function to minimize to the model
         The objective function that gets added is specified in the config file.
@@ -39,50 +116,262 @@ def addFunctionToMinimize(model, mod_time_variables, student_time_variables, max
                                         that time is impossible for that student
             max_total_sections: Integer for the maximum number of sections possible if every
                                  moderator is assigned to their maximum number of sections
+            moved_person_expressions: List of CP linear expressions which are each 1 when a person is moved away
+                                       from a time they were previously assigned, only used for incremental
+                                       assignment, see incremental_assignment.py
+            num_people: See getObjectiveTerms
+            slack_variables: List of CP variables for how far each constraint of the slack relaxation is from
+                              being satisfied, see slack_relaxation.py
+            extra_terms: List of (coefficient, CP variable) added to the objective function with the coefficient
+                          as it is, used for the two phase engine's estimate of the student cost, see
+                          two_phase_engine.addStudentCostEstimate
+
+        Returns:
+            List of ObjectiveStage for each part of the weighted objective function in priority order, which
+             can be used to report the value of each part after solving
+    """
+    (impossible_variables, not_preferred_terms,
+     mod_time_variables_to_maximize, contiguous_section_variables) = getObjectiveTerms(model, mod_time_variables,
+                                                                                        student_time_variables,
+                                                                                        num_people)
+
+    # Give making more sections a high enough priority to outweigh shifting students around
+    MAX_SECTIONS_PRIORITY_MULTIPLIER = (config.max_students_per_section + 1) * NOT_PREFERRED_PRIORITY_MULTIPLIER
+
+    # Collect every term of the objective function with its coefficient in a single pass
+    objective_expressions = []
+    objective_coefficients = []
+    objective_offset = 0
+    for variable in slack_variables:
+        objective_expressions.append(variable)
+        objective_coefficients.append(SLACK_VARIABLE_PENALTY)
+    for variable in impossible_variables:
+        objective_expressions.append(variable)
+        objective_coefficients.append(IMPOSSIBLE_VARIABLE_PENALTY)
+    moved_person_penalty = getMovedPersonPenalty(not_preferred_terms, mod_time_variables_to_maximize,
+                                                 MAX_SECTIONS_PRIORITY_MULTIPLIER)
+    for expression in moved_person_expressions:
+        objective_expressions.append(expression)
+        objective_coefficients.append(moved_person_penalty)
+    for (coefficient, variable) in not_preferred_terms:
+        objective_expressions.append(variable)
+        objective_coefficients.append(NOT_PREFERRED_PRIORITY_MULTIPLIER * coefficient)
+    for (coefficient, variable) in extra_terms:
+        objective_expressions.append(variable)
+        objective_coefficients.append(coefficient)
+
+    # Maximize contiguous sections, offset so that the objective function has minimum possible value of 0
+    for variable in contiguous_section_variables:
+        if isinstance(variable, int):
+            objective_offset -= variable
+            continue
+        objective_expressions.append(variable)
+        objective_coefficients.append(-1)
+    objective_offset += len(contiguous_section_variables)
+
+    # Maximize the number of sections, offset so that the objective function has minimum possible value of 0
+    for variable in mod_time_variables_to_maximize:
+        objective_expressions.append(variable)
+        objective_coefficients.append(-MAX_SECTIONS_PRIORITY_MULTIPLIER)
+    if len(mod_time_variables_to_maximize) > 0:
+        objective_offset += MAX_SECTIONS_PRIORITY_MULTIPLIER * max_total_sections
+
+    # Finally, minimize all of the above things
+    compileObjective(model, objective_expressions, objective_coefficients, objective_offset)
+    instrumentation.setCounter('objective terms', len(objective_expressions), 'Num objective function terms:')
+
+    return createObjectiveStages(impossible_variables, not_preferred_terms, mod_time_variables_to_maximize,
+                                 contiguous_section_variables, moved_person_expressions, slack_variables)
+
+def getMovedPersonPenalty(not_preferred_terms, mod_time_variables_to_maximize, max_sections_priority_multiplier):
+    """
+        Args:
+            not_preferred_terms: List of (coefficient, variable) from getObjectiveTerms
+            mod_time_variables_to_maximize: List of CP variables from getObjectiveTerms
+            max_sections_priority_multiplier: Number each of mod_time_variables_to_maximize is weighted by
+
+        Returns:
+            Number for the cost of moving one person, larger than the largest coefficient of any other term of the
+             objective function except impossible times and slack, so that no one change of those terms can
+             outweigh moving a person. The not preferred coefficients grow with the number of people (about 3200
+             for first come first serve on a real semester), so a fixed penalty would let a better not preferred
+             time outweigh keeping a person where they were
+    """
+    # Each contiguous section variable has a coefficient of 1
+    max_coefficient = 1
+    if len(not_preferred_terms) > 0:
+        max_coefficient = max(max_coefficient, NOT_PREFERRED_PRIORITY_MULTIPLIER *
+                              max(abs(coefficient) for (coefficient, _) in not_preferred_terms))
+    if len(mod_time_variables_to_maximize) > 0:
+        max_coefficient = max(max_coefficient, max_sections_priority_multiplier)
+    return floor(max_coefficient) + 1
+
+def getObjectiveStages(model, mod_time_variables, student_time_variables, moved_person_expressions=(),
+                       num_people=None):
+    """
+        Creates every part of the objective function without adding an objective to the model, so the parts can be
+         optimized one at a time in priority order instead of being combined with large multipliers
+
+        Args:
+            model: The CpModel object that represents the constraints of the problem
+            mod_time_variables: 2D List of PersonTimeVariableWrapper, if [mod_index][time_index]
+                                    is None then that time is impossible for that mod
+            student_time_variables: 2D List of PersonTimeVariableWrapper,
+                                        if [student_index][time_index] is None then
+                                        that time is impossible for that student
+            moved_person_expressions: List of CP linear expressions which are each 1 when a person is moved away
+                                       from a time they were previously assigned, see addFunctionToMinimize
+            num_people: See getObjectiveTerms
+
+        Returns:
+            List of ObjectiveStage in priority order: impossible times used, people moved, number of sections
+             created, not preferred times used, and contiguous sections. Parts not enabled are left out
+    """
+    return createObjectiveStages(*getObjectiveTerms(model, mod_time_variables, student_time_variables, num_people),
+                                 moved_person_expressions)
+
+def createObjectiveStages(impossible_variables, not_preferred_terms, mod_time_variables_to_maximize,
+                          contiguous_section_variables, moved_person_expressions=(), slack_variables=()):
+    """
+        Args:
+            The return values of getObjectiveTerms, followed by the moved_person_expressions and slack_variables
+             from addFunctionToMinimize
+
+        Returns:
+            List of ObjectiveStage in priority order with a stage for each non-empty part of the objective function
+    """
+    objective_stages = []
+    if len(slack_variables) > 0:
+        objective_stages.append(ObjectiveStage('slack', sum(slack_variables), True))
+    if len(impossible_variables) > 0:
+        objective_stages.append(ObjectiveStage('impossible times', sum(impossible_variables), True))
+    if len(moved_person_expressions) > 0:
+        objective_stages.append(ObjectiveStage('people moved', sum(moved_person_expressions), True))
+    if len(mod_time_variables_to_maximize) > 0:
+        objective_stages.append(ObjectiveStage('number of sections', sum(mod_time_variables_to_maximize), False))
+    if len(not_preferred_terms) > 0:
+        # Constraints can not have fractional coefficients, so scale them all to integers
+        integer_coefficients = scaleToIntegers([coefficient for (coefficient, _) in not_preferred_terms])
+        objective_stages.append(ObjectiveStage('not preferred times',
+                                               sum(coefficient * variable
+                                                   for (coefficient, (_, variable))
+                                                   in zip(integer_coefficients, not_preferred_terms)), True))
+    if len(contiguous_section_variables) > 0:
+        objective_stages.append(ObjectiveStage('contiguous sections', sum(contiguous_section_variables), False))
+    return objective_stages
+
+def compileObjective(model, expressions, coefficients, offset):
     """
-    num_mods = len(mod_time_variables)
-    num_students = len(student_time_variables)
-    num_section_times = len(mod_time_variables[0])
-    not_preferred_variables = []
+        Sets the objective to minimize the weighted sum of the expressions plus the offset as one flat linear
+         expression. The coefficients are normalized to the smallest integers with the same ratios and the
+         objective scaling factor is set to undo this, so the reported objective value is unchanged
 
-    # Give impossible times an extremely high cost to discourage the use of these times
+        Args:
+            model: The CpModel object that represents the constraints of the problem
+            expressions: List of CP variables or linear expressions
+            coefficients: List of Integer or Float, the coefficient of each expression
+            offset: Integer or Float constant added to the objective function
+    """
+    (integer_coefficients, scale) = normalizeToIntegers(coefficients)
+    model.Minimize(cp_model.LinearExpr.WeightedSum(expressions, integer_coefficients))
+
+    # The offset from the constants within the expressions is already in the normalized units
+    objective_proto = model.Proto().objective
+    objective_proto.offset += float(Fraction(offset).limit_denominator() / scale)
+    objective_proto.scaling_factor = float(scale)
+
+def normalizeToIntegers(coefficients):
+    """
+        Args:
+            coefficients: List of Integer or Float
+
+        Returns:
+            integer_coefficients: List of Integer from scaleToIntegers divided by their greatest common divisor
+            scale: Fraction such that each coefficient equals its integer coefficient multiplied by the scale
+    """
+    if len(coefficients) == 0:
+        return [], Fraction(1)
+
+    fractions = [Fraction(coefficient).limit_denominator() for coefficient in coefficients]
+    integer_coefficients = scaleToIntegers(fractions)
+    common_divisor = gcd(*integer_coefficients)
+    if common_divisor == 0:
+        return integer_coefficients, Fraction(1)
+
+    integer_coefficients = [coefficient // common_divisor for coefficient in integer_coefficients]
+    for (fraction, integer_coefficient) in zip(fractions, integer_coefficients):
+        if integer_coefficient != 0:
+            return integer_coefficients, fraction / integer_coefficient
+
+def scaleToIntegers(coefficients):
+    """
+        Args:
+            coefficients: List of Integer or Float
+
+        Returns:
+            List of Integer where every coefficient is multiplied by the smallest common factor making them integers
+    """
+    fractions = [Fraction(coefficient).limit_denominator() for coefficient in coefficients]
+    common_denominator = 1
+    for fraction in fractions:
+        common_denominator = (common_denominator * fraction.denominator) // gcd(common_denominator, fraction.denominator)
+    return [int(fraction * common_denominator) for fraction in fractions]
+
+def getObjectiveTerms(model, mod_time_variables, student_time_variables, num_people=None):
+    """
+        Collects the variables and coefficients for each part of the objective function
+
+        Args:
+            model: The CpModel object that represents the constraints of the problem
+            mod_time_variables: 2D List of PersonTimeVariableWrapper, if [mod_index][time_index]
+                                    is None then that time is impossible for that mod
+            student_time_variables: 2D List of PersonTimeVariableWrapper,
+                                        if [student_index][time_index] is None then
+                                        that time is impossible for that student
+            num_people: Tuple of (number of moderators, number of students) in the whole problem for the
+                         config.objective_function coefficients, or None to count the people in the variables.
+                         Only needed when the variables are a part of a larger problem, see component_decomposition.py
+
+        Returns:
+            impossible_variables: List of the CP variables for every time marked impossible
+            not_preferred_terms: List of (coefficient, CP variable) for every time marked not preferred, where the
+                                  coefficient comes from config.objective_function
+            mod_time_variables_to_maximize: List of every moderator CP variable if config.maximize_number_of_sections
+                                             is enabled, otherwise an empty list
+            contiguous_section_variables: List of the contiguous section decision variables if contiguous sections
+                                           are preferred in the config, otherwise an empty list
+    """
+    mod_time_index = getPersonTimeIndex(mod_time_variables)
+    student_time_index = getPersonTimeIndex(student_time_variables, mod_time_index.num_section_times)
     impossible_variables = []
-    IMPOSSIBLE_VARIABLE_PENALTY = 10000
+    not_preferred_terms = []
 
-    # Give not preferred times a multiplier to make them have a higher priority than contiguous sections
-    NOT_PREFERRED_PRIORITY_MULTIPLIER = 10
+    # The objective function coefficients are based on the number of people, not the number of types of people
+    if num_people is None:
+        total_num_mods = sum(numPeopleInRow(time_variables_for_mod) for time_variables_for_mod in mod_time_variables)
+        total_num_students = sum(numPeopleInRow(time_variables_for_student)
+                                 for time_variables_for_student in student_time_variables)
+    else:
+        (total_num_mods, total_num_students) = num_people
 
-    # Give making more sections a high enough priority to outweigh shifting students around
-    MAX_SECTIONS_PRIORITY_MULTIPLIER = (config.max_students_per_section + 1) * NOT_PREFERRED_PRIORITY_MULTIPLIER
+    # Every variable of a row belongs to the same person, so compute the coefficients once per row
+    mod_coefficients = getObjectiveCoefficients(total_num_mods, total_num_students,
+                                                getRowPersonIndices(mod_time_index), True)
+    student_coefficients = getObjectiveCoefficients(total_num_mods, total_num_students,
+                                                    getRowPersonIndices(student_time_index), False)
 
     # Minimize the sum of not preferred times
-    for time_index in range(num_section_times):
-        for mod_index in range(num_mods):
-            mod_time_var_wrapper = mod_time_variables[mod_index][time_index]
-            if mod_time_var_wrapper is not None:
-                if mod_time_var_wrapper.is_impossible_time:
+    for time_index in range(mod_time_index.num_section_times):
+        for (person_time_index, row_coefficients) in ((mod_time_index, mod_coefficients),
+                                                      (student_time_index, student_coefficients)):
+            for (row_index, person_time_var_wrapper) in zip(person_time_index.personIndicesAtTime(time_index),
+                                                            person_time_index.wrappersAtTime(time_index)):
+                if person_time_var_wrapper.is_impossible_time:
                     # Penalize the use of this impossible time heavily
-                    impossible_variables.append(IMPOSSIBLE_VARIABLE_PENALTY * mod_time_var_wrapper.variable)
-                elif not mod_time_var_wrapper.is_preferred_time:
+                    impossible_variables.append(person_time_var_wrapper.variable)
+                elif not person_time_var_wrapper.is_preferred_time:
                     # Penalize this not preferred time so that preferred times are picked with higher priority
-                    coefficient = config.objective_function(num_mods, num_students, mod_index, True)
-                    coefficient *= NOT_PREFERRED_PRIORITY_MULTIPLIER
-                    not_preferred_variables.append(coefficient * mod_time_var_wrapper.variable)
-                else:
-                    # Do nothing on preferred times, they may be used freely at no cost
-                    pass
-
-        for student_index in range(num_students):
-            student_time_var_wrapper = student_time_variables[student_index][time_index]
-            if student_time_var_wrapper is not None:
-                if student_time_var_wrapper.is_impossible_time:
-                    # Penalize the use of this impossible time heavily
-                    impossible_variables.append(IMPOSSIBLE_VARIABLE_PENALTY * student_time_var_wrapper.variable)
-                elif not student_time_var_wrapper.is_preferred_time:
-                    # Penalize this not preferred time so that preferred times are picked with higher priority
-                    coefficient = config.objective_function(num_mods, num_students, student_index, False)
-                    coefficient *= NOT_PREFERRED_PRIORITY_MULTIPLIER
-                    not_preferred_variables.append(coefficient * student_time_var_wrapper.variable)
+                    not_preferred_terms.append((row_coefficients[row_index], person_time_var_wrapper.variable))
                 else:
                     # Do nothing on preferred times, they may be used freely at no cost
                     pass
@@ -98,25 +387,57 @@ def addFunctionToMinimize(model, mod_time_variables, student_time_variables, max
     # Maximize the amount of sections created when the option is enabled
     # If the option is not enabled this will be an empty list
     mod_time_variables_to_maximize = []
-    maximum_total_sections_objective_offset = 0
     if config.maximize_number_of_sections and config.assign_exact_max_sections:
         print('WARNING: config.assign_exact_max_sections must be disabled to use config.maximize_number_of_sections')
         print('WARNING: If these are both enabled it would add add extraneous computation time')
     elif config.maximize_number_of_sections:
-        # Only config.maximize_number_of_sections is enabled, factor that into the objective function
-        # Ensure objective function has minimum possible value of 0
-        maximum_total_sections_objective_offset = MAX_SECTIONS_PRIORITY_MULTIPLIER * max_total_sections
-        # Maximize the number of sections by adding negative weight to each moderator assignment that exists
-        for mod_index in range(num_mods):
-            for time_index in range(num_section_times):
-                mod_time_var_wrapper = mod_time_variables[mod_index][time_index]
-                if mod_time_var_wrapper is not None:
-                    mod_time_variables_to_maximize.append(MAX_SECTIONS_PRIORITY_MULTIPLIER * mod_time_var_wrapper.variable)
+        # Maximize the number of sections by considering each moderator assignment that exists
+        for mod_index in range(len(mod_time_variables)):
+            mod_time_variables_to_maximize.extend(mod_time_index.variablesForPerson(mod_index))
 
-    # Finally, minimize all of the above things
-    model.Minimize(sum(not_preferred_variables) + sum(impossible_variables) - sum(contiguous_section_variables) +
-                   len(contiguous_section_variables) - sum(mod_time_variables_to_maximize) +
-                   maximum_total_sections_objective_offset)
+    return impossible_variables, not_preferred_terms, mod_time_variables_to_maximize, contiguous_section_variables
+
+def getRowPersonIndices(person_time_index):
+    """
+        Returns:
+            List of Integer for the person index of the wrappers in each row of the PersonTimeIndex, 0 for rows
+             without any wrapper as they never need a coefficient
+    """
+    row_person_indices = []
+    for row_index in range(person_time_index.num_people):
+        if person_time_index.numTimesForPerson(row_index) == 0:
+            row_person_indices.append(0)
+        else:
+            row_person_indices.append(person_time_index.person_wrappers[person_time_index.person_offsets[row_index]]
+                                      .person_index)
+    return row_person_indices
+
+def isContiguousSectionPair(current_mod_time_var_wrapper, next_mod_time_var_wrapper):
+    """
+        Args:
+            current_mod_time_var_wrapper: PersonTimeVariableWrapper for one possible time of a moderator
+            next_mod_time_var_wrapper: PersonTimeVariableWrapper for the next possible time of the same moderator
+
+        Returns:
+            True if the two times count as contiguous sections given the specification in the config file
+    """
+    # Determine if the current and next times are contiguous
+    if next_mod_time_var_wrapper.time_index != current_mod_time_var_wrapper.time_index + 1:
+        return False
+
+    # Verify current and next times take place on the same weekday
+    if current_mod_time_var_wrapper.day_of_week != next_mod_time_var_wrapper.day_of_week:
+        return False
+
+    if config.prefer_contiguous_sections_all_possible:
+        # Need times to not be impossible (both yellow and green are allowed as contiguous)
+        if current_mod_time_var_wrapper.is_impossible_time or next_mod_time_var_wrapper.is_impossible_time:
+            return False
+    elif config.prefer_contiguous_sections_preferred_times_only:
+        # Need times to be preferred (just green times are allowed as contiguous)
+        if (not current_mod_time_var_wrapper.is_preferred_time) or (not next_mod_time_var_wrapper.is_preferred_time):
+            return False
+    return True
 
 def create_contiguous_section_decision_variables(model, mod_time_variables):
     """
@@ -136,35 +457,27 @@ def create_contiguous_section_decision_variables(model, mod_time_variables):
     random.seed("Creatively Titled Contiguous Time Selection Seed") # Ensure deterministic behavior
     contiguous_section_variables = []
     num_contiguous_variables = 0
-    num_mods = len(mod_time_variables)
-    num_section_times = len(mod_time_variables[0])
-
-    for mod_index in range(num_mods):
-        for section_index in range(num_section_times - 1):
-            current_mod_time_var_wrapper = mod_time_variables[mod_index][section_index]
-            next_mod_time_var_wrapper = mod_time_variables[mod_index][section_index + 1]
-
-            # Determine if the current and next times are contiguous given the specification in the config file
-            if current_mod_time_var_wrapper is None or next_mod_time_var_wrapper is None:
-                continue
+    mod_time_index = getPersonTimeIndex(mod_time_variables)
 
-            # Verify current and next times take place on the same weekday
-            if current_mod_time_var_wrapper.day_of_week != next_mod_time_var_wrapper.day_of_week:
+    for mod_index in range(len(mod_time_variables)):
+        time_variables_for_mod = mod_time_index.wrappersForPerson(mod_index)
+        for (current_mod_time_var_wrapper, next_mod_time_var_wrapper) in zip(time_variables_for_mod,
+                                                                             time_variables_for_mod[1:]):
+            if not isContiguousSectionPair(current_mod_time_var_wrapper, next_mod_time_var_wrapper):
                 continue
 
-            if config.prefer_contiguous_sections_all_possible:
-                # Need times to not be impossible (both yellow and green are allowed as contiguous)
-                if current_mod_time_var_wrapper.is_impossible_time or next_mod_time_var_wrapper.is_impossible_time:
-                    continue
-            elif config.prefer_contiguous_sections_preferred_times_only:
-                # Need times to be preferred (just green times are allowed as contiguous)
-                if (not current_mod_time_var_wrapper.is_preferred_time) or (not next_mod_time_var_wrapper.is_preferred_time):
-                    continue
-
             # Don't consider these contiguous times if random chance has selected to not use them (reduce computation time)
             if random.random() >= config.contiguous_sections_percentage:
                 continue
 
+            # A moderator who can only teach one section, or a time which can never have a section, never gives
+            #  contiguous sections, but the pair still counts towards the objective function offset so the objective
+            #  value is unchanged, see presolve.py
+            if not (current_mod_time_var_wrapper.allows_contiguous_sections and
+                    next_mod_time_var_wrapper.allows_contiguous_sections):
+                contiguous_section_variables.append(0)
+                continue
+
             # We have two adjacent times that need to be prioritized in assignment
             left_section_value = current_mod_time_var_wrapper.variable
             right_section_value = next_mod_time_var_wrapper.variable
@@ -183,5 +496,5 @@ def create_contiguous_section_decision_variables(model, mod_time_variables):
             contiguous_section_variables.append(contiguous_decision_variable)
             num_contiguous_variables += 2
 
-    print('Num contiguous variables:', num_contiguous_variables)
+    instrumentation.setCounter('contiguous variables', num_contiguous_variables, 'Num contiguous variables:')
     return contiguous_section_variables
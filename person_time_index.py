@@ -0,0 +1,138 @@
+from array import array
+
+# Values of PersonTimeIndex.preference_states, one signed byte per person/time pair
+NO_VARIABLE = 0
+PREFERRED_TIME = 1
+NOT_PREFERRED_TIME = 2
+IMPOSSIBLE_TIME = 3
+
+class PersonTimeIndex:
+    """
+        Compact index over a 2D List of PersonTimeVariableWrapper, built once so that every stage can look up the
+         variables of one person or of one time without scanning every person/time pair
+
+        The variables are stored twice in compressed sparse row form, once ordered by person and then time and once
+         ordered by time and then person, so their size grows with the number of possible person/time pairs
+    """
+    __slots__ = ('num_people', 'num_section_times', 'preference_states', 'person_offsets', 'person_wrappers',
+                 'time_offsets', 'time_wrappers', 'time_person_indices')
+
+    def __init__(self, person_time_variables, num_section_times=None):
+        """
+            Args:
+                person_time_variables: 2D List of PersonTimeVariableWrapper, if [person_index][time_index] is None
+                                        then that time is impossible for that person
+                num_section_times: Integer for the number of section times, only needed when there are no people
+        """
+        self.num_people = len(person_time_variables)
+        if num_section_times is None:
+            num_section_times = len(person_time_variables[0])
+        self.num_section_times = num_section_times
+        self.preference_states = array('b', bytes(self.num_people * num_section_times))
+
+        # Person major order, the variables of person p are person_wrappers[person_offsets[p]:person_offsets[p + 1]]
+        self.person_offsets = array('l', [0])
+        self.person_wrappers = []
+        num_variables_at_time = [0] * num_section_times
+        for (person_index, time_variables_for_person) in enumerate(person_time_variables):
+            for person_time_var_wrapper in time_variables_for_person:
+                if person_time_var_wrapper is None:
+                    continue
+                time_index = person_time_var_wrapper.time_index
+                self.person_wrappers.append(person_time_var_wrapper)
+                self.preference_states[person_index * num_section_times + time_index] = \
+                    getPreferenceState(person_time_var_wrapper)
+                num_variables_at_time[time_index] += 1
+            self.person_offsets.append(len(self.person_wrappers))
+
+        # Time major order, the variables of time t are time_wrappers[time_offsets[t]:time_offsets[t + 1]]
+        self.time_offsets = array('l', [0])
+        for time_index in range(num_section_times):
+            self.time_offsets.append(self.time_offsets[time_index] + num_variables_at_time[time_index])
+        self.time_wrappers = [None] * len(self.person_wrappers)
+        self.time_person_indices = array('l', bytes(array('l').itemsize * len(self.person_wrappers)))
+        next_position_at_time = array('l', self.time_offsets[:num_section_times])
+        for person_index in range(self.num_people):
+            for position in range(self.person_offsets[person_index], self.person_offsets[person_index + 1]):
+                person_time_var_wrapper = self.person_wrappers[position]
+                time_position = next_position_at_time[person_time_var_wrapper.time_index]
+                self.time_wrappers[time_position] = person_time_var_wrapper
+                self.time_person_indices[time_position] = person_index
+                next_position_at_time[person_time_var_wrapper.time_index] += 1
+
+    def numVariables(self):
+        return len(self.person_wrappers)
+
+    def wrappersForPerson(self, person_index):
+        """
+            Returns:
+                List of PersonTimeVariableWrapper for every possible time of the person in time order
+        """
+        return self.person_wrappers[self.person_offsets[person_index]:self.person_offsets[person_index + 1]]
+
+    def numTimesForPerson(self, person_index):
+        return self.person_offsets[person_index + 1] - self.person_offsets[person_index]
+
+    def wrappersAtTime(self, time_index):
+        """
+            Returns:
+                List of PersonTimeVariableWrapper for every person who can make the time in person order
+        """
+        return self.time_wrappers[self.time_offsets[time_index]:self.time_offsets[time_index + 1]]
+
+    def personIndicesAtTime(self, time_index):
+        """
+            Returns:
+                array of Integer for the person indices of wrappersAtTime in the same order
+        """
+        return self.time_person_indices[self.time_offsets[time_index]:self.time_offsets[time_index + 1]]
+
+    def variablesForPerson(self, person_index):
+        return [wrapper.variable for wrapper in self.wrappersForPerson(person_index)]
+
+    def variablesAtTime(self, time_index):
+        return [wrapper.variable for wrapper in self.wrappersAtTime(time_index)]
+
+    def preferenceState(self, person_index, time_index):
+        return self.preference_states[person_index * self.num_section_times + time_index]
+
+    def countAtTime(self, time_index, preference_state):
+        """
+            Returns:
+                Integer for the number of people with the given preference state at the time
+        """
+        return sum(1 for person_index in self.personIndicesAtTime(time_index)
+                   if self.preferenceState(person_index, time_index) == preference_state)
+
+class PersonTimeVariables(list):
+    """ 2D List of PersonTimeVariableWrapper which carries the PersonTimeIndex built over it """
+    __slots__ = ('person_time_index',)
+
+    def __init__(self, rows, num_section_times):
+        super().__init__(rows)
+        self.person_time_index = PersonTimeIndex(self, num_section_times)
+
+def getPreferenceState(person_time_var_wrapper):
+    """
+        Returns:
+            The value of PersonTimeIndex.preference_states for the person/time pair of the wrapper
+    """
+    if person_time_var_wrapper.is_impossible_time:
+        return IMPOSSIBLE_TIME
+    elif person_time_var_wrapper.is_preferred_time:
+        return PREFERRED_TIME
+    return NOT_PREFERRED_TIME
+
+def getPersonTimeIndex(person_time_variables, num_section_times=None):
+    """
+        Args:
+            person_time_variables: 2D List of PersonTimeVariableWrapper
+            num_section_times: Integer for the number of section times, only needed when there may be no people
+
+        Returns:
+            The PersonTimeIndex built when the variables were created, or a new one if person_time_variables is a
+             plain 2D List such as the variables of one connected component
+    """
+    if isinstance(person_time_variables, PersonTimeVariables):
+        return person_time_variables.person_time_index
+    return PersonTimeIndex(person_time_variables, num_section_times)
@@ -0,0 +1,66 @@
+import config
+from objective_functions import getObjectiveCoefficients
+
+def groupPeopleIntoTypes(time_preferences, objective_coefficients, extra_keys=None):
+    """
+        Groups people who are interchangeable in the section assignment problem into types. Two people are
+         interchangeable when they gave the exact same time preferences, have the same objective function
+         coefficient, and have the same extra key (e.g. max sections for moderators)
+
+        Args:
+            time_preferences: List where each entry is all the time preferences for one person
+            objective_coefficients: List where each entry is the objective function coefficient for one person
+            extra_keys: List where each entry is any other hashable value which must match for two people to
+                         be interchangeable, or None if there are no other requirements
+
+        Returns:
+            List of List of Integer where each entry is the indices of all people in one type, in the same order
+             as they appear in the input. Types are ordered by the index of their first person
+    """
+    num_people = len(time_preferences)
+    if extra_keys is None:
+        extra_keys = [None] * num_people
+
+    type_index_for_key = {}
+    person_types = []
+    for person_index in range(num_people):
+        type_key = (tuple(time_preferences[person_index]), objective_coefficients[person_index],
+                    extra_keys[person_index])
+
+        if type_key not in type_index_for_key:
+            type_index_for_key[type_key] = len(person_types)
+            person_types.append([])
+        person_types[type_index_for_key[type_key]].append(person_index)
+
+    return person_types
+
+def getModAndStudentTypes(mod_time_preferences, max_sections_per_mod, student_time_preferences):
+    """
+        Determines the moderator and student types to use when config.aggregate_identical_people is enabled
+
+        Moderators are only grouped when contiguous sections are not being considered, as a moderator type
+         variable can not tell which moderator of the type was assigned to two adjacent times
+
+        Args:
+            mod_time_preferences: List where each entry is all the time preferences for one moderator
+            max_sections_per_mod: List of Integer, each entry is the max sections for that mod_index
+            student_time_preferences: List where each entry is all the time preferences for one student
+
+        Returns:
+            mod_types: List of List of Integer where each entry is the mod indices in one moderator type
+            student_types: List of List of Integer where each entry is the student indices in one student type
+    """
+    num_mods = len(mod_time_preferences)
+    num_students = len(student_time_preferences)
+    mod_coefficients = getObjectiveCoefficients(num_mods, num_students, range(num_mods), True)
+    student_coefficients = getObjectiveCoefficients(num_mods, num_students, range(num_students), False)
+
+    should_consider_contiguous_sections = config.prefer_contiguous_sections_preferred_times_only or \
+                                          config.prefer_contiguous_sections_all_possible
+    if should_consider_contiguous_sections:
+        mod_types = [[mod_index] for mod_index in range(num_mods)]
+    else:
+        mod_types = groupPeopleIntoTypes(mod_time_preferences, mod_coefficients, max_sections_per_mod)
+    student_types = groupPeopleIntoTypes(student_time_preferences, student_coefficients)
+
+    return mod_types, student_types
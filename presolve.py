@@ -0,0 +1,155 @@
+import config
+import instrumentation
+
+DOODLE_IMPOSSIBLE_TIME = ''
+
+class PresolvedInput:
+    """ The reductions presolve found in the Doodle poll data, with the same person and time indices as the input """
+
+    def __init__(self, max_sections_per_time):
+        """
+            Args:
+                max_sections_per_time: List of Integer where each index represents the number of rooms
+                                        available at that time index
+        """
+        # Copy so that the caller's data is left untouched
+        self.max_sections_per_time = list(max_sections_per_time)
+        self.removed_time_indices = set() # Times where no section can ever happen
+        self.fixed_student_times = {} # Student index -> the only time index possible for them
+        self.single_section_mod_indices = set() # Mods who can never teach two contiguous sections
+        self.num_fixed_variables = 0 # Person/time variables at removed times, which are kept but fixed to 0
+        self.num_tightened_time_bounds = 0
+
+    def printSummary(self):
+        print('Presolve removed times:', len(self.removed_time_indices), sorted(self.removed_time_indices))
+        print('Presolve fixed person/time variables to 0:', self.num_fixed_variables)
+        print('Presolve tightened max sections at times:', self.num_tightened_time_bounds)
+        print('Presolve fixed students with one possible time:', len(self.fixed_student_times))
+        print('Presolve mods without contiguous section variables:', len(self.single_section_mod_indices))
+
+@instrumentation.timed('presolve input')
+def presolveInputData(mod_time_preferences, max_sections_per_mod, student_time_preferences, max_sections_per_time):
+    """
+        Applies reductions which are obvious from the Doodle polls before any CP variable is created, repeating
+         them until nothing changes:
+         1. The max sections at a time is at most the rooms, the moderators who can make it, and the number of
+            full sections the students who can make it would fill
+         2. A time whose max sections is 0 can never have a section, so every variable at that time is fixed to 0.
+            The variables are kept rather than removed, so the contiguous section pairs touching the time and the
+            number of times each person has for greedy preselection are the same as without presolve, and the
+            optimal objective value is unchanged, see objective_functions.create_contiguous_section_decision_variables
+         3. A student with exactly one possible time other than the removed times is fixed to that time
+         4. A moderator with max sections 1 gets no contiguous section variables
+
+        A time which is the only possible time for someone is never made impossible, as there is then no
+         solution and the feasibility precheck explains why. The Doodle poll data itself is left untouched
+
+        Args:
+            mod_time_preferences: List where each entry is all the time preferences for one moderator
+            max_sections_per_mod: List of Integer, each entry is the max sections for that mod_index
+            student_time_preferences: List where each entry is all the time preferences for one student
+            max_sections_per_time: List of Integer where each index represents the number of rooms
+                                    available at that time index
+
+        Returns:
+            PresolvedInput holding the reduced data
+    """
+    presolved_input = PresolvedInput(max_sections_per_time)
+    num_section_times = len(max_sections_per_time)
+
+    is_changed = True
+    while is_changed:
+        is_changed = False
+        for time_index in range(num_section_times):
+            if time_index in presolved_input.removed_time_indices:
+                continue
+
+            num_mods_in_time = countPeopleAtTime(mod_time_preferences, time_index)
+            num_students_in_time = countPeopleAtTime(student_time_preferences, time_index)
+            max_sections_for_time = min(presolved_input.max_sections_per_time[time_index], num_mods_in_time,
+                                        num_students_in_time // config.min_students_per_section)
+            if (max_sections_for_time == 0) and \
+               (isOnlyTimeForAnyone(mod_time_preferences, time_index, presolved_input.removed_time_indices) or
+                isOnlyTimeForAnyone(student_time_preferences, time_index, presolved_input.removed_time_indices)):
+                # There is no solution, leave the time as it is for the feasibility precheck to explain
+                continue
+
+            if max_sections_for_time < presolved_input.max_sections_per_time[time_index]:
+                presolved_input.max_sections_per_time[time_index] = max_sections_for_time
+                presolved_input.num_tightened_time_bounds += 1
+                is_changed = True
+
+            if max_sections_for_time == 0:
+                presolved_input.num_fixed_variables += (num_mods_in_time + num_students_in_time)
+                presolved_input.removed_time_indices.add(time_index)
+                is_changed = True
+
+    for (student_index, preferences) in enumerate(student_time_preferences):
+        possible_time_indices = [time_index for time_index in getPossibleTimeIndices(preferences)
+                                 if time_index not in presolved_input.removed_time_indices]
+        if len(possible_time_indices) == 1:
+            presolved_input.fixed_student_times[student_index] = possible_time_indices[0]
+
+    presolved_input.single_section_mod_indices = {mod_index for (mod_index, max_sections)
+                                                  in enumerate(max_sections_per_mod) if max_sections == 1}
+
+    presolved_input.printSummary()
+    return presolved_input
+
+def isOnlyTimeForAnyone(time_preferences, time_index, removed_time_indices):
+    """
+        Returns:
+            True if someone marked every time except this one and the removed times as impossible
+    """
+    return any([possible_time_index for possible_time_index in getPossibleTimeIndices(preferences)
+                if possible_time_index not in removed_time_indices] == [time_index]
+               for preferences in time_preferences)
+
+def countPeopleAtTime(time_preferences, time_index):
+    """
+        Returns:
+            Integer for the number of people who did not mark the time as impossible
+    """
+    return sum(1 for preferences in time_preferences if preferences[time_index] != DOODLE_IMPOSSIBLE_TIME)
+
+def getPossibleTimeIndices(preferences):
+    """
+        Returns:
+            List of Integer for every time index the person did not mark as impossible
+    """
+    return [time_index for (time_index, preference) in enumerate(preferences)
+            if preference != DOODLE_IMPOSSIBLE_TIME]
+
+def applyPresolveToVariables(model, presolved_input, mod_time_variables, student_time_variables):
+    """
+        Fixes the variables of students presolve found to have one possible time and of everyone at removed times,
+         and marks the variables of moderators with max sections 1 or at removed times so that no contiguous section
+         variables are made for them
+
+        Args:
+            model: The CpModel object that represents the constraints of the problem
+            presolved_input: PresolvedInput from presolveInputData
+            mod_time_variables: 2D List of PersonTimeVariableWrapper created from the presolved data
+            student_time_variables: 2D List of PersonTimeVariableWrapper created from the presolved data
+    """
+    model_proto = model.Proto()
+    for time_variables_for_student in student_time_variables:
+        for student_time_var_wrapper in time_variables_for_student:
+            if student_time_var_wrapper is None:
+                continue
+            if student_time_var_wrapper.time_index in presolved_input.removed_time_indices:
+                model_proto.variables[student_time_var_wrapper.variable.Index()].domain[:] = [0, 0]
+            elif student_time_var_wrapper.person_index in presolved_input.fixed_student_times:
+                num_students = len(student_time_var_wrapper.type_net_ids)
+                model_proto.variables[student_time_var_wrapper.variable.Index()].domain[:] = [num_students,
+                                                                                             num_students]
+
+    for time_variables_for_mod in mod_time_variables:
+        for mod_time_var_wrapper in time_variables_for_mod:
+            if mod_time_var_wrapper is None:
+                continue
+            if mod_time_var_wrapper.person_index in presolved_input.single_section_mod_indices:
+                mod_time_var_wrapper.allows_contiguous_sections = False
+            if mod_time_var_wrapper.time_index in presolved_input.removed_time_indices:
+                model_proto.variables[mod_time_var_wrapper.variable.Index()].domain[:] = [0, 0]
+                mod_time_var_wrapper.allows_contiguous_sections = False
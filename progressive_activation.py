@@ -0,0 +1,135 @@
+import assign_time_slots
+import config
+import instrumentation
+import slack_relaxation
+from ortools.sat.python import cp_model
+
+class Activation:
+    """ Which times that are possible but not preferred get a CP variable, see solveProgressively """
+
+    def __init__(self):
+        self.net_ids = set() # Every not preferred time of these people is active
+        self.time_indices = set() # Every not preferred time at these time indices is active
+
+    def isActive(self, type_net_ids, time_index):
+        """
+            Args:
+                type_net_ids: List of String for the net IDs of the interchangeable people sharing one variable
+                time_index: Integer for the time which is possible but not preferred for them
+
+            Returns:
+                True if the time should get a variable
+        """
+        return (time_index in self.time_indices) or any(net_id in self.net_ids for net_id in type_net_ids)
+
+    def activateStuck(self, slack_report, mods_assigned_to_times, students_assigned_to_times):
+        """ Activates the not preferred times of everyone stuck and of every time needing slack in a solution """
+        self.net_ids |= slack_relaxation.getStuckNetIDs(slack_report, mods_assigned_to_times,
+                                                        students_assigned_to_times)
+        for (time_index, _) in slack_report.under_filled_times + slack_report.over_filled_times:
+            self.time_indices.add(time_index)
+
+def countNotPreferredTimes(input_data, activation):
+    """
+        Args:
+            input_data: Tuple of the return values of assign_time_slots.readInputFiles
+            activation: Activation to count the active times of, or None if every time is active
+
+        Returns:
+            (Integer for the number of active not preferred times, Integer for the number of not preferred times)
+    """
+    (mod_net_ids, mod_time_preferences, _, student_net_ids, student_time_preferences, _, _) = input_data
+    num_active = 0
+    num_not_preferred = 0
+    for (net_ids, time_preferences) in ((mod_net_ids, mod_time_preferences),
+                                        (student_net_ids, student_time_preferences)):
+        for (net_id, preferences) in zip(net_ids, time_preferences):
+            for (time_index, preference) in enumerate(preferences):
+                if preference in (assign_time_slots.DOODLE_PREFERRED_TIME, assign_time_slots.DOODLE_IMPOSSIBLE_TIME):
+                    continue
+                num_not_preferred += 1
+                num_active += (activation is None) or activation.isActive([net_id], time_index)
+    return num_active, num_not_preferred
+
+def solveProgressively(input_data):
+    """
+        Solves the slack relaxation of the input with only the preferred times of everyone first, which is a much
+         smaller model. While constraints still need relaxing, the not preferred times of everyone the solution
+         shows to be stuck and of every time needing slack are activated, and the model is solved again starting
+         from the previous solution. If that activates nothing new, every not preferred time is activated. Each
+         solve with only some times active stops after config.progressive_activation_no_improvement_seconds
+         without a better solution, since only the whole model's solution has to be the best possible.
+         With config.progressive_activation_prove_optimal, every remaining not preferred time is activated in a
+         final solve, so the assignment is optimal for the whole model and not only for the active times
+
+        Args:
+            input_data: Tuple of the return values of assign_time_slots.readInputFiles
+
+        Returns:
+            extracted_solution: solution_extraction.ExtractedSolution of the final solution, which leaves out the
+                                 students without a section
+            slack_report: slack_relaxation.SlackReport of every constraint the final solution still needed relaxing
+            num_rounds: Integer for the number of times the model was solved
+    """
+    activation = Activation()
+    (num_active, num_not_preferred) = countNotPreferredTimes(input_data, activation)
+    num_rounds = 1
+    print(f'Activation round 1: {num_active} of {num_not_preferred} not preferred times active')
+    (extracted_solution, slack_report, checkpoint) = slack_relaxation.solveRelaxedModel(
+        input_data, set(), not_preferred_activation=activation, solve_name='activation round 1',
+        no_improvement_seconds=config.progressive_activation_no_improvement_seconds)
+
+    while (slack_report.getTotalSlack() > 0) and (num_active < num_not_preferred):
+        activation.activateStuck(slack_report, extracted_solution.mods_assigned_to_times,
+                                 extracted_solution.students_assigned_to_times)
+        (new_num_active, _) = countNotPreferredTimes(input_data, activation)
+        if new_num_active == num_active:
+            # Nobody stuck has a not preferred time left to activate, so only activating everything can help
+            activation = None
+            new_num_active = num_not_preferred
+        num_active = new_num_active
+        num_rounds += 1
+        print(f'Activation round {num_rounds}: {num_active} of {num_not_preferred} not preferred times active')
+        # Once everything is active this is the whole model, which is solved like any other
+        (extracted_solution, slack_report, checkpoint) = slack_relaxation.solveRelaxedModel(
+            input_data, set(), checkpoint, activation, f'activation round {num_rounds}',
+            config.progressive_activation_no_improvement_seconds if activation is not None else None)
+
+    if config.progressive_activation_prove_optimal and (num_active < num_not_preferred):
+        num_rounds += 1
+        print(f'Activation round {num_rounds}: every not preferred time active to prove optimality')
+        (extracted_solution, slack_report, checkpoint) = slack_relaxation.solveRelaxedModel(
+            input_data, set(), checkpoint, None, f'activation round {num_rounds}')
+        num_active = num_not_preferred
+    if (num_active < num_not_preferred) and (slack_report.status == cp_model.OPTIMAL):
+        # The last solve was only optimal for the times that were active
+        slack_report.status = cp_model.FEASIBLE
+
+    instrumentation.setCounter('activation rounds', num_rounds)
+    instrumentation.setCounter('active not preferred times', num_active)
+    instrumentation.setCounter('slack', slack_report.getTotalSlack())
+    slack_relaxation.removeOverFilledStudents(slack_report, extracted_solution.mods_assigned_to_times,
+                                              extracted_solution.students_assigned_to_times)
+    return extracted_solution, slack_report, num_rounds
+
+def solveInputFilesProgressively(mod_doodle_poll_csv_path, mod_max_section_csv_path, student_doodle_poll_csv_path,
+                                 section_times_csv_path=None):
+    """
+        Assigns everyone with progressive activation, see solveProgressively, and prints which people and times
+         still needed relaxing. See assign_time_slots.assignModeratorsAndStudents for the arguments
+
+        Returns:
+            assign_time_slots.SolveOutcome of the final solve, whose assignment leaves out the students without a
+             section. Every solve was already verified by slack_relaxation.solveRelaxedModel
+    """
+    if config.allow_impossible_times:
+        print('WARNING: config.allow_impossible_times is ignored with config.use_progressive_activation')
+    if config.use_lexicographic_objective:
+        print('WARNING: config.use_lexicographic_objective is ignored with config.use_progressive_activation')
+    input_data = assign_time_slots.readInputFiles(mod_doodle_poll_csv_path, mod_max_section_csv_path,
+                                                  student_doodle_poll_csv_path, section_times_csv_path)
+    (extracted_solution, slack_report, _) = solveProgressively(input_data)
+
+    slack_report.printReport()
+    return assign_time_slots.SolveOutcome(slack_report.status, slack_report.objective, extracted_solution,
+                                          solve_results=[])
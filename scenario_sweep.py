@@ -0,0 +1,242 @@
+import argparse
+import ast
+import config
+import contextlib
+import csv
+import io
+import itertools
+import json
+import objective_functions
+import os
+import time
+from assign_time_slots import solveInputFiles
+from component_decomposition import getConfigValues
+from concurrent.futures import ProcessPoolExecutor
+from ortools.sat.python import cp_model
+
+RESULT_COLUMNS = ['Scenario', 'Status', 'Objective', 'Sections', 'Mods not preferred', 'Students not preferred',
+                  'Seconds']
+
+class Scenario:
+    """ One what-if question, answered by solving with some config options changed """
+
+    def __init__(self, name, config_overrides):
+        """
+            Args:
+                name: String describing the scenario in the comparison table
+                config_overrides: Dictionary of config option name to the value it has in this scenario
+        """
+        self.name = name
+        self.config_overrides = config_overrides
+
+class ScenarioResult:
+    """ What solving one scenario gave, one row of the comparison table """
+
+    def __init__(self, name, status_name, objective=None, num_sections=None, num_not_preferred_mods=None,
+                 num_not_preferred_students=None, seconds=None):
+        self.name = name
+        self.status_name = status_name
+        self.objective = objective
+        self.num_sections = num_sections
+        self.num_not_preferred_mods = num_not_preferred_mods
+        self.num_not_preferred_students = num_not_preferred_students
+        self.seconds = seconds
+
+    def getRow(self):
+        """
+            Returns:
+                List of the values of RESULT_COLUMNS for this scenario, with '-' for values there are none of
+        """
+        objective = '-' if self.objective is None else round(self.objective, 3)
+        return [self.name, self.status_name, objective] + \
+               ['-' if value is None else value for value in (self.num_sections, self.num_not_preferred_mods,
+                                                              self.num_not_preferred_students)] + \
+               [round(self.seconds, 3)]
+
+def getScenarioGrid(option_values):
+    """
+        Args:
+            option_values: Dictionary of config option name to a List of the values to try for that option
+
+        Returns:
+            List of Scenario for every combination of the option values
+    """
+    option_names = list(option_values)
+    scenarios = []
+    for values in itertools.product(*(option_values[option_name] for option_name in option_names)):
+        config_overrides = dict(zip(option_names, values))
+        scenarios.append(Scenario(getScenarioName(config_overrides), config_overrides))
+    return scenarios
+
+def getScenarioName(config_overrides):
+    if len(config_overrides) == 0:
+        return 'config.py'
+    return ', '.join(f'{option_name}={getattr(value, "__name__", value)}'
+                     for (option_name, value) in config_overrides.items())
+
+def solveScenario(scenario, base_config_values, time_limit_seconds, num_processes=None):
+    """
+        Solves one scenario, this is run in a worker process
+
+        Every config option is first set back to base_config_values, since a worker process may solve several
+         scenarios one after another and must not keep the overrides of the scenario before
+
+        Args:
+            scenario: Scenario to solve
+            base_config_values: Dictionary from getConfigValues in the process which started the sweep
+            time_limit_seconds: Number for the solver time limit of this scenario, or None for no limit
+            num_processes: Integer for the number of scenarios solved at once, whose solves share the CPUs unless the
+                            scenario overrides num_search_workers, or None to keep config.num_search_workers
+
+        Returns:
+            ScenarioResult for the scenario
+    """
+    for (option_name, value) in base_config_values.items():
+        setattr(config, option_name, value)
+    if num_processes is not None:
+        # Every process asking for all cores would only slow down the solves running next to it
+        config.num_search_workers = max(1, os.cpu_count() // num_processes)
+    for (option_name, value) in scenario.config_overrides.items():
+        setattr(config, option_name, value)
+    if time_limit_seconds is not None:
+        config.max_time_in_seconds = time_limit_seconds
+        config.lns_time_budget_seconds = time_limit_seconds
+
+    start_time = time.time()
+    try:
+        # The table is the output of a sweep, so hide everything the solve prints along the way
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = solveScenarioQuietly(scenario)
+    except (AssertionError, OSError, KeyError, ValueError) as error:
+        result = ScenarioResult(scenario.name, f'ERROR {type(error).__name__}: {error}')
+    result.seconds = time.time() - start_time
+    return result
+
+def solveScenarioQuietly(scenario):
+    """
+        Solves the input files in config with the way of solving chosen in config, see
+         assign_time_slots.solveInputFiles
+
+        Returns:
+            ScenarioResult for the scenario, without the seconds taken
+    """
+    solve_outcome = solveInputFiles((config.mod_doodle_poll_csv_path, config.mod_max_sections_csv_path,
+                                     config.student_doodle_poll_csv_path, config.section_times_csv_path))
+    if len(solve_outcome.precheck_problems) > 0:
+        return ScenarioResult(scenario.name, 'PRECHECK_INFEASIBLE')
+
+    status_name = cp_model.CpSolver().StatusName(solve_outcome.status)
+    if solve_outcome.mods_assigned_to_times is None:
+        return ScenarioResult(scenario.name, status_name)
+
+    num_sections = sum(len(mod_net_ids) for mod_net_ids in solve_outcome.mods_assigned_to_times)
+    extracted_solution = solve_outcome.extracted_solution
+    if extracted_solution is None:
+        # Connected components report who got a not preferred time while each one is solved
+        return ScenarioResult(scenario.name, status_name, solve_outcome.objective, num_sections)
+    return ScenarioResult(scenario.name, status_name, solve_outcome.objective, num_sections,
+                          len(extracted_solution.not_preferred_mod_net_ids),
+                          len(extracted_solution.not_preferred_student_net_ids))
+
+def runScenarioSweep(scenarios, time_limit_seconds=None, num_processes=None):
+    """
+        Solves every scenario in a process pool, each in isolation from the others
+
+        Args:
+            scenarios: List of Scenario
+            time_limit_seconds: Number for the solver time limit of each scenario, or None for no limit
+            num_processes: Integer for the number of worker processes, or None for one per CPU
+
+        Returns:
+            List of ScenarioResult in the same order as scenarios
+    """
+    base_config_values = getConfigValues()
+    if num_processes is None:
+        num_processes = os.cpu_count()
+    num_processes = max(1, min(num_processes, len(scenarios)))
+    with ProcessPoolExecutor(max_workers=num_processes) as executor:
+        return list(executor.map(solveScenario, scenarios, [base_config_values] * len(scenarios),
+                                 [time_limit_seconds] * len(scenarios), [num_processes] * len(scenarios)))
+
+def printComparisonTable(results):
+    rows = [[str(value) for value in result.getRow()] for result in results]
+    column_widths = [max([len(column)] + [len(row[column_index]) for row in rows])
+                     for (column_index, column) in enumerate(RESULT_COLUMNS)]
+    print('  '.join(column.ljust(width) for (column, width) in zip(RESULT_COLUMNS, column_widths)))
+    for row in rows:
+        print('  '.join(value.ljust(width) for (value, width) in zip(row, column_widths)))
+
+def writeComparisonCsv(results, output_csv_path):
+    with open(output_csv_path, 'w', newline='', encoding='utf-8') as output_file:
+        output_writer = csv.writer(output_file)
+        output_writer.writerow(RESULT_COLUMNS)
+        for result in results:
+            output_writer.writerow(result.getRow())
+
+def parseOptionValue(option_name, value):
+    """
+        Returns:
+            The config value for a command line value, where objective functions are given by name and anything
+             that is not a Python literal is a String such as a file path
+    """
+    if option_name == 'objective_function':
+        return getattr(objective_functions, value)
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+
+def parseScenarios(option_arguments, scenarios_json_path):
+    """
+        Args:
+            option_arguments: List of String like 'min_students_per_section=4,5' from --set, which are combined
+                               into a grid of scenarios
+            scenarios_json_path: Path to a JSON list of {"name": ..., "overrides": {option: value}}, or None
+
+        Returns:
+            List of Scenario
+    """
+    scenarios = []
+    if scenarios_json_path is not None:
+        with open(scenarios_json_path, 'r', encoding='utf-8') as scenarios_file:
+            for scenario in json.load(scenarios_file):
+                config_overrides = dict(scenario['overrides'])
+                if 'objective_function' in config_overrides:
+                    config_overrides['objective_function'] = getattr(objective_functions,
+                                                                     config_overrides['objective_function'])
+                scenarios.append(Scenario(scenario.get('name', getScenarioName(config_overrides)), config_overrides))
+
+    option_values = {}
+    for option_argument in option_arguments:
+        (option_name, values) = option_argument.split('=', 1)
+        assert hasattr(config, option_name), f'config has no option {option_name}'
+        option_values[option_name] = [parseOptionValue(option_name, value) for value in values.split(',')]
+    if len(option_values) > 0 or len(scenarios) == 0:
+        scenarios += getScenarioGrid(option_values)
+    return scenarios
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve the input files in config.py under several config overrides '
+                                                 'in parallel and print a comparison table')
+    parser.add_argument('--set', action='append', default=[], dest='option_arguments', metavar='OPTION=V1,V2',
+                        help='Values to try for a config option, every combination of the --set options is solved. '
+                             'For example --set min_students_per_section=4,5 '
+                             '--set objective_function=everyone_equal_weight,first_come_first_serve')
+    parser.add_argument('--scenarios-json', dest='scenarios_json_path',
+                        help='JSON file with a list of {"name": ..., "overrides": {option: value}} scenarios')
+    parser.add_argument('--time-limit-seconds', type=float, default=60,
+                        help='Solver time limit for each scenario')
+    parser.add_argument('--num-processes', type=int,
+                        help='Number of scenarios solved at once, one per CPU if not given')
+    parser.add_argument('--output-csv', dest='output_csv_path', help='Also write the comparison table to this CSV')
+    arguments = parser.parse_args(argv)
+
+    scenarios = parseScenarios(arguments.option_arguments, arguments.scenarios_json_path)
+    print(f'Solving {len(scenarios)} scenarios')
+    results = runScenarioSweep(scenarios, arguments.time_limit_seconds, arguments.num_processes)
+    printComparisonTable(results)
+    if arguments.output_csv_path is not None:
+        writeComparisonCsv(results, arguments.output_csv_path)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,322 @@
+import assign_time_slots
+import config
+import incumbent_checkpoint
+import instrumentation
+from constraints import addMaxSectionsPerSectionTimeConstraint, numPeopleInRow
+from incumbent_checkpoint import Checkpoint
+from objective_functions import addFunctionToMinimize
+from ortools.sat.python import cp_model
+from person_time_index import getPersonTimeIndex
+from solution_extraction import extractSolution, getSolutionValues
+
+class SlackVariables:
+    """ The slack variables of a relaxed model, each is how far one constraint is from being satisfied """
+
+    def __init__(self):
+        # Each entry is (row index in the 2D List of PersonTimeVariableWrapper or time index, CP variable)
+        self.unassigned_students = []
+        self.overloaded_mods = []
+        self.underloaded_mods = []
+        self.under_filled_times = []
+        self.over_filled_times = []
+
+    def getAllVariables(self):
+        return [variable for slack_entries in (self.unassigned_students, self.overloaded_mods, self.underloaded_mods,
+                                               self.under_filled_times, self.over_filled_times)
+                for (_, variable) in slack_entries]
+
+class SlackReport:
+    """ Every constraint the solution of a relaxed model needed relaxing, and by how much """
+
+    def __init__(self, section_times):
+        """
+            Args:
+                section_times: List of String for the name of each section time, or None to name them by index
+        """
+        self.section_times = section_times
+        self.unassigned_student_net_ids = []
+        self.overloaded_mods = [] # (List of String for net IDs, Integer for sections over their max)
+        self.underloaded_mods = [] # (List of String for net IDs, Integer for sections under their min)
+        self.under_filled_times = [] # (time index, Integer for the number of students missing)
+        self.over_filled_times = [] # (time index, Integer for the number of students too many)
+        self.status = None # CP solver status of the relaxed solve, set by solveRelaxedModel
+        self.objective = None # Float for the objective value of the relaxed solve, set by solveRelaxedModel
+
+    def getTotalSlack(self):
+        return (len(self.unassigned_student_net_ids) + sum(amount for (_, amount) in self.overloaded_mods) +
+                sum(amount for (_, amount) in self.underloaded_mods) +
+                sum(amount for (_, amount) in self.under_filled_times) +
+                sum(amount for (_, amount) in self.over_filled_times))
+
+    def getTimeName(self, time_index):
+        return self.section_times[time_index] if self.section_times is not None else f'Time {time_index}'
+
+    def printReport(self):
+        if self.getTotalSlack() == 0:
+            print('No constraint needed relaxing')
+            return
+        if len(self.unassigned_student_net_ids) > 0:
+            print(f'Students without a section: {len(self.unassigned_student_net_ids)} '
+                  f'({", ".join(self.unassigned_student_net_ids)})')
+        for (net_ids, num_sections) in self.overloaded_mods:
+            print(f'Moderator over their max sections by {num_sections}: {", ".join(net_ids)}')
+        for (net_ids, num_sections) in self.underloaded_mods:
+            print(f'Moderator under their min sections by {num_sections}: {", ".join(net_ids)}')
+        for (time_index, num_students) in self.under_filled_times:
+            print(f'{self.getTimeName(time_index)} is {num_students} students short of full sections')
+        for (time_index, num_students) in self.over_filled_times:
+            print(f'{self.getTimeName(time_index)} has {num_students} students more than its sections can hold')
+
+@instrumentation.timed('constraints: slack relaxation')
+def addRelaxedConstraints(model, mod_time_variables, student_time_variables, max_sections_per_mod,
+                          max_sections_per_time):
+    """
+        Adds every constraint of the section assignment problem with a slack variable, so that the model always
+         has a solution. Only the rooms available at each time are a hard limit. A student may be left without a
+         section, a moderator may be over their max sections or under their min sections, and a time may have too
+         few or too many students for the moderators assigned to it
+
+        Args:
+            model: The CpModel object that represents the constraints of the problem
+            mod_time_variables: 2D List of PersonTimeVariableWrapper, if [mod_index][time_index]
+                                    is None then that time is impossible for that mod
+            student_time_variables: 2D List of PersonTimeVariableWrapper,
+                                        if [student_index][time_index] is None then
+                                        that time is impossible for that student
+            max_sections_per_mod: List of Integer, each entry is the max sections for that mod_index
+            max_sections_per_time: List of Integer where each index represents the number of rooms
+                                    available at that time index
+
+        Returns:
+            SlackVariables of the model, to be penalized by the objective function
+    """
+    mod_time_index = getPersonTimeIndex(mod_time_variables)
+    student_time_index = getPersonTimeIndex(student_time_variables, mod_time_index.num_section_times)
+    num_section_times = mod_time_index.num_section_times
+    slack_variables = SlackVariables()
+
+    for mod_index in range(len(mod_time_variables)):
+        all_time_vars_for_mod = sum(mod_time_index.variablesForPerson(mod_index))
+        num_mods_in_row = numPeopleInRow(mod_time_variables[mod_index])
+        max_sections = max_sections_per_mod[mod_index] * num_mods_in_row
+        min_sections = max_sections if config.assign_exact_max_sections else num_mods_in_row
+
+        overload = model.NewIntVar(0, num_section_times * num_mods_in_row, f'mod{mod_index}:overload')
+        underload = model.NewIntVar(0, min_sections, f'mod{mod_index}:underload')
+        model.Add(all_time_vars_for_mod - overload <= max_sections)
+        model.Add(all_time_vars_for_mod + underload >= min_sections)
+        slack_variables.overloaded_mods.append((mod_index, overload))
+        slack_variables.underloaded_mods.append((mod_index, underload))
+
+    addMaxSectionsPerSectionTimeConstraint(model, mod_time_variables, max_sections_per_time)
+
+    for student_index in range(len(student_time_variables)):
+        num_students_in_row = numPeopleInRow(student_time_variables[student_index])
+        unassigned = model.NewIntVar(0, num_students_in_row, f'student{student_index}:unassigned')
+        model.Add(sum(student_time_index.variablesForPerson(student_index)) + unassigned == num_students_in_row)
+        slack_variables.unassigned_students.append((student_index, unassigned))
+
+    num_students = sum(numPeopleInRow(time_variables_for_student) for time_variables_for_student
+                       in student_time_variables)
+    for time_index in range(num_section_times):
+        mods_in_time = mod_time_index.variablesAtTime(time_index)
+        students_in_time = student_time_index.variablesAtTime(time_index)
+        if (len(mods_in_time) == 0) and (len(students_in_time) == 0):
+            # Nobody can make this time, so there is nothing to constrain
+            continue
+
+        max_students_short = config.min_students_per_section * max_sections_per_time[time_index]
+        under_fill = model.NewIntVar(0, max_students_short, f'time{time_index}:under_fill')
+        over_fill = model.NewIntVar(0, num_students, f'time{time_index}:over_fill')
+        model.Add(config.min_students_per_section * sum(mods_in_time) - under_fill <= sum(students_in_time))
+        model.Add(sum(students_in_time) <= config.max_students_per_section * sum(mods_in_time) + over_fill)
+        slack_variables.under_filled_times.append((time_index, under_fill))
+        slack_variables.over_filled_times.append((time_index, over_fill))
+
+    return slack_variables
+
+def getRowNetIDs(person_time_variables, person_index, net_ids):
+    """
+        Returns:
+            List of String for the net IDs of the people in a row of a 2D List of PersonTimeVariableWrapper
+    """
+    for person_time_var_wrapper in person_time_variables[person_index]:
+        if person_time_var_wrapper is not None:
+            return person_time_var_wrapper.type_net_ids
+    # Without any possible time a row only knows its people when every row is one person
+    return [] if config.aggregate_identical_people else [net_ids[person_index]]
+
+def getSlackReport(values, slack_variables, mod_time_variables, mod_net_ids, student_net_ids,
+                   students_assigned_to_times, section_times):
+    """
+        Args:
+            values: Sequence of Integer for the value of every CP variable in the solution of the relaxed model
+            slack_variables: SlackVariables of the relaxed model
+            mod_time_variables: 2D List of PersonTimeVariableWrapper for the moderators
+            mod_net_ids: List of String for the net ID of every moderator in the input
+            student_net_ids: List of String for the net ID of every student in the input
+            students_assigned_to_times: List of List of Strings, each entry is all net IDs of the students assigned
+                                        to that time index
+            section_times: List of String for the name of each section time, or None
+
+        Returns:
+            SlackReport of the solution
+    """
+    slack_report = SlackReport(section_times)
+    assigned_student_net_ids = {net_id for net_ids in students_assigned_to_times for net_id in net_ids}
+    slack_report.unassigned_student_net_ids = [net_id for net_id in student_net_ids
+                                               if net_id not in assigned_student_net_ids]
+    for (mod_slack_entries, mod_report_entries) in ((slack_variables.overloaded_mods, slack_report.overloaded_mods),
+                                                    (slack_variables.underloaded_mods,
+                                                     slack_report.underloaded_mods)):
+        for (mod_index, variable) in mod_slack_entries:
+            if values[variable.Index()] > 0:
+                mod_report_entries.append((getRowNetIDs(mod_time_variables, mod_index, mod_net_ids),
+                                           values[variable.Index()]))
+    for (time_slack_entries, time_report_entries) in ((slack_variables.under_filled_times,
+                                                       slack_report.under_filled_times),
+                                                      (slack_variables.over_filled_times,
+                                                       slack_report.over_filled_times)):
+        for (time_index, variable) in time_slack_entries:
+            if values[variable.Index()] > 0:
+                time_report_entries.append((time_index, values[variable.Index()]))
+    return slack_report
+
+def getStuckNetIDs(slack_report, mods_assigned_to_times, students_assigned_to_times):
+    """
+        Returns:
+            Set of String for the net IDs of everyone the relaxed solution shows to be stuck: students without a
+             section, moderators over or under their sections, and everyone assigned to a time with too few or too
+             many students
+    """
+    stuck_net_ids = set(slack_report.unassigned_student_net_ids)
+    for (net_ids, _) in slack_report.overloaded_mods + slack_report.underloaded_mods:
+        stuck_net_ids.update(net_ids)
+    for (time_index, _) in slack_report.under_filled_times + slack_report.over_filled_times:
+        stuck_net_ids.update(mods_assigned_to_times[time_index])
+        stuck_net_ids.update(students_assigned_to_times[time_index])
+    return stuck_net_ids
+
+def removeOverFilledStudents(slack_report, mods_assigned_to_times, students_assigned_to_times):
+    """
+        Leaves the students a time can not hold out of the partial assignment, since a section can not be made
+         for them, and adds them to the students without a section in the report
+    """
+    for (time_index, _) in slack_report.over_filled_times:
+        num_students_held = config.max_students_per_section * len(mods_assigned_to_times[time_index])
+        slack_report.unassigned_student_net_ids += students_assigned_to_times[time_index][num_students_held:]
+        del students_assigned_to_times[time_index][num_students_held:]
+
+def solveRelaxedModel(input_data, allowed_impossible_net_ids, previous_checkpoint=None, not_preferred_activation=None,
+                      solve_name='slack relaxation solve', no_improvement_seconds=None):
+    """
+        Builds and solves the relaxed model of the input data
+
+        Args:
+            input_data: Tuple of the return values of assign_time_slots.readInputFiles
+            allowed_impossible_net_ids: Set of String for the net IDs of the people whose impossible times get a
+                                         variable, see assign_time_slots.setupConstraintProgrammingVariables
+            previous_checkpoint: incumbent_checkpoint.Checkpoint holding the previous relaxed solution to hint,
+                                  or None
+            not_preferred_activation: See assign_time_slots.setupConstraintProgrammingVariables
+            solve_name: String naming the solve in the solver timeline
+            no_improvement_seconds: Number of seconds without a better solution after which the best solution is
+                                     accepted, or None to use config.early_stop_no_improvement_seconds
+
+        Returns:
+            extracted_solution: solution_extraction.ExtractedSolution of the solution
+            slack_report: SlackReport of the solution
+            checkpoint: incumbent_checkpoint.Checkpoint holding the solution, to hint the next relaxed model with
+    """
+    (mod_net_ids, _, _, student_net_ids, _, section_times, _) = input_data
+    (model, mod_time_variables, student_time_variables, max_sections_per_mod, max_sections_per_time) = \
+        assign_time_slots.getModelFromInputData(*input_data, allowed_impossible_net_ids=allowed_impossible_net_ids,
+                                                not_preferred_activation=not_preferred_activation)
+    slack_variables = addRelaxedConstraints(model, mod_time_variables, student_time_variables, max_sections_per_mod,
+                                            max_sections_per_time)
+    addFunctionToMinimize(model, mod_time_variables, student_time_variables,
+                          assign_time_slots.getMaxTotalSections(mod_time_variables, max_sections_per_mod),
+                          slack_variables=slack_variables.getAllVariables())
+    if previous_checkpoint is not None:
+        incumbent_checkpoint.hintCheckpoint(model, previous_checkpoint, mod_time_variables, student_time_variables)
+
+    solution_counter = assign_time_slots.SolutionCounter()
+    solver = assign_time_slots.createSolver()
+    status = assign_time_slots.solveWithProgress(solver, model, solution_counter, solve_name,
+                                                 no_improvement_seconds=no_improvement_seconds)
+    print(solver.StatusName(status))
+    print("Objective value:", round(solver.ObjectiveValue(), 3))
+    if status == cp_model.FEASIBLE:
+        # The relaxed model exists to give some assignment quickly, so a solve stopped early is used even with
+        #  config.only_allow_optimal_solutions, it may just need more slack than the optimal relaxed solution
+        print(f'WARNING: The relaxed solution is not proven optimal ({solution_counter.stop_reason}), it is used anyway')
+    else:
+        assign_time_slots.verifySolutionStatus(status, solution_counter.stop_reason)
+
+    solution_values = getSolutionValues(solver)
+    extracted_solution = extractSolution(solution_values, mod_time_variables, student_time_variables)
+    slack_report = getSlackReport(solution_values.values, slack_variables, mod_time_variables, mod_net_ids,
+                                  student_net_ids, extracted_solution.students_assigned_to_times, section_times)
+    slack_report.status = status
+    slack_report.objective = solution_values.objective_value
+    checkpoint = Checkpoint(None, solution_values.objective_value,
+                            incumbent_checkpoint.getAssignedTimes(solution_values.values,
+                                                                  getPersonTimeIndex(mod_time_variables)),
+                            incumbent_checkpoint.getAssignedTimes(solution_values.values,
+                                                                  getPersonTimeIndex(student_time_variables)))
+    return extracted_solution, slack_report, checkpoint
+
+def solveWithSlack(input_data):
+    """
+        Solves the relaxed model without any impossible time first. While constraints still need relaxing, the
+         impossible times of everyone the solution shows to be stuck are added and the relaxed model is solved
+         again starting from the previous solution, until nothing needs relaxing or nobody new is stuck
+
+        Args:
+            input_data: Tuple of the return values of assign_time_slots.readInputFiles
+
+        Returns:
+            extracted_solution: solution_extraction.ExtractedSolution of the final solution, which leaves out the
+                                 students without a section
+            slack_report: SlackReport of every constraint the final solution still needed relaxing
+            allowed_impossible_net_ids: Set of String for the net IDs of the people who were allowed impossible times
+    """
+    allowed_impossible_net_ids = set()
+    (extracted_solution, slack_report, checkpoint) = solveRelaxedModel(input_data, allowed_impossible_net_ids)
+    while slack_report.getTotalSlack() > 0:
+        stuck_net_ids = getStuckNetIDs(slack_report, extracted_solution.mods_assigned_to_times,
+                                       extracted_solution.students_assigned_to_times) - allowed_impossible_net_ids
+        if len(stuck_net_ids) == 0:
+            break
+        print(f'Allowing impossible times for {len(stuck_net_ids)} stuck people: {", ".join(sorted(stuck_net_ids))}')
+        allowed_impossible_net_ids |= stuck_net_ids
+        (extracted_solution, slack_report, checkpoint) = solveRelaxedModel(input_data, allowed_impossible_net_ids,
+                                                                           checkpoint)
+
+    instrumentation.setCounter('slack', slack_report.getTotalSlack())
+    instrumentation.setCounter('people allowed impossible times', len(allowed_impossible_net_ids))
+    removeOverFilledStudents(slack_report, extracted_solution.mods_assigned_to_times,
+                             extracted_solution.students_assigned_to_times)
+    return extracted_solution, slack_report, allowed_impossible_net_ids
+
+def solveInputFilesWithSlack(mod_doodle_poll_csv_path, mod_max_section_csv_path, student_doodle_poll_csv_path,
+                             section_times_csv_path=None):
+    """
+        Assigns everyone that can be assigned with the slack relaxation, see solveWithSlack, and prints which people
+         and times still needed relaxing. See assign_time_slots.assignModeratorsAndStudents for the arguments
+
+        Returns:
+            assign_time_slots.SolveOutcome of the final relaxed solve, whose assignment leaves out the students
+             without a section. Every relaxed solve was already verified by solveRelaxedModel
+    """
+    if config.allow_impossible_times:
+        print('WARNING: config.allow_impossible_times is ignored, impossible times are only allowed for stuck people')
+    if config.use_lexicographic_objective:
+        print('WARNING: config.use_lexicographic_objective is ignored with config.use_slack_relaxation')
+    input_data = assign_time_slots.readInputFiles(mod_doodle_poll_csv_path, mod_max_section_csv_path,
+                                                  student_doodle_poll_csv_path, section_times_csv_path)
+    (extracted_solution, slack_report, _) = solveWithSlack(input_data)
+
+    slack_report.printReport()
+    return assign_time_slots.SolveOutcome(slack_report.status, slack_report.objective, extracted_solution,
+                                          solve_results=[])
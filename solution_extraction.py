@@ -0,0 +1,162 @@
+import instrumentation
+from array import array
+from person_time_index import getPersonTimeIndex
+
+class SolutionValues:
+    """ The value of every CP variable in one solution, read from the solver all at once """
+    __slots__ = ('values', 'objective_value')
+
+    def __init__(self, values, objective_value=None):
+        """
+            Args:
+                values: Sequence of Integer where each entry is the value of the CP variable with that index
+                objective_value: Float for the objective value of the solution, or None if it is not known
+        """
+        self.values = array('q', values)
+        self.objective_value = objective_value
+
+    def Value(self, variable):
+        """ Stands in for cp_model.CpSolver.Value so the values can be used wherever a solved solver is """
+        return self.values[variable.Index()]
+
+def getSolutionValues(solution_source):
+    """
+        Copies the whole solution out of the solver in one call, instead of one call per variable
+
+        Args:
+            solution_source: A cp_model.CpSolver which found a solution, a cp_model.CpSolverSolutionCallback
+                              during on_solution_callback, or SolutionValues which is returned as it is
+
+        Returns:
+            SolutionValues holding the value of every CP variable in the model
+    """
+    if isinstance(solution_source, SolutionValues):
+        return solution_source
+    elif hasattr(solution_source, 'ResponseProto'):
+        response = solution_source.ResponseProto()
+    else:
+        response = solution_source.Response()
+    return SolutionValues(response.solution, response.objective_value)
+
+class ExtractedSolution:
+    """ Everything reported about one solution, see extractSolution """
+
+    def __init__(self, num_section_times):
+        self.mods_assigned_to_times = [[] for _ in range(num_section_times)]
+        self.students_assigned_to_times = [[] for _ in range(num_section_times)]
+        self.not_preferred_mod_net_ids = []
+        self.impossible_mod_net_ids = []
+        self.not_preferred_student_net_ids = []
+        self.impossible_student_net_ids = []
+
+        # Filled in with List of array of Integer, [row_index][time_index] is the number of people of that row
+        #  assigned to the time, only when the matrices were asked for
+        self.mod_assignment_matrix = None
+        self.student_assignment_matrix = None
+
+    def printReport(self):
+        if len(self.impossible_mod_net_ids) > 0 or len(self.impossible_student_net_ids) > 0:
+            print('Mods assigned to impossible times:', len(self.impossible_mod_net_ids),
+                  '(' + str(self.impossible_mod_net_ids) + ')')
+            print('Students assigned to impossible times:', len(self.impossible_student_net_ids),
+                  '(' + str(self.impossible_student_net_ids) + ')')
+
+        # If there aren't too many to report, print out the students who received not preferred times
+        mod_message = 'Mods assigned to not preferred time: ' + str(len(self.not_preferred_mod_net_ids)) + ' '
+        student_message = ('Students assigned to not preferred time: ' +
+                           str(len(self.not_preferred_student_net_ids)) + ' ')
+        if len(self.not_preferred_mod_net_ids) <= 10:
+            mod_message += str(self.not_preferred_mod_net_ids)
+        if len(self.not_preferred_student_net_ids) <= 10:
+            student_message += str(self.not_preferred_student_net_ids)
+
+        print(mod_message)
+        print(student_message)
+
+@instrumentation.timed('extraction')
+def extractSolution(solution_source, mod_time_variables, student_time_variables, should_build_assignment_matrix=False):
+    """
+        Reads the solution once and then builds the assignment of every time, the people assigned to times which
+         were not preferred or impossible, and optionally the dense assignment matrices, in a single pass over
+         the variables
+
+        Args:
+            solution_source: See getSolutionValues
+            mod_time_variables: 2D List of PersonTimeVariableWrapper, if [mod_index][time_index]
+                                    is None then that time is impossible for that mod
+            student_time_variables: 2D List of PersonTimeVariableWrapper,
+                                        if [student_index][time_index] is None then
+                                        that time is impossible for that student
+            should_build_assignment_matrix: True to fill in the assignment matrices of the ExtractedSolution
+
+        Returns:
+            ExtractedSolution for the solution
+    """
+    values = getSolutionValues(solution_source).values
+    mod_time_index = getPersonTimeIndex(mod_time_variables)
+    student_time_index = getPersonTimeIndex(student_time_variables, mod_time_index.num_section_times)
+    num_section_times = mod_time_index.num_section_times
+    extracted_solution = ExtractedSolution(num_section_times)
+    if should_build_assignment_matrix:
+        extracted_solution.mod_assignment_matrix = [array('l', bytes(array('l').itemsize * num_section_times))
+                                                    for _ in range(len(mod_time_variables))]
+        extracted_solution.student_assignment_matrix = [array('l', bytes(array('l').itemsize * num_section_times))
+                                                        for _ in range(len(student_time_variables))]
+
+    people_to_extract = ((mod_time_index, extracted_solution.mods_assigned_to_times,
+                          extracted_solution.impossible_mod_net_ids, extracted_solution.not_preferred_mod_net_ids,
+                          extracted_solution.mod_assignment_matrix),
+                         (student_time_index, extracted_solution.students_assigned_to_times,
+                          extracted_solution.impossible_student_net_ids,
+                          extracted_solution.not_preferred_student_net_ids,
+                          extracted_solution.student_assignment_matrix))
+
+    # Position of the next person to hand out from each type, only matters with config.aggregate_identical_people
+    next_person_in_type = ([0] * len(mod_time_variables), [0] * len(student_time_variables))
+
+    for time_index in range(num_section_times):
+        for ((person_time_index, people_assigned_to_times, impossible_net_ids, not_preferred_net_ids,
+              assignment_matrix), next_person_in_type_for_people) in zip(people_to_extract, next_person_in_type):
+            for (person_index, person_time_var_wrapper) in zip(person_time_index.personIndicesAtTime(time_index),
+                                                               person_time_index.wrappersAtTime(time_index)):
+                num_assigned = values[person_time_var_wrapper.variable.Index()]
+                if num_assigned == 0:
+                    continue
+
+                net_ids = popPeopleFromType(person_time_var_wrapper.type_net_ids, next_person_in_type_for_people,
+                                            person_index, num_assigned)
+                people_assigned_to_times[time_index].extend(net_ids)
+                if assignment_matrix is not None:
+                    assignment_matrix[person_index][time_index] = num_assigned
+
+                # Record if this person did not receive a preferred time
+                if person_time_var_wrapper.is_impossible_time:
+                    impossible_net_ids.extend(net_ids)
+                elif not person_time_var_wrapper.is_preferred_time:
+                    not_preferred_net_ids.extend(net_ids)
+
+    return extracted_solution
+
+def popPeopleFromType(type_net_ids, next_person_in_type, person_index, num_assigned):
+    """
+        Hands out the people of a type who were assigned to one time by the CP solver
+
+        People are handed out round robin across time indices. Since the CP variable for a type is at most the
+         number of people in the type, no person is handed out twice for the same time, and the number of times
+         each person of the type receives differs by at most one. For students the type's variables sum to the type
+         size, and for moderators the sum is within [size, size * max sections], so every person receives a valid
+         number of times. Without aggregation every type holds exactly one person and this is a no-op
+
+        Args:
+            type_net_ids: List of String for the net IDs of every person in the type
+            next_person_in_type: List of Integer holding the position of the next person to hand out for each type,
+                                  this is updated in place
+            person_index: Integer for the index of the type in its 2D List of PersonTimeVariableWrapper
+            num_assigned: Integer for the value of the type's CP variable at the time
+
+        Returns:
+            List of String for the net IDs of the people assigned to the time
+    """
+    first_position = next_person_in_type[person_index]
+    next_person_in_type[person_index] = (first_position + num_assigned) % len(type_net_ids)
+    return [type_net_ids[(first_position + i) % len(type_net_ids)] for i in range(num_assigned)]
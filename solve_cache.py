@@ -0,0 +1,355 @@
+import argparse
+import assign_time_slots
+import config
+import hashlib
+import json
+import os
+import time
+from ortools.sat.python import cp_model
+from person_time_index import PersonTimeVariables
+
+# Increase this whenever a change to the code changes the model or the assignment for the same inputs, so that
+#  entries made by older code are never used
+CACHE_FORMAT_VERSION = 2
+
+# The config options which change the CP model built from the input files
+MODEL_CONFIG_OPTIONS = ['objective_function', 'min_students_per_section', 'max_students_per_section',
+                        'assign_exact_max_sections', 'maximize_number_of_sections',
+                        'prefer_contiguous_sections_preferred_times_only', 'prefer_contiguous_sections_all_possible',
+                        'contiguous_sections_percentage', 'num_sections_to_greedy_preselect', 'greedy_preselect_mode',
+                        'allow_impossible_times', 'impossible_time_percentage',
+                        'use_compact_students_per_section_time_encoding', 'aggregate_identical_people',
+                        'presolve_input_data', 'use_slack_relaxation', 'use_progressive_activation',
+                        'progressive_activation_prove_optimal', 'num_students_without_not_preferred_times']
+
+# The config options which only change how the CP model is solved
+SOLVER_CONFIG_OPTIONS = ['num_search_workers', 'max_time_in_seconds', 'relative_gap_limit', 'absolute_gap_limit',
+                         'random_seed', 'deterministic_interleave_search', 'only_allow_optimal_solutions',
+                         'use_lexicographic_objective', 'decompose_into_components', 'use_two_phase_engine',
+                         'use_large_neighbourhood_search', 'lns_time_budget_seconds', 'lns_initial_solution_seconds',
+                         'lns_neighbourhood_seconds', 'lns_neighbourhood_num_times', 'lns_neighbourhood_num_mods',
+                         'early_stop_no_improvement_seconds', 'early_stop_target_objective',
+                         'progressive_activation_no_improvement_seconds', 'two_phase_max_iterations',
+                         'checkpoint_incumbents', 'resume_from_checkpoint']
+
+MODELS_DIRECTORY = 'models'
+RESULTS_DIRECTORY = 'results'
+
+class SolveCache:
+    """
+        On-disk cache of CP models and solved assignments, where every entry is named by the hash of everything
+         it was made from, so an entry never needs to be invalidated, only evicted when the cache grows too large
+
+        Each model entry is a serialized CpModel proto along with a JSON file describing the
+         PersonTimeVariableWrapper objects for its variables, and each result entry is a JSON file holding the
+         assignment of every time
+    """
+
+    def __init__(self, cache_directory, max_megabytes):
+        """
+            Args:
+                cache_directory: String for the directory holding the cache, created when it does not exist
+                max_megabytes: Number for the size the cache is pruned to after every new entry, or None for no limit
+        """
+        self.cache_directory = cache_directory
+        self.max_megabytes = max_megabytes
+        for subdirectory in (MODELS_DIRECTORY, RESULTS_DIRECTORY):
+            os.makedirs(os.path.join(cache_directory, subdirectory), exist_ok=True)
+
+    def getPath(self, subdirectory, key, extension):
+        return os.path.join(self.cache_directory, subdirectory, key + extension)
+
+    def loadResult(self, key):
+        """
+            Returns:
+                mods_assigned_to_times: List of List of Strings, see assignModeratorsAndStudents
+                students_assigned_to_times: List of List of Strings, see assignModeratorsAndStudents
+                Or None if there is no result for the key
+        """
+        result_path = self.getPath(RESULTS_DIRECTORY, key, '.json')
+        if not os.path.exists(result_path):
+            return None
+        with open(result_path, 'r', encoding='utf-8') as result_file:
+            result = json.load(result_file)
+        markUsed(result_path)
+        print('Solve cache hit: assignment from', result_path)
+        return result['mods_assigned_to_times'], result['students_assigned_to_times']
+
+    def saveResult(self, key, status_name, objective_value, mods_assigned_to_times, students_assigned_to_times):
+        """
+            Args:
+                key: String from getCacheKey
+                status_name: String for the CP solver status of the assignment, or None if it is not known
+                objective_value: Float for the objective value of the assignment, or None if it is not known
+                mods_assigned_to_times: List of List of Strings, see assignModeratorsAndStudents
+                students_assigned_to_times: List of List of Strings, see assignModeratorsAndStudents
+        """
+        result = {'status': status_name, 'objective_value': objective_value,
+                  'mods_assigned_to_times': mods_assigned_to_times,
+                  'students_assigned_to_times': students_assigned_to_times}
+        writeFileAtomically(self.getPath(RESULTS_DIRECTORY, key, '.json'), json.dumps(result).encode('utf-8'))
+        self.prune(self.max_megabytes)
+
+    def loadModel(self, key):
+        """
+            Returns:
+                model: The CpModel object with every constraint, without the objective function
+                mod_time_variables: 2D List of PersonTimeVariableWrapper for the variables of model
+                student_time_variables: 2D List of PersonTimeVariableWrapper for the variables of model
+                max_sections_per_mod: List of Integer, each entry is the max sections for that mod_index
+                max_sections_per_time: List of Integer where each index represents the number of rooms
+                                        available at that time index
+                Or None if there is no model for the key
+        """
+        model_path = self.getPath(MODELS_DIRECTORY, key, '.pb')
+        variables_path = self.getPath(MODELS_DIRECTORY, key, '.json')
+        if not (os.path.exists(model_path) and os.path.exists(variables_path)):
+            return None
+
+        model = cp_model.CpModel()
+        with open(model_path, 'rb') as model_file:
+            model.Proto().ParseFromString(model_file.read())
+        with open(variables_path, 'r', encoding='utf-8') as variables_file:
+            variables = json.load(variables_file)
+        markUsed(model_path)
+        markUsed(variables_path)
+
+        num_section_times = variables['num_section_times']
+        return (model, readPersonTimeVariables(model, variables['mod_time_variables'], num_section_times),
+                readPersonTimeVariables(model, variables['student_time_variables'], num_section_times),
+                variables['max_sections_per_mod'], variables['max_sections_per_time'])
+
+    def saveModel(self, key, model, mod_time_variables, student_time_variables, max_sections_per_mod,
+                  max_sections_per_time):
+        variables = {'num_section_times': len(mod_time_variables[0]),
+                     'mod_time_variables': writePersonTimeVariables(mod_time_variables),
+                     'student_time_variables': writePersonTimeVariables(student_time_variables),
+                     'max_sections_per_mod': max_sections_per_mod, 'max_sections_per_time': max_sections_per_time}
+        writeFileAtomically(self.getPath(MODELS_DIRECTORY, key, '.pb'), model.Proto().SerializeToString())
+        writeFileAtomically(self.getPath(MODELS_DIRECTORY, key, '.json'), json.dumps(variables).encode('utf-8'))
+        self.prune(self.max_megabytes)
+
+    def getEntries(self):
+        """
+            Returns:
+                List of (subdirectory, key, total bytes, seconds since the epoch the entry was last used) for every
+                 entry in the cache, least recently used first
+        """
+        entries = {}
+        for subdirectory in (MODELS_DIRECTORY, RESULTS_DIRECTORY):
+            for file_name in os.listdir(os.path.join(self.cache_directory, subdirectory)):
+                (key, extension) = os.path.splitext(file_name)
+                if extension == '.tmp':
+                    continue
+                file_stat = os.stat(os.path.join(self.cache_directory, subdirectory, file_name))
+                (num_bytes, last_used) = entries.get((subdirectory, key), (0, 0))
+                entries[(subdirectory, key)] = (num_bytes + file_stat.st_size, max(last_used, file_stat.st_mtime))
+        return sorted(((subdirectory, key, num_bytes, last_used)
+                       for ((subdirectory, key), (num_bytes, last_used)) in entries.items()),
+                      key=lambda entry: entry[3])
+
+    def removeEntry(self, subdirectory, key):
+        for extension in ('.pb', '.json'):
+            entry_path = self.getPath(subdirectory, key, extension)
+            if os.path.exists(entry_path):
+                os.remove(entry_path)
+
+    def prune(self, max_megabytes=None, max_age_days=None):
+        """
+            Removes the least recently used entries until the cache is at most max_megabytes, and every entry not
+             used in the last max_age_days
+
+            Returns:
+                Integer for the number of entries removed
+        """
+        entries = self.getEntries()
+        total_bytes = sum(num_bytes for (_, _, num_bytes, _) in entries)
+        num_removed = 0
+        for (subdirectory, key, num_bytes, last_used) in entries:
+            is_too_large = (max_megabytes is not None) and (total_bytes > max_megabytes * 1024 * 1024)
+            is_too_old = (max_age_days is not None) and (time.time() - last_used > max_age_days * 24 * 60 * 60)
+            if is_too_large or is_too_old:
+                self.removeEntry(subdirectory, key)
+                total_bytes -= num_bytes
+                num_removed += 1
+        return num_removed
+
+def writePersonTimeVariables(person_time_variables):
+    """
+        Returns:
+            List with a Dictionary for each row of the 2D List of PersonTimeVariableWrapper that can be written as
+             JSON and read back with readPersonTimeVariables
+    """
+    rows = []
+    for time_variables_for_person in person_time_variables:
+        wrappers = [wrapper for wrapper in time_variables_for_person if wrapper is not None]
+        if len(wrappers) == 0:
+            rows.append(None)
+            continue
+        rows.append({'net_id': wrappers[0].net_id, 'person_index': wrappers[0].person_index,
+                     'type_net_ids': wrappers[0].type_net_ids,
+                     'times': [[wrapper.time_index, wrapper.is_preferred_time, wrapper.is_impossible_time,
+                                wrapper.day_of_week, wrapper.variable.Index(), wrapper.allows_contiguous_sections]
+                               for wrapper in wrappers]})
+    return rows
+
+def readPersonTimeVariables(model, rows, num_section_times):
+    """
+        Returns:
+            PersonTimeVariables for rows from writePersonTimeVariables, wrapping the variables of the model
+    """
+    person_time_variables = []
+    for row in rows:
+        time_variables_for_person = [None] * num_section_times
+        for (time_index, is_preferred_time, is_impossible_time, day_of_week, variable_index,
+             allows_contiguous_sections) in ([] if row is None else row['times']):
+            wrapper = assign_time_slots.PersonTimeVariableWrapper(
+                row['net_id'], time_index, is_preferred_time, is_impossible_time, day_of_week,
+                model.GetIntVarFromProtoIndex(variable_index), row['person_index'], row['type_net_ids'])
+            wrapper.allows_contiguous_sections = allows_contiguous_sections
+            time_variables_for_person[time_index] = wrapper
+        person_time_variables.append(time_variables_for_person)
+    return PersonTimeVariables(person_time_variables, num_section_times)
+
+def writeFileAtomically(path, contents):
+    """ Writes to a temporary file first so that a run stopped midway never leaves a partial entry """
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as temporary_file:
+        temporary_file.write(contents)
+    os.replace(temporary_path, path)
+
+def markUsed(path):
+    """ Entries are evicted least recently used first, by the modification time of their files """
+    os.utime(path, None)
+
+def hashInputFiles(csv_paths):
+    """
+        Returns:
+            String for the hash of the contents of every input file, where a path of None is hashed as missing
+    """
+    input_hash = hashlib.sha256()
+    for csv_path in csv_paths:
+        if csv_path is None:
+            input_hash.update(b'missing\0')
+            continue
+        with open(csv_path, 'rb') as csv_file:
+            input_hash.update(hashlib.sha256(csv_file.read()).digest())
+    return input_hash.hexdigest()
+
+def getConfigValue(option_name):
+    value = getattr(config, option_name)
+    if callable(value):
+        return value.__module__ + '.' + value.__qualname__
+    return value
+
+def getCacheKey(input_hash, config_options):
+    """
+        Returns:
+            String naming the cache entry for the inputs solved with the current values of the config options
+    """
+    key_contents = {'version': CACHE_FORMAT_VERSION, 'inputs': input_hash,
+                    'config': {option_name: getConfigValue(option_name) for option_name in config_options}}
+    return hashlib.sha256(json.dumps(key_contents, sort_keys=True).encode('utf-8')).hexdigest()
+
+class CachedModel:
+    """
+        The cache entry for the CP model of one set of input files and model config options, which
+         assign_time_slots.solveInputFiles reads the model from instead of building it, or saves the model it built to
+    """
+
+    def __init__(self, solve_cache, key):
+        """
+            Args:
+                solve_cache: SolveCache holding the entry
+                key: String from getCacheKey for the model config options
+        """
+        self.solve_cache = solve_cache
+        self.key = key
+
+    def load(self):
+        """
+            Returns:
+                The return values of SolveCache.loadModel, or None if the model is not cached yet
+        """
+        cached_model = self.solve_cache.loadModel(self.key)
+        if cached_model is not None:
+            print('Solve cache hit: CP model')
+        return cached_model
+
+    def save(self, model, mod_time_variables, student_time_variables, max_sections_per_mod, max_sections_per_time):
+        """ Should be called once every constraint is added, but before the objective function is """
+        self.solve_cache.saveModel(self.key, model, mod_time_variables, student_time_variables, max_sections_per_mod,
+                                   max_sections_per_time)
+
+def isCachedModelSolve():
+    """
+        Returns:
+            True if the assignment comes from solving the CP model with every constraint added, the only case where
+             the model is cached. Every other way of solving still has its assignment cached
+    """
+    return not (config.use_two_phase_engine or config.decompose_into_components or
+                config.use_slack_relaxation or config.use_progressive_activation)
+
+def assignModeratorsAndStudentsWithCache(mod_doodle_poll_csv_path, mod_max_section_csv_path,
+                                         student_doodle_poll_csv_path, section_times_csv_path=None):
+    """
+        Same as assignModeratorsAndStudents, except that the assignment is read from the cache when the input
+         files and config options are unchanged from an earlier run, and the CP model is read from the cache when
+         only the solver options changed
+
+        Returns:
+            mods_assigned_to_times: List of List of Strings, each entry is all net IDs of the moderators assigned
+                                        to that time index
+            students_assigned_to_times: List of List of Strings, each entry is all net IDs of the students assigned
+                                        to that time index
+    """
+    csv_paths = (mod_doodle_poll_csv_path, mod_max_section_csv_path, student_doodle_poll_csv_path,
+                 section_times_csv_path)
+    solve_cache = SolveCache(config.solve_cache_directory, config.solve_cache_max_megabytes)
+    input_hash = hashInputFiles(csv_paths)
+    result_key = getCacheKey(input_hash, MODEL_CONFIG_OPTIONS + SOLVER_CONFIG_OPTIONS)
+    cached_result = solve_cache.loadResult(result_key)
+    if cached_result is not None:
+        return cached_result
+
+    model_cache = CachedModel(solve_cache, getCacheKey(input_hash, MODEL_CONFIG_OPTIONS)) \
+        if isCachedModelSolve() else None
+    solve_outcome = assign_time_slots.solveInputFiles(csv_paths, model_cache)
+    assign_time_slots.verifySolveOutcome(solve_outcome)
+
+    solve_cache.saveResult(result_key, cp_model.CpSolver().StatusName(solve_outcome.status), solve_outcome.objective,
+                           solve_outcome.mods_assigned_to_times, solve_outcome.students_assigned_to_times)
+    return solve_outcome.mods_assigned_to_times, solve_outcome.students_assigned_to_times
+
+def main(argv=None):
+    """ Command to list what is in the solve cache and remove entries from it """
+    parser = argparse.ArgumentParser(description='Inspect and prune the solve cache at config.solve_cache_directory')
+    parser.add_argument('--cache-directory', default=config.solve_cache_directory,
+                        help='The solve cache directory to use instead of config.solve_cache_directory')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('inspect', help='List every entry, least recently used first')
+    prune_parser = subparsers.add_parser('prune', help='Remove least recently used entries')
+    prune_parser.add_argument('--max-megabytes', type=float, default=config.solve_cache_max_megabytes,
+                              help='Remove entries until the cache is at most this size')
+    prune_parser.add_argument('--max-age-days', type=float, help='Remove every entry not used in this many days')
+    subparsers.add_parser('clear', help='Remove every entry')
+    arguments = parser.parse_args(argv)
+
+    solve_cache = SolveCache(arguments.cache_directory, None)
+    if arguments.command == 'inspect':
+        entries = solve_cache.getEntries()
+        print('{:<8} {:<64} {:>10} {:<20}'.format('Kind', 'Key', 'KB', 'Last used'))
+        for (subdirectory, key, num_bytes, last_used) in entries:
+            print('{:<8} {:<64} {:>10} {:<20}'.format(subdirectory, key, round(num_bytes / 1024, 1),
+                                                      time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_used))))
+        total_megabytes = sum(num_bytes for (_, _, num_bytes, _) in entries) / (1024 * 1024)
+        print(f'{len(entries)} entries, {round(total_megabytes, 2)} MB')
+    elif arguments.command == 'prune':
+        num_removed = solve_cache.prune(arguments.max_megabytes, arguments.max_age_days)
+        print(f'Removed {num_removed} entries')
+    else:
+        num_removed = solve_cache.prune(max_megabytes=0)
+        print(f'Removed {num_removed} entries')
+
+if __name__ == '__main__':
+    main()
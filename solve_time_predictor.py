@@ -0,0 +1,301 @@
+import assign_time_slots
+import config
+import instrumentation
+import json
+import math
+import os
+from constraints import numPeopleInRow
+from objective_functions import isContiguousSectionPair
+from person_time_index import NOT_PREFERRED_TIME, PREFERRED_TIME, getPersonTimeIndex
+
+# Features of a model which are counts, these are fitted on a log scale since solve time grows exponentially
+COUNT_FEATURE_NAMES = ['person_time_variables', 'students_per_section_time_variables', 'contiguous_variables']
+FEATURE_NAMES = COUNT_FEATURE_NAMES + ['preferred_density', 'not_preferred_density', 'rooms_per_time',
+                                       'supply_demand_slack']
+MIN_TRAINING_RESULTS = 3
+MIN_SOLVE_SECONDS = 0.01
+RIDGE_PENALTY = 1.0
+
+class SolveTimeModel:
+    """
+        Linear model of the logarithm of the solve time on the standardized features of a model, see
+         fitSolveTimeModel
+    """
+
+    def __init__(self, feature_means, feature_scales, weights, intercept, num_training_results):
+        self.feature_means = feature_means
+        self.feature_scales = feature_scales
+        self.weights = weights
+        self.intercept = intercept
+        self.num_training_results = num_training_results
+
+    def predictSeconds(self, features):
+        """
+            Args:
+                features: Dictionary from getModelFeatures
+
+            Returns:
+                Float for the predicted seconds the CP solver takes to solve the model
+        """
+        standardized_features = standardizeFeatureVector(getFeatureVector(features), self.feature_means,
+                                                         self.feature_scales)
+        log_seconds = self.intercept + sum(weight * feature
+                                           for (weight, feature) in zip(self.weights, standardized_features))
+        return math.exp(log_seconds)
+
+def getModelFeatures(mod_time_variables, student_time_variables, max_sections_per_mod, max_sections_per_time):
+    """
+        Computes the features solve time is predicted from, right after the person/time variables are created and
+         before any constraint is added
+
+        Args:
+            See addAllConstraints in assign_time_slots.py
+
+        Returns:
+            Dictionary from each of FEATURE_NAMES to its value for the model:
+            person_time_variables: Number of person/time variables
+            students_per_section_time_variables: Number of decision variables addStudentsPerSectionTimeConstraint
+                                                  will add, 0 with the compact encoding
+            contiguous_variables: Expected number of contiguous section variables the objective function will add
+            preferred_density: Fraction of every person/time pair which is a preferred time
+            not_preferred_density: Fraction of every person/time pair which is possible but not preferred
+            rooms_per_time: Average number of sections which fit in each time
+            supply_demand_slack: How many more student seats the moderators and rooms could give than there are
+                                  students, as a fraction of the number of students
+    """
+    mod_time_index = getPersonTimeIndex(mod_time_variables)
+    student_time_index = getPersonTimeIndex(student_time_variables, mod_time_index.num_section_times)
+    num_section_times = mod_time_index.num_section_times
+
+    num_pairs = (mod_time_index.num_people + student_time_index.num_people) * num_section_times
+    preference_counts = {PREFERRED_TIME: 0, NOT_PREFERRED_TIME: 0}
+    for person_time_index in (mod_time_index, student_time_index):
+        for preference_state in person_time_index.preference_states:
+            if preference_state in preference_counts:
+                preference_counts[preference_state] += 1
+
+    num_students = sum(numPeopleInRow(time_variables_for_student)
+                       for time_variables_for_student in student_time_variables)
+    max_total_sections = min(assign_time_slots.getMaxTotalSections(mod_time_variables, max_sections_per_mod),
+                             sum(max_sections_per_time))
+    num_seats = max_total_sections * config.max_students_per_section
+
+    return {'person_time_variables': mod_time_index.numVariables() + student_time_index.numVariables(),
+            'students_per_section_time_variables': countStudentsPerSectionTimeVariables(
+                mod_time_index, student_time_index, max_sections_per_time),
+            'contiguous_variables': countContiguousVariables(mod_time_index),
+            'preferred_density': preference_counts[PREFERRED_TIME] / max(1, num_pairs),
+            'not_preferred_density': preference_counts[NOT_PREFERRED_TIME] / max(1, num_pairs),
+            'rooms_per_time': sum(max_sections_per_time) / max(1, num_section_times),
+            'supply_demand_slack': (num_seats - num_students) / max(1, num_students)}
+
+def countStudentsPerSectionTimeVariables(mod_time_index, student_time_index, max_sections_per_time):
+    """
+        Returns:
+            Integer for the number of decision variables addDecisionVariableStudentsPerSectionTimeConstraint creates,
+             one for each possible number of sections in a time and one for each possible number of students for
+             each of those
+    """
+    if config.use_compact_students_per_section_time_encoding:
+        return 0
+    num_decision_variables = 0
+    for time_index in range(mod_time_index.num_section_times):
+        if (len(mod_time_index.wrappersAtTime(time_index)) == 0) or \
+           (len(student_time_index.wrappersAtTime(time_index)) == 0):
+            continue
+        for num_sections in range(max_sections_per_time[time_index] + 1):
+            num_student_sums = (config.max_students_per_section - config.min_students_per_section) * num_sections + 1
+            num_decision_variables += 1 + num_student_sums
+    return num_decision_variables
+
+def countContiguousVariables(mod_time_index):
+    """
+        Returns:
+            Float for the expected number of variables create_contiguous_section_decision_variables creates, two for
+             each pair of contiguous sections it keeps out of the contiguous_sections_percentage it samples
+    """
+    if not (config.prefer_contiguous_sections_preferred_times_only or config.prefer_contiguous_sections_all_possible):
+        return 0
+    num_contiguous_pairs = 0
+    for mod_index in range(mod_time_index.num_people):
+        time_variables_for_mod = mod_time_index.wrappersForPerson(mod_index)
+        for (current_mod_time_var_wrapper, next_mod_time_var_wrapper) in zip(time_variables_for_mod,
+                                                                             time_variables_for_mod[1:]):
+            if isContiguousSectionPair(current_mod_time_var_wrapper, next_mod_time_var_wrapper) and \
+               current_mod_time_var_wrapper.allows_contiguous_sections:
+                num_contiguous_pairs += 1
+    return 2 * num_contiguous_pairs * min(1.0, config.contiguous_sections_percentage)
+
+def getFeatureVector(features):
+    """
+        Returns:
+            List of Float for the features in FEATURE_NAMES order, with the counts on a log scale
+    """
+    return [math.log1p(features[feature_name]) if feature_name in COUNT_FEATURE_NAMES else features[feature_name]
+            for feature_name in FEATURE_NAMES]
+
+def standardizeFeatureVector(feature_vector, feature_means, feature_scales):
+    return [(feature - mean) / scale for (feature, mean, scale) in zip(feature_vector, feature_means, feature_scales)]
+
+def getTrainingResults(history):
+    """
+        Args:
+            history: List of benchmark runs, see benchmark_suite.readHistory
+
+        Returns:
+            List of the benchmark results with model features. A solve stopped by the benchmark time limit is kept
+             with the time limit as its solve time, which is less than it would have taken but still shows it is slow
+    """
+    return [result for run in history for result in run['results'] if 'features' in result]
+
+def fitSolveTimeModel(training_results, ridge_penalty=RIDGE_PENALTY):
+    """
+        Fits the logarithm of the solve seconds of the benchmark results as a linear function of their standardized
+         features, with a ridge penalty since there are few results compared to the number of features
+
+        Args:
+            training_results: List of benchmark result dictionaries with 'features' and 'phase_seconds'
+            ridge_penalty: Float for how strongly the weights are pulled towards 0
+
+        Returns:
+            SolveTimeModel fitted on the results
+    """
+    feature_vectors = [getFeatureVector(result['features']) for result in training_results]
+    log_seconds = [math.log(max(result['phase_seconds']['solve'], MIN_SOLVE_SECONDS)) for result in training_results]
+    num_results = len(training_results)
+    num_features = len(FEATURE_NAMES)
+
+    feature_means = [sum(feature_vector[feature_index] for feature_vector in feature_vectors) / num_results
+                     for feature_index in range(num_features)]
+    feature_scales = []
+    for feature_index in range(num_features):
+        variance = sum((feature_vector[feature_index] - feature_means[feature_index]) ** 2
+                       for feature_vector in feature_vectors) / num_results
+        # A feature which is the same in every result carries no information, so it is left unscaled
+        feature_scales.append(math.sqrt(variance) if variance > 1e-12 else 1.0)
+    standardized_vectors = [standardizeFeatureVector(feature_vector, feature_means, feature_scales)
+                            for feature_vector in feature_vectors]
+    intercept = sum(log_seconds) / num_results
+
+    # Normal equations of ridge regression, (X^T X + penalty * I) weights = X^T (y - mean(y))
+    normal_matrix = [[sum(vector[row] * vector[column] for vector in standardized_vectors) +
+                      (ridge_penalty if row == column else 0.0)
+                      for column in range(num_features)] for row in range(num_features)]
+    normal_vector = [sum(vector[row] * (target - intercept) for (vector, target) in zip(standardized_vectors,
+                                                                                       log_seconds))
+                     for row in range(num_features)]
+    weights = solveLinearSystem(normal_matrix, normal_vector)
+    return SolveTimeModel(feature_means, feature_scales, weights, intercept, num_results)
+
+def solveLinearSystem(matrix, vector):
+    """
+        Solves matrix * x = vector with Gaussian elimination and partial pivoting
+
+        Args:
+            matrix: List of List of Float for a square, non-singular matrix
+            vector: List of Float
+
+        Returns:
+            List of Float for x
+    """
+    size = len(vector)
+    augmented_rows = [list(matrix_row) + [value] for (matrix_row, value) in zip(matrix, vector)]
+    for pivot_index in range(size):
+        best_row_index = max(range(pivot_index, size),
+                             key=lambda row_index: abs(augmented_rows[row_index][pivot_index]))
+        (augmented_rows[pivot_index], augmented_rows[best_row_index]) = \
+            (augmented_rows[best_row_index], augmented_rows[pivot_index])
+        pivot_row = augmented_rows[pivot_index]
+        assert abs(pivot_row[pivot_index]) > 1e-12, 'Singular matrix'
+        for row_index in range(pivot_index + 1, size):
+            factor = augmented_rows[row_index][pivot_index] / pivot_row[pivot_index]
+            for column_index in range(pivot_index, size + 1):
+                augmented_rows[row_index][column_index] -= factor * pivot_row[column_index]
+
+    solution = [0.0] * size
+    for row_index in reversed(range(size)):
+        row = augmented_rows[row_index]
+        solution[row_index] = (row[size] - sum(row[column_index] * solution[column_index]
+                                               for column_index in range(row_index + 1, size))) / row[row_index]
+    return solution
+
+def loadSolveTimeModel(history_path):
+    """
+        Returns:
+            SolveTimeModel fitted on every benchmark run in the history file, or None if it has too few results
+             with model features to fit on
+    """
+    if not os.path.exists(history_path):
+        return None
+    with open(history_path, 'r', encoding='utf-8') as history_file:
+        training_results = getTrainingResults(json.load(history_file))
+    if len(training_results) < MIN_TRAINING_RESULTS:
+        return None
+    return fitSolveTimeModel(training_results)
+
+def predictSolveSeconds(features):
+    """
+        Returns:
+            (Float for the predicted solve seconds or None if there is no benchmark history to predict from,
+             Integer for the number of benchmark results the prediction was fitted on)
+    """
+    solve_time_model = loadSolveTimeModel(config.benchmark_history_path)
+    if solve_time_model is None:
+        print(f'WARNING: Cannot predict the solve time, {config.benchmark_history_path} has fewer than '
+              f'{MIN_TRAINING_RESULTS} benchmark results with model features, run python3 benchmark_suite.py run')
+        return None, 0
+    return solve_time_model.predictSeconds(features), solve_time_model.num_training_results
+
+def checkPredictedSolveTime(mod_time_variables, student_time_variables, max_sections_per_mod, max_sections_per_time):
+    """
+        Predicts how long solving the model will take before the solver starts, warning when the prediction is over
+         config.predicted_solve_seconds_limit, or failing instead with config.refuse_slow_predicted_solves
+
+        Args:
+            See addAllConstraints in assign_time_slots.py
+
+        Returns:
+            Float for the predicted solve seconds, or None if there is no benchmark history to predict from
+    """
+    features = getModelFeatures(mod_time_variables, student_time_variables, max_sections_per_mod,
+                                max_sections_per_time)
+    (predicted_seconds, num_training_results) = predictSolveSeconds(features)
+    if predicted_seconds is None:
+        return None
+
+    instrumentation.setCounter('predicted solve seconds', round(predicted_seconds, 3))
+    print(f'Predicted solve time: {round(predicted_seconds, 1)} seconds, fitted on {num_training_results} '
+          f'benchmark results')
+    if predicted_seconds > config.predicted_solve_seconds_limit:
+        print(f'WARNING: The predicted solve time is over {config.predicted_solve_seconds_limit} seconds, see '
+              f'"How to deal with that?" in usage_instructions.txt or run python3 data_doctoring.py')
+        if config.refuse_slow_predicted_solves:
+            print('Run with config.refuse_slow_predicted_solves=False to solve anyway')
+            assert predicted_seconds <= config.predicted_solve_seconds_limit
+    return predicted_seconds
+
+def dryRun(mod_doodle_poll_csv_path, mod_max_section_csv_path, student_doodle_poll_csv_path,
+           section_times_csv_path=None):
+    """
+        Builds the model for the input files and prints its features and predicted solve time without solving it,
+         see assign_time_slots.assignModeratorsAndStudents for the arguments
+
+        Returns:
+            Float for the predicted solve seconds, or None if there is no benchmark history to predict from
+    """
+    (model, mod_time_variables, student_time_variables,
+     max_sections_per_mod, max_sections_per_time) = assign_time_slots.getModelFromInputFiles(
+        mod_doodle_poll_csv_path, mod_max_section_csv_path, student_doodle_poll_csv_path, section_times_csv_path)
+    features = getModelFeatures(mod_time_variables, student_time_variables, max_sections_per_mod,
+                                max_sections_per_time)
+    for feature_name in FEATURE_NAMES:
+        print(f'{feature_name}: {round(features[feature_name], 3)}')
+
+    (predicted_seconds, num_training_results) = predictSolveSeconds(features)
+    if predicted_seconds is not None:
+        print(f'Predicted solve time: {round(predicted_seconds, 1)} seconds, fitted on {num_training_results} '
+              f'benchmark results')
+        if predicted_seconds > config.predicted_solve_seconds_limit:
+            print(f'The predicted solve time is over {config.predicted_solve_seconds_limit} seconds')
+    print('Dry run, the model was not solved')
+    return predicted_seconds
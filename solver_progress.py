@@ -0,0 +1,177 @@
+import config
+import contextlib
+import csv
+import threading
+from ortools.sat.python import cp_model
+
+# Why a solve stopped, see getStopReason
+STOP_PROVEN_OPTIMAL = 'proven optimal'
+STOP_PROVEN_INFEASIBLE = 'proven infeasible'
+STOP_RELATIVE_GAP = 'relative gap limit'
+STOP_ABSOLUTE_GAP = 'absolute gap limit'
+STOP_TARGET_OBJECTIVE = 'target objective reached'
+STOP_NO_IMPROVEMENT = 'no improvement'
+STOP_TIME_LIMIT = 'time limit or interrupted'
+STOP_MODEL_INVALID = 'model invalid'
+
+# Stop reasons which come from a rule the user configured, so the solution is accepted even if it is not optimal
+EARLY_STOP_REASONS = (STOP_RELATIVE_GAP, STOP_ABSOLUTE_GAP, STOP_TARGET_OBJECTIVE, STOP_NO_IMPROVEMENT)
+
+TIMELINE_COLUMNS = ['Solve', 'Seconds', 'Objective', 'Best bound', 'Relative gap']
+
+# How often the no improvement rule is checked
+WATCHDOG_INTERVAL_SECONDS = 0.1
+
+class ProgressPoint:
+    """ The state of the search when a solution was found """
+    __slots__ = ('solve_name', 'seconds', 'objective', 'best_bound', 'relative_gap')
+
+    def __init__(self, solve_name, seconds, objective, best_bound):
+        """
+            Args:
+                solve_name: String naming the solve the solution was found in
+                seconds: Float for the wall time since that solve started
+                objective: Float for the objective value of the solution
+                best_bound: Float for the best possible objective value known when the solution was found
+        """
+        self.solve_name = solve_name
+        self.seconds = seconds
+        self.objective = objective
+        self.best_bound = best_bound
+        self.relative_gap = getRelativeGap(objective, best_bound)
+
+    def getRow(self):
+        return [self.solve_name, round(self.seconds, 4), self.objective, self.best_bound, round(self.relative_gap, 6)]
+
+def getRelativeGap(objective, best_bound):
+    """
+        Returns:
+            Float for the gap between the objective and the bound relative to the objective, as CP-SAT measures it
+    """
+    return abs(objective - best_bound) / max(1.0, abs(objective))
+
+def getEarlyStopReason(objective, best_bound, target_objective):
+    """
+        Checks the stopping rules which only depend on the newest solution. CP-SAT does apply
+         config.relative_gap_limit and config.absolute_gap_limit itself, but does not always stop as soon as a
+         solution within them is found: fa19 with config.maximize_number_of_sections keeps searching to its time
+         limit with a gap under 2% from the first second. They are checked here too so the search stops right away
+
+        Args:
+            objective: Float for the objective value of the newest solution
+            best_bound: Float for the best possible objective value known
+            target_objective: Number for a minimized objective value which is good enough, or None
+
+        Returns:
+            One of EARLY_STOP_REASONS if the search should stop, otherwise None
+    """
+    if (config.relative_gap_limit > 0) and (getRelativeGap(objective, best_bound) <= config.relative_gap_limit):
+        return STOP_RELATIVE_GAP
+    if (config.absolute_gap_limit > 0) and (abs(objective - best_bound) <= config.absolute_gap_limit):
+        return STOP_ABSOLUTE_GAP
+    if (target_objective is not None) and (objective <= target_objective):
+        return STOP_TARGET_OBJECTIVE
+    return None
+
+def getStopReason(status, solver, early_stop_reason=None):
+    """
+        Args:
+            status: The CP solver status of a finished solve
+            solver: The cp_model.CpSolver which ran the solve
+            early_stop_reason: One of EARLY_STOP_REASONS if a rule in the solution callback stopped the search
+
+        Returns:
+            String for why the solve stopped, one of the STOP_ values
+    """
+    if status == cp_model.INFEASIBLE:
+        return STOP_PROVEN_INFEASIBLE
+    if status == cp_model.MODEL_INVALID:
+        return STOP_MODEL_INVALID
+    if status != cp_model.OPTIMAL:
+        return early_stop_reason if early_stop_reason is not None else STOP_TIME_LIMIT
+
+    # CP-SAT also reports a solve stopped by a gap limit or by StopSearch after closing the gap as optimal
+    gap = abs(solver.ObjectiveValue() - solver.BestObjectiveBound())
+    if gap <= 1e-9:
+        return STOP_PROVEN_OPTIMAL
+    if early_stop_reason is not None:
+        return early_stop_reason
+    if solver.parameters.absolute_gap_limit > 0 and gap <= solver.parameters.absolute_gap_limit:
+        return STOP_ABSOLUTE_GAP
+    return STOP_RELATIVE_GAP
+
+class NoImprovementWatchdog(threading.Thread):
+    """ Stops a solve from another thread once no better solution has been found for a while """
+
+    def __init__(self, solver, solution_counter, no_improvement_seconds):
+        """
+            Args:
+                solver: The cp_model.CpSolver running the solve
+                solution_counter: SolutionCounter of the solve, which records when the last solution was found
+                no_improvement_seconds: Number of seconds without a better solution after the first solution before
+                                         the solve is stopped
+        """
+        threading.Thread.__init__(self, daemon=True)
+        self.solver = solver
+        self.solution_counter = solution_counter
+        self.no_improvement_seconds = no_improvement_seconds
+        self.finished = threading.Event()
+
+    def run(self):
+        while not self.finished.wait(WATCHDOG_INTERVAL_SECONDS):
+            # Every solution CP-SAT reports is better than the one before, so only the last one matters
+            seconds_since_improvement = self.solution_counter.secondsSinceLastSolution()
+            if (seconds_since_improvement is not None) and (seconds_since_improvement >= self.no_improvement_seconds):
+                self.solution_counter.early_stop_reason = STOP_NO_IMPROVEMENT
+                self.solver.StopSearch()
+                return
+
+@contextlib.contextmanager
+def watchForNoImprovement(solver, solution_counter, no_improvement_seconds=None):
+    """
+        Stops the solve run inside the with block after no_improvement_seconds without a better solution, which is
+         config.early_stop_no_improvement_seconds when not given, does nothing if that is None
+    """
+    if no_improvement_seconds is None:
+        no_improvement_seconds = config.early_stop_no_improvement_seconds
+    if no_improvement_seconds is None:
+        yield
+        return
+    watchdog = NoImprovementWatchdog(solver, solution_counter, no_improvement_seconds)
+    watchdog.start()
+    try:
+        yield
+    finally:
+        watchdog.finished.set()
+        watchdog.join()
+
+def writeTimelineCsv(timeline, timeline_csv_path):
+    """
+        Writes every point of a timeline to a CSV, replacing the file
+
+        Args:
+            timeline: List of ProgressPoint
+            timeline_csv_path: Path to the CSV
+    """
+    with open(timeline_csv_path, 'w', newline='', encoding='utf-8') as timeline_file:
+        timeline_writer = csv.writer(timeline_file)
+        timeline_writer.writerow(TIMELINE_COLUMNS)
+        for progress_point in timeline:
+            timeline_writer.writerow(progress_point.getRow())
+
+def printProgressSummary(solution_counter, solver):
+    """
+        Prints why the last solve stopped, when it last improved and the gap left, to judge whether waiting longer
+         is worth it
+
+        Args:
+            solution_counter: SolutionCounter of the solve
+            solver: The cp_model.CpSolver which ran the solve
+    """
+    message = f'Solver stopped: {solution_counter.stop_reason}'
+    solve_timeline = [progress_point for progress_point in solution_counter.timeline
+                      if progress_point.solve_name == solution_counter.solve_name]
+    if len(solve_timeline) > 0:
+        message += (f', last improvement after {round(solve_timeline[-1].seconds, 3)} seconds, relative gap '
+                    f'{round(100 * getRelativeGap(solver.ObjectiveValue(), solver.BestObjectiveBound()), 2)}%')
+    print(message)
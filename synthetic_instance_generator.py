@@ -0,0 +1,445 @@
+import argparse
+import collections
+import config
+import csv
+import math
+import os
+import random
+
+DOODLE_WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+PREFERRED_TIME = 'OK'
+NOT_PREFERRED_TIME = '(OK)'
+IMPOSSIBLE_TIME = ''
+FIRST_SECTION_HOUR = 10
+SECTION_HOURS = 2
+
+# Names of the files written by generateSyntheticInstance
+MOD_PREFERENCES_CSV_NAME = 'mod_preferences.csv'
+MOD_MAX_SECTIONS_CSV_NAME = 'mod_max_sections.csv'
+STUDENT_PREFERENCES_CSV_NAME = 'student_preferences.csv'
+SECTION_TIMES_CSV_NAME = 'section_times.csv'
+MOD_NET_ID_TO_NAME_CSV_NAME = 'mod_net_ids_to_names.csv'
+MOD_DOODLE_EXPORT_CSV_NAME = 'mod_preferences_doodle_export.csv'
+STUDENT_DOODLE_EXPORT_CSV_NAME = 'student_preferences_doodle_export.csv'
+
+class SyntheticInstanceParameters:
+    """ Everything which decides the shape of a generated instance, the same parameters always give the same files """
+
+    def __init__(self, num_students=330, num_mods=None, weekdays=('Wednesday', 'Thursday', 'Friday'),
+                 slots_per_weekday=6, preferred_fraction=0.2, not_preferred_fraction=0.15, popularity_skew=1.0,
+                 duplicate_row_rate=0.05, rooms_per_time=None, sections_per_room=2, max_sections_weights=None,
+                 min_students_per_section=None, max_students_per_section=None, plant_solution=True, seed=1):
+        """
+            Args:
+                num_students: Integer for the number of students in the student poll
+                num_mods: Integer for the number of mods in the mod poll, or None for about 10% more mod sections
+                           than the sections needed for every student. When planting a solution every mod gets a
+                           section, so there must be enough students to fill a section for each mod
+                weekdays: Sequence of weekday names that have section times
+                slots_per_weekday: Integer for the number of 2 hour section times each weekday, starting at 10 AM
+                preferred_fraction: Float for the average fraction of the times a person marks as preferred (green)
+                not_preferred_fraction: Float for the average fraction of the times a person marks as not preferred
+                                         (yellow), every other time is impossible (red)
+                popularity_skew: Float for how much more some times are picked than others. The time with popularity
+                                  rank r is picked in proportion to 1 / (r + 1)^popularity_skew, so 0 is no skew
+                duplicate_row_rate: Float for the fraction of people who also have an earlier, outdated entry in the
+                                     raw Doodle export, as when someone fills out the poll twice
+                rooms_per_time: Integer for the number of rooms at each time, or None for about 50% more room than
+                                 the sections needed for every student
+                sections_per_room: Integer for the max sections each room can hold at once
+                max_sections_weights: Dictionary of max sections a mod will take to how often mods pick that
+                                       number, or None for the mix of the past semesters
+                min_students_per_section: Integer used to plant a solution, or None for config.min_students_per_section
+                max_students_per_section: Integer used to plant a solution, or None for config.max_students_per_section
+                plant_solution: When True, a section assignment is chosen first and every person can make the time
+                                 they are assigned to in it, so the instance is always feasible
+                seed: Integer seed for every random choice
+        """
+        self.num_students = num_students
+        self.num_mods = num_mods
+        self.weekdays = tuple(weekdays)
+        self.slots_per_weekday = slots_per_weekday
+        self.preferred_fraction = preferred_fraction
+        self.not_preferred_fraction = not_preferred_fraction
+        self.popularity_skew = popularity_skew
+        self.duplicate_row_rate = duplicate_row_rate
+        self.rooms_per_time = rooms_per_time
+        self.sections_per_room = sections_per_room
+        self.max_sections_weights = max_sections_weights if max_sections_weights is not None else {1: 0.85, 2: 0.15}
+        self.min_students_per_section = min_students_per_section if min_students_per_section is not None \
+                                         else config.min_students_per_section
+        self.max_students_per_section = max_students_per_section if max_students_per_section is not None \
+                                         else config.max_students_per_section
+        self.plant_solution = plant_solution
+        self.seed = seed
+
+        assert all(weekday in DOODLE_WEEKDAYS for weekday in self.weekdays)
+        assert FIRST_SECTION_HOUR + SECTION_HOURS * slots_per_weekday <= 24, 'section times must end by midnight'
+        assert 0 <= preferred_fraction and 0 <= not_preferred_fraction and \
+               preferred_fraction + not_preferred_fraction <= 1
+        assert 0 <= duplicate_row_rate <= 1
+        assert 1 <= self.min_students_per_section <= self.max_students_per_section
+
+    def getNumSectionsNeeded(self):
+        """
+            Returns:
+                Integer for the fewest sections that can hold every student
+        """
+        return math.ceil(self.num_students / self.max_students_per_section)
+
+class SyntheticInstance:
+    """ The people, preferences and rooms of a generated instance before they are written to CSV files """
+
+    def __init__(self, section_times, rooms_per_time, mod_net_ids, mod_time_preferences, max_sections_per_mod,
+                 student_net_ids, student_time_preferences, mod_submissions, student_submissions,
+                 planted_mods_assigned_to_times=None, planted_students_assigned_to_times=None):
+        """
+            Args:
+                section_times: List of String describing each section time like "Wednesday 10 AM - 12 PM"
+                rooms_per_time: List of List of (room name, max sections) at each time index
+                mod_net_ids: List of String for each mod, in the order of their first Doodle poll entry
+                mod_time_preferences: List of the latest time preferences of each mod, see readDoodlePreferences
+                max_sections_per_mod: List of Integer for the max sections of each mod
+                student_net_ids: List of String for each student, in the order of their first Doodle poll entry
+                student_time_preferences: List of the latest time preferences of each student
+                mod_submissions: List of (net ID, time preferences) for every mod Doodle poll entry, including
+                                  outdated entries, in the order they were submitted
+                student_submissions: The same as mod_submissions for students
+                planted_mods_assigned_to_times: List of List of mod net IDs planted at each time index, or None
+                planted_students_assigned_to_times: List of List of student net IDs planted at each time index,
+                                                     or None
+        """
+        self.section_times = section_times
+        self.rooms_per_time = rooms_per_time
+        self.mod_net_ids = mod_net_ids
+        self.mod_time_preferences = mod_time_preferences
+        self.max_sections_per_mod = max_sections_per_mod
+        self.student_net_ids = student_net_ids
+        self.student_time_preferences = student_time_preferences
+        self.mod_submissions = mod_submissions
+        self.student_submissions = student_submissions
+        self.planted_mods_assigned_to_times = planted_mods_assigned_to_times
+        self.planted_students_assigned_to_times = planted_students_assigned_to_times
+
+def getSectionTimes(parameters):
+    """
+        Returns:
+            List of String like "Wednesday 10 AM - 12 PM" for each section time, in the format of section_times.csv
+    """
+    section_times = []
+    for weekday in parameters.weekdays:
+        for slot_index in range(parameters.slots_per_weekday):
+            start_hour = FIRST_SECTION_HOUR + SECTION_HOURS * slot_index
+            section_times.append(f'{weekday} {formatHour(start_hour)} - {formatHour(start_hour + SECTION_HOURS)}')
+    return section_times
+
+def formatHour(hour):
+    """
+        Returns:
+            String like "10 AM" or "2 PM" for an hour of the day from 0 to 24
+    """
+    hour_on_clock = hour % 12 if hour % 12 != 0 else 12
+    return f'{hour_on_clock} {"AM" if hour % 24 < 12 else "PM"}'
+
+def getTimePopularities(num_times, popularity_skew, random_generator):
+    """
+        Returns:
+            List of Float for how popular each time is, with a mean of 1 so the preference fractions are kept
+    """
+    popularity_ranks = list(range(num_times))
+    random_generator.shuffle(popularity_ranks)
+    popularities = [1 / ((rank + 1) ** popularity_skew) for rank in popularity_ranks]
+    mean_popularity = sum(popularities) / num_times
+    return [popularity / mean_popularity for popularity in popularities]
+
+def getRandomPreferences(parameters, time_popularities, random_generator):
+    """
+        Returns:
+            List of String with the Doodle poll preference of one person at each time
+    """
+    possible_fraction = parameters.preferred_fraction + parameters.not_preferred_fraction
+    preferred_share = parameters.preferred_fraction / possible_fraction if possible_fraction > 0 else 0
+    time_preferences = []
+    for popularity in time_popularities:
+        if random_generator.random() < min(1.0, possible_fraction * popularity):
+            time_preferences.append(PREFERRED_TIME if random_generator.random() < preferred_share
+                                    else NOT_PREFERRED_TIME)
+        else:
+            time_preferences.append(IMPOSSIBLE_TIME)
+    return time_preferences
+
+def makeTimePossible(time_preferences, time_index, parameters, random_generator):
+    """ Changes an impossible time to preferred or not preferred in the same ratio as the other times """
+    if time_preferences[time_index] == IMPOSSIBLE_TIME:
+        possible_fraction = parameters.preferred_fraction + parameters.not_preferred_fraction
+        preferred_share = parameters.preferred_fraction / possible_fraction if possible_fraction > 0 else 1
+        time_preferences[time_index] = PREFERRED_TIME if random_generator.random() < preferred_share \
+                                       else NOT_PREFERRED_TIME
+
+def plantSolution(parameters, max_sections_per_mod, max_sections_per_time, time_popularities, random_generator):
+    """
+        Chooses a section assignment which only has to respect the capacities, the preferences are made to fit it.
+         Every mod is planted at least once, since a mod whose preferences are all random may not be able to make
+         any time, which makes the instance infeasible
+
+        Returns:
+            planted_mods_at_times: List of List of mod index assigned to each time index
+            planted_students_at_times: List of List of student index assigned to each time index
+
+        Raises:
+            AssertionError: if there are not enough mod sections or room for a section for every student, or not
+                             enough students to fill a section for every mod
+    """
+    num_sections = max(parameters.getNumSectionsNeeded(), len(max_sections_per_mod))
+    assert parameters.num_students >= num_sections * parameters.min_students_per_section, \
+        'too few students to fill the sections needed for them and a section for every mod'
+    assert sum(max_sections_per_mod) >= num_sections, 'not enough mod sections for every student'
+    assert sum(max_sections_per_time) >= num_sections, 'not enough room for a section for every student'
+
+    # Popular times get planted sections more often, like the assignments made from real polls
+    sections_left_per_time = list(max_sections_per_time)
+    sections_left_per_mod = list(max_sections_per_mod)
+    planted_mods_at_times = [[] for _ in max_sections_per_time]
+    for _ in range(num_sections):
+        open_times = [time_index for (time_index, sections_left) in enumerate(sections_left_per_time)
+                      if sections_left > 0 and len(planted_mods_at_times[time_index]) < len(max_sections_per_mod)]
+        time_index = random_generator.choices(open_times, [time_popularities[time_index] for time_index in open_times])[0]
+
+        # A mod cannot have two sections at the same time, so take a mod who has no section yet, otherwise whoever
+        #  has the most sections left
+        available_mods = [mod_index for (mod_index, sections_left) in enumerate(sections_left_per_mod)
+                          if sections_left > 0 and mod_index not in planted_mods_at_times[time_index]]
+        assert len(available_mods) > 0, 'mod sections could not be spread over the section times'
+        plant_priorities = {mod_index : (sections_left_per_mod[mod_index] == max_sections_per_mod[mod_index],
+                                         sections_left_per_mod[mod_index]) for mod_index in available_mods}
+        highest_priority = max(plant_priorities.values())
+        mod_index = random_generator.choice([mod_index for mod_index in available_mods
+                                             if plant_priorities[mod_index] == highest_priority])
+
+        planted_mods_at_times[time_index].append(mod_index)
+        sections_left_per_time[time_index] -= 1
+        sections_left_per_mod[mod_index] -= 1
+
+    # Spread the students as evenly as possible over the planted sections
+    section_times = [time_index for (time_index, mod_indices) in enumerate(planted_mods_at_times)
+                     for _ in mod_indices]
+    student_indices = list(range(parameters.num_students))
+    random_generator.shuffle(student_indices)
+    planted_students_at_times = [[] for _ in max_sections_per_time]
+    for (section_index, time_index) in enumerate(section_times):
+        num_section_students = parameters.num_students // num_sections + \
+                               (1 if section_index < parameters.num_students % num_sections else 0)
+        planted_students_at_times[time_index] += student_indices[:num_section_students]
+        student_indices = student_indices[num_section_students:]
+    return (planted_mods_at_times, planted_students_at_times)
+
+def getSubmissions(net_ids, time_preferences, parameters, time_popularities, random_generator):
+    """
+        Adds an earlier, outdated Doodle poll entry for duplicate_row_rate of the people
+
+        Returns:
+            List of (net ID, time preferences) for every Doodle poll entry in the order they were submitted
+    """
+    submissions = []
+    for (person_index, (net_id, person_time_preferences)) in enumerate(zip(net_ids, time_preferences)):
+        submissions.append((person_index, net_id, person_time_preferences))
+        if random_generator.random() < parameters.duplicate_row_rate:
+            outdated_time_preferences = getRandomPreferences(parameters, time_popularities, random_generator)
+            submissions.append((person_index - 1 - random_generator.random() * person_index, net_id,
+                                outdated_time_preferences))
+    submissions.sort(key=lambda submission: submission[0])
+    return [(net_id, person_time_preferences) for (_, net_id, person_time_preferences) in submissions]
+
+def getLatestSubmissions(submissions):
+    """
+        Removes outdated entries the same way scripts/preprocess_doodle_poll.py does, a person keeps the position of
+         their first entry but the preferences of their latest entry
+
+        Returns:
+            net_ids: List of String for each person
+            time_preferences: List of the latest time preferences of each person
+    """
+    latest_submissions = collections.OrderedDict()
+    for (net_id, time_preferences) in submissions:
+        latest_submissions[net_id] = time_preferences
+    return (list(latest_submissions), list(latest_submissions.values()))
+
+def generateSyntheticInstance(parameters):
+    """
+        Args:
+            parameters: SyntheticInstanceParameters
+
+        Returns:
+            SyntheticInstance, which is always the same for the same parameters
+    """
+    random_generator = random.Random(parameters.seed)
+    section_times = getSectionTimes(parameters)
+    num_times = len(section_times)
+    num_sections_needed = parameters.getNumSectionsNeeded()
+
+    # Room for about 50% more sections than needed, the slack real semesters have
+    rooms_per_time = parameters.rooms_per_time
+    if rooms_per_time is None:
+        rooms_per_time = max(1, math.ceil(1.5 * num_sections_needed / (num_times * parameters.sections_per_room)))
+    room_layout = [(f'Room {1000 + room_number}', parameters.sections_per_room) for room_number in range(rooms_per_time)]
+    max_sections_per_time = [rooms_per_time * parameters.sections_per_room] * num_times
+
+    max_sections_choices = sorted(parameters.max_sections_weights)
+    max_sections_weights = [parameters.max_sections_weights[max_sections] for max_sections in max_sections_choices]
+    num_mods = parameters.num_mods
+    if num_mods is None:
+        mean_max_sections = sum(max_sections * weight for (max_sections, weight)
+                                in zip(max_sections_choices, max_sections_weights)) / sum(max_sections_weights)
+        num_mods = math.ceil(1.1 * num_sections_needed / mean_max_sections)
+    max_sections_per_mod = random_generator.choices(max_sections_choices, max_sections_weights, k=num_mods)
+
+    time_popularities = getTimePopularities(num_times, parameters.popularity_skew, random_generator)
+    mod_net_ids = [f'md{mod_index + 1}' for mod_index in range(num_mods)]
+    student_net_ids = [f'st{student_index + 1}' for student_index in range(parameters.num_students)]
+    mod_time_preferences = [getRandomPreferences(parameters, time_popularities, random_generator)
+                            for _ in mod_net_ids]
+    student_time_preferences = [getRandomPreferences(parameters, time_popularities, random_generator)
+                                for _ in student_net_ids]
+
+    planted_mods_assigned_to_times = None
+    planted_students_assigned_to_times = None
+    if parameters.plant_solution:
+        (planted_mods_at_times, planted_students_at_times) = plantSolution(
+            parameters, max_sections_per_mod, max_sections_per_time, time_popularities, random_generator)
+        for time_index in range(num_times):
+            for mod_index in planted_mods_at_times[time_index]:
+                makeTimePossible(mod_time_preferences[mod_index], time_index, parameters, random_generator)
+            for student_index in planted_students_at_times[time_index]:
+                makeTimePossible(student_time_preferences[student_index], time_index, parameters, random_generator)
+        planted_mods_assigned_to_times = [[mod_net_ids[mod_index] for mod_index in mod_indices]
+                                          for mod_indices in planted_mods_at_times]
+        planted_students_assigned_to_times = [[student_net_ids[student_index] for student_index in student_indices]
+                                              for student_indices in planted_students_at_times]
+
+    mod_submissions = getSubmissions(mod_net_ids, mod_time_preferences, parameters, time_popularities,
+                                     random_generator)
+    student_submissions = getSubmissions(student_net_ids, student_time_preferences, parameters, time_popularities,
+                                         random_generator)
+
+    # The people are read in the order of their first entry, which is the order first come first serve uses
+    max_sections_per_net_id = dict(zip(mod_net_ids, max_sections_per_mod))
+    (mod_net_ids, mod_time_preferences) = getLatestSubmissions(mod_submissions)
+    max_sections_per_mod = [max_sections_per_net_id[mod_net_id] for mod_net_id in mod_net_ids]
+    (student_net_ids, student_time_preferences) = getLatestSubmissions(student_submissions)
+
+    return SyntheticInstance(section_times, [room_layout] * num_times, mod_net_ids, mod_time_preferences,
+                             max_sections_per_mod, student_net_ids, student_time_preferences, mod_submissions,
+                             student_submissions, planted_mods_assigned_to_times, planted_students_assigned_to_times)
+
+def writeDoodleExport(submissions, section_times, doodle_export_csv_path, poll_name):
+    """
+        Writes Doodle poll entries in the format of a raw Doodle export, which scripts/preprocess_doodle_poll.py
+         turns into the format readDoodlePreferences reads
+    """
+    num_times = len(section_times)
+    day_row = ['']
+    time_row = ['']
+    previous_weekday = None
+    for section_time in section_times:
+        # Only the first time of each day names the day, like Doodle does
+        (weekday, hours) = section_time.split(' ', 1)
+        day_row.append(weekday[:3] if weekday != previous_weekday else '')
+        time_row.append(hours)
+        previous_weekday = weekday
+
+    counts = [':'.join(str(sum(1 for (_, time_preferences) in submissions if time_preferences[time_index] == answer))
+                       for answer in (PREFERRED_TIME, NOT_PREFERRED_TIME, IMPOSSIBLE_TIME))
+              for time_index in range(num_times)]
+    with open(doodle_export_csv_path, 'w', newline='', encoding='utf-8-sig') as export_file:
+        export_writer = csv.writer(export_file)
+        export_writer.writerow([f'Poll "{poll_name}"'] + [''] * num_times)
+        export_writer.writerow(['https://doodle.com/poll/synthetic'] + [''] * num_times)
+        export_writer.writerow([''] * (num_times + 1))
+        export_writer.writerow(['', 'Synthetic'] + [''] * (num_times - 1))
+        export_writer.writerow(day_row)
+        export_writer.writerow(time_row)
+        for (net_id, time_preferences) in submissions:
+            export_writer.writerow([net_id] + time_preferences)
+        export_writer.writerow(['Count'] + counts)
+
+def writePreferences(net_ids, time_preferences, preferences_csv_path):
+    with open(preferences_csv_path, 'w', newline='', encoding='utf-8-sig') as preferences_file:
+        preferences_writer = csv.writer(preferences_file, quoting=csv.QUOTE_NONE, escapechar='\\')
+        for (net_id, person_time_preferences) in zip(net_ids, time_preferences):
+            preferences_writer.writerow([net_id] + person_time_preferences)
+
+def writeSyntheticInstance(instance, output_directory):
+    """
+        Writes every input file of the instance to output_directory, the preference CSVs already have the outdated
+         entries removed and the raw Doodle exports are written next to them
+
+        Args:
+            instance: SyntheticInstance
+            output_directory: Directory to write into, created if it does not exist
+
+        Returns:
+            Tuple of the input CSV paths in getModelFromInputFiles order
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    csv_files = tuple(os.path.join(output_directory, file_name) for file_name in
+                      (MOD_PREFERENCES_CSV_NAME, MOD_MAX_SECTIONS_CSV_NAME, STUDENT_PREFERENCES_CSV_NAME,
+                       SECTION_TIMES_CSV_NAME))
+    (mod_preferences_csv_path, mod_max_sections_csv_path, student_preferences_csv_path,
+     section_times_csv_path) = csv_files
+
+    writePreferences(instance.mod_net_ids, instance.mod_time_preferences, mod_preferences_csv_path)
+    writePreferences(instance.student_net_ids, instance.student_time_preferences, student_preferences_csv_path)
+    writeDoodleExport(instance.mod_submissions, instance.section_times,
+                      os.path.join(output_directory, MOD_DOODLE_EXPORT_CSV_NAME), 'Synthetic Moderator Poll')
+    writeDoodleExport(instance.student_submissions, instance.section_times,
+                      os.path.join(output_directory, STUDENT_DOODLE_EXPORT_CSV_NAME), 'Synthetic Student Poll')
+
+    with open(mod_max_sections_csv_path, 'w', newline='', encoding='utf-8-sig') as max_sections_file:
+        csv.writer(max_sections_file).writerows(zip(instance.mod_net_ids, instance.max_sections_per_mod))
+    with open(os.path.join(output_directory, MOD_NET_ID_TO_NAME_CSV_NAME), 'w', newline='',
+              encoding='utf-8-sig') as mapping_file:
+        csv.writer(mapping_file).writerows((mod_net_id, f'Moderator {mod_net_id[2:]}')
+                                           for mod_net_id in instance.mod_net_ids)
+    with open(section_times_csv_path, 'w', newline='', encoding='utf-8') as section_times_file:
+        # Room entries contain no commas or quotes, so they are written as is like the hand made files
+        for (section_time, rooms) in zip(instance.section_times, instance.rooms_per_time):
+            section_times_file.write(','.join([section_time] + [f'({room_name}:{max_sections})'
+                                                                for (room_name, max_sections) in rooms]) + '\n')
+    return csv_files
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write a synthetic set of Doodle poll, max sections and section '
+                                                 'time CSVs, for testing how solving scales with the problem size')
+    parser.add_argument('output_directory', help='Directory to write the CSVs into')
+    parser.add_argument('--num-students', type=int, default=330)
+    parser.add_argument('--num-mods', type=int, help='About 10%% more mod sections than needed if not given')
+    parser.add_argument('--weekdays', nargs='+', default=['Wednesday', 'Thursday', 'Friday'])
+    parser.add_argument('--slots-per-weekday', type=int, default=6)
+    parser.add_argument('--preferred-fraction', type=float, default=0.2, help='Average fraction of green times')
+    parser.add_argument('--not-preferred-fraction', type=float, default=0.15, help='Average fraction of yellow times')
+    parser.add_argument('--popularity-skew', type=float, default=1.0,
+                        help='0 for every time being equally popular, higher for a few very popular times')
+    parser.add_argument('--duplicate-row-rate', type=float, default=0.05,
+                        help='Fraction of people with an outdated earlier entry in the raw Doodle export')
+    parser.add_argument('--rooms-per-time', type=int, help='About 50%% more room than needed if not given')
+    parser.add_argument('--sections-per-room', type=int, default=2)
+    parser.add_argument('--no-planted-solution', action='store_false', dest='plant_solution',
+                        help='Do not guarantee the instance is feasible')
+    parser.add_argument('--seed', type=int, default=1)
+    arguments = parser.parse_args(argv)
+
+    parameters = SyntheticInstanceParameters(
+        num_students=arguments.num_students, num_mods=arguments.num_mods, weekdays=arguments.weekdays,
+        slots_per_weekday=arguments.slots_per_weekday, preferred_fraction=arguments.preferred_fraction,
+        not_preferred_fraction=arguments.not_preferred_fraction, popularity_skew=arguments.popularity_skew,
+        duplicate_row_rate=arguments.duplicate_row_rate, rooms_per_time=arguments.rooms_per_time,
+        sections_per_room=arguments.sections_per_room, plant_solution=arguments.plant_solution, seed=arguments.seed)
+    instance = generateSyntheticInstance(parameters)
+    csv_files = writeSyntheticInstance(instance, arguments.output_directory)
+    print(f'{len(instance.student_net_ids)} students, {len(instance.mod_net_ids)} mods and '
+          f'{len(instance.section_times)} section times written to:')
+    for csv_path in csv_files:
+        print('   ', csv_path)
+
+if __name__ == '__main__':
+    main()
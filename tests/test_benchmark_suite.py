@@ -0,0 +1,58 @@
+import unittest
+import config
+import copy
+import os
+import shutil
+import tempfile
+from benchmark_suite import BENCHMARK_INSTANCES, PHASES, appendToHistory, findRegressions, main, readHistory,\
+                            runBenchmark
+from solve_time_predictor import FEATURE_NAMES
+
+class TestBenchmarkSuite(unittest.TestCase):
+    """ Tests timing the pipeline phases and flagging regressions between runs """
+
+    def setUp(self):
+        self.history_directory = tempfile.mkdtemp()
+        self.history_path = os.path.join(self.history_directory, 'history.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.history_directory)
+
+    def test_run(self):
+        """ Tests that every phase is timed and the config of this process is unchanged """
+        instances = [instance for instance in BENCHMARK_INSTANCES if instance.name == 'fa19']
+        run = runBenchmark(instances, ['default'], time_limit_seconds=20)
+
+        self.assertEqual(len(run['results']), 1)
+        result = run['results'][0]
+        self.assertEqual((result['instance'], result['profile'], result['status']), ('fa19', 'default', 'OPTIMAL'))
+        self.assertEqual(result['objective'], 20)
+        self.assertEqual(result['num_precheck_problems'], 0)
+        self.assertEqual(set(result['phase_seconds']), set(PHASES))
+        self.assertEqual(set(result['features']), set(FEATURE_NAMES))
+        self.assertAlmostEqual(result['total_seconds'], sum(result['phase_seconds'].values()))
+        self.assertIsNone(config.max_time_in_seconds)
+
+        appendToHistory(self.history_path, run)
+        appendToHistory(self.history_path, run)
+        self.assertEqual(len(readHistory(self.history_path)), 2)
+        self.assertEqual(main(['--history-path', self.history_path, 'compare']), 0)
+
+    def test_find_regressions(self):
+        """ Tests that slower phases and worse solutions are flagged, but not small absolute slowdowns """
+        baseline_run = {'results': [{'instance': 'fa19', 'profile': 'default', 'status': 'OPTIMAL', 'objective': 20,
+                                     'phase_seconds': {'parse': 0.001, 'solve': 1.0}, 'total_seconds': 1.001}]}
+        self.assertEqual(findRegressions(baseline_run, baseline_run, 0.2, 0.05), [])
+
+        new_run = copy.deepcopy(baseline_run)
+        new_run['results'][0]['phase_seconds'] = {'parse': 0.01, 'solve': 2.0}
+        new_run['results'][0]['total_seconds'] = 2.01
+        self.assertEqual(findRegressions(baseline_run, new_run, 0.2, 0.05),
+                         ['fa19/default: solve 1.0s -> 2.0s', 'fa19/default: total 1.001s -> 2.01s'])
+
+        new_run['results'][0].update({'status': 'FEASIBLE', 'objective': 30})
+        regressions = findRegressions(baseline_run, new_run, 1.5, 0.05)
+        self.assertEqual(regressions, ['fa19/default: status OPTIMAL -> FEASIBLE', 'fa19/default: objective 20 -> 30'])
+
+if __name__ == '__main__':
+    unittest.main()
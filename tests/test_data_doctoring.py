@@ -0,0 +1,90 @@
+import unittest
+import config
+import contextlib
+import io
+from assign_time_slots import DOODLE_NOT_PREFERRED_TIME, readInputFiles
+from data_doctoring import DataDoctoringSearch, Trial
+from scenario_sweep import ScenarioResult
+from test_encodings import getTestDataCsvFiles
+TEST_DATA_DIR = 'test_data/real_data/fa19_data/'
+
+class FakeSolveSearch(DataDoctoringSearch):
+    """ DataDoctoringSearch where each trial is decided by a function of its settings instead of solving """
+
+    def __init__(self, getStatusName):
+        DataDoctoringSearch.__init__(self, budget_seconds=60, trial_seconds=10)
+        self.getStatusName = getStatusName
+
+    def runTrial(self, config_overrides):
+        trial = Trial(len(self.trials) + 1, dict(config_overrides), self.trial_seconds,
+                      ScenarioResult('', self.getStatusName(config_overrides), seconds=0))
+        self.trials.append(trial)
+        return trial
+
+class TestDataDoctoring(unittest.TestCase):
+    """ Tests searching for the least degraded settings which solve within a time budget """
+
+    def setUp(self):
+        (config.mod_doodle_poll_csv_path, config.mod_max_sections_csv_path,
+         config.student_doodle_poll_csv_path, config.section_times_csv_path) = getTestDataCsvFiles(TEST_DATA_DIR)
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+        config.num_sections_to_greedy_preselect = 0
+
+    def tearDown(self):
+        config.num_students_without_not_preferred_times = 0
+
+    def test_remove_not_preferred_times(self):
+        """ Tests that only the first students of the Doodle poll lose their not preferred times """
+        (_, _, _, student_net_ids, student_time_preferences, _, _) = \
+            readInputFiles(*getTestDataCsvFiles(TEST_DATA_DIR))
+        config.num_students_without_not_preferred_times = 10
+        (_, _, _, doctored_net_ids, doctored_time_preferences, _, _) = \
+            readInputFiles(*getTestDataCsvFiles(TEST_DATA_DIR))
+
+        self.assertEqual(doctored_net_ids, student_net_ids)
+        for time_preferences in doctored_time_preferences[:10]:
+            self.assertNotIn(DOODLE_NOT_PREFERRED_TIME, time_preferences)
+        self.assertEqual(doctored_time_preferences[10:], student_time_preferences[10:])
+        self.assertTrue(any(DOODLE_NOT_PREFERRED_TIME in time_preferences
+                            for time_preferences in student_time_preferences[:10]))
+
+    def test_no_doctoring_needed(self):
+        """ Tests that an input solving within the trial time limit is left as it is and config is unchanged """
+        data_doctoring_search = DataDoctoringSearch(budget_seconds=60, trial_seconds=30)
+        with contextlib.redirect_stdout(io.StringIO()):
+            settings = data_doctoring_search.search()
+        self.assertEqual(settings, {})
+        self.assertEqual(len(data_doctoring_search.trials), 1)
+        self.assertEqual(data_doctoring_search.trials[0].objective, 20)
+        self.assertIsNone(config.max_time_in_seconds)
+
+    def test_bisect_num_students(self):
+        """ Tests that escalating and then bisecting finds the fewest students to doctor within the resolution """
+        data_doctoring_search = FakeSolveSearch(
+            lambda settings: 'OPTIMAL' if settings.get('num_students_without_not_preferred_times', 0) >= 63
+            else 'FEASIBLE')
+        settings = data_doctoring_search.search()
+        self.assertEqual(settings, {'num_students_without_not_preferred_times': 65})
+        self.assertEqual([trial.config_overrides.get('num_students_without_not_preferred_times')
+                          for trial in data_doctoring_search.trials], [None, 25, 50, 100, 75, 62, 68, 65])
+
+    def test_infeasible_stops_escalation(self):
+        """ Tests that the most degraded option value which is not infeasible is kept for the next option """
+        def getStatusName(settings):
+            if settings.get('num_students_without_not_preferred_times', 0) >= 50:
+                return 'INFEASIBLE'
+            return 'OPTIMAL' if settings.get('num_sections_to_greedy_preselect', 0) >= 10 else 'UNKNOWN'
+
+        data_doctoring_search = FakeSolveSearch(getStatusName)
+        settings = data_doctoring_search.search()
+        self.assertEqual(settings, {'num_students_without_not_preferred_times': 25,
+                                    'num_sections_to_greedy_preselect': 10})
+        self.assertEqual(len(data_doctoring_search.trials), 5)
+
+        data_doctoring_search = FakeSolveSearch(lambda settings: 'PRECHECK_INFEASIBLE')
+        self.assertIsNone(data_doctoring_search.search())
+        self.assertEqual(len(data_doctoring_search.trials), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import config
+import test_assignments
+import test_impossible
+from assign_time_slots import getModelFromInputFiles
+from component_decomposition import findConnectedComponents, mergeComponentResults, solveComponents
+from test_encodings import getAllTestDataDirectories, getTestDataCsvFiles, solveTestDataDirectory
+from ortools.sat.python import cp_model
+TEST_DATA_PREFIX = 'test_data/assignment_test_data/'
+
+class TestDecomposition(unittest.TestCase):
+    """ Tests that groups of people sharing no section times are found and solved separately """
+
+    def setUp(self):
+        config.assign_exact_max_sections = False
+        config.maximize_number_of_sections = False
+        config.prefer_contiguous_sections_preferred_times_only = False
+        config.prefer_contiguous_sections_all_possible = False
+        config.num_sections_to_greedy_preselect = 0
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+        config.min_students_per_section = 5
+        config.max_students_per_section = 6
+        self.original_min_component_batch_variables = config.min_component_batch_variables
+        config.min_component_batch_variables = 1
+
+    def tearDown(self):
+        config.min_component_batch_variables = self.original_min_component_batch_variables
+
+    def test_separate_times_are_separate_components(self):
+        """ Tests that people who can only make different times are in different components """
+        test_data_dir = TEST_DATA_PREFIX + 'basic_functionality/'
+        (_, mod_time_variables, student_time_variables, _, _) = getModelFromInputFiles(
+            test_data_dir + 'mod_preferences.csv', test_data_dir + 'mod_max_sections.csv',
+            test_data_dir + 'student_preferences.csv', None)
+        components = findConnectedComponents(mod_time_variables, student_time_variables)
+
+        self.assertEqual([component.time_indices for component in components], [[0], [1], [2]])
+        self.assertEqual([component.mod_indices for component in components], [[0], [1], [2]])
+        self.assertEqual([component.student_indices for component in components],
+                         [list(range(0, 6)), list(range(6, 12)), list(range(12, 18))])
+
+    def test_shared_time_joins_components(self):
+        """ Tests that one person who can make two times joins everyone at both times into one component """
+        test_data_dir = TEST_DATA_PREFIX + 'different_num_rooms/'
+        (_, mod_time_variables, student_time_variables, _, _) = getModelFromInputFiles(
+            test_data_dir + 'mod_preferences.csv', test_data_dir + 'mod_max_sections.csv',
+            test_data_dir + 'student_preferences.csv', test_data_dir + 'section_times.csv')
+        components = findConnectedComponents(mod_time_variables, student_time_variables)
+
+        self.assertEqual(len(components), 1)
+        self.assertEqual(components[0].time_indices, [0, 1, 2])
+
+    def test_same_optimal_objective_on_all_test_data(self):
+        """ Tests that solving every component separately gives the same status and objective as one solve """
+        for test_data_dir in getAllTestDataDirectories():
+            with self.subTest(test_data_dir=test_data_dir):
+                (expected_status, expected_objective) = solveTestDataDirectory(test_data_dir)
+                if expected_status not in (cp_model.OPTIMAL, cp_model.INFEASIBLE):
+                    continue
+
+                (_, mod_time_variables, student_time_variables,
+                 max_sections_per_mod, max_sections_per_time) = getModelFromInputFiles(
+                    *getTestDataCsvFiles(test_data_dir))
+                components = findConnectedComponents(mod_time_variables, student_time_variables)
+                results = solveComponents(components, mod_time_variables, student_time_variables,
+                                          max_sections_per_mod, max_sections_per_time)
+                (status, objective, _, _) = mergeComponentResults(results, len(mod_time_variables[0]))
+
+                self.assertEqual(status, expected_status)
+                if status == cp_model.OPTIMAL:
+                    self.assertEqual(round(objective, 3), expected_objective)
+
+class TestDecomposedAssignments(test_assignments.TestAssignments):
+    """ Tests that assignment works correctly when every connected component is solved separately """
+
+    def setUp(self):
+        super().setUp()
+        config.decompose_into_components = True
+        self.original_min_component_batch_variables = config.min_component_batch_variables
+        config.min_component_batch_variables = 1
+
+    def tearDown(self):
+        config.decompose_into_components = False
+        config.min_component_batch_variables = self.original_min_component_batch_variables
+
+class TestDecomposedImpossible(test_impossible.TestImpossible):
+    """ Tests that no assignments can be made for inputs with no solution when components are solved separately """
+
+    def setUp(self):
+        super().setUp()
+        config.decompose_into_components = True
+
+    def tearDown(self):
+        config.decompose_into_components = False
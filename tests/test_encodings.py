@@ -0,0 +1,94 @@
+import os
+import unittest
+import config
+from assign_time_slots import addConstraintsAndObjective, getModelFromInputFiles
+from ortools.sat.python import cp_model
+TEST_DATA_PREFIX = 'test_data/'
+
+class TestEncodings(unittest.TestCase):
+    """ Tests that the compact and decision variable constraint encodings describe the same problem """
+
+    def setUp(self):
+        # Ensure that config options are correct for testing
+        config.assign_exact_max_sections = False
+        config.maximize_number_of_sections = False
+        config.only_allow_optimal_solutions = True
+        config.prefer_contiguous_sections_preferred_times_only = False
+        config.prefer_contiguous_sections_all_possible = False
+        config.num_sections_to_greedy_preselect = 0
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+        config.min_students_per_section = 5
+        config.max_students_per_section = 6
+
+    def tearDown(self):
+        config.use_compact_students_per_section_time_encoding = True
+
+    def test_same_optimal_objective_on_all_test_data(self):
+        """ Tests that both encodings find the same status and optimal objective for every test data directory """
+        test_data_dirs = getAllTestDataDirectories()
+        self.assertGreater(len(test_data_dirs), 0)
+
+        for test_data_dir in test_data_dirs:
+            with self.subTest(test_data_dir=test_data_dir):
+                config.use_compact_students_per_section_time_encoding = False
+                (decision_var_status, decision_var_objective) = solveTestDataDirectory(test_data_dir)
+                config.use_compact_students_per_section_time_encoding = True
+                (compact_status, compact_objective) = solveTestDataDirectory(test_data_dir)
+
+                self.assertIn(compact_status, (cp_model.OPTIMAL, cp_model.INFEASIBLE))
+                self.assertEqual(compact_status, decision_var_status)
+                if compact_status == cp_model.OPTIMAL:
+                    self.assertEqual(compact_objective, decision_var_objective)
+
+    def test_maximize_num_sections_same_objective(self):
+        """ Tests that both encodings agree when the number of sections is also being maximized """
+        config.maximize_number_of_sections = True
+        test_data_dir = TEST_DATA_PREFIX + 'assignment_test_data/maximize_num_sections/'
+
+        config.use_compact_students_per_section_time_encoding = False
+        decision_var_result = solveTestDataDirectory(test_data_dir)
+        config.use_compact_students_per_section_time_encoding = True
+        compact_result = solveTestDataDirectory(test_data_dir)
+
+        self.assertEqual(compact_result, decision_var_result)
+
+def getAllTestDataDirectories():
+    """
+        Returns:
+            List of String for every directory under test_data/ that contains a complete set of input CSV files
+    """
+    test_data_dirs = []
+    for (dir_path, _, file_names) in sorted(os.walk(TEST_DATA_PREFIX)):
+        if all(required_file in file_names
+               for required_file in ('mod_preferences.csv', 'mod_max_sections.csv', 'student_preferences.csv')):
+            test_data_dirs.append(dir_path + '/')
+    return test_data_dirs
+
+def getTestDataCsvFiles(test_data_dir):
+    """
+        Returns:
+            Tuple of the input CSV paths in test_data_dir in getModelFromInputFiles order, where the section times
+             path is None if the directory has no section times CSV
+    """
+    section_times_csv_path = test_data_dir + 'section_times.csv'
+    if not os.path.exists(section_times_csv_path):
+        section_times_csv_path = None
+
+    return (test_data_dir + 'mod_preferences.csv', test_data_dir + 'mod_max_sections.csv',
+            test_data_dir + 'student_preferences.csv', section_times_csv_path)
+
+def solveTestDataDirectory(test_data_dir):
+    """
+        Returns:
+            (status, objective) for solving the full model built from the CSV files in test_data_dir
+    """
+    (model, mod_time_variables, student_time_variables,
+     max_sections_per_mod, max_sections_per_time) = getModelFromInputFiles(*getTestDataCsvFiles(test_data_dir))
+    addConstraintsAndObjective(model, mod_time_variables, student_time_variables,
+                               max_sections_per_mod, max_sections_per_time)
+
+    solver = cp_model.CpSolver()
+    status = solver.Solve(model)
+    objective = round(solver.ObjectiveValue(), 3) if status == cp_model.OPTIMAL else None
+    return (status, objective)
@@ -0,0 +1,91 @@
+import unittest
+import config
+from assign_time_slots import getModelFromInputFiles
+from feasibility_precheck import FlowNetwork, findFeasibilityProblems
+from test_encodings import getTestDataCsvFiles
+TEST_DATA_PREFIX = 'test_data/'
+
+class TestFeasibilityPrecheck(unittest.TestCase):
+    """ Tests that obviously infeasible inputs are found and explained before solving """
+
+    def setUp(self):
+        # Ensure that config options are correct for testing
+        config.assign_exact_max_sections = False
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+        config.min_students_per_section = 5
+        config.max_students_per_section = 6
+
+    def test_max_flow(self):
+        """ Tests that the maximum flow and the source side of the minimum cut are found """
+        network = FlowNetwork()
+        network.addEdge('source', 'a', 3)
+        network.addEdge('source', 'b', 2)
+        network.addEdge('a', 'b', 1)
+        network.addEdge('a', 'sink', 1)
+        network.addEdge('b', 'sink', 4)
+
+        self.assertEqual(network.maxFlow('source', 'sink'), 4)
+        self.assertEqual(network.getSourceSide('source'), {'source', 'a'})
+
+    def test_feasible_inputs_pass(self):
+        """ Tests that no problem is reported for inputs which have an assignment """
+        for test_data_name in ('basic_functionality', 'different_num_rooms', 'three_mods_one_section_time',
+                               'two_sections_one_mod', 'maximize_num_sections'):
+            with self.subTest(test_data_name=test_data_name):
+                self.assertEqual(self.getProblems('assignment_test_data/' + test_data_name + '/'), [])
+
+    def test_too_many_students(self):
+        """ Tests that a time with more students than its moderators can hold is reported """
+        problems = self.getProblems('impossible_test_data/too_many_students/')
+        self.assertEqual(len(problems), 1)
+        self.assertIn('Only 18 of 20 students', problems[0])
+        self.assertIn('can only make times [2]', problems[0])
+
+    def test_too_few_students(self):
+        """ Tests that a time which must have a section but can not fill one is reported """
+        problems = self.getProblems('impossible_test_data/too_few_students/')
+        self.assertEqual(len(problems), 1)
+        self.assertIn('Time 3 must have a section since students d7, d8', problems[0])
+
+    def test_too_few_mods(self):
+        """ Tests that students who need more sections than their moderators can teach are reported """
+        problems = self.getProblems('impossible_test_data/too_few_mods/')
+        self.assertEqual(len(problems), 1)
+        self.assertIn('can only make times [0, 2]', problems[0])
+        self.assertIn('max sections of moderators amackow2', problems[0])
+
+    def test_zero_max_sections(self):
+        """ Tests that a moderator with zero max sections is reported """
+        problems = self.getProblems('impossible_test_data/zero_max_sections/')
+        self.assertEqual(len(problems), 1)
+        self.assertIn('ysharma5', problems[0])
+
+    def test_no_mod_available_at_time(self):
+        """ Tests that students at a time no moderator can make are reported """
+        problems = self.getProblems('impossible_test_data/no_mod_available_at_time/')
+        self.assertGreater(len(problems), 0)
+        self.assertIn('Time 4 must have a section', problems[0])
+        self.assertIn('no moderator can make it', problems[0])
+
+    def test_more_sections_than_rooms(self):
+        """ Tests that moderators who must teach more sections than there are rooms at their times are reported """
+        problems = self.getProblems('assignment_test_data/three_mods_one_section_time/',
+                                    max_sections_per_time=[2, 3, 3])
+        self.assertGreater(len(problems), 0)
+        self.assertIn('Only 4 of the 5 sections moderators must teach fit into rooms', problems[0])
+        self.assertIn('amackow2, ssolank2, ztan19 can only make times [0]', problems[0])
+
+    def getProblems(self, test_data_dir, max_sections_per_time=None):
+        """
+            Returns:
+                The result of findFeasibilityProblems for the test data, with the number of rooms at each time
+                 replaced by max_sections_per_time if it is given
+        """
+        (_, mod_time_variables, student_time_variables,
+         max_sections_per_mod, rooms_per_time) = getModelFromInputFiles(
+            *getTestDataCsvFiles(TEST_DATA_PREFIX + test_data_dir))
+        if max_sections_per_time is None:
+            max_sections_per_time = rooms_per_time
+        return findFeasibilityProblems(mod_time_variables, student_time_variables, max_sections_per_mod,
+                                       max_sections_per_time)
@@ -1,8 +1,9 @@
 import unittest
 import config
+import test_assignments
 from assign_time_slots import getModelFromInputFiles
 from csv_input import readDoodlePreferences, readModMaxSectionPreferences
-from greedy_preselect import getGreedyAssignment
+from greedy_preselect import getGreedyAssignment, getGreedyCompleteAssignment
 from ortools.sat.python import cp_model
 TEST_DATA_PREFIX = 'test_data/greedy_preselect_test_data/'
 
@@ -151,6 +152,39 @@ class TestGreedyPreselect(unittest.TestCase):
         # Verify we received the requested number of sections
         self.assertEqual(len(greedy_assignment), config.num_sections_to_greedy_preselect)
 
+    def test_complete_assignment_is_valid(self):
+        """ Tests that the complete greedy assignment places everyone it can without breaking any constraint """
+        for test_data_dir in (TEST_DATA_PREFIX + 'complex_assignment/', 'test_data/real_data/sp19_data/'):
+            csv_files = (test_data_dir + 'mod_preferences.csv', test_data_dir + 'mod_max_sections.csv',
+                         test_data_dir + 'student_preferences.csv', None)
+            (model, mod_time_variables, student_time_variables,
+             max_sections_per_mod, max_sections_per_time) = getModelFromInputFiles(*csv_files)
+
+            (mod_assigned_times, student_assigned_times) = getGreedyCompleteAssignment(mod_time_variables,
+                                                                                       student_time_variables,
+                                                                                       max_sections_per_time,
+                                                                                       max_sections_per_mod)
+            num_section_times = len(max_sections_per_time)
+            num_sections_in_time = [0] * num_section_times
+            num_students_in_time = [0] * num_section_times
+            for (mod_index, assigned_times) in mod_assigned_times.items():
+                self.assertLessEqual(len(assigned_times), max_sections_per_mod[mod_index])
+                for time_index in assigned_times:
+                    self.assertIsNotNone(mod_time_variables[mod_index][time_index])
+                    num_sections_in_time[time_index] += 1
+            for (student_index, time_index) in enumerate(student_assigned_times):
+                if time_index is not None:
+                    self.assertIsNotNone(student_time_variables[student_index][time_index])
+                    num_students_in_time[time_index] += 1
+
+            self.assertGreater(sum(1 for time_index in student_assigned_times if time_index is not None), 0)
+            for time_index in range(num_section_times):
+                self.assertLessEqual(num_sections_in_time[time_index], max_sections_per_time[time_index])
+                self.assertGreaterEqual(num_students_in_time[time_index],
+                                        num_sections_in_time[time_index] * config.min_students_per_section)
+                self.assertLessEqual(num_students_in_time[time_index],
+                                     num_sections_in_time[time_index] * config.max_students_per_section)
+
     def verify_greedy_assignment(self, test_data_dir, expected_assignment, non_standard_rooms=False):
         mod_doodle_poll_csv_path = (test_data_dir + 'mod_preferences.csv')
         mod_max_sections_csv_path = (test_data_dir + 'mod_max_sections.csv')
@@ -181,3 +215,13 @@ class TestGreedyPreselect(unittest.TestCase):
             self.assertIn(time_index, expected_assignment)
             self.assertIn(mod_net_id, expected_assignment[time_index])
             self.assertCountEqual(student_net_ids, expected_assignment[time_index][mod_net_id])
+
+class TestGreedyHintAssignments(test_assignments.TestAssignments):
+    """ Tests that hinting a greedy assignment does not change the optimal assignment """
+
+    def setUp(self):
+        super().setUp()
+        config.greedy_preselect_mode = 'hint'
+
+    def tearDown(self):
+        config.greedy_preselect_mode = 'constraints'
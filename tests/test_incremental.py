@@ -0,0 +1,185 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import config
+from assign_sections import write_sections_to_csv
+from assign_time_slots import assignModeratorsAndStudents
+from create_sections_from_time_slots import assignSectionsFromSectionTimes
+from csv_input import readModNetIDToNameMapping, readSectionTimeInfo
+from incremental_assignment import assignModeratorsAndStudentsIncrementally, assignSectionsKeepingPrevious,\
+                                   getAssignmentChanges, getChangedMaxSectionsNetIDs, getNewTimes,\
+                                   readPreviousAssignment
+from objective_functions import NOT_PREFERRED_PRIORITY_MULTIPLIER, getMovedPersonPenalty
+TEST_DATA_DIR = 'test_data/assignment_test_data/different_num_rooms/'
+
+class TestIncremental(unittest.TestCase):
+    """ Tests that re-assigning after adds and drops moves as few people as possible """
+
+    def setUp(self):
+        config.assign_exact_max_sections = False
+        config.maximize_number_of_sections = False
+        config.only_allow_optimal_solutions = True
+        config.prefer_contiguous_sections_preferred_times_only = False
+        config.prefer_contiguous_sections_all_possible = False
+        config.num_sections_to_greedy_preselect = 0
+        config.allow_impossible_times = False
+        config.min_students_per_section = 5
+        config.max_students_per_section = 6
+
+        self.temp_dir = tempfile.mkdtemp()
+        self.original_section_times_csv_path = config.section_times_csv_path
+        self.original_output_csv_path = config.output_csv_path
+        config.section_times_csv_path = TEST_DATA_DIR + 'section_times.csv'
+        config.output_csv_path = os.path.join(self.temp_dir, 'previous_assignment.csv')
+
+        # Make and write out the assignment that students have already been told
+        (mods_assigned_to_times, students_assigned_to_times) = \
+            assignModeratorsAndStudents(TEST_DATA_DIR + 'mod_preferences.csv',
+                                        TEST_DATA_DIR + 'mod_max_sections.csv',
+                                        TEST_DATA_DIR + 'student_preferences.csv',
+                                        config.section_times_csv_path)
+        section_assignments = assignSectionsFromSectionTimes(mods_assigned_to_times, students_assigned_to_times)
+        self.mod_net_id_to_name_dict = readModNetIDToNameMapping(TEST_DATA_DIR + 'mod_net_ids_to_names.csv',
+                                                                 mod_net_id_error_check=False)
+        write_sections_to_csv(section_assignments, self.mod_net_id_to_name_dict)
+
+        (self.section_times, _) = readSectionTimeInfo(config.section_times_csv_path)
+        self.previous_assignment = readPreviousAssignment(config.output_csv_path, self.section_times,
+                                                          self.mod_net_id_to_name_dict)
+
+    def tearDown(self):
+        config.section_times_csv_path = self.original_section_times_csv_path
+        config.output_csv_path = self.original_output_csv_path
+        config.max_students_per_section = 6
+        shutil.rmtree(self.temp_dir)
+
+    def test_read_previous_assignment(self):
+        """ Tests that every student and moderator is read back from a written section assignment """
+        self.assertEqual(len(self.previous_assignment.student_time), 44)
+        self.assertEqual(self.previous_assignment.student_time['f1'], 1)
+        self.assertEqual(self.previous_assignment.mod_times['amackow2'], {0, 1, 2})
+        self.assertEqual(self.previous_assignment.student_mod['h1'], 'amackow2')
+
+    def test_add_and_drop(self):
+        """ Tests that an added student takes the place of a dropped student without moving anyone else """
+        student_preferences = self.readStudentPreferenceLines()
+        student_preferences = [line for line in student_preferences if not line.startswith('a1,')]
+        student_preferences.append('z1,OK,,')
+        changes = self.assignIncrementally(student_preferences)
+
+        self.assertEqual([change[0] for change in changes], ['a1', 'z1'])
+        (_, _, a1_previous, a1_new) = changes[0]
+        (_, _, z1_previous, z1_new) = changes[1]
+        self.assertEqual(a1_new, '')
+        self.assertEqual(z1_previous, '')
+        # The added student fills the spot left open by the dropped student
+        self.assertEqual(z1_new, a1_previous)
+
+    def test_previous_time_no_longer_possible(self):
+        """ Tests that only the student who can no longer make their time is moved to a different time """
+        student_preferences = self.readStudentPreferenceLines()
+        student_preferences = ['a1,,OK,OK' if line.startswith('a1,') else line for line in student_preferences]
+        changes = self.assignIncrementally(student_preferences)
+
+        (net_id, role, previous_description, new_description) = changes[0]
+        self.assertEqual((net_id, role), ('a1', 'student'))
+        self.assertTrue(previous_description.startswith(self.section_times[0]))
+        self.assertTrue(new_description.startswith(self.section_times[2]))
+
+        # Other students may only change sections within their time to refill the section that was left
+        for (net_id, role, previous_description, new_description) in changes[1:]:
+            self.assertEqual(role, 'student')
+            self.assertTrue(previous_description.startswith(self.section_times[0]))
+            self.assertTrue(new_description.startswith(self.section_times[0]))
+        self.assertLessEqual(len(changes), 1 + config.min_students_per_section)
+
+    def test_lowered_max_sections(self):
+        """ Tests that a moderator with fewer max sections than previous sections is changed and infeasible fails """
+        max_sections_csv_path = os.path.join(self.temp_dir, 'mod_max_sections.csv')
+        with open(TEST_DATA_DIR + 'mod_max_sections.csv', 'r') as max_sections_file:
+            max_sections_lines = max_sections_file.read().splitlines()
+        with open(max_sections_csv_path, 'w') as max_sections_file:
+            max_sections_file.write('\n'.join('amackow2,1' if line.startswith('amackow2,') else line
+                                              for line in max_sections_lines) + '\n')
+
+        # 44 students can not fit in the 6 sections the moderators can now teach
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            self.assertRaises(AssertionError, assignModeratorsAndStudentsIncrementally, self.previous_assignment,
+                              TEST_DATA_DIR + 'mod_preferences.csv', max_sections_csv_path,
+                              TEST_DATA_DIR + 'student_preferences.csv', config.section_times_csv_path)
+        self.assertIn("Changed mods: 1 ['amackow2']", output.getvalue())
+        self.assertIn('INFEASIBLE:', output.getvalue())
+
+    def test_changed_max_sections(self):
+        """ Tests that a moderator is changed when their max sections row differs from the previous one """
+        mod_net_ids = ['amackow2', 'albertl3', 'new_mod']
+        self.assertEqual(getChangedMaxSectionsNetIDs(mod_net_ids, [3, 1, 1], None, self.previous_assignment), set())
+        self.assertEqual(getChangedMaxSectionsNetIDs(mod_net_ids, [2, 1, 1], None, self.previous_assignment),
+                         {'amackow2'})
+        self.assertEqual(getChangedMaxSectionsNetIDs(mod_net_ids, [3, 2, 1], {'amackow2': 3, 'albertl3': 1},
+                                                     self.previous_assignment), {'albertl3'})
+
+    def test_infeasible_without_changes(self):
+        """ Tests that re-solving every time is tried and then fails when nothing changed but no assignment exists """
+        config.max_students_per_section = 5
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            self.assertRaises(AssertionError, self.assignIncrementally, self.readStudentPreferenceLines())
+        self.assertIn('Re-solving 0 of 3 times', output.getvalue())
+        self.assertIn('Re-solving 3 of 3 times', output.getvalue())
+        self.assertEqual(output.getvalue().count('Re-solving'), 2)
+        self.assertIn('INFEASIBLE:', output.getvalue())
+
+    def test_new_times(self):
+        """ Tests that only the times a changed person is likely to move to are affected, not every possible time """
+        self.assertEqual(getNewTimes(['OK', '(OK)', 'OK', ''], ['OK', '', 'OK', 'OK']), {1})
+        self.assertEqual(getNewTimes(['OK', '(OK)', 'OK', ''], None), {0, 2})
+        self.assertEqual(getNewTimes(['(OK)', '(OK)', ''], None), {0, 1})
+        self.assertEqual(getNewTimes(['OK', '(OK)', ''], ['OK', '(OK)', 'OK']), {0, 1})
+
+    def test_aggregation_restored(self):
+        """ Tests that aggregating identical people is only turned off for the incremental solve """
+        config.aggregate_identical_people = True
+        try:
+            self.assignIncrementally(self.readStudentPreferenceLines())
+            self.assertTrue(config.aggregate_identical_people)
+        finally:
+            config.aggregate_identical_people = False
+
+    def test_moved_person_penalty(self):
+        """ Tests that moving a person outweighs every other single term of the objective function """
+        not_preferred_terms = [(3200.5, None), (12.0, None)]
+        moved_person_penalty = getMovedPersonPenalty(not_preferred_terms, [None], max_sections_priority_multiplier=70)
+        self.assertGreater(moved_person_penalty, NOT_PREFERRED_PRIORITY_MULTIPLIER * 3200.5)
+        self.assertEqual(getMovedPersonPenalty([], [None], max_sections_priority_multiplier=70), 71)
+        self.assertEqual(getMovedPersonPenalty([], [], max_sections_priority_multiplier=70), 2)
+
+    def readStudentPreferenceLines(self):
+        with open(TEST_DATA_DIR + 'student_preferences.csv', 'r') as student_preferences_file:
+            return student_preferences_file.read().splitlines()
+
+    def assignIncrementally(self, student_preferences):
+        """
+            Returns:
+                The result of getAssignmentChanges after incrementally assigning the given student preference lines
+        """
+        student_preferences_csv_path = os.path.join(self.temp_dir, 'student_preferences.csv')
+        with open(student_preferences_csv_path, 'w') as student_preferences_file:
+            student_preferences_file.write('\n'.join(student_preferences) + '\n')
+
+        (mods_assigned_to_times, students_assigned_to_times) = \
+            assignModeratorsAndStudentsIncrementally(self.previous_assignment,
+                                                     TEST_DATA_DIR + 'mod_preferences.csv',
+                                                     TEST_DATA_DIR + 'mod_max_sections.csv',
+                                                     student_preferences_csv_path,
+                                                     config.section_times_csv_path)
+        section_assignments = assignSectionsKeepingPrevious(mods_assigned_to_times, students_assigned_to_times,
+                                                            self.previous_assignment)
+        for sections_in_time in section_assignments:
+            for section in sections_in_time:
+                self.assertGreaterEqual(len(section.student_net_ids), config.min_students_per_section)
+                self.assertLessEqual(len(section.student_net_ids), config.max_students_per_section)
+
+        return getAssignmentChanges(section_assignments, self.previous_assignment, self.section_times)
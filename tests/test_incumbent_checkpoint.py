@@ -0,0 +1,157 @@
+import unittest
+import config
+import contextlib
+import incumbent_checkpoint
+import io
+import os
+import shutil
+import tempfile
+import time
+from assign_time_slots import addAllConstraints, assignModeratorsAndStudents, getModelFromInputFiles, solveModel
+from incumbent_checkpoint import IncumbentCheckpointer, getModelKey, hintCheckpoint, readCheckpoint, writeCheckpoint
+from ortools.sat.python import cp_model
+from person_time_index import getPersonTimeIndex
+from solution_extraction import SolutionValues, getSolutionValues
+from test_encodings import getTestDataCsvFiles
+TEST_DATA_DIR = 'test_data/real_data/fa19_data/'
+
+class TestIncumbentCheckpoint(unittest.TestCase):
+    """ Tests writing the best assignment found so far while solving and resuming from it """
+
+    def setUp(self):
+        self.output_directory = tempfile.mkdtemp()
+        self.csv_files = getTestDataCsvFiles(TEST_DATA_DIR)
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+        config.num_sections_to_greedy_preselect = 0
+        config.checkpoint_path = os.path.join(self.output_directory, 'assignments.checkpoint.json')
+        config.checkpoint_interval_seconds = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.output_directory)
+        config.checkpoint_incumbents = False
+        config.checkpoint_path = None
+        config.checkpoint_interval_seconds = 10
+        config.resume_from_checkpoint = False
+        config.aggregate_identical_people = False
+        config.min_students_per_section = 5
+
+    def buildModel(self):
+        """
+            Returns:
+                (model, mod_time_variables, student_time_variables, max_sections_per_mod) with every constraint
+        """
+        with contextlib.redirect_stdout(io.StringIO()):
+            (model, mod_time_variables, student_time_variables,
+             max_sections_per_mod, max_sections_per_time) = getModelFromInputFiles(*self.csv_files)
+            addAllConstraints(model, mod_time_variables, student_time_variables, max_sections_per_mod,
+                              max_sections_per_time)
+        return (model, mod_time_variables, student_time_variables, max_sections_per_mod)
+
+    def test_checkpoint_path(self):
+        """ Tests that the checkpoint is next to the output CSV unless a path is given """
+        config.checkpoint_path = None
+        self.assertEqual(incumbent_checkpoint.getCheckpointPath(),
+                         os.path.splitext(config.output_csv_path)[0] + '.checkpoint.json')
+
+    def test_checkpoint_written(self):
+        """ Tests that the final checkpoint holds the assignment returned by the solve """
+        config.checkpoint_incumbents = True
+        with contextlib.redirect_stdout(io.StringIO()):
+            (mods_assigned_to_times, students_assigned_to_times) = assignModeratorsAndStudents(*self.csv_files)
+
+        checkpoint = readCheckpoint(config.checkpoint_path)
+        self.assertEqual(checkpoint.objective_value, 20)
+        self.assertEqual(checkpoint.model_key, getModelKey(self.csv_files))
+        for (assigned_times, people_assigned_to_times) in ((checkpoint.mod_times, mods_assigned_to_times),
+                                                          (checkpoint.student_times, students_assigned_to_times)):
+            for (time_index, net_ids) in enumerate(people_assigned_to_times):
+                self.assertEqual(sorted(net_ids), sorted(net_id for (net_id, times) in assigned_times.items()
+                                                         if time_index in times))
+        self.assertFalse(os.path.exists(config.checkpoint_path + '.tmp'))
+
+    def test_writes_are_throttled(self):
+        """ Tests that solutions found within the interval are not written until the interval ends or it closes """
+        (_, mod_time_variables, student_time_variables, _) = self.buildModel()
+        num_variables = (getPersonTimeIndex(mod_time_variables).numVariables() +
+                         getPersonTimeIndex(student_time_variables).numVariables())
+        checkpointer = IncumbentCheckpointer(config.checkpoint_path, 'key', mod_time_variables,
+                                             student_time_variables, interval_seconds=60)
+        checkpointer.offer(SolutionValues([0] * num_variables, 30))
+        while checkpointer.num_writes == 0:
+            time.sleep(0.01)
+        self.assertEqual(readCheckpoint(config.checkpoint_path).objective_value, 30)
+
+        # Solutions found within the interval wait, and only the newest one is written when closing
+        for objective_value in (25, 20):
+            checkpointer.offer(SolutionValues([0] * num_variables, objective_value))
+        time.sleep(0.1)
+        self.assertEqual(checkpointer.num_writes, 1)
+        checkpointer.close()
+        self.assertEqual(checkpointer.num_writes, 2)
+        self.assertEqual(readCheckpoint(config.checkpoint_path).objective_value, 20)
+
+    def test_hint_round_trip(self):
+        """ Tests that hinting a checkpoint gives every person/time variable its value in the solution """
+        for aggregate_identical_people in (False, True):
+            config.aggregate_identical_people = aggregate_identical_people
+            (model, mod_time_variables, student_time_variables, max_sections_per_mod) = self.buildModel()
+            with contextlib.redirect_stdout(io.StringIO()):
+                (status, solver, _, _) = solveModel(model, mod_time_variables, student_time_variables,
+                                                    max_sections_per_mod)
+            self.assertEqual(status, cp_model.OPTIMAL)
+            mod_time_index = getPersonTimeIndex(mod_time_variables)
+            student_time_index = getPersonTimeIndex(student_time_variables)
+            writeCheckpoint(config.checkpoint_path, 'key', getSolutionValues(solver), mod_time_index,
+                            student_time_index)
+
+            self.assertEqual(hintCheckpoint(model, readCheckpoint(config.checkpoint_path), mod_time_variables,
+                                            student_time_variables), 0)
+            hint = dict(zip(model.Proto().solution_hint.vars, model.Proto().solution_hint.values))
+            for person_time_index in (mod_time_index, student_time_index):
+                for person_time_var_wrapper in person_time_index.person_wrappers:
+                    self.assertEqual(hint[person_time_var_wrapper.variable.Index()],
+                                     solver.Value(person_time_var_wrapper.variable))
+
+    def test_resume(self):
+        """ Tests that a resumed solve starts from the checkpoint and never finds a worse solution """
+        config.checkpoint_incumbents = True
+        with contextlib.redirect_stdout(io.StringIO()):
+            assignModeratorsAndStudents(*self.csv_files)
+
+        config.resume_from_checkpoint = True
+        (model, mod_time_variables, student_time_variables, max_sections_per_mod) = self.buildModel()
+        checkpointer = incumbent_checkpoint.getCheckpointer(self.csv_files, mod_time_variables,
+                                                            student_time_variables)
+        num_constraints = len(model.Proto().constraints)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            (status, solver, solution_counter, _) = solveModel(model, mod_time_variables, student_time_variables,
+                                                               max_sections_per_mod, checkpointer=checkpointer)
+        self.assertIn('Resuming from checkpoint with objective value 20', output.getvalue())
+        self.assertEqual(len(model.Proto().constraints), num_constraints + 1)
+        self.assertEqual(status, cp_model.OPTIMAL)
+        self.assertEqual(solver.ObjectiveValue(), 20)
+        for progress_point in solution_counter.timeline:
+            self.assertLessEqual(progress_point.objective, 20)
+
+    def test_resume_other_model(self):
+        """ Tests that a checkpoint made with a different model config is only used as a hint """
+        config.checkpoint_incumbents = True
+        with contextlib.redirect_stdout(io.StringIO()):
+            assignModeratorsAndStudents(*self.csv_files)
+
+        config.resume_from_checkpoint = True
+        config.min_students_per_section = 4
+        (model, mod_time_variables, student_time_variables, max_sections_per_mod) = self.buildModel()
+        checkpointer = incumbent_checkpoint.getCheckpointer(self.csv_files, mod_time_variables,
+                                                            student_time_variables)
+        num_constraints = len(model.Proto().constraints)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            (status, _, _, _) = solveModel(model, mod_time_variables, student_time_variables, max_sections_per_mod,
+                                           checkpointer=checkpointer)
+        self.assertIn('only used as a hint', output.getvalue())
+        self.assertEqual(len(model.Proto().constraints), num_constraints)
+        self.assertEqual(status, cp_model.OPTIMAL)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import config
+import contextlib
+import instrumentation
+import io
+import json
+import os
+import shutil
+import tempfile
+from assign_time_slots import assignModeratorsAndStudents
+from test_encodings import getTestDataCsvFiles
+TEST_DATA_DIR = 'test_data/real_data/fa19_data/'
+
+class TestInstrumentation(unittest.TestCase):
+    """ Tests timing the pipeline phases and recording counts and solver statistics """
+
+    def setUp(self):
+        self.output_directory = tempfile.mkdtemp()
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+        config.num_sections_to_greedy_preselect = 0
+        config.enable_instrumentation = True
+
+    def tearDown(self):
+        shutil.rmtree(self.output_directory)
+        config.enable_instrumentation = False
+        config.instrumentation_output_path = None
+        config.instrumentation_trace_memory = False
+        config.quiet_mode = False
+        instrumentation.recorder = None
+
+    def runInstrumented(self):
+        """
+            Returns:
+                String printed while solving the fa19 data and finishing the run
+        """
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            instrumentation.startRun('test')
+            assignModeratorsAndStudents(*getTestDataCsvFiles(TEST_DATA_DIR))
+            instrumentation.finishRun()
+        return output.getvalue()
+
+    def test_json_output(self):
+        """ Tests that every phase, count and solver statistic of a run is written to the JSON document """
+        config.instrumentation_output_path = os.path.join(self.output_directory, 'run.json')
+        config.instrumentation_trace_memory = True
+        summary = self.runInstrumented()
+        with open(config.instrumentation_output_path, 'r', encoding='utf-8') as output_file:
+            run = json.load(output_file)
+
+        span_names = {span['name'] for span in run['spans']}
+        for phase_name in ('read input files', 'presolve input', 'create variables', 'feasibility precheck',
+                           'greedy preselect', 'constraints: max sections per mod', 'constraints: max sections per time',
+                           'constraints: sections per student', 'constraints: students per section time', 'objective',
+                           'solve', 'extraction'):
+            self.assertIn(phase_name, span_names)
+        for span in run['spans']:
+            self.assertGreaterEqual(span['seconds'], 0)
+            self.assertGreaterEqual(span['peak_memory_bytes'], 0)
+        self.assertEqual(run['counters']['students'], 132)
+        self.assertGreaterEqual(run['counters']['solutions found'], 1)
+
+        self.assertEqual(len(run['solver_statistics']), 1)
+        solver_statistics = run['solver_statistics'][0]
+        self.assertEqual((solver_statistics['status'], solver_statistics['objective']), ('OPTIMAL', 20))
+        self.assertEqual(solver_statistics['best_bound'], 20)
+        self.assertIsNotNone(solver_statistics['presolve_seconds'])
+        self.assertGreaterEqual(solver_statistics['num_branches'], 0)
+        self.assertIn('constraints: students per section time', summary)
+        self.assertIsNone(instrumentation.recorder)
+
+    def test_jsonl_output(self):
+        """ Tests that every event is appended as its own line with the parent span of nested spans """
+        config.instrumentation_output_path = os.path.join(self.output_directory, 'run.jsonl')
+        instrumentation.startRun('nested')
+        with instrumentation.span('outer'):
+            with instrumentation.span('inner'):
+                instrumentation.setCounter('things', 3)
+        with contextlib.redirect_stdout(io.StringIO()):
+            instrumentation.finishRun()
+
+        with open(config.instrumentation_output_path, 'r', encoding='utf-8') as output_file:
+            events = [json.loads(line) for line in output_file]
+        self.assertEqual([(event['type'], event['name']) for event in events],
+                         [('counter', 'things'), ('span', 'inner'), ('span', 'outer')])
+        self.assertEqual(events[1]['parent'], 'outer')
+        self.assertIsNone(events[2]['parent'])
+        self.assertEqual({event['run'] for event in events}, {'nested'})
+
+    def test_quiet_mode(self):
+        """ Tests that quiet mode leaves out the per solution and model size prints but keeps the counts """
+        config.quiet_mode = True
+        instrumentation.startRun('quiet')
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            assignModeratorsAndStudents(*getTestDataCsvFiles(TEST_DATA_DIR))
+        self.assertNotIn('Viable assignment found', output.getvalue())
+        self.assertNotIn('Num students:', output.getvalue())
+        self.assertEqual(instrumentation.recorder.counters['students'], 132)
+
+    def test_disabled(self):
+        """ Tests that nothing is recorded when instrumentation is disabled """
+        config.enable_instrumentation = False
+        instrumentation.startRun('disabled')
+        with instrumentation.span('phase'):
+            instrumentation.setCounter('things', 3)
+        self.assertIsNone(instrumentation.getRecorder())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import random
+import unittest
+import config
+import test_assignments
+from assign_time_slots import addAllConstraints, getModelFromInputFiles
+from large_neighbourhood_search import getNeighbourhoodVariableIndices, getPersonVariableIndices,\
+                                       solveWithLargeNeighbourhoodSearch
+from test_encodings import getTestDataCsvFiles, solveTestDataDirectory
+from ortools.sat.python import cp_model
+TEST_DATA_PREFIX = 'test_data/assignment_test_data/'
+
+class TestLargeNeighbourhoodSearch(unittest.TestCase):
+    """ Tests that improving a first solution one neighbourhood at a time works correctly """
+
+    def setUp(self):
+        config.assign_exact_max_sections = False
+        config.maximize_number_of_sections = False
+        config.prefer_contiguous_sections_preferred_times_only = False
+        config.prefer_contiguous_sections_all_possible = False
+        config.num_sections_to_greedy_preselect = 0
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+        config.min_students_per_section = 5
+        config.max_students_per_section = 6
+        self.original_lns_time_budget_seconds = config.lns_time_budget_seconds
+        self.original_lns_neighbourhood_num_times = config.lns_neighbourhood_num_times
+        config.lns_time_budget_seconds = 10
+
+    def tearDown(self):
+        config.lns_time_budget_seconds = self.original_lns_time_budget_seconds
+        config.lns_neighbourhood_num_times = self.original_lns_neighbourhood_num_times
+
+    def test_people_at_neighbourhood_times_are_free(self):
+        """ Tests that everyone assigned to a freed time may move anywhere and everyone else only into it """
+        test_data_dir = TEST_DATA_PREFIX + 'different_num_rooms/'
+        (_, mod_time_variables, student_time_variables, _, _) = getModelFromInputFiles(
+            *getTestDataCsvFiles(test_data_dir))
+        # Assign every moderator and student to the first time they can make
+        values = [0] * (1 + max(getPersonVariableIndices(mod_time_variables + student_time_variables)))
+        for time_variables_for_person in mod_time_variables + student_time_variables:
+            first_wrapper = next(wrapper for wrapper in time_variables_for_person if wrapper is not None)
+            values[first_wrapper.variable.Index()] = 1
+
+        config.lns_neighbourhood_num_times = 1
+        free_variable_indices = getNeighbourhoodVariableIndices('times', mod_time_variables, student_time_variables,
+                                                                values, random.Random(0))
+
+        for time_variables_for_person in mod_time_variables + student_time_variables:
+            person_variable_indices = getPersonVariableIndices([time_variables_for_person])
+            assigned_variable_indices = {index for index in person_variable_indices if values[index] == 1}
+            if assigned_variable_indices <= free_variable_indices:
+                self.assertLessEqual(person_variable_indices, free_variable_indices)
+            else:
+                self.assertLessEqual(len(person_variable_indices & free_variable_indices), 1)
+
+    def test_same_objective_on_test_data(self):
+        """ Tests that the search reaches the optimal objective on small inputs within its time budget """
+        for test_data_name in ('basic_functionality', 'chooses_preferred_times', 'different_num_rooms',
+                               'four_sections_one_aamir', 'three_mods_one_section_time', 'two_sections_one_mod'):
+            with self.subTest(test_data_name=test_data_name):
+                test_data_dir = TEST_DATA_PREFIX + test_data_name + '/'
+                (_, expected_objective) = solveTestDataDirectory(test_data_dir)
+                (model, mod_time_variables, student_time_variables,
+                 max_sections_per_mod, max_sections_per_time) = getModelFromInputFiles(
+                    *getTestDataCsvFiles(test_data_dir))
+                addAllConstraints(model, mod_time_variables, student_time_variables, max_sections_per_mod,
+                                  max_sections_per_time)
+                (status, objective, best_bound, _, _) = solveWithLargeNeighbourhoodSearch(
+                    model, mod_time_variables, student_time_variables, max_sections_per_mod)
+
+                self.assertEqual(status, cp_model.OPTIMAL)
+                self.assertEqual(round(objective, 3), expected_objective)
+                self.assertEqual(round(best_bound, 3), expected_objective)
+
+    def test_infeasible_input(self):
+        """ Tests that no solution is reported for inputs with no solution """
+        test_data_dir = 'test_data/impossible_test_data/too_many_students/'
+        (model, mod_time_variables, student_time_variables,
+         max_sections_per_mod, max_sections_per_time) = getModelFromInputFiles(*getTestDataCsvFiles(test_data_dir))
+        addAllConstraints(model, mod_time_variables, student_time_variables, max_sections_per_mod,
+                          max_sections_per_time)
+        (status, objective, _, assignment_values, _) = solveWithLargeNeighbourhoodSearch(
+            model, mod_time_variables, student_time_variables, max_sections_per_mod)
+
+        self.assertEqual(status, cp_model.INFEASIBLE)
+        self.assertIsNone(objective)
+        self.assertIsNone(assignment_values)
+
+class TestLargeNeighbourhoodSearchAssignments(test_assignments.TestAssignments):
+    """ Tests that assignment works correctly with large neighbourhood search """
+
+    def setUp(self):
+        super().setUp()
+        config.use_large_neighbourhood_search = True
+
+    def tearDown(self):
+        config.use_large_neighbourhood_search = False
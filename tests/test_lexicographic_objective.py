@@ -0,0 +1,79 @@
+import unittest
+import config
+import test_assignments
+import test_impossible
+from assign_time_slots import SolutionCounter, addAllConstraints, addConstraintsAndObjective, createSolver,\
+                              getModelFromInputFiles, solveLexicographically
+from objective_functions import getObjectiveStages, scaleToIntegers
+from ortools.sat.python import cp_model
+TEST_DATA_PREFIX = 'test_data/assignment_test_data/'
+
+class TestLexicographicObjective(unittest.TestCase):
+    """ Tests that the objective function can be solved one stage at a time """
+
+    def setUp(self):
+        config.assign_exact_max_sections = False
+        config.maximize_number_of_sections = True
+        config.prefer_contiguous_sections_preferred_times_only = False
+        config.prefer_contiguous_sections_all_possible = False
+        config.num_sections_to_greedy_preselect = 0
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+        config.min_students_per_section = 5
+        config.max_students_per_section = 6
+
+    def tearDown(self):
+        config.maximize_number_of_sections = False
+
+    def test_scale_to_integers(self):
+        """ Tests that fractional coefficients are scaled by the smallest factor making all of them integers """
+        self.assertEqual(scaleToIntegers([1, 2, 3]), [1, 2, 3])
+        self.assertEqual(scaleToIntegers([12.5, 3, 0.25]), [50, 12, 1])
+
+    def test_stages_match_weighted_objective(self):
+        """ Tests that every stage reaches the same value as the weighted objective when both are optimal """
+        test_data_dir = TEST_DATA_PREFIX + 'maximize_num_sections/'
+        csv_files = (test_data_dir + 'mod_preferences.csv', test_data_dir + 'mod_max_sections.csv',
+                     test_data_dir + 'student_preferences.csv', None)
+
+        (model, mod_time_variables, student_time_variables,
+         max_sections_per_mod, max_sections_per_time) = getModelFromInputFiles(*csv_files)
+        weighted_stages = addConstraintsAndObjective(model, mod_time_variables, student_time_variables,
+                                                     max_sections_per_mod, max_sections_per_time)
+        solver = createSolver()
+        self.assertEqual(solver.Solve(model), cp_model.OPTIMAL)
+        weighted_stage_values = [solver.Value(stage.expression) for stage in weighted_stages]
+
+        (model, mod_time_variables, student_time_variables,
+         max_sections_per_mod, max_sections_per_time) = getModelFromInputFiles(*csv_files)
+        addAllConstraints(model, mod_time_variables, student_time_variables, max_sections_per_mod,
+                          max_sections_per_time)
+        objective_stages = getObjectiveStages(model, mod_time_variables, student_time_variables)
+        (status, _) = solveLexicographically(model, objective_stages, SolutionCounter())
+
+        self.assertEqual(status, cp_model.OPTIMAL)
+        self.assertEqual([stage.name for stage in objective_stages], ['number of sections', 'not preferred times'])
+        self.assertEqual([stage.value for stage in objective_stages], weighted_stage_values)
+        self.assertEqual(objective_stages[0].value, 6)
+        for stage in objective_stages:
+            self.assertIsNotNone(stage.solve_seconds)
+
+class TestLexicographicAssignments(test_assignments.TestAssignments):
+    """ Tests that assignment works correctly with the lexicographic objective """
+
+    def setUp(self):
+        super().setUp()
+        config.use_lexicographic_objective = True
+
+    def tearDown(self):
+        config.use_lexicographic_objective = False
+
+class TestLexicographicImpossible(test_impossible.TestImpossible):
+    """ Tests that no assignments can be made for inputs with no solution with the lexicographic objective """
+
+    def setUp(self):
+        super().setUp()
+        config.use_lexicographic_objective = True
+
+    def tearDown(self):
+        config.use_lexicographic_objective = False
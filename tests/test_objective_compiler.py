@@ -0,0 +1,62 @@
+import unittest
+import config
+import objective_functions
+from fractions import Fraction
+from objective_functions import compileObjective, getObjectiveCoefficients, normalizeToIntegers
+from ortools.sat.python import cp_model
+
+def customObjectiveFunction(num_mods, num_students, index, is_mod_coefficient):
+    return (2 * index) + 1
+
+class TestObjectiveCompiler(unittest.TestCase):
+    """ Tests building the objective function as one flat expression with integer coefficients """
+
+    def tearDown(self):
+        config.objective_function = objective_functions.everyone_equal_weight
+
+    def test_normalize_to_integers(self):
+        """ Tests that coefficients become the smallest integers with the same ratios """
+        self.assertEqual(normalizeToIntegers([10000, 1000, 10, -110]), ([1000, 100, 1, -11], Fraction(10)))
+        self.assertEqual(normalizeToIntegers([12.5, 3, -0.25]), ([50, 12, -1], Fraction(1, 4)))
+        self.assertEqual(normalizeToIntegers([7, -1]), ([7, -1], Fraction(1)))
+        self.assertEqual(normalizeToIntegers([0, 0]), ([0, 0], Fraction(1)))
+        self.assertEqual(normalizeToIntegers([]), ([], Fraction(1)))
+
+    def test_coefficient_generators_match_objective_functions(self):
+        """ Tests that every vectorized coefficient generator gives the same coefficients as its function """
+        (num_mods, num_students) = (4, 7)
+        for (objective_function, coefficient_generator) in objective_functions.COEFFICIENT_GENERATORS.items():
+            for (num_people, is_mod_coefficient) in ((num_mods, True), (num_students, False)):
+                with self.subTest(objective_function=objective_function.__name__,
+                                  is_mod_coefficient=is_mod_coefficient):
+                    config.objective_function = objective_function
+                    expected_coefficients = [objective_function(num_mods, num_students, index, is_mod_coefficient)
+                                             for index in range(num_people)]
+                    self.assertEqual(coefficient_generator(num_mods, num_students, range(num_people),
+                                                           is_mod_coefficient), expected_coefficients)
+                    self.assertEqual(getObjectiveCoefficients(num_mods, num_students, range(num_people),
+                                                              is_mod_coefficient), expected_coefficients)
+
+    def test_custom_objective_function(self):
+        """ Tests that an objective function without a coefficient generator is called for each index """
+        config.objective_function = customObjectiveFunction
+        self.assertEqual(getObjectiveCoefficients(3, 5, [0, 2, 4], False), [1, 5, 9])
+
+    def test_objective_value_unchanged(self):
+        """ Tests that normalizing the coefficients does not change the reported objective value """
+        model = cp_model.CpModel()
+        x = model.NewBoolVar('x')
+        y = model.NewBoolVar('y')
+        z = model.NewBoolVar('z')
+        model.Add(x + y + z == 2)
+        compileObjective(model, [x, y, 1 - z], [12.5, 3, -0.25], 7.5)
+
+        solver = cp_model.CpSolver()
+        self.assertEqual(solver.Solve(model), cp_model.OPTIMAL)
+        self.assertEqual([solver.Value(x), solver.Value(y), solver.Value(z)], [0, 1, 1])
+        self.assertAlmostEqual(solver.ObjectiveValue(), 3 + 7.5)
+        self.assertAlmostEqual(solver.BestObjectiveBound(), 3 + 7.5)
+        self.assertEqual(sorted(model.Proto().objective.coeffs), [1, 12, 50])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import config
+from assign_time_slots import getModelFromInputFiles
+from person_time_index import IMPOSSIBLE_TIME, NO_VARIABLE, NOT_PREFERRED_TIME, PREFERRED_TIME, PersonTimeIndex,\
+                              getPersonTimeIndex
+from test_encodings import getTestDataCsvFiles
+TEST_DATA_PREFIX = 'test_data/'
+
+class TestPersonTimeIndex(unittest.TestCase):
+    """ Tests that the per person and per time index matches the 2D List of variables it is built from """
+
+    def setUp(self):
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+        config.aggregate_identical_people = False
+
+    def tearDown(self):
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+
+    def test_index_matches_variables(self):
+        """ Tests that every lookup agrees with scanning the 2D List of variables """
+        for test_data_dir in ('assignment_test_data/different_num_rooms/', 'real_data/fa19_data/'):
+            with self.subTest(test_data_dir=test_data_dir):
+                (_, mod_time_variables, student_time_variables, _, _) = getModelFromInputFiles(
+                    *getTestDataCsvFiles(TEST_DATA_PREFIX + test_data_dir))
+                for person_time_variables in (mod_time_variables, student_time_variables):
+                    self.assertIndexMatches(person_time_variables, getPersonTimeIndex(person_time_variables))
+
+    def test_index_is_built_once(self):
+        """ Tests that the index built with the variables is shared, and plain lists get a new index """
+        (_, mod_time_variables, _, _, _) = getModelFromInputFiles(
+            *getTestDataCsvFiles(TEST_DATA_PREFIX + 'assignment_test_data/basic_functionality/'))
+
+        self.assertIs(getPersonTimeIndex(mod_time_variables), getPersonTimeIndex(mod_time_variables))
+        self.assertIsNot(getPersonTimeIndex(list(mod_time_variables)), getPersonTimeIndex(mod_time_variables))
+
+    def test_impossible_times(self):
+        """ Tests that impossible times allowed by config.allow_impossible_times get their own preference state """
+        config.allow_impossible_times = True
+        config.impossible_time_percentage = 1.0
+        (_, _, student_time_variables, _, _) = getModelFromInputFiles(
+            *getTestDataCsvFiles(TEST_DATA_PREFIX + 'assignment_test_data/basic_functionality/'))
+        student_time_index = getPersonTimeIndex(student_time_variables)
+
+        self.assertEqual(student_time_index.numVariables(), len(student_time_variables) * 3)
+        self.assertEqual(student_time_index.preferenceState(0, 0), PREFERRED_TIME)
+        self.assertEqual(student_time_index.preferenceState(0, 1), IMPOSSIBLE_TIME)
+
+    def test_no_people(self):
+        """ Tests that an index can be built for no people """
+        person_time_index = PersonTimeIndex([], 3)
+        self.assertEqual(person_time_index.numVariables(), 0)
+        self.assertEqual(person_time_index.wrappersAtTime(2), [])
+
+    def assertIndexMatches(self, person_time_variables, person_time_index):
+        num_section_times = len(person_time_variables[0])
+        for (person_index, time_variables_for_person) in enumerate(person_time_variables):
+            self.assertEqual(person_time_index.wrappersForPerson(person_index),
+                             [wrapper for wrapper in time_variables_for_person if wrapper is not None])
+            for (time_index, wrapper) in enumerate(time_variables_for_person):
+                expected_state = NO_VARIABLE
+                if wrapper is not None:
+                    expected_state = PREFERRED_TIME if wrapper.is_preferred_time else NOT_PREFERRED_TIME
+                self.assertEqual(person_time_index.preferenceState(person_index, time_index), expected_state)
+
+        for time_index in range(num_section_times):
+            expected_person_indices = [person_index for person_index in range(len(person_time_variables))
+                                       if person_time_variables[person_index][time_index] is not None]
+            self.assertEqual(list(person_time_index.personIndicesAtTime(time_index)), expected_person_indices)
+            self.assertEqual(person_time_index.wrappersAtTime(time_index),
+                             [person_time_variables[person_index][time_index]
+                              for person_index in expected_person_indices])
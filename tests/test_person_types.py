@@ -0,0 +1,78 @@
+import unittest
+import config
+import objective_functions
+import test_assignments
+import test_impossible
+from person_types import groupPeopleIntoTypes
+from test_encodings import getAllTestDataDirectories, solveTestDataDirectory
+from ortools.sat.python import cp_model
+
+class TestPersonTypes(unittest.TestCase):
+    """ Tests that interchangeable people are grouped into types correctly """
+
+    def setUp(self):
+        config.prefer_contiguous_sections_preferred_times_only = False
+        config.prefer_contiguous_sections_all_possible = False
+        config.num_sections_to_greedy_preselect = 0
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+        config.min_students_per_section = 5
+        config.max_students_per_section = 6
+
+    def tearDown(self):
+        config.aggregate_identical_people = False
+        config.objective_function = objective_functions.everyone_equal_weight
+
+    def test_identical_rows_grouped(self):
+        """ Tests that identical preference rows are grouped in order of first appearance """
+        time_preferences = [['OK', ''], ['', 'OK'], ['OK', ''], ['OK', '(OK)'], ['', 'OK']]
+        person_types = groupPeopleIntoTypes(time_preferences, [1] * 5)
+        self.assertEqual(person_types, [[0, 2], [1, 4], [3]])
+
+    def test_different_coefficients_not_grouped(self):
+        """ Tests that identical rows with different objective coefficients are not grouped """
+        time_preferences = [['OK', ''], ['OK', ''], ['OK', '']]
+        person_types = groupPeopleIntoTypes(time_preferences, [3, 2, 2])
+        self.assertEqual(person_types, [[0], [1, 2]])
+
+    def test_different_extra_keys_not_grouped(self):
+        """ Tests that identical moderator rows with different max sections are not grouped """
+        time_preferences = [['OK', ''], ['OK', ''], ['OK', '']]
+        person_types = groupPeopleIntoTypes(time_preferences, [1, 1, 1], extra_keys=[2, 1, 2])
+        self.assertEqual(person_types, [[0, 2], [1]])
+
+    def test_same_optimal_objective_on_all_test_data(self):
+        """ Tests that aggregating types does not change the status or optimal objective on any test data """
+        for objective_function in (objective_functions.everyone_equal_weight, objective_functions.first_come_first_serve):
+            config.objective_function = objective_function
+            for test_data_dir in getAllTestDataDirectories():
+                with self.subTest(test_data_dir=test_data_dir, objective_function=objective_function.__name__):
+                    config.aggregate_identical_people = False
+                    (individual_status, individual_objective) = solveTestDataDirectory(test_data_dir)
+                    if individual_status not in (cp_model.OPTIMAL, cp_model.INFEASIBLE):
+                        continue
+                    config.aggregate_identical_people = True
+                    (aggregated_status, aggregated_objective) = solveTestDataDirectory(test_data_dir)
+
+                    self.assertEqual(aggregated_status, individual_status)
+                    self.assertEqual(aggregated_objective, individual_objective)
+
+class TestAggregatedAssignments(test_assignments.TestAssignments):
+    """ Tests that assignment works correctly when interchangeable people are aggregated into types """
+
+    def setUp(self):
+        super().setUp()
+        config.aggregate_identical_people = True
+
+    def tearDown(self):
+        config.aggregate_identical_people = False
+
+class TestAggregatedImpossible(test_impossible.TestImpossible):
+    """ Tests that no assignments can be made for inputs with no solution when people are aggregated into types """
+
+    def setUp(self):
+        super().setUp()
+        config.aggregate_identical_people = True
+
+    def tearDown(self):
+        config.aggregate_identical_people = False
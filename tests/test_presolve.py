@@ -0,0 +1,113 @@
+import unittest
+import config
+from assign_time_slots import getModelFromInputFiles
+from csv_input import readDoodlePreferences, readModMaxSectionPreferences
+from objective_functions import create_contiguous_section_decision_variables
+from presolve import presolveInputData
+from test_encodings import getAllTestDataDirectories, getTestDataCsvFiles, solveTestDataDirectory
+TEST_DATA_PREFIX = 'test_data/'
+
+class TestPresolve(unittest.TestCase):
+    """ Tests that reductions obvious from the Doodle polls are applied before the model is built """
+
+    def setUp(self):
+        config.assign_exact_max_sections = False
+        config.maximize_number_of_sections = False
+        config.prefer_contiguous_sections_preferred_times_only = False
+        config.prefer_contiguous_sections_all_possible = False
+        config.num_sections_to_greedy_preselect = 0
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+        config.min_students_per_section = 5
+        config.max_students_per_section = 6
+
+    def tearDown(self):
+        config.presolve_input_data = True
+        config.prefer_contiguous_sections_all_possible = False
+
+    def test_times_without_enough_students_are_removed(self):
+        """ Tests that the variables at times which can not fill a section are fixed to 0 and the other times are
+             bounded """
+        presolved_input = self.presolve('greedy_preselect_test_data/one_mod_two_sections/')
+
+        self.assertEqual(presolved_input.removed_time_indices, {1, 3})
+        self.assertEqual(presolved_input.max_sections_per_time, [1, 0, 2, 0])
+        self.assertEqual(presolved_input.num_fixed_variables, 10)
+
+        # The variables are kept fixed to 0, so contiguous section pairs and greedy preselection are unchanged
+        (_, mod_time_variables, student_time_variables, _, _) = getModelFromInputFiles(
+            *getTestDataCsvFiles(TEST_DATA_PREFIX + 'greedy_preselect_test_data/one_mod_two_sections/'))
+        self.assertEqual(list(mod_time_variables[1][1].variable.Proto().domain), [0, 0])
+        self.assertFalse(mod_time_variables[1][1].allows_contiguous_sections)
+        self.assertEqual(list(student_time_variables[-2][1].variable.Proto().domain), [0, 0])
+
+    def test_single_time_students_are_fixed(self):
+        """ Tests that students with one possible time are fixed to it, including those left so by removed times """
+        presolved_input = self.presolve('greedy_preselect_test_data/one_mod_two_sections/')
+        self.assertEqual(presolved_input.fixed_student_times,
+                         {0 : 0, 1 : 0, 2 : 0, 3 : 0, 4 : 0, 6 : 2, 8 : 2,
+                          10 : 2, 11 : 2, 12 : 2, 13 : 2, 14 : 2, 15 : 2, 16 : 0})
+        self.assertEqual(presolved_input.single_section_mod_indices, {2})
+
+        (_, _, student_time_variables, _, _) = getModelFromInputFiles(
+            *getTestDataCsvFiles(TEST_DATA_PREFIX + 'greedy_preselect_test_data/one_mod_two_sections/'))
+        fixed_variable = student_time_variables[15][2].variable
+        self.assertEqual(list(fixed_variable.Proto().domain), [1, 1])
+
+    def test_only_time_for_someone_is_kept(self):
+        """ Tests that a time which must have a section but can not is left for the feasibility precheck """
+        presolved_input = self.presolve('impossible_test_data/too_few_students/')
+
+        self.assertEqual(presolved_input.removed_time_indices, set())
+        self.assertEqual(presolved_input.num_fixed_variables, 0)
+
+    def test_same_optimal_objective_on_all_test_data(self):
+        """ Tests that presolve does not change the status or optimal objective of any test data """
+        for test_data_dir in getAllTestDataDirectories():
+            with self.subTest(test_data_dir=test_data_dir):
+                self.assertSolvesTheSameWithPresolve(test_data_dir)
+
+    def test_same_optimal_objective_with_contiguous_sections(self):
+        """ Tests that removed times and moderators with max sections 1 keep their contiguous section pairs as
+             constant 0 terms, so the objective offset, random draws, and optimal objective are unchanged """
+        config.prefer_contiguous_sections_all_possible = True
+        for test_data_dir in getAllTestDataDirectories():
+            with self.subTest(test_data_dir=test_data_dir):
+                self.assertSameContiguousSectionPairsWithPresolve(test_data_dir)
+                # The real semesters can not be solved to optimality with every contiguous section pair in test time
+                if not test_data_dir.startswith(TEST_DATA_PREFIX + 'real_data/'):
+                    self.assertSolvesTheSameWithPresolve(test_data_dir)
+
+    def assertSameContiguousSectionPairsWithPresolve(self, test_data_dir):
+        config.presolve_input_data = False
+        expected_num_pairs = self.countContiguousSectionPairs(test_data_dir)
+        config.presolve_input_data = True
+        self.assertEqual(self.countContiguousSectionPairs(test_data_dir), expected_num_pairs)
+
+    def assertSolvesTheSameWithPresolve(self, test_data_dir):
+        config.presolve_input_data = False
+        expected_result = solveTestDataDirectory(test_data_dir)
+        config.presolve_input_data = True
+        self.assertEqual(solveTestDataDirectory(test_data_dir), expected_result)
+
+    def presolve(self, test_data_dir):
+        """
+            Returns:
+                The result of presolveInputData for the test data, with 3 rooms at every time
+        """
+        (mod_doodle_poll_csv_path, mod_max_sections_csv_path,
+         student_doodle_poll_csv_path, _) = getTestDataCsvFiles(TEST_DATA_PREFIX + test_data_dir)
+        (mod_net_ids, mod_time_preferences) = readDoodlePreferences(mod_doodle_poll_csv_path)
+        max_sections_per_mod = readModMaxSectionPreferences(mod_max_sections_csv_path, mod_net_ids)
+        (_, student_time_preferences) = readDoodlePreferences(student_doodle_poll_csv_path)
+        return presolveInputData(mod_time_preferences, max_sections_per_mod, student_time_preferences,
+                                 [3] * len(mod_time_preferences[0]))
+
+    def countContiguousSectionPairs(self, test_data_dir):
+        """
+            Returns:
+                The number of contiguous section terms in the objective for the test data, each of which adds 1
+                 to the objective offset
+        """
+        (model, mod_time_variables, _, _, _) = getModelFromInputFiles(*getTestDataCsvFiles(test_data_dir))
+        return len(create_contiguous_section_decision_variables(model, mod_time_variables))
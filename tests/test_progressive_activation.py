@@ -0,0 +1,86 @@
+import unittest
+import config
+import contextlib
+import io
+from assign_time_slots import assignModeratorsAndStudents, getModelFromInputData, readInputFiles
+from progressive_activation import Activation, countNotPreferredTimes, solveProgressively
+from test_encodings import getTestDataCsvFiles
+from test_slack_relaxation import getImpossibleTestDataCsvFiles
+
+class TestProgressiveActivation(unittest.TestCase):
+    """ Tests solving with preferred times first and adding not preferred times only where they are needed """
+
+    def setUp(self):
+        config.assign_exact_max_sections = False
+        config.num_sections_to_greedy_preselect = 0
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+        config.min_students_per_section = 5
+        config.max_students_per_section = 6
+        config.use_progressive_activation = True
+
+    def tearDown(self):
+        config.use_progressive_activation = False
+        config.progressive_activation_prove_optimal = False
+
+    def test_activation(self):
+        """ Tests that only the not preferred times of activated people and times get a variable """
+        input_data = readInputFiles(*getTestDataCsvFiles('test_data/real_data/fa19_data/'))
+        activation = Activation()
+        self.assertEqual(countNotPreferredTimes(input_data, activation), (0, 175))
+        self.assertEqual(countNotPreferredTimes(input_data, None), (175, 175))
+
+        activation.time_indices.add(0)
+        activation.net_ids.add(input_data[3][0])
+        with contextlib.redirect_stdout(io.StringIO()):
+            (_, mod_time_variables, student_time_variables, _, _) = \
+                getModelFromInputData(*input_data, not_preferred_activation=activation)
+        num_not_preferred_variables = 0
+        for person_time_variables in (mod_time_variables, student_time_variables):
+            for time_variables_for_person in person_time_variables:
+                for person_time_var_wrapper in time_variables_for_person:
+                    if (person_time_var_wrapper is None) or person_time_var_wrapper.is_preferred_time:
+                        continue
+                    self.assertTrue(activation.isActive(person_time_var_wrapper.type_net_ids,
+                                                        person_time_var_wrapper.time_index))
+                    num_not_preferred_variables += 1
+        self.assertEqual(num_not_preferred_variables, countNotPreferredTimes(input_data, activation)[0])
+
+    def test_progressive(self):
+        """ Tests that a feasible input ends without slack and every student assigned """
+        with contextlib.redirect_stdout(io.StringIO()):
+            (extracted_solution, slack_report, num_rounds) = \
+                solveProgressively(readInputFiles(*getTestDataCsvFiles('test_data/real_data/sp19_data/')))
+        self.assertEqual(slack_report.getTotalSlack(), 0)
+        self.assertGreater(num_rounds, 1)
+        self.assertEqual(len(slack_report.unassigned_student_net_ids), 0)
+
+    def test_prove_optimal(self):
+        """ Tests that the final solve with every not preferred time finds the optimal assignment """
+        config.progressive_activation_prove_optimal = True
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            assignModeratorsAndStudents(*getTestDataCsvFiles('test_data/real_data/sp19_data/'))
+        self.assertIn('every not preferred time active to prove optimality', output.getvalue())
+        self.assertEqual(output.getvalue().split('Objective value: ')[-1].split('\n')[0], '30.0')
+
+    def test_partial_assignment(self):
+        """ Tests that an input with no solution still gets a partial assignment """
+        with contextlib.redirect_stdout(io.StringIO()):
+            (_, slack_report, _) = solveProgressively(readInputFiles(*getImpossibleTestDataCsvFiles('too_few_mods')))
+        self.assertGreater(slack_report.getTotalSlack(), 0)
+        self.assertEqual(len(slack_report.unassigned_student_net_ids), 0)
+
+    def test_ignored_with_slack_relaxation(self):
+        """ Tests that slack relaxation takes precedence and says that progressive activation is ignored """
+        config.use_slack_relaxation = True
+        try:
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                assignModeratorsAndStudents(*getImpossibleTestDataCsvFiles('too_few_mods'))
+        finally:
+            config.use_slack_relaxation = False
+        self.assertIn('WARNING: config.use_progressive_activation is ignored with config.use_slack_relaxation',
+                      output.getvalue())
+        self.assertNotIn('not preferred times active', output.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
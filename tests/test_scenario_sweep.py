@@ -0,0 +1,97 @@
+import unittest
+import config
+import objective_functions
+import os
+from component_decomposition import getConfigValues
+from scenario_sweep import Scenario, getScenarioGrid, parseScenarios, runScenarioSweep, solveScenario
+from test_encodings import getTestDataCsvFiles
+TEST_DATA_DIR = 'test_data/real_data/fa19_data/'
+
+class TestScenarioSweep(unittest.TestCase):
+    """ Tests solving several config scenarios in isolation from each other """
+
+    def setUp(self):
+        (config.mod_doodle_poll_csv_path, config.mod_max_sections_csv_path,
+         config.student_doodle_poll_csv_path, config.section_times_csv_path) = getTestDataCsvFiles(TEST_DATA_DIR)
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+        config.num_sections_to_greedy_preselect = 0
+
+    def tearDown(self):
+        config.min_students_per_section = 5
+        config.objective_function = objective_functions.everyone_equal_weight
+        config.max_time_in_seconds = None
+        config.lns_time_budget_seconds = 300
+        config.num_search_workers = 0
+        config.decompose_into_components = False
+
+    def test_scenario_grid(self):
+        """ Tests that every combination of the option values becomes a scenario """
+        scenarios = getScenarioGrid({'min_students_per_section': [4, 5],
+                                     'objective_function': [objective_functions.everyone_equal_weight,
+                                                            objective_functions.first_come_first_serve]})
+        self.assertEqual(len(scenarios), 4)
+        self.assertEqual(scenarios[1].config_overrides, {
+            'min_students_per_section': 4, 'objective_function': objective_functions.first_come_first_serve})
+        self.assertEqual(scenarios[1].name, 'min_students_per_section=4, objective_function=first_come_first_serve')
+        self.assertEqual([scenario.name for scenario in getScenarioGrid({})], ['config.py'])
+
+    def test_parse_scenarios(self):
+        """ Tests that command line values are turned into config values """
+        scenarios = parseScenarios(['min_students_per_section=4,5', 'objective_function=first_come_first_serve',
+                                    'section_times_csv_path=rooms.csv'], None)
+        self.assertEqual([scenario.config_overrides for scenario in scenarios],
+                         [{'min_students_per_section': min_students,
+                           'objective_function': objective_functions.first_come_first_serve,
+                           'section_times_csv_path': 'rooms.csv'} for min_students in (4, 5)])
+
+    def test_scenarios_are_isolated(self):
+        """ Tests that the overrides of one scenario are not kept for the next scenario solved by a process """
+        base_config_values = getConfigValues()
+        solveScenario(Scenario('min 4', {'min_students_per_section': 4}), base_config_values, 10)
+        self.assertEqual(config.min_students_per_section, 4)
+        solveScenario(Scenario('config.py', {}), base_config_values, 10)
+        self.assertEqual(config.min_students_per_section, 5)
+
+    def test_search_workers_share_cpus(self):
+        """ Tests that the processes of a sweep split the CPUs between them unless a scenario sets its own workers """
+        base_config_values = getConfigValues()
+        solveScenario(Scenario('config.py', {}), base_config_values, 10, num_processes=2)
+        self.assertEqual(config.num_search_workers, max(1, os.cpu_count() // 2))
+        solveScenario(Scenario('3 workers', {'num_search_workers': 3}), base_config_values, 10, num_processes=2)
+        self.assertEqual(config.num_search_workers, 3)
+        solveScenario(Scenario('config.py', {}), base_config_values, 10)
+        self.assertEqual(config.num_search_workers, 0)
+
+    def test_decomposition_scenario(self):
+        """ Tests that a scenario is solved with the way of solving its config chooses """
+        test_data_dir = 'test_data/assignment_test_data/basic_functionality/'
+        (config.mod_doodle_poll_csv_path, config.mod_max_sections_csv_path, config.student_doodle_poll_csv_path,
+         config.section_times_csv_path) = (test_data_dir + 'mod_preferences.csv',
+                                           test_data_dir + 'mod_max_sections.csv',
+                                           test_data_dir + 'student_preferences.csv', None)
+        result = solveScenario(Scenario('decompose', {'decompose_into_components': True}), getConfigValues(), 20)
+        self.assertEqual(result.status_name, 'OPTIMAL')
+        self.assertEqual(result.num_sections, 3)
+        self.assertIsNone(result.num_not_preferred_students)
+
+    def test_sweep(self):
+        """ Tests that every scenario is solved and the config of this process is unchanged """
+        scenarios = getScenarioGrid({'objective_function': [objective_functions.everyone_equal_weight,
+                                                             objective_functions.first_come_first_serve],
+                                     'max_students_per_section': [6, 2]})
+        results = runScenarioSweep(scenarios, time_limit_seconds=20, num_processes=2)
+
+        self.assertEqual([result.name for result in results], [scenario.name for scenario in scenarios])
+        self.assertEqual([result.status_name for result in results],
+                         ['OPTIMAL', 'PRECHECK_INFEASIBLE', 'OPTIMAL', 'PRECHECK_INFEASIBLE'])
+        self.assertEqual(results[0].objective, 20)
+        self.assertGreater(results[2].objective, results[0].objective)
+        self.assertIsNone(results[1].num_sections)
+        for result in results:
+            self.assertIsNotNone(result.seconds)
+        self.assertEqual(config.objective_function, objective_functions.everyone_equal_weight)
+        self.assertIsNone(config.max_time_in_seconds)
+
+if __name__ == '__main__':
+    unittest.main()
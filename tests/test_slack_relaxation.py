@@ -0,0 +1,100 @@
+import unittest
+import config
+import contextlib
+import io
+from assign_time_slots import assignModeratorsAndStudents, getModelFromInputData, readInputFiles
+from slack_relaxation import solveRelaxedModel, solveWithSlack
+from test_encodings import getTestDataCsvFiles
+TEST_DATA_PREFIX = 'test_data/impossible_test_data/'
+
+def getImpossibleTestDataCsvFiles(test_name):
+    test_data_dir = TEST_DATA_PREFIX + test_name + '/'
+    return (test_data_dir + 'mod_preferences.csv', test_data_dir + 'mod_max_sections.csv',
+            test_data_dir + 'student_preferences.csv', None)
+
+class TestSlackRelaxation(unittest.TestCase):
+    """ Tests finding a partial assignment with slack variables, allowing impossible times only for stuck people """
+
+    def setUp(self):
+        config.assign_exact_max_sections = False
+        config.num_sections_to_greedy_preselect = 0
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+        config.min_students_per_section = 5
+        config.max_students_per_section = 6
+        config.use_slack_relaxation = True
+
+    def tearDown(self):
+        config.use_slack_relaxation = False
+        config.max_time_in_seconds = None
+        config.num_search_workers = 0
+
+    def solve(self, csv_files):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return solveWithSlack(readInputFiles(*csv_files))
+
+    def test_allowed_impossible_net_ids(self):
+        """ Tests that only the given people get variables for their impossible times """
+        input_data = readInputFiles(*getImpossibleTestDataCsvFiles('too_many_students'))
+        with contextlib.redirect_stdout(io.StringIO()):
+            (_, mod_time_variables, student_time_variables, _, _) = \
+                getModelFromInputData(*input_data, allowed_impossible_net_ids={'c1', 'ysharma5'})
+        impossible_net_ids = {person_time_var_wrapper.net_id
+                              for person_time_variables in (mod_time_variables, student_time_variables)
+                              for time_variables_for_person in person_time_variables
+                              for person_time_var_wrapper in time_variables_for_person
+                              if person_time_var_wrapper is not None and person_time_var_wrapper.is_impossible_time}
+        self.assertEqual(impossible_net_ids, {'c1', 'ysharma5'})
+
+    def test_feasible_input_needs_no_slack(self):
+        """ Tests that an input with a solution gets the same optimal assignment without any impossible time """
+        (extracted_solution, slack_report, allowed_impossible_net_ids) = \
+            self.solve(getTestDataCsvFiles('test_data/real_data/fa19_data/'))
+        self.assertEqual(slack_report.getTotalSlack(), 0)
+        self.assertEqual(allowed_impossible_net_ids, set())
+        self.assertEqual(sum(len(net_ids) for net_ids in extracted_solution.students_assigned_to_times), 132)
+
+    def test_impossible_times_for_stuck_people(self):
+        """ Tests that allowing impossible times for the stuck people removes every relaxation """
+        (extracted_solution, slack_report, allowed_impossible_net_ids) = \
+            self.solve(getImpossibleTestDataCsvFiles('too_many_students'))
+        self.assertEqual(slack_report.getTotalSlack(), 0)
+        self.assertGreater(len(allowed_impossible_net_ids), 0)
+        self.assertLessEqual(set(extracted_solution.impossible_student_net_ids +
+                                 extracted_solution.impossible_mod_net_ids), allowed_impossible_net_ids)
+
+    def test_partial_assignment(self):
+        """ Tests that an input with no solution even with impossible times still gets a partial assignment """
+        (extracted_solution, slack_report, _) = self.solve(getImpossibleTestDataCsvFiles('too_few_mods'))
+        self.assertGreater(slack_report.getTotalSlack(), 0)
+        self.assertEqual(len(slack_report.overloaded_mods), 1)
+
+        (extracted_solution, slack_report, _) = self.solve(getImpossibleTestDataCsvFiles('too_few_students'))
+        self.assertEqual(sorted(slack_report.unassigned_student_net_ids), ['d7', 'd8'])
+        for (mods_in_time, students_in_time) in zip(extracted_solution.mods_assigned_to_times,
+                                                    extracted_solution.students_assigned_to_times):
+            # Every student left in the assignment can be put in a section
+            self.assertLessEqual(len(students_in_time), config.max_students_per_section * len(mods_in_time))
+
+    def test_relaxed_solve_stopped_early(self):
+        """ Tests that a relaxed solve stopped by the time limit is used even when only optimal solutions are """
+        config.only_allow_optimal_solutions = True
+        config.max_time_in_seconds = 0.5
+        config.num_search_workers = 1
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            (extracted_solution, _, _) = \
+                solveRelaxedModel(readInputFiles(*getTestDataCsvFiles('test_data/real_data/fa19_data/')), set())
+        self.assertIn('WARNING: The relaxed solution is not proven optimal (time limit or interrupted)', output.getvalue())
+        self.assertGreater(sum(len(net_ids) for net_ids in extracted_solution.mods_assigned_to_times), 0)
+
+    def test_assign_with_slack(self):
+        """ Tests that the config option makes assigning an infeasible input succeed instead of failing """
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            (mods_assigned_to_times, students_assigned_to_times) = \
+                assignModeratorsAndStudents(*getImpossibleTestDataCsvFiles('no_mod_available_at_time'))
+        self.assertIn('Moderator over their max sections by 1: elainew2', output.getvalue())
+        self.assertEqual(sum(len(net_ids) for net_ids in students_assigned_to_times), 30)
+        self.assertEqual(mods_assigned_to_times[4], ['elainew2'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import config
+from assign_time_slots import SolutionCounter, addConstraintsAndObjective, createSolver, getModelFromInputFiles
+from ortools.sat.python import cp_model
+from solution_extraction import SolutionValues, extractSolution, getSolutionValues
+from test_encodings import getTestDataCsvFiles
+TEST_DATA_PREFIX = 'test_data/'
+
+class TestSolutionExtraction(unittest.TestCase):
+    """ Tests reading the whole solution at once and extracting the assignment from it """
+
+    def setUp(self):
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+        config.num_sections_to_greedy_preselect = 0
+
+    def solveTestDataDirectory(self, test_data_dir, solution_callback=None):
+        (model, mod_time_variables, student_time_variables,
+         max_sections_per_mod, max_sections_per_time) = getModelFromInputFiles(
+            *getTestDataCsvFiles(TEST_DATA_PREFIX + test_data_dir))
+        addConstraintsAndObjective(model, mod_time_variables, student_time_variables, max_sections_per_mod,
+                                   max_sections_per_time)
+        solver = createSolver()
+        if solution_callback is None:
+            status = solver.Solve(model)
+        else:
+            status = solver.SolveWithSolutionCallback(model, solution_callback)
+        self.assertEqual(status, cp_model.OPTIMAL)
+        return solver, mod_time_variables, student_time_variables
+
+    def test_extraction_matches_solver_values(self):
+        """ Tests that the bulk extraction agrees with asking the solver for every variable """
+        for test_data_dir in ('assignment_test_data/different_num_rooms/', 'real_data/fa19_data/'):
+            with self.subTest(test_data_dir=test_data_dir):
+                (solver, mod_time_variables, student_time_variables) = self.solveTestDataDirectory(test_data_dir)
+                extracted_solution = extractSolution(solver, mod_time_variables, student_time_variables,
+                                                     should_build_assignment_matrix=True)
+
+                for (person_time_variables, people_assigned_to_times, assignment_matrix, not_preferred_net_ids) in (
+                        (mod_time_variables, extracted_solution.mods_assigned_to_times,
+                         extracted_solution.mod_assignment_matrix, extracted_solution.not_preferred_mod_net_ids),
+                        (student_time_variables, extracted_solution.students_assigned_to_times,
+                         extracted_solution.student_assignment_matrix,
+                         extracted_solution.not_preferred_student_net_ids)):
+                    expected_not_preferred_net_ids = []
+                    for (person_index, time_variables_for_person) in enumerate(person_time_variables):
+                        for (time_index, wrapper) in enumerate(time_variables_for_person):
+                            expected_value = 0 if wrapper is None else solver.Value(wrapper.variable)
+                            self.assertEqual(assignment_matrix[person_index][time_index], expected_value)
+                            if expected_value > 0:
+                                self.assertIn(wrapper.net_id, people_assigned_to_times[time_index])
+                                if not wrapper.is_preferred_time:
+                                    expected_not_preferred_net_ids.append(wrapper.net_id)
+                    self.assertEqual(sorted(not_preferred_net_ids), sorted(expected_not_preferred_net_ids))
+                    self.assertEqual(sum(len(net_ids) for net_ids in people_assigned_to_times),
+                                     sum(sum(row) for row in assignment_matrix))
+
+                self.assertEqual(extracted_solution.impossible_mod_net_ids, [])
+                self.assertEqual(extracted_solution.impossible_student_net_ids, [])
+
+    def test_assignment_matrix_is_optional(self):
+        """ Tests that the dense assignment matrices are only built when asked for """
+        (solver, mod_time_variables, student_time_variables) = self.solveTestDataDirectory(
+            'assignment_test_data/basic_functionality/')
+        extracted_solution = extractSolution(solver, mod_time_variables, student_time_variables)
+        self.assertIsNone(extracted_solution.mod_assignment_matrix)
+        self.assertIsNone(extracted_solution.student_assignment_matrix)
+
+    def test_snapshot_incumbents(self):
+        """ Tests that the solution callback keeps the full values of the last solution it was given """
+        solution_counter = SolutionCounter(should_snapshot_incumbents=True)
+        (solver, mod_time_variables, student_time_variables) = self.solveTestDataDirectory(
+            'assignment_test_data/different_num_rooms/', solution_counter)
+
+        incumbent = solution_counter.incumbent
+        self.assertIsInstance(incumbent, SolutionValues)
+        self.assertEqual(list(incumbent.values), list(solver.ResponseProto().solution))
+        self.assertEqual(incumbent.objective_value, solver.ObjectiveValue())
+        incumbent_solution = extractSolution(incumbent, mod_time_variables, student_time_variables)
+        final_solution = extractSolution(solver, mod_time_variables, student_time_variables)
+        self.assertEqual(incumbent_solution.students_assigned_to_times, final_solution.students_assigned_to_times)
+
+        self.assertIsNone(SolutionCounter().incumbent)
+        self.assertIs(getSolutionValues(incumbent), incumbent)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import unittest
+import assign_time_slots
+import config
+import os
+import shutil
+import solve_cache
+import tempfile
+import time
+from solve_cache import MODEL_CONFIG_OPTIONS, SOLVER_CONFIG_OPTIONS, SolveCache, assignModeratorsAndStudentsWithCache,\
+                        getCacheKey, hashInputFiles
+from test_encodings import getTestDataCsvFiles
+from unittest import mock
+TEST_DATA_DIR = 'test_data/real_data/fa19_data/'
+
+class TestSolveCache(unittest.TestCase):
+    """ Tests reusing the CP model and assignment of an earlier run with the same inputs """
+
+    def setUp(self):
+        self.cache_directory = tempfile.mkdtemp()
+        config.solve_cache_directory = self.cache_directory
+        config.solve_cache_max_megabytes = 512
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+        config.num_sections_to_greedy_preselect = 0
+        self.csv_files = getTestDataCsvFiles(TEST_DATA_DIR)
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_directory)
+        config.solve_cache_directory = '.solve_cache'
+        config.random_seed = 1
+        config.checkpoint_incumbents = False
+        config.checkpoint_path = None
+
+    def test_unchanged_run_skips_solving(self):
+        """ Tests that a second run with the same inputs returns the first run's assignment without building a model """
+        first_assignment = assignModeratorsAndStudentsWithCache(*self.csv_files)
+        with mock.patch.object(assign_time_slots, 'getModelFromInputFiles', side_effect=AssertionError), \
+             mock.patch.object(assign_time_slots, 'createSolver', side_effect=AssertionError):
+            self.assertEqual(assignModeratorsAndStudentsWithCache(*self.csv_files), first_assignment)
+
+    def test_solver_option_change_skips_model_construction(self):
+        """ Tests that changing only a solver option solves the cached model again """
+        (mods_assigned_to_times, students_assigned_to_times) = assignModeratorsAndStudentsWithCache(*self.csv_files)
+        config.random_seed = 2
+        with mock.patch.object(assign_time_slots, 'getModelFromInputFiles', side_effect=AssertionError):
+            (cached_model_mods_assigned_to_times,
+             cached_model_students_assigned_to_times) = assignModeratorsAndStudentsWithCache(*self.csv_files)
+
+        self.assertEqual(sorted(map(len, cached_model_mods_assigned_to_times)),
+                         sorted(map(len, mods_assigned_to_times)))
+        self.assertEqual(sorted(net_id for net_ids in cached_model_students_assigned_to_times for net_id in net_ids),
+                         sorted(net_id for net_ids in students_assigned_to_times for net_id in net_ids))
+        self.assertEqual(len(os.listdir(os.path.join(self.cache_directory, solve_cache.RESULTS_DIRECTORY))), 2)
+
+    def test_cached_model_writes_checkpoints(self):
+        """ Tests that solving the cached model still checkpoints, since it is solved like an uncached model """
+        config.checkpoint_incumbents = True
+        config.checkpoint_path = os.path.join(self.cache_directory, 'checkpoint.json')
+        assignModeratorsAndStudentsWithCache(*self.csv_files)
+        self.assertTrue(os.path.exists(config.checkpoint_path))
+        os.remove(config.checkpoint_path)
+
+        config.random_seed = 2
+        with mock.patch.object(assign_time_slots, 'getModelFromInputFiles', side_effect=AssertionError):
+            assignModeratorsAndStudentsWithCache(*self.csv_files)
+        self.assertTrue(os.path.exists(config.checkpoint_path))
+
+    def test_cache_keys(self):
+        """ Tests which changes to the inputs and config options make a new cache entry """
+        input_hash = hashInputFiles(self.csv_files)
+        model_key = getCacheKey(input_hash, MODEL_CONFIG_OPTIONS)
+        result_key = getCacheKey(input_hash, MODEL_CONFIG_OPTIONS + SOLVER_CONFIG_OPTIONS)
+        self.assertNotEqual(input_hash, hashInputFiles(getTestDataCsvFiles('test_data/real_data/sp19_data/')))
+        self.assertNotEqual(input_hash, hashInputFiles(self.csv_files[:3] + (None,)))
+
+        # Output options are not part of any key
+        self.assertNotIn('output_csv_path', MODEL_CONFIG_OPTIONS + SOLVER_CONFIG_OPTIONS)
+        self.assertNotIn('mod_net_id_to_name_csv_path', MODEL_CONFIG_OPTIONS + SOLVER_CONFIG_OPTIONS)
+
+        config.random_seed = 2
+        self.assertEqual(getCacheKey(input_hash, MODEL_CONFIG_OPTIONS), model_key)
+        self.assertNotEqual(getCacheKey(input_hash, MODEL_CONFIG_OPTIONS + SOLVER_CONFIG_OPTIONS), result_key)
+
+    def test_prune_least_recently_used(self):
+        """ Tests that pruning removes the least recently used entries first """
+        cache = SolveCache(self.cache_directory, None)
+        for (key_number, last_used) in enumerate((300, 100, 200)):
+            cache.saveResult(str(key_number), None, None, [['mod']], [['student'] * 1000])
+            os.utime(cache.getPath(solve_cache.RESULTS_DIRECTORY, str(key_number), '.json'),
+                     (time.time() - last_used, time.time() - last_used))
+
+        self.assertEqual([key for (_, key, _, _) in cache.getEntries()], ['0', '2', '1'])
+        entry_megabytes = cache.getEntries()[0][2] / (1024 * 1024)
+        self.assertEqual(cache.prune(max_megabytes=2.5 * entry_megabytes), 1)
+        self.assertEqual([key for (_, key, _, _) in cache.getEntries()], ['2', '1'])
+        self.assertEqual(cache.prune(max_age_days=150 / (24 * 60 * 60)), 1)
+        self.assertEqual([key for (_, key, _, _) in cache.getEntries()], ['1'])
+        self.assertIsNotNone(cache.loadResult('1'))
+        self.assertIsNone(cache.loadResult('0'))
+
+if __name__ == '__main__':
+    unittest.main()
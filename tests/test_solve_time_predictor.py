@@ -0,0 +1,122 @@
+import unittest
+import config
+import contextlib
+import io
+import json
+import math
+import os
+import shutil
+import tempfile
+from assign_time_slots import assignModeratorsAndStudents, getModelFromInputFiles
+from constraints import addStudentsPerSectionTimeConstraint
+from objective_functions import create_contiguous_section_decision_variables
+from person_time_index import getPersonTimeIndex
+from solve_time_predictor import FEATURE_NAMES, SolveTimeModel, dryRun, fitSolveTimeModel, getModelFeatures,\
+                                 solveLinearSystem
+from test_encodings import getTestDataCsvFiles
+TEST_DATA_DIR = 'test_data/real_data/fa19_data/'
+
+class TestSolveTimePredictor(unittest.TestCase):
+    """ Tests predicting the solve time of a model from its features before solving it """
+
+    def setUp(self):
+        self.history_directory = tempfile.mkdtemp()
+        self.csv_files = getTestDataCsvFiles(TEST_DATA_DIR)
+        config.benchmark_history_path = os.path.join(self.history_directory, 'history.json')
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+        config.num_sections_to_greedy_preselect = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.history_directory)
+        config.benchmark_history_path = 'benchmark_history.json'
+        config.predict_solve_time = False
+        config.refuse_slow_predicted_solves = False
+        config.use_compact_students_per_section_time_encoding = True
+        config.prefer_contiguous_sections_preferred_times_only = False
+
+    def buildModel(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return getModelFromInputFiles(*self.csv_files)
+
+    def writeHistory(self, solve_seconds):
+        """ Writes a benchmark history where every result is the fa19 model solved in solve_seconds """
+        (_, mod_time_variables, student_time_variables, max_sections_per_mod, max_sections_per_time) = \
+            self.buildModel()
+        features = getModelFeatures(mod_time_variables, student_time_variables, max_sections_per_mod,
+                                    max_sections_per_time)
+        results = [{'status': 'OPTIMAL', 'features': features, 'phase_seconds': {'solve': solve_seconds}}] * 3
+        with open(config.benchmark_history_path, 'w', encoding='utf-8') as history_file:
+            json.dump([{'results': results}], history_file)
+
+    def test_features(self):
+        """ Tests that the variable counts match the variables the constraints and objective function create """
+        config.use_compact_students_per_section_time_encoding = False
+        config.prefer_contiguous_sections_preferred_times_only = True
+        (model, mod_time_variables, student_time_variables, max_sections_per_mod, max_sections_per_time) = \
+            self.buildModel()
+        features = getModelFeatures(mod_time_variables, student_time_variables, max_sections_per_mod,
+                                    max_sections_per_time)
+        self.assertEqual(set(features), set(FEATURE_NAMES))
+        self.assertEqual(features['person_time_variables'], getPersonTimeIndex(mod_time_variables).numVariables() +
+                         getPersonTimeIndex(student_time_variables).numVariables())
+
+        num_variables = len(model.Proto().variables)
+        with contextlib.redirect_stdout(io.StringIO()):
+            addStudentsPerSectionTimeConstraint(model, mod_time_variables, student_time_variables,
+                                                max_sections_per_time)
+            self.assertEqual(features['students_per_section_time_variables'],
+                             len(model.Proto().variables) - num_variables)
+            num_variables = len(model.Proto().variables)
+            create_contiguous_section_decision_variables(model, mod_time_variables)
+        self.assertEqual(features['contiguous_variables'], len(model.Proto().variables) - num_variables)
+
+        self.assertGreater(features['preferred_density'], features['not_preferred_density'])
+        self.assertLess(features['preferred_density'] + features['not_preferred_density'], 1)
+        self.assertGreater(features['supply_demand_slack'], 0)
+
+    def test_fit(self):
+        """ Tests that a solve time which is exponential in one feature is fitted """
+        self.assertEqual(solveLinearSystem([[0.0, 2.0], [4.0, 1.0]], [4.0, 6.0]), [1.0, 2.0])
+
+        training_results = []
+        for num_variables in (100, 1000, 10000, 100000):
+            features = {feature_name: 0.5 for feature_name in FEATURE_NAMES}
+            features['person_time_variables'] = num_variables
+            training_results.append({'features': features,
+                                     'phase_seconds': {'solve': (num_variables + 1) / 1000}})
+        solve_time_model = fitSolveTimeModel(training_results, ridge_penalty=1e-9)
+        self.assertIsInstance(solve_time_model, SolveTimeModel)
+        for training_result in training_results:
+            self.assertAlmostEqual(math.log(solve_time_model.predictSeconds(training_result['features'])),
+                                   math.log(training_result['phase_seconds']['solve']), places=4)
+
+    def test_warn_and_refuse(self):
+        """ Tests that a solve predicted to be too slow is warned about, or refused before solving """
+        self.writeHistory(solve_seconds=1000)
+        config.predict_solve_time = True
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            assignModeratorsAndStudents(*self.csv_files)
+        self.assertIn('Predicted solve time: 1000.0 seconds, fitted on 3 benchmark results', output.getvalue())
+        self.assertIn('WARNING: The predicted solve time is over 60 seconds', output.getvalue())
+
+        config.refuse_slow_predicted_solves = True
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            self.assertRaises(AssertionError, assignModeratorsAndStudents, *self.csv_files)
+        self.assertNotIn('Objective value', output.getvalue())
+
+    def test_dry_run(self):
+        """ Tests that a dry run predicts without solving, and without a history only prints the features """
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            self.assertIsNone(dryRun(*self.csv_files))
+        self.assertIn('Cannot predict the solve time', output.getvalue())
+        self.assertIn('person_time_variables: ', output.getvalue())
+
+        self.writeHistory(solve_seconds=2)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            self.assertAlmostEqual(dryRun(*self.csv_files), 2)
+        self.assertIn('Dry run, the model was not solved', output.getvalue())
+        self.assertNotIn('Objective value', output.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
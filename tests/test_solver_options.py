@@ -0,0 +1,60 @@
+import unittest
+import config
+from assign_sections import applyConfigOverrides, parseCommandLineArguments
+from assign_time_slots import assignModeratorsAndStudents, createSolver
+TEST_DATA_PREFIX = 'test_data/assignment_test_data/'
+
+class TestSolverOptions(unittest.TestCase):
+    """ Tests that solver options are taken from the config and command line """
+
+    def setUp(self):
+        self.original_config_values = {option_name : getattr(config, option_name)
+                                       for option_name in ('num_search_workers', 'max_time_in_seconds',
+                                                           'relative_gap_limit', 'absolute_gap_limit', 'random_seed',
+                                                           'deterministic_interleave_search',
+                                                           'only_allow_optimal_solutions')}
+
+    def tearDown(self):
+        for (option_name, value) in self.original_config_values.items():
+            setattr(config, option_name, value)
+
+    def test_solver_parameters_from_config(self):
+        """ Tests that the solver parameters are set from the config file """
+        config.num_search_workers = 3
+        config.max_time_in_seconds = 12.5
+        config.relative_gap_limit = 0.01
+        config.absolute_gap_limit = 2.0
+        config.random_seed = 42
+        config.deterministic_interleave_search = True
+
+        solver = createSolver()
+        self.assertEqual(solver.parameters.num_search_workers, 3)
+        self.assertEqual(solver.parameters.max_time_in_seconds, 12.5)
+        self.assertAlmostEqual(solver.parameters.relative_gap_limit, 0.01)
+        self.assertEqual(solver.parameters.absolute_gap_limit, 2.0)
+        self.assertEqual(solver.parameters.random_seed, 42)
+        self.assertTrue(solver.parameters.interleave_search)
+
+    def test_command_line_overrides_config(self):
+        """ Tests that only the options given on the command line override the config file """
+        config.num_search_workers = 1
+        config.random_seed = 7
+        applyConfigOverrides(parseCommandLineArguments(['--num-search-workers', '8', '--max-time-in-seconds', '30',
+                                                        '--deterministic-interleave-search', '--allow-non-optimal']))
+
+        self.assertEqual(config.num_search_workers, 8)
+        self.assertEqual(config.max_time_in_seconds, 30.0)
+        self.assertTrue(config.deterministic_interleave_search)
+        self.assertFalse(config.only_allow_optimal_solutions)
+        self.assertEqual(config.random_seed, 7)
+
+    def test_same_seed_same_assignment(self):
+        """ Tests that two runs with the same seed and deterministic search give the same assignment """
+        config.num_search_workers = 2
+        config.random_seed = 1234
+        config.deterministic_interleave_search = True
+        test_data_dir = TEST_DATA_PREFIX + 'different_num_rooms/'
+        csv_files = (test_data_dir + 'mod_preferences.csv', test_data_dir + 'mod_max_sections.csv',
+                     test_data_dir + 'student_preferences.csv', test_data_dir + 'section_times.csv')
+
+        self.assertEqual(assignModeratorsAndStudents(*csv_files), assignModeratorsAndStudents(*csv_files))
@@ -0,0 +1,114 @@
+import unittest
+import config
+import contextlib
+import csv
+import io
+import os
+import shutil
+import solver_progress
+import tempfile
+import time
+from assign_time_slots import addAllConstraints, getModelFromInputFiles, solveModel, verifyEverySolve,\
+                              verifySolutionStatus
+from ortools.sat.python import cp_model
+from test_encodings import getTestDataCsvFiles
+
+class TestSolverProgress(unittest.TestCase):
+    """ Tests recording a timeline of the solutions found and stopping the search early """
+
+    def setUp(self):
+        self.output_directory = tempfile.mkdtemp()
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+        config.num_sections_to_greedy_preselect = 0
+        config.num_search_workers = 1
+
+    def tearDown(self):
+        shutil.rmtree(self.output_directory)
+        config.num_search_workers = 0
+        config.max_time_in_seconds = None
+        config.relative_gap_limit = 0.0
+        config.maximize_number_of_sections = False
+        config.early_stop_no_improvement_seconds = None
+        config.early_stop_target_objective = None
+        config.solver_timeline_csv_path = None
+
+    def solve(self, test_data_dir):
+        """
+            Returns:
+                (status, solver, solution_counter, seconds taken to solve) for the data with the current config
+        """
+        with contextlib.redirect_stdout(io.StringIO()):
+            (model, mod_time_variables, student_time_variables,
+             max_sections_per_mod, max_sections_per_time) = getModelFromInputFiles(*getTestDataCsvFiles(test_data_dir))
+            addAllConstraints(model, mod_time_variables, student_time_variables, max_sections_per_mod,
+                              max_sections_per_time)
+            start_time = time.time()
+            (status, solver, solution_counter, _) = solveModel(model, mod_time_variables, student_time_variables,
+                                                               max_sections_per_mod)
+        return (status, solver, solution_counter, time.time() - start_time)
+
+    def test_timeline(self):
+        """ Tests that every solution is recorded and written to the timeline CSV """
+        config.solver_timeline_csv_path = os.path.join(self.output_directory, 'timeline.csv')
+        (status, _, solution_counter, _) = self.solve('test_data/real_data/sp19_data/')
+        self.assertEqual(status, cp_model.OPTIMAL)
+        self.assertEqual(solution_counter.stop_reason, solver_progress.STOP_PROVEN_OPTIMAL)
+        self.assertEqual(len(solution_counter.timeline), solution_counter.solution_count)
+        self.assertEqual(solution_counter.timeline[-1].objective, 30)
+
+        with open(config.solver_timeline_csv_path, 'r', encoding='utf-8') as timeline_file:
+            rows = list(csv.reader(timeline_file))
+        self.assertEqual(rows[0], solver_progress.TIMELINE_COLUMNS)
+        self.assertEqual(len(rows), 1 + solution_counter.solution_count)
+        objectives = [float(row[2]) for row in rows[1:]]
+        self.assertEqual(objectives, sorted(objectives, reverse=True))
+        for row in rows[1:]:
+            self.assertLessEqual(float(row[3]), float(row[2]))
+
+    def test_target_objective(self):
+        """ Tests that the search stops at the first solution reaching the target, which is accepted """
+        config.early_stop_target_objective = 1000
+        (status, solver, solution_counter, _) = self.solve('test_data/real_data/sp19_data/')
+        self.assertEqual(solution_counter.solution_count, 1)
+        self.assertLessEqual(solver.ObjectiveValue(), 1000)
+        if status == cp_model.FEASIBLE:
+            self.assertEqual(solution_counter.stop_reason, solver_progress.STOP_TARGET_OBJECTIVE)
+            with contextlib.redirect_stdout(io.StringIO()):
+                verifySolutionStatus(status, solution_counter.stop_reason)
+
+    def test_no_improvement(self):
+        """ Tests that a search which stops improving is stopped long before its time limit """
+        config.maximize_number_of_sections = True
+        config.max_time_in_seconds = 30
+        config.early_stop_no_improvement_seconds = 1
+        (status, _, solution_counter, seconds) = self.solve('test_data/real_data/fa19_data/')
+        self.assertEqual(status, cp_model.FEASIBLE)
+        self.assertEqual(solution_counter.stop_reason, solver_progress.STOP_NO_IMPROVEMENT)
+        self.assertLess(seconds, 15)
+
+    def test_gap_limit(self):
+        """ Tests that the search stops at the first solution within the gap limit, which is told apart from optimal """
+        config.maximize_number_of_sections = True
+        config.relative_gap_limit = 0.5
+        config.max_time_in_seconds = 20
+        (status, solver, solution_counter, seconds) = self.solve('test_data/real_data/fa19_data/')
+        self.assertIn(status, (cp_model.OPTIMAL, cp_model.FEASIBLE))
+        self.assertEqual(solution_counter.stop_reason, solver_progress.STOP_RELATIVE_GAP)
+        self.assertLess(seconds, 10)
+        self.assertLessEqual(solver_progress.getRelativeGap(solver.ObjectiveValue(), solver.BestObjectiveBound()), 0.5)
+
+    def test_verify_every_solve(self):
+        """ Tests that an earlier lexicographic stage stopped by the time limit fails even if the last was optimal """
+        config.only_allow_optimal_solutions = True
+        solve_results = [(cp_model.OPTIMAL, solver_progress.STOP_PROVEN_OPTIMAL),
+                         (cp_model.FEASIBLE, solver_progress.STOP_NO_IMPROVEMENT)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            verifyEverySolve(solve_results)
+
+        solve_results.insert(0, (cp_model.FEASIBLE, solver_progress.STOP_TIME_LIMIT))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertRaises(AssertionError, verifyEverySolve, solve_results)
+
+if __name__ == '__main__':
+    unittest.main()
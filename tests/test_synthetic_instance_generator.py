@@ -0,0 +1,125 @@
+import unittest
+import config
+import contextlib
+import filecmp
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from assign_time_slots import assignModeratorsAndStudents, getModelFromInputData, readInputFiles
+from csv_input import readDoodlePreferences, readModMaxSectionPreferences, readSectionTimeInfo
+from feasibility_precheck import verifyFeasibilityPrecheck
+from synthetic_instance_generator import NOT_PREFERRED_TIME, PREFERRED_TIME, STUDENT_DOODLE_EXPORT_CSV_NAME,\
+                                         SyntheticInstanceParameters, generateSyntheticInstance, writeSyntheticInstance
+
+class TestSyntheticInstanceGenerator(unittest.TestCase):
+    """ Tests generating Doodle poll instances of any size for scaling tests """
+
+    def setUp(self):
+        self.output_directory = tempfile.mkdtemp()
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+        config.num_sections_to_greedy_preselect = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.output_directory)
+
+    def test_files_are_readable(self):
+        """ Tests that every file is read by the same functions as the real input files """
+        parameters = SyntheticInstanceParameters(num_students=120, weekdays=['Monday', 'Tuesday'], slots_per_weekday=5,
+                                                 rooms_per_time=2, sections_per_room=3)
+        (mod_csv_path, max_sections_csv_path, student_csv_path, section_times_csv_path) = \
+            writeSyntheticInstance(generateSyntheticInstance(parameters), self.output_directory)
+
+        (mod_net_ids, mod_time_preferences) = readDoodlePreferences(mod_csv_path)
+        (student_net_ids, student_time_preferences) = readDoodlePreferences(student_csv_path)
+        max_sections_per_mod = readModMaxSectionPreferences(max_sections_csv_path, mod_net_ids)
+        (section_times, rooms_per_time) = readSectionTimeInfo(section_times_csv_path)
+
+        self.assertEqual(len(student_net_ids), 120)
+        self.assertEqual(len(set(student_net_ids)), 120)
+        self.assertGreaterEqual(sum(max_sections_per_mod), parameters.getNumSectionsNeeded())
+        self.assertEqual(section_times[:2], ['Monday 10 AM - 12 PM', 'Monday 12 PM - 2 PM'])
+        self.assertEqual(section_times[-1], 'Tuesday 6 PM - 8 PM')
+        self.assertEqual([[room.max_sections for room in rooms] for rooms in rooms_per_time], [[3, 3]] * 10)
+        for time_preferences in mod_time_preferences + student_time_preferences:
+            self.assertEqual(len(time_preferences), 10)
+            self.assertTrue(set(time_preferences) <= {PREFERRED_TIME, NOT_PREFERRED_TIME, ''})
+
+    def test_same_seed_same_instance(self):
+        """ Tests that a seed always gives the same files and another seed gives different ones """
+        first_csv_files = writeSyntheticInstance(generateSyntheticInstance(SyntheticInstanceParameters(seed=3)),
+                                                 os.path.join(self.output_directory, 'first'))
+        second_csv_files = writeSyntheticInstance(generateSyntheticInstance(SyntheticInstanceParameters(seed=3)),
+                                                  os.path.join(self.output_directory, 'second'))
+        other_csv_files = writeSyntheticInstance(generateSyntheticInstance(SyntheticInstanceParameters(seed=4)),
+                                                 os.path.join(self.output_directory, 'other'))
+        for (first_csv_path, second_csv_path) in zip(first_csv_files, second_csv_files):
+            self.assertTrue(filecmp.cmp(first_csv_path, second_csv_path, shallow=False))
+        self.assertFalse(filecmp.cmp(first_csv_files[2], other_csv_files[2], shallow=False))
+
+    def test_duplicate_rows_match_preprocessing(self):
+        """ Tests that the raw Doodle export preprocesses into the same preferences as the written CSV """
+        instance = generateSyntheticInstance(SyntheticInstanceParameters(num_students=200, duplicate_row_rate=0.2))
+        self.assertGreater(len(instance.student_submissions), len(instance.student_net_ids))
+        csv_files = writeSyntheticInstance(instance, self.output_directory)
+
+        export_csv_path = os.path.join(self.output_directory, STUDENT_DOODLE_EXPORT_CSV_NAME)
+        subprocess.run([sys.executable, 'scripts/preprocess_doodle_poll.py', export_csv_path], check=True,
+                       stdout=subprocess.DEVNULL)
+        self.assertTrue(filecmp.cmp(export_csv_path[:-len('.csv')] + '_no_duplicates.csv', csv_files[2],
+                                    shallow=False))
+
+    def test_planted_solution_is_feasible(self):
+        """ Tests that the planted assignment fits every preference and capacity, so the instance can be solved """
+        parameters = SyntheticInstanceParameters(num_students=90, preferred_fraction=0.05, not_preferred_fraction=0.05,
+                                                 popularity_skew=2.0, seed=7)
+        instance = generateSyntheticInstance(parameters)
+        mod_preferences = dict(zip(instance.mod_net_ids, instance.mod_time_preferences))
+        student_preferences = dict(zip(instance.student_net_ids, instance.student_time_preferences))
+        for (time_index, rooms) in enumerate(instance.rooms_per_time):
+            planted_mod_net_ids = instance.planted_mods_assigned_to_times[time_index]
+            planted_student_net_ids = instance.planted_students_assigned_to_times[time_index]
+            self.assertLessEqual(len(planted_mod_net_ids), sum(max_sections for (_, max_sections) in rooms))
+            self.assertEqual(len(set(planted_mod_net_ids)), len(planted_mod_net_ids))
+            self.assertLessEqual(len(planted_mod_net_ids) * parameters.min_students_per_section,
+                                 len(planted_student_net_ids))
+            self.assertLessEqual(len(planted_student_net_ids),
+                                 len(planted_mod_net_ids) * parameters.max_students_per_section)
+            for net_id in planted_mod_net_ids:
+                self.assertNotEqual(mod_preferences[net_id][time_index], '')
+            for net_id in planted_student_net_ids:
+                self.assertNotEqual(student_preferences[net_id][time_index], '')
+        self.assertEqual(sorted(net_id for net_ids in instance.planted_students_assigned_to_times for net_id in net_ids),
+                         sorted(instance.student_net_ids))
+        self.assertEqual(sorted(net_id for net_ids in instance.planted_mods_assigned_to_times for net_id in net_ids),
+                         sorted(instance.mod_net_ids))
+
+        (_, students_assigned_to_times) = assignModeratorsAndStudents(
+            *writeSyntheticInstance(instance, self.output_directory))
+        self.assertEqual(sum(map(len, students_assigned_to_times)), 90)
+
+    def test_every_mod_planted(self):
+        """ Tests that every mod gets a planted section, so no mod is left without a time they can make """
+        for seed in range(30):
+            with self.subTest(seed=seed):
+                instance = generateSyntheticInstance(SyntheticInstanceParameters(num_students=330, seed=seed,
+                                                                                 preferred_fraction=0.1,
+                                                                                 not_preferred_fraction=0.05))
+                self.assertEqual({net_id for net_ids in instance.planted_mods_assigned_to_times for net_id in net_ids},
+                                 set(instance.mod_net_ids))
+
+                csv_files = writeSyntheticInstance(instance, os.path.join(self.output_directory, str(seed)))
+                with contextlib.redirect_stdout(io.StringIO()):
+                    (_, mod_time_variables, student_time_variables, max_sections_per_mod, max_sections_per_time) = \
+                        getModelFromInputData(*readInputFiles(*csv_files))
+                    verifyFeasibilityPrecheck(mod_time_variables, student_time_variables, max_sections_per_mod,
+                                              max_sections_per_time)
+
+        self.assertRaises(AssertionError, generateSyntheticInstance,
+                          SyntheticInstanceParameters(num_students=30, num_mods=10))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import config
+import contextlib
+import io
+import os
+import test_assignments
+import test_impossible
+from assign_time_slots import getModelFromInputFiles
+from objective_functions import NOT_PREFERRED_PRIORITY_MULTIPLIER
+from ortools.sat.python import cp_model
+from two_phase_engine import MinCostFlowNetwork, placeStudents, solveTwoPhase
+from test_encodings import getTestDataCsvFiles, solveTestDataDirectory
+TEST_DATA_PREFIX = 'test_data/assignment_test_data/'
+REAL_DATA_PREFIX = 'test_data/real_data/'
+
+class TestTwoPhaseEngine(unittest.TestCase):
+    """ Tests that choosing moderator times first and then placing students with a flow works correctly """
+
+    def setUp(self):
+        config.assign_exact_max_sections = False
+        config.maximize_number_of_sections = False
+        config.prefer_contiguous_sections_preferred_times_only = False
+        config.prefer_contiguous_sections_all_possible = False
+        config.num_sections_to_greedy_preselect = 0
+        config.allow_impossible_times = False
+        config.impossible_time_percentage = 0.0
+        config.min_students_per_section = 5
+        config.max_students_per_section = 6
+
+    def test_min_cost_flow(self):
+        """ Tests that the cheapest maximum flow is found """
+        network = MinCostFlowNetwork()
+        network.addEdge('source', 'a', 2, 0)
+        network.addEdge('a', 'sink', 1, 5)
+        network.addEdge('a', 'b', 2, 1)
+        network.addEdge('b', 'sink', 1, 1)
+
+        self.assertEqual(network.minCostMaxFlow('source', 'sink'), (2, 7))
+
+    def test_students_fill_minimum_first(self):
+        """ Tests that students are moved to not preferred times when needed to fill a section to its minimum """
+        test_data_dir = TEST_DATA_PREFIX + 'different_num_rooms/'
+        (_, _, student_time_variables, _, _) = getModelFromInputFiles(*getTestDataCsvFiles(test_data_dir))
+        (student_values, student_cost, cut) = placeStudents(student_time_variables, [5, 2, 1], (5, 44))
+
+        self.assertIsNone(cut)
+        self.assertEqual(sum(student_values.values()), 44)
+        self.assertEqual(student_cost, 0)
+
+    def test_too_few_sections_gives_cut(self):
+        """ Tests that sections which can not hold every student give a constraint on the students at those times """
+        test_data_dir = TEST_DATA_PREFIX + 'different_num_rooms/'
+        (_, _, student_time_variables, _, _) = getModelFromInputFiles(*getTestDataCsvFiles(test_data_dir))
+        (student_values, _, cut) = placeStudents(student_time_variables, [4, 2, 1], (5, 44))
+
+        self.assertIsNone(student_values)
+        self.assertEqual(cut, ([0], True, 27))
+
+    def test_same_objective_on_test_data(self):
+        """ Tests that the two phase engine finds the same status and objective as the full model """
+        for test_data_name in ('basic_functionality', 'chooses_preferred_times', 'different_num_rooms',
+                               'four_sections_one_aamir', 'three_mods_one_section_time', 'two_sections_one_mod'):
+            with self.subTest(test_data_name=test_data_name):
+                test_data_dir = TEST_DATA_PREFIX + test_data_name + '/'
+                (expected_status, expected_objective) = solveTestDataDirectory(test_data_dir)
+                (status, objective, _, _) = solveTwoPhase(*getModelFromInputFiles(*getTestDataCsvFiles(test_data_dir)))
+
+                self.assertEqual(status, expected_status)
+                self.assertEqual(round(objective, 3), expected_objective)
+
+    def test_within_bound_on_real_data(self):
+        """
+            Tests that on every real semester the two phase engine is at most one not preferred time worse than the
+             full model, and only claims optimality when it matches it
+        """
+        for test_data_name in sorted(os.listdir(REAL_DATA_PREFIX)):
+            with self.subTest(test_data_name=test_data_name):
+                test_data_dir = REAL_DATA_PREFIX + test_data_name + '/'
+                with contextlib.redirect_stdout(io.StringIO()):
+                    (expected_status, expected_objective) = solveTestDataDirectory(test_data_dir)
+                    (status, objective, _, _) = \
+                        solveTwoPhase(*getModelFromInputFiles(*getTestDataCsvFiles(test_data_dir)))
+
+                if expected_status == cp_model.INFEASIBLE:
+                    self.assertEqual(status, cp_model.INFEASIBLE)
+                    continue
+                self.assertIn(status, (cp_model.OPTIMAL, cp_model.FEASIBLE))
+                self.assertLessEqual(round(objective, 3), expected_objective + NOT_PREFERRED_PRIORITY_MULTIPLIER)
+                if status == cp_model.OPTIMAL:
+                    self.assertEqual(round(objective, 3), expected_objective)
+
+class TestTwoPhaseAssignments(test_assignments.TestAssignments):
+    """ Tests that assignment works correctly with the two phase engine """
+
+    def setUp(self):
+        super().setUp()
+        config.use_two_phase_engine = True
+
+    def tearDown(self):
+        config.use_two_phase_engine = False
+
+class TestTwoPhaseImpossible(test_impossible.TestImpossible):
+    """ Tests that no assignments can be made for inputs with no solution with the two phase engine """
+
+    def setUp(self):
+        super().setUp()
+        config.use_two_phase_engine = True
+        config.check_feasibility_before_solving = False
+
+    def tearDown(self):
+        config.use_two_phase_engine = False
+        config.check_feasibility_before_solving = True
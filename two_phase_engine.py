@@ -0,0 +1,406 @@
+import assign_time_slots
+import config
+import instrumentation
+from collections import deque
+from constraints import addMaxSectionsPerModConstraint, addMaxSectionsPerSectionTimeConstraint, numPeopleInRow
+from feasibility_precheck import FlowNetwork
+from math import inf
+from objective_functions import IMPOSSIBLE_VARIABLE_PENALTY, NOT_PREFERRED_PRIORITY_MULTIPLIER, addFunctionToMinimize
+from ortools.sat.python import cp_model
+from solution_extraction import getSolutionValues
+
+class MinCostFlowNetwork(FlowNetwork):
+    """ FlowNetwork where every edge also has a cost per unit of flow """
+
+    def __init__(self):
+        super().__init__()
+        self.edge_cost = []
+
+    def addEdge(self, from_node, to_node, capacity, cost=0):
+        super().addEdge(from_node, to_node, capacity)
+        self.edge_cost.append(cost)
+        self.edge_cost.append(-cost)
+
+    def minCostMaxFlow(self, source, sink):
+        """
+            Finds the cheapest of all maximum flows from source to sink by repeatedly sending flow along the
+             cheapest path with remaining capacity. Edge costs may be negative as long as there is no cycle of
+             negative cost, afterwards edge_capacity holds the remaining capacity of every edge
+
+            Returns:
+                (total flow, total cost)
+        """
+        total_flow = 0
+        total_cost = 0
+        while True:
+            (node_cost, edge_into_node) = self.getCheapestPaths(source)
+            if sink not in node_cost:
+                return total_flow, total_cost
+
+            # Find how much flow fits through the cheapest path, then send it
+            path_edges = []
+            node = sink
+            while node != source:
+                edge_index = edge_into_node[node]
+                path_edges.append(edge_index)
+                node = self.edge_to_node[edge_index ^ 1]
+            flow = min(self.edge_capacity[edge_index] for edge_index in path_edges)
+
+            for edge_index in path_edges:
+                self.edge_capacity[edge_index] -= flow
+                self.edge_capacity[edge_index ^ 1] += flow
+            total_flow += flow
+            total_cost += flow * node_cost[sink]
+
+    def getCheapestPaths(self, source):
+        """
+            Finds the cheapest path to every node through edges with remaining capacity with the Bellman-Ford
+             algorithm, using a queue of nodes whose cost changed
+
+            Returns:
+                node_cost: Dictionary of every node reachable from source to the cost of the cheapest path to it
+                edge_into_node: Dictionary of every node reachable from source to the last edge of that path
+        """
+        node_cost = {source : 0}
+        edge_into_node = {}
+        nodes_to_visit = deque([source])
+        nodes_in_queue = {source}
+        while len(nodes_to_visit) > 0:
+            node = nodes_to_visit.popleft()
+            nodes_in_queue.remove(node)
+            for edge_index in self.edges_from_node[node]:
+                if self.edge_capacity[edge_index] <= 0:
+                    continue
+                to_node = self.edge_to_node[edge_index]
+                cost = node_cost[node] + self.edge_cost[edge_index]
+                if cost < node_cost.get(to_node, inf):
+                    node_cost[to_node] = cost
+                    edge_into_node[to_node] = edge_index
+                    if to_node not in nodes_in_queue:
+                        nodes_to_visit.append(to_node)
+                        nodes_in_queue.add(to_node)
+        return node_cost, edge_into_node
+
+def getStudentTimeCost(student_time_var_wrapper, num_people):
+    """
+        Returns:
+            Integer cost of assigning one student to the time of student_time_var_wrapper, exactly as the time is
+             weighted by addFunctionToMinimize
+    """
+    if student_time_var_wrapper.is_impossible_time:
+        return IMPOSSIBLE_VARIABLE_PENALTY
+    elif not student_time_var_wrapper.is_preferred_time:
+        (total_num_mods, total_num_students) = num_people
+        return NOT_PREFERRED_PRIORITY_MULTIPLIER * config.objective_function(total_num_mods, total_num_students,
+                                                                             student_time_var_wrapper.person_index,
+                                                                             False)
+    return 0
+
+def placeStudents(student_time_variables, sections_per_time, num_people):
+    """
+        Assigns every student to a time so that each time with k sections has between k * min and k * max students,
+         at the lowest total cost of not preferred and impossible times, by finding a minimum cost flow
+
+        Flow goes from every student to each of their possible times and then to the sink. The first k * min
+         students at each time earn a large negative cost, so the cheapest maximum flow fills every time to its
+         minimum whenever that is possible, and only then minimizes the real cost
+
+        Args:
+            student_time_variables: 2D List of PersonTimeVariableWrapper,
+                                        if [student_index][time_index] is None then
+                                        that time is impossible for that student
+            sections_per_time: List of Integer for the number of sections at each time index
+            num_people: Tuple of (number of moderators, number of students) for the objective function
+
+        Returns:
+            student_values: Dictionary of student CP variable index to the number of people assigned, or None if
+                             the students can not be placed
+            student_cost: The objective function cost of the student assignment, or None if they can not be placed
+            cut: None if the students were placed, otherwise a tuple of (List of Integer for time indices,
+                  is_upper_bound, Integer for number of students) saying that the aggregate number of students at
+                  those times must be at least (upper bound violated) or at most (lower bound violated) that number
+    """
+    network = MinCostFlowNetwork()
+    num_students = 0
+    max_total_cost = 0
+    for student_index in range(len(student_time_variables)):
+        num_students_in_row = numPeopleInRow(student_time_variables[student_index])
+        num_students += num_students_in_row
+        network.addEdge('source', ('student', student_index), num_students_in_row)
+        max_student_cost = 0
+        for student_time_var_wrapper in student_time_variables[student_index]:
+            if student_time_var_wrapper is not None:
+                cost = getStudentTimeCost(student_time_var_wrapper, num_people)
+                max_student_cost = max(max_student_cost, cost)
+                network.addEdge(('student', student_index), ('time', student_time_var_wrapper.time_index),
+                                num_students_in_row, cost)
+        max_total_cost += max_student_cost * num_students_in_row
+
+    min_students_reward = max_total_cost + 1
+    num_min_students = 0
+    for (time_index, num_sections) in enumerate(sections_per_time):
+        min_students = num_sections * config.min_students_per_section
+        max_students = num_sections * config.max_students_per_section
+        num_min_students += min_students
+        network.addEdge(('time', time_index), 'sink', min_students, -min_students_reward)
+        network.addEdge(('time', time_index), 'sink', max_students - min_students, 0)
+
+    (num_students_placed, cost) = network.minCostMaxFlow('source', 'sink')
+    if num_students_placed < num_students:
+        # Students on the source side of the minimum cut can only make times which are already full
+        source_side = network.getSourceSide('source')
+        full_times = sorted(node[1] for node in source_side if isinstance(node, tuple) and node[0] == 'time')
+        return None, None, (full_times, True, countStudentsOnlyAtTimes(student_time_variables, full_times))
+
+    student_cost = cost + num_min_students * min_students_reward
+    if student_cost >= min_students_reward:
+        # Not every time could be filled to its minimum number of students
+        return None, None, findUnderfilledTimesCut(student_time_variables, sections_per_time)
+
+    student_values = {}
+    for student_index in range(len(student_time_variables)):
+        for edge_index in network.edges_from_node[('student', student_index)]:
+            to_node = network.edge_to_node[edge_index]
+            if edge_index % 2 == 0 and to_node[0] == 'time':
+                student_time_var_wrapper = student_time_variables[student_index][to_node[1]]
+                # The flow sent along an edge is the remaining capacity of its reverse edge
+                student_values[student_time_var_wrapper.variable.Index()] = network.edge_capacity[edge_index ^ 1]
+    return student_values, student_cost, None
+
+def countStudentsOnlyAtTimes(student_time_variables, time_indices):
+    """
+        Returns:
+            Integer for the number of students who can make no time other than those in time_indices
+    """
+    return sum(numPeopleInRow(time_variables_for_student) for time_variables_for_student in student_time_variables
+               if all(student_time_var_wrapper is None or student_time_var_wrapper.time_index in time_indices
+                      for student_time_var_wrapper in time_variables_for_student))
+
+def findUnderfilledTimesCut(student_time_variables, sections_per_time):
+    """
+        Finds a set of times whose sections need more students in total than can make any of those times
+
+        Returns:
+            A cut like placeStudents returns, or None if there is no such set of times
+    """
+    network = FlowNetwork()
+    num_min_students = 0
+    for student_index in range(len(student_time_variables)):
+        network.addEdge('source', ('student', student_index), numPeopleInRow(student_time_variables[student_index]))
+        for student_time_var_wrapper in student_time_variables[student_index]:
+            if student_time_var_wrapper is not None:
+                network.addEdge(('student', student_index), ('time', student_time_var_wrapper.time_index), inf)
+    for (time_index, num_sections) in enumerate(sections_per_time):
+        num_min_students += num_sections * config.min_students_per_section
+        network.addEdge(('time', time_index), 'sink', num_sections * config.min_students_per_section)
+
+    if network.maxFlow('source', 'sink') == num_min_students:
+        return None
+
+    # Every student who can make a time on the sink side of the minimum cut is also on the sink side
+    source_side = network.getSourceSide('source')
+    underfilled_times = [time_index for time_index in range(len(sections_per_time))
+                         if ('time', time_index) not in source_side]
+    num_students_at_times = sum(numPeopleInRow(time_variables_for_student)
+                                for time_variables_for_student in student_time_variables
+                                if any(student_time_var_wrapper is not None and
+                                       student_time_var_wrapper.time_index in underfilled_times
+                                       for student_time_var_wrapper in time_variables_for_student))
+    return underfilled_times, False, num_students_at_times
+
+def solveTwoPhase(model, mod_time_variables, student_time_variables, max_sections_per_mod, max_sections_per_time):
+    """
+        Chooses the moderator times with a CP model that only knows how many students can make each time, then
+         places the students with a minimum cost flow. Whenever the students can not be placed in the chosen
+         sections, a constraint ruling out those sections is added to the CP model and it is solved again
+
+        The moderator part of the objective function, including contiguous sections and the number of sections,
+         is optimized by the CP model together with an estimate of the student part, see addStudentCostEstimate,
+         and the student part by the flow. The students are placed optimally for the chosen moderator times, but
+         the combined assignment may cost more than the monolithic model's when the estimate was too low
+
+        Args:
+            model: The CpModel object from getModelFromInputFiles, without any constraints added
+            mod_time_variables: 2D List of PersonTimeVariableWrapper, if [mod_index][time_index]
+                                    is None then that time is impossible for that mod
+            student_time_variables: 2D List of PersonTimeVariableWrapper,
+                                        if [student_index][time_index] is None then
+                                        that time is impossible for that student
+            max_sections_per_mod: List of Integer, each entry is the max sections for that mod_index
+            max_sections_per_time: List of Integer where each index represents the number of rooms
+                                    available at that time index
+
+        Returns:
+            status: The status of the last CP solve, INFEASIBLE if no section choice lets every student be placed.
+                     FEASIBLE instead of OPTIMAL unless the combined objective is proven optimal
+            objective: The combined objective value comparable to the monolithic model's, or None
+            assignment_values: SolutionValues holding the value of every moderator and student CP variable to be
+                                given to extractModAndStudentAssignments, or None
+            num_iterations: Integer for the number of times the CP model was solved
+    """
+    num_section_times = len(max_sections_per_time)
+    num_people = (sum(numPeopleInRow(time_variables_for_mod) for time_variables_for_mod in mod_time_variables),
+                  sum(numPeopleInRow(time_variables_for_student)
+                      for time_variables_for_student in student_time_variables))
+
+    addMaxSectionsPerModConstraint(model, mod_time_variables, max_sections_per_mod)
+    addMaxSectionsPerSectionTimeConstraint(model, mod_time_variables, max_sections_per_time)
+    sections_at_time = [sum(time_variables_for_mod[time_index].variable
+                            for time_variables_for_mod in mod_time_variables
+                            if time_variables_for_mod[time_index] is not None)
+                        for time_index in range(num_section_times)]
+
+    # Aggregate number of students at each time, bounded by the sections there and who can make it
+    students_at_time = []
+    for time_index in range(num_section_times):
+        num_students_possible = sum(numPeopleInRow(time_variables_for_student)
+                                    for time_variables_for_student in student_time_variables
+                                    if time_variables_for_student[time_index] is not None)
+        num_students_at_time = model.NewIntVar(0, num_students_possible, 'students_at_time_' + str(time_index))
+        model.Add(num_students_at_time >= config.min_students_per_section * sections_at_time[time_index])
+        model.Add(num_students_at_time <= config.max_students_per_section * sections_at_time[time_index])
+        students_at_time.append(num_students_at_time)
+    model.Add(sum(students_at_time) == num_people[1])
+    for time_index in range(num_section_times):
+        addStudentCut(model, students_at_time, ([time_index], True,
+                                                countStudentsOnlyAtTimes(student_time_variables, [time_index])))
+
+    student_cost_terms = addStudentCostEstimate(model, students_at_time, student_time_variables, num_people)
+    addFunctionToMinimize(model, mod_time_variables, [],
+                          assign_time_slots.getMaxTotalSections(mod_time_variables, max_sections_per_mod),
+                          num_people=num_people, extra_terms=student_cost_terms)
+
+    # Every section choice placed so far is ruled out afterwards, so the CP objective bound is a lower bound on every
+    #  assignment not yet tried, and the best assignment found is optimal once that bound reaches it
+    best_objective = None
+    best_solution_values = None
+    is_proven_optimal = False
+    num_iterations = 0
+    while num_iterations < config.two_phase_max_iterations:
+        num_iterations += 1
+        solver = assign_time_slots.createSolver()
+        status = instrumentation.solve(solver, model, name='solve moderator times')
+        if status == cp_model.INFEASIBLE:
+            # No section choice is left, so the best one placed is optimal if every choice ruled out was optimal
+            is_proven_optimal = is_proven_optimal or (best_objective is not None)
+            break
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            break
+        if (best_objective is not None) and (solver.BestObjectiveBound() >= best_objective - 1e-6):
+            is_proven_optimal = is_proven_optimal or (status == cp_model.OPTIMAL)
+            break
+
+        sections_per_time = [solver.Value(sections_at_time[time_index]) for time_index in range(num_section_times)]
+        (student_values, student_cost, cut) = placeStudents(student_time_variables, sections_per_time, num_people)
+        if student_values is None:
+            if cut is not None:
+                addStudentCut(model, students_at_time, cut)
+            else:
+                # The students can not be placed for a reason neither cut describes, so only rule out these sections
+                addDifferentSectionsConstraint(model, sections_at_time, sections_per_time)
+            if not config.quiet_mode:
+                print(f'Two phase iteration {num_iterations}: students can not be placed in sections '
+                      f'{sections_per_time}')
+            continue
+
+        estimated_student_cost = sum(cost * solver.Value(variable) for (cost, variable) in student_cost_terms)
+        objective = solver.ObjectiveValue() - estimated_student_cost + student_cost
+        if (best_objective is None) or (objective < best_objective):
+            best_objective = objective
+            best_solution_values = getStudentSolutionValues(solver, student_time_variables, student_values)
+            best_solution_values.objective_value = objective
+        if (status == cp_model.OPTIMAL) and (objective <= solver.ObjectiveValue() + 1e-6):
+            # The estimate of the student cost was exact, so nothing can be better
+            is_proven_optimal = True
+            break
+        if status != cp_model.OPTIMAL:
+            # A better choice of moderators for these sections may have been missed, so it can not be ruled out
+            break
+        if not config.quiet_mode:
+            print(f'Two phase iteration {num_iterations}: objective {round(objective, 3)} for sections '
+                  f'{sections_per_time}, at least {round(solver.ObjectiveValue(), 3)} is possible')
+        addDifferentSectionsConstraint(model, sections_at_time, sections_per_time)
+
+    print(f'Two phase solve took {num_iterations} iterations')
+    if best_objective is None:
+        return (status if status != cp_model.OPTIMAL else cp_model.UNKNOWN), None, None, num_iterations
+    status = cp_model.OPTIMAL if is_proven_optimal else cp_model.FEASIBLE
+    return status, best_objective, best_solution_values, num_iterations
+
+def getStudentSolutionValues(solver, student_time_variables, student_values):
+    """
+        Returns:
+            SolutionValues of the CP solve with the value of every student CP variable set from the flow placement
+    """
+    solution_values = getSolutionValues(solver)
+    # Students at times without flow were not given an edge value by placeStudents
+    for time_variables_for_student in student_time_variables:
+        for student_time_var_wrapper in time_variables_for_student:
+            if student_time_var_wrapper is not None:
+                variable_index = student_time_var_wrapper.variable.Index()
+                solution_values.values[variable_index] = student_values.get(variable_index, 0)
+    return solution_values
+
+def addStudentCostEstimate(model, students_at_time, student_time_variables, num_people):
+    """
+        Adds variables for the least the students at each time can cost, so that the moderator times are not chosen
+         without regard for the students. The students at a time beyond those who prefer it must be at a not preferred
+         or impossible time there, and at best these are the ones for whom that time costs the least. Summed over
+         every time this never costs more than the minimum cost flow placement of placeStudents
+
+        Args:
+            model: The CpModel object for the moderator times
+            students_at_time: List of CP variables for the number of students at each time index
+            student_time_variables: 2D List of PersonTimeVariableWrapper,
+                                        if [student_index][time_index] is None then
+                                        that time is impossible for that student
+            num_people: Tuple of (number of moderators, number of students) for the objective function
+
+        Returns:
+            List of (Integer or Float cost, CP variable) for the objective function, where each variable is the
+             number of students at a time with that cost
+    """
+    student_cost_terms = []
+    for (time_index, num_students_at_time) in enumerate(students_at_time):
+        num_preferred = 0
+        num_students_at_cost = {}
+        for time_variables_for_student in student_time_variables:
+            student_time_var_wrapper = time_variables_for_student[time_index]
+            if student_time_var_wrapper is None:
+                continue
+            cost = getStudentTimeCost(student_time_var_wrapper, num_people)
+            if cost == 0:
+                num_preferred += numPeopleInRow(time_variables_for_student)
+            else:
+                num_students_at_cost[cost] = num_students_at_cost.get(cost, 0) + \
+                                             numPeopleInRow(time_variables_for_student)
+        if len(num_students_at_cost) == 0:
+            continue
+
+        students_at_cost = []
+        for (cost, num_students) in sorted(num_students_at_cost.items()):
+            students_at_cost.append(model.NewIntVar(0, num_students, f'students_at_time_{time_index}_cost_{cost}'))
+            student_cost_terms.append((cost, students_at_cost[-1]))
+        model.Add(sum(students_at_cost) >= num_students_at_time - num_preferred)
+    return student_cost_terms
+
+def addStudentCut(model, students_at_time, cut):
+    (time_indices, is_upper_bound, num_students) = cut
+    students_at_times = sum(students_at_time[time_index] for time_index in time_indices)
+    if is_upper_bound:
+        model.Add(students_at_times >= num_students)
+    else:
+        model.Add(students_at_times <= num_students)
+
+def addDifferentSectionsConstraint(model, sections_at_time, sections_per_time):
+    """ Adds the constraint that the number of sections must differ from sections_per_time at some time """
+    is_same_at_time = []
+    for time_index in range(len(sections_at_time)):
+        if isinstance(sections_at_time[time_index], int):
+            # No moderator can make this time, so it always has zero sections
+            continue
+        is_same = model.NewBoolVar('same_sections_at_time_' + str(time_index))
+        model.Add(sections_at_time[time_index] == sections_per_time[time_index]).OnlyEnforceIf(is_same)
+        model.Add(sections_at_time[time_index] != sections_per_time[time_index]).OnlyEnforceIf(is_same.Not())
+        is_same_at_time.append(is_same)
+    model.AddBoolOr([is_same.Not() for is_same in is_same_at_time])